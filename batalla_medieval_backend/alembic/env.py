@@ -8,6 +8,7 @@ from sqlalchemy import engine_from_config, pool
 from app.config import get_settings
 from app.database import Base
 from app import models  # noqa: F401 -- imports every mapped model into metadata
+from app.services import retention, wiki_search
 
 
 config = context.config
@@ -20,6 +21,16 @@ config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
 target_metadata = Base.metadata
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # The monthly partitions of the history tables belong to services.retention.
+    if type_ == "table":
+        return not retention.is_partition(name)
+    # The PostgreSQL full-text index is an expression index over the search columns.
+    if type_ == "index":
+        return name != wiki_search.PG_INDEX
+    return True
+
+
 def run_migrations_offline() -> None:
     context.configure(
         url=database_url,
@@ -27,6 +38,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -45,6 +57,7 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,134 @@
+"""materialized player ranking scores
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of ranking.TROOP_VALUES at the time of this revision.
+TROOP_VALUES = {
+    "basic_infantry": 2,
+    "heavy_infantry": 3,
+    "archer": 3,
+    "fast_cavalry": 4,
+    "heavy_cavalry": 5,
+    "spy": 1,
+    "ram": 8,
+    "catapult": 10,
+}
+BUILDING_POINTS_PER_LEVEL = 5
+
+
+def _backfill_scores(connection) -> None:
+    """Seed one score row per (owner, world) from the current city state."""
+
+    building_totals = connection.execute(
+        sa.text(
+            """
+            SELECT c.owner_id, c.world_id, COALESCE(SUM(b.level), 0) AS levels
+            FROM cities c
+            LEFT JOIN buildings b ON b.city_id = c.id
+            WHERE c.owner_id IS NOT NULL
+            GROUP BY c.owner_id, c.world_id
+            """
+        )
+    ).all()
+    troop_totals = connection.execute(
+        sa.text(
+            """
+            SELECT c.owner_id, c.world_id, t.unit_type, COALESCE(SUM(t.quantity), 0) AS quantity
+            FROM cities c
+            JOIN troops t ON t.city_id = c.id
+            WHERE c.owner_id IS NOT NULL
+            GROUP BY c.owner_id, c.world_id, t.unit_type
+            """
+        )
+    ).all()
+
+    building_points = {
+        (int(row.owner_id), int(row.world_id)): int(row.levels) * BUILDING_POINTS_PER_LEVEL
+        for row in building_totals
+    }
+    troop_points: dict[tuple[int, int], int] = defaultdict(int)
+    for row in troop_totals:
+        troop_points[(int(row.owner_id), int(row.world_id))] += int(row.quantity) * TROOP_VALUES.get(
+            row.unit_type, 1
+        )
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for key in set(building_points) | set(troop_points):
+        user_id, world_id = key
+        buildings = building_points.get(key, 0)
+        troops = troop_points.get(key, 0)
+        rows.append(
+            {
+                "user_id": user_id,
+                "world_id": world_id,
+                "building_points": buildings,
+                "troop_points": troops,
+                "points": buildings + troops,
+                "updated_at": now,
+            }
+        )
+    if rows:
+        score_table = sa.table(
+            "player_scores",
+            sa.column("user_id", sa.Integer()),
+            sa.column("world_id", sa.Integer()),
+            sa.column("building_points", sa.Integer()),
+            sa.column("troop_points", sa.Integer()),
+            sa.column("points", sa.Integer()),
+            sa.column("updated_at", sa.DateTime()),
+        )
+        op.bulk_insert(score_table, rows)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "player_scores",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("world_id", sa.Integer(), nullable=False),
+        sa.Column("building_points", sa.Integer(), nullable=False),
+        sa.Column("troop_points", sa.Integer(), nullable=False),
+        sa.Column("points", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["world_id"], ["worlds.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_player_scores_id"), "player_scores", ["id"], unique=False)
+    op.create_index(
+        "ux_player_scores_user_world",
+        "player_scores",
+        ["user_id", "world_id"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_player_scores_world_points",
+        "player_scores",
+        ["world_id", "points"],
+        unique=False,
+    )
+    _backfill_scores(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_index("ix_player_scores_world_points", table_name="player_scores")
+    op.drop_index("ux_player_scores_user_world", table_name="player_scores")
+    op.drop_index(op.f("ix_player_scores_id"), table_name="player_scores")
+    op.drop_table("player_scores")
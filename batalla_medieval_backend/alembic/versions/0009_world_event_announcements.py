@@ -0,0 +1,37 @@
+"""announcement marker for world events
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("world_events", sa.Column("announced_at", sa.DateTime(), nullable=True))
+    # Events that already started are not announced again by the worker.
+    events = sa.table(
+        "world_events",
+        sa.column("start_time", sa.DateTime()),
+        sa.column("announced_at", sa.DateTime()),
+    )
+    op.execute(
+        events.update()
+        .where(events.c.start_time <= datetime.now(timezone.utc).replace(tzinfo=None))
+        .values(announced_at=events.c.start_time)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("world_events", "announced_at")
@@ -0,0 +1,38 @@
+"""resumable season rollover
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0012"
+down_revision: Union[str, Sequence[str], None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("seasons", sa.Column("rollover_stage", sa.String(), nullable=True))
+    op.add_column(
+        "seasons",
+        sa.Column("rollover_step", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "seasons",
+        sa.Column("rollover_rows", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("season_results", sa.Column("alliance_name", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("season_results", "alliance_name")
+    with op.batch_alter_table("seasons") as batch_op:
+        batch_op.drop_column("rollover_rows")
+        batch_op.drop_column("rollover_step")
+        batch_op.drop_column("rollover_stage")
@@ -0,0 +1,47 @@
+"""market order book ratio and indexes
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0014"
+down_revision: Union[str, Sequence[str], None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("market_offers", sa.Column("ratio", sa.Float(), nullable=True))
+    op.execute(
+        "UPDATE market_offers SET ratio = CAST(request_amount AS FLOAT) / offer_amount"
+    )
+    with op.batch_alter_table("market_offers") as batch_op:
+        batch_op.alter_column("ratio", existing_type=sa.Float(), nullable=False)
+    op.create_index(
+        "ix_market_offers_book",
+        "market_offers",
+        ["world_id", "offer_type", "request_type", "ratio", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_market_offers_world_ratio",
+        "market_offers",
+        ["world_id", "ratio", "id"],
+        unique=False,
+    )
+    op.create_index("ix_market_offers_city_id", "market_offers", ["city_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_market_offers_city_id", table_name="market_offers")
+    op.drop_index("ix_market_offers_world_ratio", table_name="market_offers")
+    op.drop_index("ix_market_offers_book", table_name="market_offers")
+    with op.batch_alter_table("market_offers") as batch_op:
+        batch_op.drop_column("ratio")
@@ -0,0 +1,45 @@
+"""indexes for worker and anti-cheat queries
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0015"
+down_revision: Union[str, Sequence[str], None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ("ix_building_queue_finish_time", "building_queue", ["finish_time"]),
+    ("ix_troop_queue_finish_time", "troop_queue", ["finish_time"]),
+    ("ix_movements_due", "movements", ["status", "arrival_time"]),
+    (
+        "ix_movements_origin",
+        "movements",
+        ["origin_city_id", "target_city_id", "movement_type", "created_at"],
+    ),
+    ("ix_movements_target", "movements", ["target_city_id", "movement_type", "status"]),
+    ("ix_logs_user_action_timestamp", "logs", ["user_id", "action", "timestamp"]),
+    ("ix_cities_owner_id", "cities", ["owner_id"]),
+)
+
+
+def upgrade() -> None:
+    # These tables are written by every tick of the worker: build the indexes
+    # without blocking writes on PostgreSQL.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,123 @@
+"""history tables: required timestamps, retention indexes, monthly partitions
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-18
+
+On PostgreSQL the four tables are rebuilt as tables partitioned by month on
+their timestamp (plus a default partition), so the retention job can drop a
+whole expired month. The rebuild copies every row: run it in a maintenance
+window on large databases.
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0016"
+down_revision: Union[str, Sequence[str], None] = "0015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = (
+    ("logs", "timestamp"),
+    ("reports", "created_at"),
+    ("chat_messages", "timestamp"),
+    ("notifications", "created_at"),
+)
+
+# Must match services.retention.PARTITION_MONTHS_AHEAD.
+MONTHS_AHEAD = 2
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _definitions(bind, table: str):
+    """Secondary indexes and foreign keys of ``table``, as DDL."""
+
+    indexes = bind.execute(
+        sa.text(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = :table"
+        ),
+        {"table": table},
+    ).all()
+    foreign_keys = bind.execute(
+        sa.text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+        ),
+        {"table": table},
+    ).all()
+    return [(name, ddl) for name, ddl in indexes if name != f"{table}_pkey"], foreign_keys
+
+
+def _rebuild(table: str, column: str, partitioned: bool) -> None:
+    bind = op.get_bind()
+    old = f"{table}_unpartitioned" if partitioned else f"{table}_partitioned"
+    indexes, foreign_keys = _definitions(bind, table)
+
+    op.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+    op.execute(f'ALTER TABLE "{old}" RENAME CONSTRAINT "{table}_pkey" TO "{old}_pkey"')
+    for name, _ in indexes:
+        op.execute(f'DROP INDEX "{name}"')
+
+    if partitioned:
+        op.execute(f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS) PARTITION BY RANGE ("{column}")')
+        op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id, "{column}")')
+        op.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+        oldest = bind.execute(sa.text(f'SELECT min("{column}") FROM "{old}"')).scalar()
+        current = _month_start(datetime.now(timezone.utc).replace(tzinfo=None))
+        month = _month_start(oldest) if oldest else current
+        while month <= _add_months(current, MONTHS_AHEAD):
+            following = _add_months(month, 1)
+            op.execute(
+                f'CREATE TABLE "{table}_p{month:%Y%m}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+            )
+            month = following
+    else:
+        op.execute(f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS)')
+        op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id)')
+
+    op.execute(f'INSERT INTO "{table}" SELECT * FROM "{old}"')
+    op.execute(f'ALTER SEQUENCE "{table}_id_seq" OWNED BY "{table}".id')
+    op.execute(f'DROP TABLE "{old}"')
+    for _, ddl in indexes:
+        op.execute(ddl)
+    for name, ddl in foreign_keys:
+        op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {ddl}')
+
+
+def upgrade() -> None:
+    for table, column in TABLES:
+        op.execute(f'UPDATE "{table}" SET "{column}" = CURRENT_TIMESTAMP WHERE "{column}" IS NULL')
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=False)
+        op.create_index(f"ix_{table}_{column}", table, [column], unique=False)
+
+    if op.get_bind().dialect.name == "postgresql":
+        for table, column in TABLES:
+            _rebuild(table, column, partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        for table, column in TABLES:
+            _rebuild(table, column, partitioned=False)
+
+    for table, column in reversed(TABLES):
+        op.drop_index(f"ix_{table}_{column}", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=True)
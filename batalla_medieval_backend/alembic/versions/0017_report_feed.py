@@ -0,0 +1,127 @@
+"""report feed: recipient, summary columns and read cursor
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-18
+
+Existing reports are summarized from their JSON content in batches; the
+rules mirror services.report.summarize.
+"""
+
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0017"
+down_revision: Union[str, Sequence[str], None] = "0016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 1000
+RESOURCES = ("wood", "clay", "iron")
+
+
+def _total(resources) -> int:
+    return sum(int((resources or {}).get(resource) or 0) for resource in RESOURCES)
+
+
+def _alive(side: dict) -> bool:
+    losses = side.get("losses") or {}
+    return any(count - losses.get(unit, 0) > 0 for unit, count in (side.get("initial") or {}).items())
+
+
+def _summary(report_type: str, raw: str, is_attacker: bool) -> dict:
+    try:
+        content = json.loads(raw)
+    except (TypeError, ValueError):
+        content = None
+    if not isinstance(content, dict):
+        return {"outcome": None, "loot_total": 0, "attacker_name": None, "defender_name": None}
+
+    attacker = content.get("attacker") or content.get("sender") or content.get("from") or {}
+    defender = content.get("defender") or content.get("receiver") or {}
+    outcome, loot_total = None, _total(content.get("resources"))
+    if report_type == "battle":
+        attacker_won = _alive(attacker) and not _alive(defender)
+        outcome = "victory" if attacker_won == is_attacker else "defeat"
+        loot_total = _total(content.get("loot"))
+    elif report_type == "spy":
+        outcome = "victory" if bool(content.get("success")) == is_attacker else "defeat"
+        loot_total = 0
+    return {
+        "outcome": outcome,
+        "loot_total": loot_total,
+        "attacker_name": attacker.get("name"),
+        "defender_name": defender.get("name"),
+    }
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("reports") as batch_op:
+        batch_op.add_column(sa.Column("owner_id", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("outcome", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("loot_total", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("attacker_name", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("defender_name", sa.String(), nullable=True))
+        batch_op.create_foreign_key("fk_reports_owner_id_users", "users", ["owner_id"], ["id"])
+    with op.batch_alter_table("player_world") as batch_op:
+        batch_op.add_column(sa.Column("reports_read_at", sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column("reports_read_id", sa.Integer(), nullable=True))
+
+    op.execute(
+        "UPDATE reports SET owner_id = "
+        "(SELECT cities.owner_id FROM cities WHERE cities.id = reports.city_id)"
+    )
+
+    bind = op.get_bind()
+    update = sa.text(
+        "UPDATE reports SET outcome = :outcome, loot_total = :loot_total, "
+        "attacker_name = :attacker_name, defender_name = :defender_name WHERE id = :id"
+    )
+    after = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, city_id, attacker_city_id, report_type, content FROM reports "
+                "WHERE id > :after ORDER BY id LIMIT :limit"
+            ),
+            {"after": after, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            update,
+            [
+                {
+                    "id": row.id,
+                    **_summary(row.report_type, row.content, row.city_id == row.attacker_city_id),
+                }
+                for row in rows
+            ],
+        )
+        after = rows[-1].id
+
+    op.create_index(
+        "ix_reports_feed",
+        "reports",
+        ["owner_id", "world_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reports_feed", table_name="reports")
+    with op.batch_alter_table("player_world") as batch_op:
+        batch_op.drop_column("reports_read_id")
+        batch_op.drop_column("reports_read_at")
+    with op.batch_alter_table("reports") as batch_op:
+        batch_op.drop_constraint("fk_reports_owner_id_users", type_="foreignkey")
+        batch_op.drop_column("defender_name")
+        batch_op.drop_column("attacker_name")
+        batch_op.drop_column("loot_total")
+        batch_op.drop_column("outcome")
+        batch_op.drop_column("owner_id")
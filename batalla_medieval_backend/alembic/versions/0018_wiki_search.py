@@ -0,0 +1,62 @@
+"""wiki search: folded title and body, full-text index on PostgreSQL
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-18
+
+Existing articles are folded in Python; the rules mirror
+services.wiki_search.prepare. The PostgreSQL index expression must match
+services.wiki_search.PG_DOCUMENT.
+"""
+
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0018"
+down_revision: Union[str, Sequence[str], None] = "0017"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MARKUP = re.compile(r"[#*`|>\[\]~]+|-{2,}")
+SPACE = re.compile(r"\s+")
+DOCUMENT = (
+    "setweight(to_tsvector('simple', search_title), 'A') || "
+    "setweight(to_tsvector('simple', search_body), 'B')"
+)
+
+
+def _fold(text: str) -> str:
+    text = SPACE.sub(" ", MARKUP.sub(" ", text or "")).strip()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("wiki_articles") as batch_op:
+        batch_op.add_column(sa.Column("search_title", sa.Text(), nullable=False, server_default=""))
+        batch_op.add_column(sa.Column("search_body", sa.Text(), nullable=False, server_default=""))
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, title, content_markdown FROM wiki_articles")).all()
+    if rows:
+        bind.execute(
+            sa.text("UPDATE wiki_articles SET search_title = :title, search_body = :body WHERE id = :id"),
+            [{"id": row.id, "title": _fold(row.title), "body": _fold(row.content_markdown)} for row in rows],
+        )
+
+    if bind.dialect.name == "postgresql":
+        op.execute(f"CREATE INDEX ix_wiki_articles_search ON wiki_articles USING gin (({DOCUMENT}))")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_wiki_articles_search")
+    with op.batch_alter_table("wiki_articles") as batch_op:
+        batch_op.drop_column("search_body")
+        batch_op.drop_column("search_title")
@@ -0,0 +1,54 @@
+"""Monte Carlo battle simulation for balance tuning.
+
+Usage (from ``batalla_medieval_backend``)::
+
+    python -m app.battle_sim --attacker basic_infantry=100,archer=40 \\
+        --defender heavy_infantry=80 --wall-level 5 --battles 100000
+
+Runs the pure battle kernel, without a database, and prints the win rate,
+mean losses per unit and throughput in battles per second.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+
+from .services import battle_kernel
+
+
+def parse_troops(raw: str) -> dict[str, int]:
+    troops: dict[str, int] = {}
+    for part in filter(None, (item.strip() for item in raw.split(","))):
+        unit, _, amount = part.partition("=")
+        if unit not in battle_kernel.UNIT_STATS:
+            raise argparse.ArgumentTypeError(f"Unknown unit: {unit}")
+        try:
+            troops[unit] = int(amount)
+        except ValueError as exc:
+            raise argparse.ArgumentTypeError(f"Invalid amount for {unit}: {amount!r}") from exc
+    return troops
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attacker", type=parse_troops, required=True)
+    parser.add_argument("--defender", type=parse_troops, required=True)
+    parser.add_argument("--wall-level", type=int, default=0)
+    parser.add_argument("--battles", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    summary = battle_kernel.run_simulation(
+        args.attacker,
+        args.defender,
+        battles=args.battles,
+        wall_level=args.wall_level,
+        seed=args.seed,
+    )
+    print(json.dumps(summary, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
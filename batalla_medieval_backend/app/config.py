@@ -38,6 +38,49 @@ class Settings(BaseSettings):
     smtp_use_starttls: bool = True
     from_email: str = ""
     frontend_url: str = "http://localhost:5173"
+    movement_batch_size: int = Field(default=500, ge=1)
+    queue_poll_interval_seconds: float = Field(default=5.0, gt=0)
+    queue_resync_interval_seconds: float = Field(default=60.0, gt=0)
+    queue_preload_limit: int = Field(default=1000, ge=1)
+    event_cache_ttl_seconds: float = Field(default=30.0, ge=0)
+    map_chunk_ttl_seconds: float = Field(default=60.0, ge=0)
+    map_chunk_cache_size: int = Field(default=4096, ge=1)
+    activity_flush_seconds: float = Field(default=5.0, gt=0)
+    progress_flush_seconds: float = Field(default=5.0, gt=0)
+    auth_cache_ttl_seconds: float = Field(default=30.0, ge=0)
+    notification_dispatch_seconds: float = Field(default=2.0, gt=0)
+    notification_batch_size: int = Field(default=500, ge=1)
+    notification_max_attempts: int = Field(default=5, ge=1)
+    notification_retry_seconds: float = Field(default=30.0, gt=0)
+    rate_limit_backend: Literal["memory", "database"] = "memory"
+    rate_limit_max_keys: int = Field(default=100_000, ge=1)
+    anticheat_signal_seconds: float = Field(default=2.0, gt=0)
+    anticheat_signal_batch_size: int = Field(default=1_000, ge=1)
+    season_rollover_chunk_size: int = Field(default=1_000, ge=1)
+    chat_flush_seconds: float = Field(default=0.005, ge=0)
+    chat_batch_size: int = Field(default=500, ge=1)
+    chat_send_queue_size: int = Field(default=64, ge=1)
+    chat_send_timeout_seconds: float = Field(default=5.0, gt=0)
+    chat_slow_consumer: Literal["drop", "disconnect"] = "disconnect"
+    chat_filter_reload_seconds: float = Field(default=30.0, ge=0)
+    wiki_index_reload_seconds: float = Field(default=30.0, ge=0)
+    market_book_enabled: bool = False
+    market_book_ttl_seconds: float = Field(default=300.0, gt=0)
+    # Days kept in the database before rows are archived; 0 keeps them forever.
+    retention_logs_days: int = Field(default=90, ge=0)
+    retention_reports_days: int = Field(default=90, ge=0)
+    retention_chat_days: int = Field(default=30, ge=0)
+    retention_notifications_days: int = Field(default=30, ge=0)
+    retention_interval_minutes: float = Field(default=60.0, gt=0)
+    retention_batch_size: int = Field(default=5_000, ge=1)
+    archive_dir: str = "./archive"
+    # Days archive files are kept, like backups; 0 leaves their removal to the operator.
+    archive_retention_days: int = Field(default=14, ge=0)
+    queue_shard_count: int = Field(default=1, ge=1, le=64)
+    queue_shard_mode: Literal["world", "city"] = "world"
+    socket_bus_backend: Literal["memory", "postgres"] = "memory"
+    socket_bus_flush_seconds: float = Field(default=0.05, gt=0)
+    socket_bus_max_batch: int = Field(default=200, ge=1)
 
     @field_validator("cors_origins", mode="before")
     @classmethod
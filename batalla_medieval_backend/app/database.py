@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from .config import get_settings
+from .due_times import announce_due_times
 
 settings = get_settings()
 
@@ -10,6 +11,7 @@ engine = create_engine(
     settings.database_url, connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+event.listen(SessionLocal, "after_flush", announce_due_times)
 Base = declarative_base()
 
 
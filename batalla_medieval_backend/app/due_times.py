@@ -0,0 +1,144 @@
+"""Due-time bookkeeping that lets the worker sleep until the next queue item.
+
+Writers announce new due times from an ORM ``after_flush`` hook: on
+PostgreSQL the hook issues ``pg_notify`` inside the writing transaction, so
+the worker hears about an item only once it is committed and never about a
+rolled-back one. SQLite has no notification channel; the worker falls back to
+polling there.
+
+This module must not import ``app.models`` or ``app.database`` because the
+database module registers the hook at import time.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Callable, Iterable, List
+
+from .pg_notify import NotificationListener, notify
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "game_due_times"
+
+# Tables whose rows the worker resolves once their due column has passed.
+_DUE_COLUMNS = {
+    "building_queue": "finish_time",
+    "troop_queue": "finish_time",
+    "movements": "arrival_time",
+}
+
+
+def as_utc(value: datetime) -> datetime:
+    """Return ``value`` as an aware UTC datetime (naive columns are UTC)."""
+
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def announce_due_times(session, _flush_context) -> None:
+    """Notify listening workers of the earliest due time written in a flush."""
+
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    earliest: datetime | None = None
+    for obj in list(session.new) + list(session.dirty):
+        column = _DUE_COLUMNS.get(getattr(obj, "__tablename__", None))
+        if column is None:
+            continue
+        if getattr(obj, "status", None) not in (None, "ongoing"):
+            continue
+        due_at = getattr(obj, column, None)
+        if due_at is None:
+            continue
+        due_at = as_utc(due_at)
+        if earliest is None or due_at < earliest:
+            earliest = due_at
+
+    if earliest is not None:
+        notify(session.connection(), CHANNEL, earliest.isoformat())
+
+
+def listen_for_due_times(engine, on_due_time: Callable[[datetime], None]) -> NotificationListener:
+    """Subscribe ``on_due_time`` to due times committed by other processes."""
+
+    def handle(payload: str) -> None:
+        try:
+            on_due_time(datetime.fromisoformat(payload))
+        except ValueError:
+            logger.warning("Ignoring malformed due-time notification: %r", payload)
+
+    return NotificationListener(engine, CHANNEL, handle)
+
+
+class DueTimeQueue:
+    """Thread-safe min-heap of pending due times."""
+
+    def __init__(self) -> None:
+        self._heap: List[datetime] = []
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    def push(self, due_at: datetime) -> None:
+        with self._lock:
+            heapq.heappush(self._heap, as_utc(due_at))
+
+    def replace(self, due_times: Iterable[datetime]) -> None:
+        with self._lock:
+            self._heap = [as_utc(value) for value in due_times]
+            heapq.heapify(self._heap)
+
+    def peek(self) -> datetime | None:
+        with self._lock:
+            return self._heap[0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[datetime]:
+        """Remove and return every due time at or before ``now``."""
+
+        due: List[datetime] = []
+        with self._lock:
+            while self._heap and self._heap[0] <= now:
+                due.append(heapq.heappop(self._heap))
+        return due
+
+
+class LatenessMetrics:
+    """Running statistics of resolve time minus due time, in seconds."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._count = 0
+            self._total = 0.0
+            self._max = 0.0
+            self._last = 0.0
+
+    def observe(self, due_times: Iterable[datetime], resolved_at: datetime) -> None:
+        with self._lock:
+            for due_at in due_times:
+                lateness = max(0.0, (resolved_at - as_utc(due_at)).total_seconds())
+                self._count += 1
+                self._total += lateness
+                self._max = max(self._max, lateness)
+                self._last = lateness
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "count": self._count,
+                "mean_seconds": self._total / self._count if self._count else 0.0,
+                "max_seconds": self._max,
+                "last_seconds": self._last,
+            }
@@ -4,7 +4,8 @@ import socketio
 
 from .config import get_settings
 from .middleware.language import LanguageMiddleware
-from .services import socket_manager
+from .services import activity, notification_outbox, progress_events, socket_manager
+from .services.chat_writer import chat_writer
 from .routers import (
     admin,
     alliance,
@@ -93,6 +94,26 @@ app.include_router(world.router)
 app.include_router(admin.router)
 app.include_router(anticheat.router)
 
+
+async def _on_startup() -> None:
+    await socket_manager.start_event_relay()
+    notification_outbox.start_dispatcher()
+
+
+async def _on_shutdown() -> None:
+    notification_outbox.stop_dispatcher()
+    await socket_manager.stop_event_relay()
+    await chat_writer.close()
+    activity.flush_activity()
+    progress_events.flush_progress()
+
+
 # Socket.IO is mounted around the HTTP application. The real-time transport
-# authenticates every connection from its JWT before assigning a personal room.
-socket_app = socketio.ASGIApp(socket_manager.sio, app)
\ No newline at end of file
+# authenticates every connection from its JWT before assigning a personal room
+# and relays events published by any process through the message bus.
+socket_app = socketio.ASGIApp(
+    socket_manager.sio,
+    app,
+    on_startup=_on_startup,
+    on_shutdown=_on_shutdown,
+)
\ No newline at end of file
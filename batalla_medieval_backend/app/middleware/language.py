@@ -2,23 +2,28 @@
 
 from typing import Callable, Optional
 
-import jwt
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from ..config import get_settings
 from ..database import SessionLocal
-from ..models import User
-from ..services.i18n import DEFAULT_LANGUAGE, available_languages, get_translator
+from ..routers.auth import decode_typed_token
+from ..services import auth_cache
+from ..services.i18n import DEFAULT_LANGUAGE, get_translator, is_available, load_languages
 
 
 class LanguageMiddleware(BaseHTTPMiddleware):
-    """Resolve the preferred language for each request."""
+    """Resolve the preferred language for each request.
+
+    The bearer token is decoded here once. The payload and the principal
+    resolved through the auth cache are left on ``request.state``
+    (``access_token``, ``access_payload``, ``principal``) for
+    ``get_current_user``, so a request performs a single user lookup.
+    """
 
     def __init__(self, app, default_language: str = DEFAULT_LANGUAGE):
         super().__init__(app)
         self.default_language = default_language
-        self.settings = get_settings()
+        load_languages(default_language)
 
     def _get_language_from_header(self, request: Request) -> Optional[str]:
         """Parse the Accept-Language header for a supported language code."""
@@ -28,39 +33,44 @@ class LanguageMiddleware(BaseHTTPMiddleware):
             return None
         preferred = header.split(",")[0].strip().lower()
         preferred = preferred.split("-")[0]
-        return preferred if preferred in available_languages() else None
+        return preferred if is_available(preferred) else None
 
-    def _get_language_from_user(self, request: Request) -> Optional[str]:
-        """Return a verified user's preference for a current access token."""
+    def _resolve_principal(self, request: Request) -> Optional[auth_cache.Principal]:
+        """Decode an access token once and share it through ``request.state``."""
+
+        request.state.access_token = None
+        request.state.access_payload = None
+        request.state.principal = None
 
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.lower().startswith("bearer "):
             return None
         token = auth_header.split()[1]
+        request.state.access_token = token
         try:
-            payload = jwt.decode(
-                token,
-                self.settings.secret_key,
-                algorithms=[self.settings.algorithm],
-                options={"verify_exp": True},
-            )
-        except jwt.exceptions.InvalidTokenError:
+            payload = decode_typed_token(token, "access")
+        except ValueError:
             return None
+        request.state.access_payload = payload
 
-        username = payload.get("sub")
-        if payload.get("type") != "access" or not username:
-            return None
+        principal = auth_cache.get(payload["sub"], payload.get("ver"))
+        if principal is None:
+            with SessionLocal() as db:
+                principal = auth_cache.resolve(db, payload["sub"], payload.get("ver"))
+        request.state.principal = principal
+        return principal
+
+    def _get_language_from_user(self, request: Request) -> Optional[str]:
+        """Return a verified user's preference for a current access token."""
 
-        with SessionLocal() as db:
-            user = db.query(User).filter(User.username == username).first()
-            if (
-                user
-                and payload.get("ver") == user.auth_version
-                and user.is_verified
-                and not user.is_frozen
-                and user.language in available_languages()
-            ):
-                return user.language
+        principal = self._resolve_principal(request)
+        if (
+            principal
+            and principal.is_verified
+            and not principal.is_frozen
+            and is_available(principal.language)
+        ):
+            return principal.language
         return None
 
     async def dispatch(self, request: Request, call_next: Callable):
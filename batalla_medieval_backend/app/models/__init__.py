@@ -22,8 +22,8 @@ from .user_item import UserItem
 from .market_offer import MarketOffer
 from .hero import Hero
 from .admin_bot_log import AdminBotLog
-from .notification import Notification
-from .anticheat import AntiCheatFlag
+from .notification import Notification, NotificationOutbox
+from .anticheat import AntiCheatFlag, AntiCheatSignal
 from .event import WorldEvent
 from .quest import Quest
 from .quest_progress import QuestProgress
@@ -31,10 +31,12 @@ from .premium import MapBookmark, PremiumStatus
 from .world import World, PlayerWorld
 from .oasis import Oasis
 from .wiki import WikiArticle, WikiCategory
-from .chat_message import ChatMessage
+from .chat_message import ChatFilterTerm, ChatMessage
 from .research import Research
 from .forum import ForumThread, ForumPost
 from .adventure import Adventure
+from .player_score import PlayerScore
+from .rate_limit import RateLimitCounter
 
 __all__ = [
     "User",
@@ -67,7 +69,9 @@ __all__ = [
     "Hero",
     "AdminBotLog",
     "Notification",
+    "NotificationOutbox",
     "AntiCheatFlag",
+    "AntiCheatSignal",
     "WorldEvent",
     "Quest",
     "QuestProgress",
@@ -78,9 +82,12 @@ __all__ = [
     "Oasis",
     "WikiArticle",
     "WikiCategory",
+    "ChatFilterTerm",
     "ChatMessage",
     "Research",
     "ForumThread",
     "ForumPost",
     "Adventure",
+    "PlayerScore",
+    "RateLimitCounter",
 ]
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -22,3 +22,19 @@ class AntiCheatFlag(Base):
 
     user = relationship("User", foreign_keys=[user_id])
     reviewer = relationship("User", foreign_keys=[reviewer_id])
+
+
+class AntiCheatSignal(Base):
+    """An action waiting for the anti-cheat consumer (see services.anticheat_signals).
+
+    Rows are written in the transaction of the action they describe and
+    deleted once analyzed.
+    """
+
+    __tablename__ = "anti_cheat_signals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=get_utc_now, nullable=False)
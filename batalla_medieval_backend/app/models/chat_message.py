@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -9,6 +9,7 @@ from ..utils import get_utc_now
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (Index("ix_chat_messages_timestamp", "timestamp"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -17,9 +18,24 @@ class ChatMessage(Base):
     channel = Column(String, nullable=False)
     receiver_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=get_utc_now)
+    timestamp = Column(DateTime, default=get_utc_now, nullable=False)
 
     user = relationship("User", foreign_keys=[user_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
     world = relationship("World")
     alliance = relationship("Alliance")
+
+
+class ChatFilterTerm(Base):
+    """A word censored in chat (see services.moderation).
+
+    Terms without a world or language apply everywhere.
+    """
+
+    __tablename__ = "chat_filter_terms"
+
+    id = Column(Integer, primary_key=True, index=True)
+    term = Column(String, nullable=False)
+    world_id = Column(Integer, ForeignKey("worlds.id", ondelete="CASCADE"), nullable=True)
+    language = Column(String, nullable=True)
+    created_at = Column(DateTime, default=get_utc_now, nullable=False)
@@ -10,6 +10,7 @@ class City(Base):
     __tablename__ = "cities"
     __table_args__ = (
         Index("ux_cities_world_xy", "world_id", "x", "y", unique=True),
+        Index("ix_cities_owner_id", "owner_id"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
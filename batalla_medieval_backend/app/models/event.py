@@ -27,6 +27,8 @@ class WorldEvent(Base):
         },
         nullable=False,
     )
+    # Set once the start was announced to the world's players.
+    announced_at = Column(DateTime, nullable=True)
 
     def get_modifiers(self) -> Dict[str, Any]:
         return self.modifiers or {}
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -9,11 +9,15 @@ from ..utils import get_utc_now
 
 class Log(Base):
     __tablename__ = "logs"
+    __table_args__ = (
+        Index("ix_logs_user_action_timestamp", "user_id", "action", "timestamp"),
+        Index("ix_logs_timestamp", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     action = Column(String, nullable=False)
     details = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=get_utc_now)
+    timestamp = Column(DateTime, default=get_utc_now, nullable=False)
 
     user = relationship("User", back_populates="logs")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import ForeignKey, Integer, String, DateTime, Boolean
+from sqlalchemy import ForeignKey, Index, Integer, String, DateTime, Boolean, Float
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from ..database import Base
@@ -8,6 +8,12 @@ from ..utils import get_utc_now
 
 class MarketOffer(Base):
     __tablename__ = "market_offers"
+    __table_args__ = (
+        # Order book: resource pair, then best exchange ratio (see services.market).
+        Index("ix_market_offers_book", "world_id", "offer_type", "request_type", "ratio", "id"),
+        Index("ix_market_offers_world_ratio", "world_id", "ratio", "id"),
+        Index("ix_market_offers_city_id", "city_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     city_id: Mapped[int] = mapped_column(Integer, ForeignKey("cities.id"), nullable=False)
@@ -20,6 +26,8 @@ class MarketOffer(Base):
     # What I want
     request_type: Mapped[str] = mapped_column(String, nullable=False)  # wood, clay, iron
     request_amount: Mapped[int] = mapped_column(Integer, nullable=False)
+    # request_amount / offer_amount: what one offered unit costs.
+    ratio: Mapped[float] = mapped_column(Float, nullable=False)
     
     is_alliance_only: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=get_utc_now)
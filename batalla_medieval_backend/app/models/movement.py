@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, JSON
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, JSON
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -9,6 +9,14 @@ from ..utils import get_utc_now
 
 class Movement(Base):
     __tablename__ = "movements"
+    __table_args__ = (
+        # Worker: ongoing movements whose arrival time has passed.
+        Index("ix_movements_due", "status", "arrival_time"),
+        # Movements leaving a city, optionally towards one target.
+        Index("ix_movements_origin", "origin_city_id", "target_city_id", "movement_type", "created_at"),
+        # Movements arriving at a city (returns, incoming transports).
+        Index("ix_movements_target", "target_city_id", "movement_type", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     origin_city_id = Column(Integer, ForeignKey("cities.id"))
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
+from sqlalchemy.orm import relationship
+
+from ..database import Base
+from ..utils import get_utc_now
+
+
+class PlayerScore(Base):
+    """Materialized ranking score for one player inside one world."""
+
+    __tablename__ = "player_scores"
+    __table_args__ = (
+        Index("ux_player_scores_user_world", "user_id", "world_id", unique=True),
+        Index("ix_player_scores_world_points", "world_id", "points"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    world_id = Column(Integer, ForeignKey("worlds.id"), nullable=False)
+    building_points = Column(Integer, nullable=False, default=0)
+    troop_points = Column(Integer, nullable=False, default=0)
+    points = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=get_utc_now)
+
+    user = relationship("User")
+    world = relationship("World")
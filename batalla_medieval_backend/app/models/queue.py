@@ -15,6 +15,7 @@ class BuildingQueue(Base):
             "building_type",
             unique=True,
         ),
+        Index("ix_building_queue_finish_time", "finish_time"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -29,6 +30,7 @@ class BuildingQueue(Base):
 
 class TroopQueue(Base):
     __tablename__ = "troop_queue"
+    __table_args__ = (Index("ix_troop_queue_finish_time", "finish_time"),)
 
     id = Column(Integer, primary_key=True, index=True)
     city_id = Column(Integer, ForeignKey("cities.id"), index=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, Float, Index, Integer, String
+
+from ..database import Base
+
+
+class RateLimitCounter(Base):
+    """Hits of one rate-limit key in one fixed window (see services.rate_limit)."""
+
+    __tablename__ = "rate_limit_counters"
+    __table_args__ = (Index("ix_rate_limit_counters_expires_at", "expires_at"),)
+
+    key = Column(String, primary_key=True)
+    window_index = Column(BigInteger, primary_key=True, autoincrement=False)
+    hits = Column(Integer, nullable=False, default=0)
+    # Unix time after which the row no longer affects any decision.
+    expires_at = Column(Float, nullable=False)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -9,15 +9,26 @@ from ..utils import get_utc_now
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("ix_reports_created_at", "created_at"),
+        Index("ix_reports_feed", "owner_id", "world_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     city_id = Column(Integer, ForeignKey("cities.id"))
+    # Owner of ``city_id`` when the report was delivered.
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     world_id = Column(Integer, ForeignKey("worlds.id"), nullable=False)
     report_type = Column(String, nullable=False)  # battle or spy
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=get_utc_now)
+    created_at = Column(DateTime, default=get_utc_now, nullable=False)
     attacker_city_id = Column(Integer, ForeignKey("cities.id"), nullable=True)
     defender_city_id = Column(Integer, ForeignKey("cities.id"), nullable=True)
+    # Summary of ``content`` for the report feed (services.report.summarize).
+    outcome = Column(String, nullable=True)  # victory or defeat, for the recipient
+    loot_total = Column(Integer, nullable=False, default=0, server_default="0")
+    attacker_name = Column(String, nullable=True)
+    defender_name = Column(String, nullable=True)
 
     # Disambiguate the three city foreign keys - specify foreign_keys explicitly
     city = relationship(
@@ -17,5 +17,9 @@ class Season(Base):
     start_date = Column(DateTime, default=get_utc_now, nullable=False)
     end_date = Column(DateTime, nullable=True)
     is_active = Column(Boolean, default=True)
+    # Progress of the rollover that ends the season (see services.season).
+    rollover_stage = Column(String, nullable=True)
+    rollover_step = Column(Integer, default=0, nullable=False)
+    rollover_rows = Column(Integer, default=0, nullable=False)
 
     results = relationship("SeasonResult", back_populates="season", cascade="all, delete-orphan")
@@ -13,6 +13,8 @@ class SeasonResult(Base):
     season_id = Column(Integer, ForeignKey("seasons.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     alliance_id = Column(Integer, ForeignKey("alliances.id"), nullable=True)
+    # Kept when the alliance is deleted by the season rollover.
+    alliance_name = Column(String, nullable=True)
     rank = Column(Integer, nullable=False)
     points = Column(Integer, default=0)
     rewards = Column(String, default="[]")
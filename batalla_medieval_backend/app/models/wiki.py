@@ -24,5 +24,8 @@ class WikiArticle(Base):
     title = Column(String, nullable=False, unique=True)
     category = Column(SAEnum(WikiCategory), nullable=False, index=True)
     content_markdown = Column(Text, nullable=False)
+    # Folded plain text kept by services.wiki_search.prepare.
+    search_title = Column(Text, nullable=False, server_default="")
+    search_body = Column(Text, nullable=False, server_default="")
     created_at = Column(DateTime, default=get_utc_now, nullable=False)
     updated_at = Column(DateTime, default=get_utc_now, onupdate=get_utc_now, nullable=False)
@@ -53,6 +53,9 @@ class PlayerWorld(Base):
     world_id = Column(Integer, ForeignKey("worlds.id"), nullable=False)
     starting_city_id = Column(Integer, ForeignKey("cities.id"), nullable=True)
     joined_at = Column(DateTime, default=get_utc_now)
+    # Cursor (created_at, id) of the newest report the player has seen here.
+    reports_read_at = Column(DateTime, nullable=True)
+    reports_read_id = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="world_memberships")
     world = relationship("World", back_populates="players")
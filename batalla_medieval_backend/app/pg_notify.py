@@ -0,0 +1,65 @@
+"""Thin helpers around PostgreSQL ``LISTEN/NOTIFY``.
+
+Kept free of ``app.database`` and ``app.models`` imports so that low-level
+modules (ORM hooks, the message bus) can use them.
+"""
+
+from __future__ import annotations
+
+import logging
+import select
+from typing import Callable
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more.
+MAX_PAYLOAD_BYTES = 7900
+
+
+def notify(connection, channel: str, payload: str) -> None:
+    """Queue a notification on ``connection``; it is delivered on commit."""
+
+    connection.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": payload},
+    )
+
+
+class NotificationListener:
+    """Dedicated PostgreSQL connection subscribed to one channel.
+
+    psycopg dispatches notifications to handlers while it executes a
+    statement, so ``wait`` blocks on the socket and then runs a no-op query
+    to drain whatever arrived.
+    """
+
+    def __init__(self, engine, channel: str, on_payload: Callable[[str], None]) -> None:
+        self._channel = channel
+        self._raw = engine.raw_connection()
+        # Keep the LISTEN session out of the pool for the lifetime of the listener.
+        self._raw.detach()
+        self._connection = self._raw.driver_connection
+        self._connection.autocommit = True
+        self._on_payload = on_payload
+        self._connection.add_notify_handler(self._handle)
+        self._connection.execute(f"LISTEN {channel}")
+
+    def _handle(self, notify) -> None:
+        try:
+            self._on_payload(notify.payload)
+        except Exception:
+            logger.exception("Notification handler failed on channel %s", self._channel)
+
+    def wait(self, timeout: float) -> None:
+        readable, _, _ = select.select([self._connection.fileno()], [], [], max(timeout, 0.0))
+        if readable:
+            self._connection.execute("SELECT 1")
+
+    def close(self) -> None:
+        try:
+            self._connection.execute(f"UNLISTEN {self._channel}")
+        except Exception:
+            logger.debug("UNLISTEN failed while closing the %s listener", self._channel)
+        self._raw.close()
@@ -0,0 +1,62 @@
+"""Operational commands for the materialized ranking table.
+
+Usage (from ``batalla_medieval_backend``)::
+
+    python -m app.ranking_maintenance rebuild [--world-id N]
+    python -m app.ranking_maintenance check --world-id N
+
+``check`` exits with status 1 when any stored score differs from the
+on-the-fly reference calculation.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+
+from . import models
+from .database import SessionLocal
+from .services import ranking
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="recompute scores from scratch")
+    rebuild_parser.add_argument("--world-id", type=int, default=None)
+    check_parser = subparsers.add_parser("check", help="compare scores with the reference")
+    check_parser.add_argument("--world-id", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            rows = ranking.rebuild_scores(db, args.world_id)
+            db.commit()
+            logger.info("Rebuilt %s player score rows", rows)
+            return 0
+
+        world_ids = (
+            [args.world_id]
+            if args.world_id is not None
+            else [world_id for (world_id,) in db.query(models.World.id).all()]
+        )
+        exit_code = 0
+        for world_id in world_ids:
+            mismatches = ranking.check_score_consistency(db, world_id)
+            for mismatch in mismatches:
+                logger.error("score_mismatch world_id=%s %s", world_id, mismatch)
+            if mismatches:
+                exit_code = 1
+            else:
+                logger.info("World %s scores are consistent", world_id)
+        return exit_code
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
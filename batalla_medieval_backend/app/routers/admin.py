@@ -1,14 +1,27 @@
 from typing import Dict, List
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
 from ..database import get_db
 from ..routers.auth import get_current_user
 from ..services import admin as admin_service
-from ..services import onboarding_metrics
+from ..services import battle_kernel
+from ..services import event as event_service
+from ..services import (
+    auth_cache,
+    map_chunks,
+    moderation,
+    notification_outbox,
+    onboarding_metrics,
+    rate_limit,
+    socket_manager,
+    wiki_search,
+)
+from ..services.chat_manager import chat_manager
+from ..services.chat_writer import chat_writer
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -50,6 +63,14 @@ class UserFreezeUpdate(BaseModel):
     reason: str | None = None
 
 
+class BattleSimulationRequest(BaseModel):
+    attacker: Dict[str, int]
+    defender: Dict[str, int]
+    wall_level: int = Field(default=0, ge=0, le=100)
+    battles: int = Field(default=10000, ge=1, le=200000)
+    seed: int | None = None
+
+
 class OnboardingMetricsRead(BaseModel):
     window_hours: int
     total_players: int
@@ -84,6 +105,95 @@ def onboarding_product_metrics(
     )
 
 
+@router.get("/metrics/caches")
+def cache_metrics(current_admin: models.User = Depends(require_admin)):
+    """Return hit/miss counters of the process-local caches of this replica."""
+
+    return {
+        "event_modifiers": event_service.get_modifier_cache_stats(),
+        "map_chunks": map_chunks.get_cache_stats(),
+        "auth_tokens": auth_cache.get_stats(),
+        "rate_limits": rate_limit.get_limiter().stats(),
+        "chat_filters": moderation.get_stats(),
+        "wiki_search": wiki_search.get_stats(),
+    }
+
+
+@router.get("/metrics/realtime")
+def realtime_metrics(current_admin: models.User = Depends(require_admin)):
+    """Return publish/relay queue depth and delivery latency of this replica."""
+
+    return {
+        **socket_manager.relay.metrics(),
+        "chat": {**chat_manager.stats(), "writer": chat_writer.metrics()},
+    }
+
+
+@router.get("/metrics/notifications")
+def notification_metrics(
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(require_admin),
+):
+    """Return queued and dead notification deliveries per channel."""
+
+    return notification_outbox.get_outbox_stats(db)
+
+
+@router.post("/simulate/battles")
+def simulate_battles(
+    payload: BattleSimulationRequest,
+    current_admin: models.User = Depends(require_admin),
+):
+    """Monte Carlo one matchup with the battle kernel for balance tuning."""
+
+    unknown = sorted(
+        unit
+        for unit in set(payload.attacker) | set(payload.defender)
+        if unit not in battle_kernel.UNIT_STATS
+    )
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown units: {', '.join(unknown)}")
+    return battle_kernel.run_simulation(
+        payload.attacker,
+        payload.defender,
+        battles=payload.battles,
+        wall_level=payload.wall_level,
+        seed=payload.seed,
+    )
+
+
+@router.get("/moderation/terms", response_model=List[schemas.ChatFilterTermRead])
+def list_chat_filter_terms(
+    world_id: int | None = None,
+    language: str | None = None,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(require_admin),
+):
+    return moderation.list_terms(db, world_id=world_id, language=language)
+
+
+@router.post("/moderation/terms")
+def add_chat_filter_terms(
+    payload: schemas.ChatFilterTermsCreate,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(require_admin),
+):
+    """Censor more words in chat; other replicas pick them up within CHAT_FILTER_RELOAD_SECONDS."""
+
+    added = moderation.add_terms(db, payload.terms, world_id=payload.world_id, language=payload.language)
+    return {"added": added}
+
+
+@router.delete("/moderation/terms/{term_id}")
+def delete_chat_filter_term(
+    term_id: int,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(require_admin),
+):
+    moderation.remove_term(db, term_id)
+    return {"detail": "Term deleted"}
+
+
 @router.get("/logs", response_model=List[schemas.LogRead])
 def list_admin_logs(
     limit: int = Query(default=100, ge=1, le=500),
@@ -7,11 +7,12 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from passlib.context import CryptContext
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from .. import models, schemas
 from ..config import PROTECTED_ENVIRONMENTS, get_settings
 from ..database import get_db
-from ..services import anticheat, emailer
+from ..services import activity, anticheat, auth_cache, emailer, rate_limit
 from ..utils import utc_now
 
 router = APIRouter(tags=["auth"])
@@ -97,15 +98,47 @@ def _credentials_exception() -> HTTPException:
     )
 
 
+def _load_token_user(
+    db: Session, payload: dict, principal: Optional[auth_cache.Principal] = None
+) -> Optional[models.User]:
+    """Return the user a decoded access token belongs to, via the auth cache."""
+
+    sub, ver = payload["sub"], payload.get("ver")
+    if principal is None:
+        principal = auth_cache.resolve(db, sub, ver)
+        if principal is None:
+            return None
+    user = db.get(models.User, principal.user_id)
+    if user is not None and principal.matches(user):
+        return user
+
+    # The cached principal is stale (changed in another process): use the row.
+    auth_cache.invalidate_users({principal.user_id})
+    user = get_user_by_username(db, username=sub)
+    if user is not None and ver == user.auth_version:
+        auth_cache.put(auth_cache.Principal.from_user(user))
+    return user
+
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    request: Request = None,
 ) -> models.User:
-    try:
-        payload = decode_typed_token(token, "access")
-    except ValueError:
-        raise _credentials_exception()
-
-    user = get_user_by_username(db, username=payload["sub"])
+    # LanguageMiddleware already decoded this token and resolved its principal;
+    # WebSocket handlers call this directly without a request.
+    state = request.state if request is not None else None
+    principal = None
+    if getattr(state, "access_token", None) == token and state.access_payload is not None:
+        payload = state.access_payload
+        principal = state.principal
+    else:
+        try:
+            payload = decode_typed_token(token, "access")
+        except ValueError:
+            raise _credentials_exception()
+
+    user = _load_token_user(db, payload, principal)
     if user is None or payload.get("ver") != user.auth_version:
         raise _credentials_exception()
     if not user.is_verified:
@@ -116,13 +149,19 @@ async def get_current_user(
     if user.is_frozen:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account frozen")
 
-    user.last_active_at = utc_now()
-    db.commit()
-    db.refresh(user)
+    # Last-seen times are written behind by the activity buffer; the instance
+    # shows the new value without becoming dirty.
+    now = utc_now()
+    activity.record_activity(user.id, now)
+    set_committed_value(user, "last_active_at", now)
     return user
 
 
-@router.post("/register", response_model=schemas.UserRead)
+@router.post(
+    "/register",
+    response_model=schemas.UserRead,
+    dependencies=[Depends(rate_limit.limit_by_ip(rate_limit.AUTH_REGISTER))],
+)
 def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     existing = (
         db.query(models.User)
@@ -163,7 +202,11 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 
-@router.post("/token", response_model=schemas.Token)
+@router.post(
+    "/token",
+    response_model=schemas.Token,
+    dependencies=[Depends(rate_limit.limit_by_ip(rate_limit.AUTH_LOGIN))],
+)
 def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     request: Request = None,
@@ -252,7 +295,9 @@ def update_me(
     return current_user
 
 
-@router.post("/verify-email")
+@router.post(
+    "/verify-email", dependencies=[Depends(rate_limit.limit_by_ip(rate_limit.AUTH_LOGIN))]
+)
 def verify_email(token: str, db: Session = Depends(get_db)):
     try:
         payload = decode_typed_token(token, "verify")
@@ -276,7 +321,9 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     return {"message": "Email verified successfully"}
 
 
-@router.post("/forgot-password")
+@router.post(
+    "/forgot-password", dependencies=[Depends(rate_limit.limit_by_ip(rate_limit.AUTH_EMAIL))]
+)
 def forgot_password(payload: schemas.PasswordResetRequest, db: Session = Depends(get_db)):
     generic_response = {"message": "If the email exists, a reset link has been sent."}
     user = db.query(models.User).filter(models.User.email == payload.email).first()
@@ -303,7 +350,9 @@ def forgot_password(payload: schemas.PasswordResetRequest, db: Session = Depends
     return generic_response
 
 
-@router.post("/reset-password")
+@router.post(
+    "/reset-password", dependencies=[Depends(rate_limit.limit_by_ip(rate_limit.AUTH_LOGIN))]
+)
 def reset_password(payload: schemas.PasswordResetConfirm, db: Session = Depends(get_db)):
     try:
         data = decode_typed_token(payload.token, "reset")
@@ -2,11 +2,13 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
 from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketState
 
 from .. import models, schemas
-from ..database import get_db
+from ..database import SessionLocal, get_db
 from ..routers.auth import get_current_user
 from ..services.chat_manager import chat_manager
+from ..services.chat_writer import chat_writer
 from ..utils import utc_now
 
 router = APIRouter(tags=["chat"])
@@ -55,114 +57,145 @@ def _user_in_world(db: Session, user_id: int, world_id: int) -> bool:
     )
 
 
-@router.websocket("/{channel}")
-async def websocket_chat(websocket: WebSocket, channel: str, db: Session = Depends(get_db)):
+async def _authorize_websocket(websocket: WebSocket, channel: str) -> Optional[dict]:
+    """Return the sender's chat scope, or None once the socket has been closed.
+
+    The session is only held while the connection is checked; messages are
+    stored by the batched chat writer.
+    """
+
     token = websocket.query_params.get("token")
     if not token:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
+        return None
 
     if channel not in ALLOWED_CHANNELS:
         await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
-        return
-
-    try:
-        current_user = await get_current_user(token=token, db=db)
-    except HTTPException:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
-
-    world_id = _get_active_world_id(db, current_user)
-    if world_id is None:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
-
-    alliance_id = _get_alliance_id(db, current_user.id, world_id)
-    receiver_id: Optional[int] = None
-
-    if channel == "alliance" and not alliance_id:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
+        return None
 
-    if channel == "private":
-        receiver = websocket.query_params.get("receiver_id")
-        if not receiver:
-            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
+    with SessionLocal() as db:
         try:
-            receiver_id = int(receiver)
-        except ValueError:
+            current_user = await get_current_user(token=token, db=db)
+        except HTTPException:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
-        if receiver_id == current_user.id:
+            return None
+
+        world_id = _get_active_world_id(db, current_user)
+        if world_id is None:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
-        if not _user_in_world(db, receiver_id, world_id):
+            return None
+
+        alliance_id = _get_alliance_id(db, current_user.id, world_id)
+        receiver_id: Optional[int] = None
+
+        if channel == "alliance" and not alliance_id:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
+            return None
+
+        if channel == "private":
+            receiver = websocket.query_params.get("receiver_id")
+            if not receiver:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                return None
+            try:
+                receiver_id = int(receiver)
+            except ValueError:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                return None
+            if receiver_id == current_user.id:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                return None
+            if not _user_in_world(db, receiver_id, world_id):
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                return None
+
+        return {
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "language": current_user.language,
+            "world_id": world_id,
+            "alliance_id": alliance_id,
+            "receiver_id": receiver_id,
+        }
+
+
+@router.websocket("/{channel}")
+async def websocket_chat(websocket: WebSocket, channel: str):
+    scope = await _authorize_websocket(websocket, channel)
+    if scope is None:
+        return
+    user_id = scope["user_id"]
+    world_id = scope["world_id"]
+    alliance_id = scope["alliance_id"] if channel == "alliance" else None
+    receiver_id = scope["receiver_id"] if channel == "private" else None
 
     await websocket.accept()
     try:
         chat_manager.register_connection(
             websocket,
             channel=channel,
-            user_id=current_user.id,
+            user_id=user_id,
             world_id=world_id,
-            alliance_id=alliance_id,
-            receiver_id=receiver_id,
+            alliance_id=scope["alliance_id"],
+            receiver_id=scope["receiver_id"],
         )
     except ValueError:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
     try:
-        while True:
+        # The manager closes the socket itself when it falls too far behind.
+        while websocket.application_state == WebSocketState.CONNECTED:
             data = await websocket.receive_json()
             content = data.get("content") if isinstance(data, dict) else None
             if not content:
-                await websocket.send_json({"error": "Message content required"})
+                await chat_manager.send(websocket, {"error": "Message content required"})
                 continue
 
-            if not chat_manager.allow_message(current_user.id):
-                await websocket.send_json({"error": "Rate limit exceeded"})
+            if not chat_manager.allow_message(user_id):
+                await chat_manager.send(websocket, {"error": "Rate limit exceeded"})
                 continue
 
-            filtered_content = chat_manager.filter_content(str(content))
-
-            chat_message = models.ChatMessage(
-                user_id=current_user.id,
-                world_id=world_id,
-                alliance_id=alliance_id if channel == "alliance" else None,
-                channel=channel,
-                receiver_id=receiver_id if channel == "private" else None,
-                content=filtered_content,
-                timestamp=utc_now(),
-            )
-            db.add(chat_message)
-            db.commit()
-            db.refresh(chat_message)
+            row = {
+                "user_id": user_id,
+                "world_id": world_id,
+                "alliance_id": alliance_id,
+                "channel": channel,
+                "receiver_id": receiver_id,
+                "content": await chat_manager.filter_content(
+                    str(content), world_id=world_id, language=scope["language"]
+                ),
+                "timestamp": utc_now(),
+            }
+            try:
+                message_id = await chat_writer.write(row)
+            except Exception:
+                await chat_manager.send(websocket, {"error": "Message could not be sent"})
+                continue
 
             payload = {
-                "id": chat_message.id,
-                "user_id": current_user.id,
-                "username": current_user.username,
-                "world_id": chat_message.world_id,
-                "alliance_id": chat_message.alliance_id,
-                "channel": chat_message.channel,
-                "receiver_id": chat_message.receiver_id,
-                "content": chat_message.content,
-                "timestamp": chat_message.timestamp.isoformat(),
+                "id": message_id,
+                "user_id": user_id,
+                "username": scope["username"],
+                "world_id": world_id,
+                "alliance_id": alliance_id,
+                "channel": channel,
+                "receiver_id": receiver_id,
+                "content": row["content"],
+                "timestamp": row["timestamp"].isoformat(),
             }
 
             await chat_manager.broadcast(
                 channel=channel,
                 message=payload,
-                sender_id=current_user.id,
+                sender_id=user_id,
                 world_id=world_id,
-                alliance_id=chat_message.alliance_id,
+                alliance_id=alliance_id,
                 receiver_id=receiver_id,
             )
     except WebSocketDisconnect:
+        pass
+    finally:
         chat_manager.disconnect(websocket)
 
 
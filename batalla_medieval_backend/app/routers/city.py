@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from .. import models, schemas
 from ..database import get_db
 from ..routers.auth import get_current_user
-from ..services import production, protection, quest as quest_service, world_gen
+from ..services import production, protection, ranking, world_gen
 
 router = APIRouter(tags=["cities"])
 
@@ -60,9 +60,10 @@ def create_city(
         tile_type=tile_type
     )
     db.add(db_city)
+    db.flush()
+    ranking.refresh_player_score(db, current_user.id, db_city.world_id)
     db.commit()
     db.refresh(db_city)
-    production.recalculate_resources(db, db_city)
     return db_city
 
 
@@ -78,8 +79,7 @@ def list_cities(
         .all()
     )
     for city in cities:
-        city, gains = production.recalculate_resources(db, city, return_gains=True)
-        quest_service.handle_event(db, current_user, "resources_collected", gains)
+        production.show_current_resources(db, city)
         city.is_protected = protection.is_user_protected(city.owner)
     return cities
 
@@ -102,8 +102,7 @@ def get_city(
     )
     if not city:
         raise HTTPException(status_code=404, detail="City not found")
-    city, gains = production.recalculate_resources(db, city, return_gains=True)
-    quest_service.handle_event(db, current_user, "resources_collected", gains)
+    production.show_current_resources(db, city)
     city.is_protected = protection.is_user_protected(city.owner)
     return city
 
@@ -127,7 +126,7 @@ def city_status(
     if not city:
         raise HTTPException(status_code=404, detail="City not found")
 
-    city, _ = production.recalculate_resources(db, city, return_gains=True)
+    production.show_current_resources(db, city)
     storage_limit = production.get_storage_limit(city)
     production_per_hour = production.get_production_per_hour(db, city)
     building_queue = (
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session
 
 from .. import models, schemas
 from ..database import get_db
-from ..services import ranking, world_gen, world_membership
+from ..services import map_chunks, world_gen, world_membership
 from .auth import get_current_user
 from .responses import error_response
 from .world_access import require_world_access
@@ -15,14 +15,44 @@ router = APIRouter(
 )
 
 
-def _alliance_name(user: models.User | None, world_id: int) -> str | None:
-    if not user:
-        return None
-    for membership in user.alliances:
-        alliance = membership.alliance
-        if alliance and alliance.world_id == world_id:
-            return alliance.name
-    return None
+def _tile_renderer(terrain: world_gen.TerrainGrid):
+    def render(
+        x: int,
+        y: int,
+        city: map_chunks.CityEntry | None,
+        oasis: map_chunks.OasisEntry | None,
+    ) -> schemas.MapTile:
+        tile_type = terrain.tile_type(x, y)
+        if city:
+            return schemas.MapTile(
+                x=x,
+                y=y,
+                type=tile_type,
+                city_id=city.city_id,
+                city_name=city.name,
+                owner_id=city.owner_id if city.owner_name else None,
+                owner_name=city.owner_name if city.owner_name else "Bárbaros",
+                alliance_name=city.alliance_name,
+                points=city.points,
+                is_conquered=False,
+            )
+        if oasis:
+            return schemas.MapTile(
+                x=x,
+                y=y,
+                type=tile_type,
+                owner_id=oasis.owner_id,
+                owner_name=oasis.owner_name if oasis.owner_city_id else "Naturaleza",
+                alliance_name=oasis.alliance_name,
+                points=0,
+                oasis_id=oasis.oasis_id,
+                resource_type=oasis.resource_type,
+                bonus_percent=oasis.bonus_percent,
+                is_conquered=oasis.owner_city_id is not None,
+            )
+        return schemas.MapTile(x=x, y=y, type=tile_type, points=0, is_conquered=False)
+
+    return render
 
 
 @router.get("/tiles", response_model=schemas.MapResponse)
@@ -34,116 +64,18 @@ def get_map_tiles(
     db: Session = Depends(get_db),
     _membership: models.PlayerWorld = Depends(require_world_access),
 ):
-    min_x = x - radius
-    max_x = x + radius
-    min_y = y - radius
-    max_y = y + radius
-
-    owner_alliance = (
-        selectinload(models.City.owner)
-        .selectinload(models.User.alliances)
-        .selectinload(models.AllianceMember.alliance)
+    map_size = _membership.world.map_size if _membership.world else world_gen.DEFAULT_MAP_SIZE
+    render = _tile_renderer(world_gen.get_terrain_grid(map_size))
+    tiles = map_chunks.viewport(
+        db,
+        world_id,
+        x - radius,
+        x + radius,
+        y - radius,
+        y + radius,
+        kind=f"tiles:{map_size}",
+        render=render,
     )
-
-    # Fetch cities in range with everything needed for labels and canonical score.
-    cities = (
-        db.query(models.City)
-        .options(
-            owner_alliance,
-            selectinload(models.City.buildings),
-            selectinload(models.City.troops),
-        )
-        .filter(
-            models.City.world_id == world_id,
-            models.City.x >= min_x,
-            models.City.x <= max_x,
-            models.City.y >= min_y,
-            models.City.y <= max_y,
-        )
-        .all()
-    )
-
-    # Map cities by coordinate for O(1) lookup
-    city_map = {(c.x, c.y): c for c in cities}
-
-    # Fetch oases in range
-    oases = (
-        db.query(models.Oasis)
-        .options(
-            selectinload(models.Oasis.owner_city)
-            .selectinload(models.City.owner)
-            .selectinload(models.User.alliances)
-            .selectinload(models.AllianceMember.alliance)
-        )
-        .filter(
-            models.Oasis.world_id == world_id,
-            models.Oasis.x >= min_x,
-            models.Oasis.x <= max_x,
-            models.Oasis.y >= min_y,
-            models.Oasis.y <= max_y,
-        )
-        .all()
-    )
-    oasis_map = {(o.x, o.y): o for o in oases}
-
-    tiles: list[schemas.MapTile] = []
-    for curr_x in range(min_x, max_x + 1):
-        for curr_y in range(min_y, max_y + 1):
-            city = city_map.get((curr_x, curr_y))
-            oasis = oasis_map.get((curr_x, curr_y))
-
-            tile_type = world_gen.get_tile_type(curr_x, curr_y)
-
-            city_id = city.id if city else None
-            city_name = city.name if city else None
-            points = ranking.calculate_city_points(city) if city else 0
-            owner_id = None
-            owner_name = None
-            alliance_name = None
-
-            oasis_id = None
-            resource_type = None
-            bonus_percent = None
-            is_conquered = False
-
-            if city:
-                if city.owner:
-                    owner_id = city.owner.id
-                    owner_name = city.owner.username
-                    alliance_name = _alliance_name(city.owner, world_id)
-                else:
-                    owner_name = "Bárbaros"
-            elif oasis:
-                oasis_id = oasis.id
-                resource_type = oasis.resource_type
-                bonus_percent = oasis.bonus_percent
-                if oasis.owner_city:
-                    is_conquered = True
-                    owner_id = oasis.owner_city.owner_id
-                    if oasis.owner_city.owner:
-                        owner_name = oasis.owner_city.owner.username
-                        alliance_name = _alliance_name(oasis.owner_city.owner, world_id)
-                else:
-                    owner_name = "Naturaleza"
-
-            tiles.append(
-                schemas.MapTile(
-                    x=curr_x,
-                    y=curr_y,
-                    type=tile_type,
-                    city_id=city_id,
-                    city_name=city_name,
-                    owner_id=owner_id,
-                    owner_name=owner_name,
-                    alliance_name=alliance_name,
-                    points=points,
-                    oasis_id=oasis_id,
-                    resource_type=resource_type,
-                    bonus_percent=bonus_percent,
-                    is_conquered=is_conquered,
-                )
-            )
-
     return schemas.MapResponse(tiles=tiles)
 
 
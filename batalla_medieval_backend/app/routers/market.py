@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session, selectinload
 
 from .. import models, schemas
@@ -54,6 +54,34 @@ def get_offers(
     return offers
 
 
+@router.get("/book", response_model=schemas.MarketOrderBook)
+def get_order_book(
+    world_id: int,
+    offer_type: Optional[Literal["wood", "clay", "iron"]] = None,
+    request_type: Optional[Literal["wood", "clay", "iron"]] = None,
+    min_ratio: Optional[float] = Query(default=None, ge=0),
+    max_ratio: Optional[float] = Query(default=None, ge=0),
+    filter_alliance: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    offers, next_cursor = market.get_order_book(
+        db,
+        world_id,
+        current_user.id,
+        offer_type=offer_type,
+        request_type=request_type,
+        min_ratio=min_ratio,
+        max_ratio=max_ratio,
+        filter_alliance=filter_alliance,
+        cursor=cursor,
+        limit=limit,
+    )
+    return {"offers": offers, "next_cursor": next_cursor}
+
+
 @router.post("/npc_trade")
 def npc_trade(
     city_id: int,
@@ -75,8 +75,6 @@ def send_message(
         content=payload.content,
     )
     db.add(message)
-    db.commit()
-    db.refresh(message)
     notification_service.create_notification(
         db,
         receiver,
@@ -84,7 +82,10 @@ def send_message(
         body=f"Has recibido un mensaje de {current_user.username}: {payload.subject}",
         notification_type="message_received",
         allow_email=False,
+        commit=False,
     )
+    db.commit()
+    db.refresh(message)
     return message
 
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
@@ -11,10 +11,22 @@ router = APIRouter(tags=["notification"])
 
 @router.get("/list", response_model=list[schemas.NotificationRead])
 def list_notifications(
+    limit: int | None = Query(default=None, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    return notification_service.list_notifications(db, current_user)
+    return notification_service.list_notifications(db, current_user, limit)
+
+
+@router.patch("/read")
+def mark_type_as_read(
+    notification_type: str = Query(alias="type", min_length=1),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Mark the player's unread notifications of one type, e.g. a world broadcast, as read."""
+
+    return {"updated": notification_service.mark_type_as_read(db, current_user, notification_type)}
 
 
 @router.patch("/read/{notification_id}", response_model=schemas.NotificationRead)
@@ -1,20 +1,15 @@
 from __future__ import annotations
 
-import time
-from collections import defaultdict, deque
-from typing import Deque, Dict, List, Optional
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
 from ..database import get_db
-from ..services import balance, event as event_service, ranking as ranking_service, world_gen
-
-RATE_LIMIT_REQUESTS = 60
-RATE_LIMIT_WINDOW_SECONDS = 60
-_request_logs: Dict[str, Deque[float]] = defaultdict(deque)
+from ..services import balance, event as event_service, map_chunks, ranking as ranking_service, world_gen
+from ..services import rate_limit as rate_limit_service
 
 
 def _mask_name(name: Optional[str]) -> Optional[str]:
@@ -25,22 +20,10 @@ def _mask_name(name: Optional[str]) -> Optional[str]:
     return f"{name[0]}{'*' * (len(name) - 2)}{name[-1]}"
 
 
-def rate_limit(request: Request) -> None:
-    client_ip = request.client.host if request.client else "anonymous"
-    now = time.time()
-    window_start = now - RATE_LIMIT_WINDOW_SECONDS
-    log = _request_logs[client_ip]
-
-    while log and log[0] < window_start:
-        log.popleft()
-
-    if len(log) >= RATE_LIMIT_REQUESTS:
-        raise HTTPException(
-            status_code=429,
-            detail="Rate limit exceeded. Max 60 requests per minute.",
-        )
-
-    log.append(now)
+rate_limit = rate_limit_service.limit_by_ip(
+    rate_limit_service.PUBLIC_API,
+    "Rate limit exceeded. Max 60 requests per minute.",
+)
 
 
 class PublicCityMapEntry(BaseModel):
@@ -83,98 +66,36 @@ def get_map_viewport(
     if not world:
         raise HTTPException(status_code=404, detail="World not found")
 
-    min_x, max_x = x - radius, x + radius
-    min_y, max_y = y - radius, y + radius
-
-    cities = (
-        db.query(models.City)
-        .filter(
-            models.City.world_id == world_id,
-            models.City.x >= min_x,
-            models.City.x <= max_x,
-            models.City.y >= min_y,
-            models.City.y <= max_y,
-        )
-        .all()
-    )
-
-    owner_ids = {city.owner_id for city in cities if city.owner_id}
-    users = (
-        db.query(models.User).filter(models.User.id.in_(owner_ids)).all()
-        if owner_ids
-        else []
-    )
-    user_map = {user.id: user for user in users}
-
-    memberships = (
-        db.query(models.AllianceMember)
-        .filter(models.AllianceMember.user_id.in_(owner_ids))
-        .all()
-        if owner_ids
-        else []
-    )
-    alliance_ids = {membership.alliance_id for membership in memberships}
-    alliances = (
-        db.query(models.Alliance).filter(models.Alliance.id.in_(alliance_ids)).all()
-        if alliance_ids
-        else []
+    map_size = world.map_size
+    terrain = world_gen.get_terrain_grid(map_size)
+
+    def render(cur_x, cur_y, city, _oasis):
+        if cur_x < 0 or cur_y < 0 or cur_x >= map_size or cur_y >= map_size:
+            return None
+        tile_type = terrain.tile_type(cur_x, cur_y)
+        city_entry = None
+        if city:
+            city_entry = PublicCityMapEntry(
+                city_id=city.city_id,
+                x=cur_x,
+                y=cur_y,
+                owner=_mask_name(city.owner_name),
+                alliance=city.alliance_name,
+                points=city.player_points,
+                tile_type=city.tile_type or tile_type,
+            )
+        return MapTile(x=cur_x, y=cur_y, type=tile_type, city=city_entry)
+
+    return map_chunks.viewport(
+        db,
+        world_id,
+        x - radius,
+        x + radius,
+        y - radius,
+        y + radius,
+        kind=f"public:{map_size}",
+        render=render,
     )
-    alliance_map = {alliance.id: alliance for alliance in alliances}
-
-    user_alliance_map = {}
-    for membership in memberships:
-        if membership.alliance_id in alliance_map:
-            user_alliance_map[membership.user_id] = alliance_map[
-                membership.alliance_id
-            ].name
-
-    city_map = {(city.x, city.y): city for city in cities}
-
-    tiles = []
-    for cur_x in range(min_x, max_x + 1):
-        for cur_y in range(min_y, max_y + 1):
-            if (
-                cur_x < 0
-                or cur_y < 0
-                or cur_x >= world.map_size
-                or cur_y >= world.map_size
-            ):
-                continue
-
-            tile_type = world_gen.get_tile_type(cur_x, cur_y)
-            city_entry = None
-
-            if (cur_x, cur_y) in city_map:
-                city = city_map[(cur_x, cur_y)]
-                owner_name = (
-                    user_map[city.owner_id].username
-                    if city.owner_id and city.owner_id in user_map
-                    else None
-                )
-                alliance_name = (
-                    user_alliance_map.get(city.owner_id) if city.owner_id else None
-                )
-                points = (
-                    ranking_service.calculate_player_points(
-                        db, user_map[city.owner_id], world_id
-                    )
-                    if city.owner_id and city.owner_id in user_map
-                    else 0
-                )
-
-                city_entry = PublicCityMapEntry(
-                    city_id=city.id,
-                    x=city.x,
-                    y=city.y,
-                    owner=_mask_name(owner_name),
-                    alliance=alliance_name,
-                    points=points,
-                    tile_type=city.tile_type or tile_type,
-                )
-
-            tiles.append(MapTile(x=cur_x, y=cur_y, type=tile_type, city=city_entry))
-
-    return tiles
 
 
 @router.get("/worlds", response_model=list[schemas.WorldRead])
@@ -230,10 +151,9 @@ def list_public_cities(world_id: int, db: Session = Depends(get_db)):
     )
     alliance_map = {alliance.id: alliance for alliance in alliances}
 
-    user_points: Dict[int, int] = {
-        user.id: ranking_service.calculate_player_points(db, user, world_id)
-        for user in users
-    }
+    user_points: Dict[int, int] = ranking_service.get_points_by_user(
+        db, world_id, user_map
+    )
 
     entries: List[PublicCityMapEntry] = []
     for city in cities:
@@ -263,13 +183,31 @@ def list_public_cities(world_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/ranking/players", response_model=list[schemas.PlayerRanking])
-def public_player_ranking(world_id: int, db: Session = Depends(get_db)):
-    return ranking_service.get_player_ranking(db, world_id)
+def public_player_ranking(
+    world_id: int,
+    limit: int = Query(
+        default=ranking_service.DEFAULT_RANKING_LIMIT,
+        ge=1,
+        le=ranking_service.MAX_RANKING_LIMIT,
+    ),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    return ranking_service.get_player_ranking(db, world_id, limit=limit, offset=offset)
 
 
 @router.get("/ranking/alliances", response_model=list[schemas.AllianceRanking])
-def public_alliance_ranking(world_id: int, db: Session = Depends(get_db)):
-    return ranking_service.get_alliance_ranking(db, world_id)
+def public_alliance_ranking(
+    world_id: int,
+    limit: int = Query(
+        default=ranking_service.DEFAULT_RANKING_LIMIT,
+        ge=1,
+        le=ranking_service.MAX_RANKING_LIMIT,
+    ),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    return ranking_service.get_alliance_ranking(db, world_id, limit=limit, offset=offset)
 
 
 @router.get("/troops")
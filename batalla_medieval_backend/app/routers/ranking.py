@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from .. import schemas
@@ -10,13 +10,31 @@ router = APIRouter(tags=["ranking"], dependencies=[Depends(require_world_access)
 
 
 @router.get("/players", response_model=list[schemas.PlayerRanking])
-def list_player_ranking(world_id: int, db: Session = Depends(get_db)):
-    return ranking_service.get_player_ranking(db, world_id)
+def list_player_ranking(
+    world_id: int,
+    limit: int = Query(
+        default=ranking_service.DEFAULT_RANKING_LIMIT,
+        ge=1,
+        le=ranking_service.MAX_RANKING_LIMIT,
+    ),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    return ranking_service.get_player_ranking(db, world_id, limit=limit, offset=offset)
 
 
 @router.get("/alliances", response_model=list[schemas.AllianceRanking])
-def list_alliance_ranking(world_id: int, db: Session = Depends(get_db)):
-    return ranking_service.get_alliance_ranking(db, world_id)
+def list_alliance_ranking(
+    world_id: int,
+    limit: int = Query(
+        default=ranking_service.DEFAULT_RANKING_LIMIT,
+        ge=1,
+        le=ranking_service.MAX_RANKING_LIMIT,
+    ),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    return ranking_service.get_alliance_ranking(db, world_id, limit=limit, offset=offset)
 
 
 @router.get("/search", response_model=list[schemas.UserPublic])
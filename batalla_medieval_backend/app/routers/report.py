@@ -1,21 +1,53 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
 from ..database import get_db
 from ..routers.auth import get_current_user
+from ..services import report as report_service
+from .world_access import require_world_access
 
 router = APIRouter(tags=["reports"])
 
 
-@router.get("/", response_model=list[schemas.ReportRead])
+@router.get("/", response_model=schemas.ReportFeed)
 def list_reports(
-    world_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
+    world_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
-    reports = (
-        db.query(models.Report)
-        .join(models.City, models.Report.city_id == models.City.id)
-        .filter(models.City.owner_id == current_user.id, models.Report.world_id == world_id)
-        .all()
+    reports, next_cursor = report_service.list_reports(
+        db, current_user.id, world_id, cursor=cursor, limit=limit
     )
-    return reports
+    return {"reports": reports, "next_cursor": next_cursor}
+
+
+@router.get("/unread", response_model=schemas.ReportUnread)
+def unread_reports(
+    since: Optional[str] = None,
+    db: Session = Depends(get_db),
+    membership: models.PlayerWorld = Depends(require_world_access),
+):
+    return report_service.unread_reports(db, membership, since)
+
+
+@router.post("/read", response_model=schemas.ReportUnread)
+def mark_reports_read(
+    cursor: str,
+    db: Session = Depends(get_db),
+    membership: models.PlayerWorld = Depends(require_world_access),
+):
+    return report_service.mark_read(db, membership, cursor)
+
+
+@router.get("/{report_id}", response_model=schemas.ReportRead)
+def get_report(
+    report_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return report_service.get_report(db, current_user.id, report_id)
@@ -35,6 +35,7 @@ def end_season(
         schemas.SeasonResultRead(
             user_id=result.user_id,
             alliance_id=result.alliance_id,
+            alliance_name=result.alliance_name,
             rank=result.rank,
             points=result.points,
             rewards=result.get_rewards(),
@@ -53,6 +54,7 @@ def get_season_info(db: Session = Depends(get_db)):
             schemas.SeasonResultRead(
                 user_id=result.user_id,
                 alliance_id=result.alliance_id,
+                alliance_name=result.alliance_name,
                 rank=result.rank,
                 points=result.points,
                 rewards=result.get_rewards(),
@@ -33,8 +33,7 @@ def available_units(
     if not city:
         raise error_response(404, "city_not_found", "City not found", {"city_id": city_id})
 
-    production.recalculate_resources(db, city)
-    db.expire(city, ["buildings"])
+    production.show_current_resources(db, city)
     return unit_catalog.get_availability(db, city)
 
 
@@ -2,13 +2,12 @@ import threading
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
 from ..database import get_db
 from ..routers.auth import get_current_user
-from ..services import balance, event as event_service
+from ..services import balance, event as event_service, wiki_search
 from ..utils import utc_now
 
 router = APIRouter(tags=["wiki"])
@@ -280,16 +279,17 @@ def ensure_builtin_articles(db: Session):
                     existing.category = article["category"]
                     existing.content_markdown = article["content_markdown"]
                     existing.updated_at = utc_now()
+                    wiki_search.prepare(existing)
                     db.add(existing)
                     changed = True
                 continue
-            db.add(
-                models.WikiArticle(
-                    title=article["title"],
-                    category=article["category"],
-                    content_markdown=article["content_markdown"],
-                )
+            created = models.WikiArticle(
+                title=article["title"],
+                category=article["category"],
+                content_markdown=article["content_markdown"],
             )
+            wiki_search.prepare(created)
+            db.add(created)
             changed = True
         if changed:
             db.commit()
@@ -314,22 +314,15 @@ def get_article(article_id: int, db: Session = Depends(get_db)):
     return article
 
 
-@router.get("/search", response_model=List[schemas.WikiArticleRead])
+@router.get("/search", response_model=schemas.WikiSearchPage)
 def search_articles(
     q: str | None = Query(default=None, description="Texto a buscar en título o contenido"),
+    limit: int = Query(default=20, ge=1, le=50),
+    offset: int = Query(default=0, ge=0),
     db: Session = Depends(get_db),
 ):
     ensure_builtin_articles(db)
-    query = db.query(models.WikiArticle)
-    if q:
-        pattern = f"%{q}%"
-        query = query.filter(
-            or_(
-                models.WikiArticle.title.ilike(pattern),
-                models.WikiArticle.content_markdown.ilike(pattern),
-            )
-        )
-    return query.order_by(models.WikiArticle.updated_at.desc()).all()
+    return wiki_search.search(db, q, limit=limit, offset=offset)
 
 
 @router.post("/create", response_model=schemas.WikiArticleRead)
@@ -340,9 +333,11 @@ def create_article(
 ):
     ensure_builtin_articles(db)
     article = models.WikiArticle(**payload.model_dump())
+    wiki_search.prepare(article)
     db.add(article)
     db.commit()
     db.refresh(article)
+    wiki_search.article_saved(db, article)
     return article
 
 
@@ -365,7 +360,9 @@ def edit_article(
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(article, field, value)
     article.updated_at = utc_now()
+    wiki_search.prepare(article)
     db.add(article)
     db.commit()
     db.refresh(article)
+    wiki_search.article_saved(db, article)
     return article
@@ -96,10 +96,15 @@ def get_map_tiles(
     if (max_x - min_x) * (max_y - min_y) > 2500:
         raise HTTPException(status_code=400, detail="Area too large")
 
+    map_size = (
+        db.query(models.World.map_size).filter(models.World.id == world_id).scalar()
+        or world_gen.DEFAULT_MAP_SIZE
+    )
+    terrain = world_gen.get_terrain_grid(map_size)
+
     tiles = []
     for x in range(min_x, max_x + 1):
-        for y in range(min_y, max_y + 1):
-            tile_type = world_gen.get_tile_type(x, y)
+        for y, tile_type in zip(range(min_y, max_y + 1), terrain.column(x, min_y, max_y)):
             tiles.append(schemas.MapTile(x=x, y=y, type=tile_type))
 
     return tiles
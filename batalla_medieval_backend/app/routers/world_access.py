@@ -15,14 +15,15 @@ def require_world_access(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ) -> models.PlayerWorld:
-    """Require durable membership before exposing arbitrary world-scoped data."""
+    """Require durable membership of an active world before exposing its data."""
 
     try:
-        return world_membership.require_world_membership(
+        membership = world_membership.require_world_membership(
             db,
             user_id=current_user.id,
             world_id=world_id,
         )
+        world_membership.ensure_world_open(db.get(models.World, world_id))
     except world_membership.WorldAccessDeniedError as exc:
         raise error_response(
             403,
@@ -30,3 +31,11 @@ def require_world_access(
             "You have not joined this world",
             {"world_id": world_id},
         ) from exc
+    except world_membership.WorldNotAvailableError as exc:
+        raise error_response(
+            409,
+            "world_inactive",
+            "This world is no longer active",
+            {"world_id": world_id},
+        ) from exc
+    return membership
@@ -3,30 +3,58 @@
 The HTTP process must never start this scheduler. Production workers coordinate
 through PostgreSQL advisory locks so that only one process executes a given
 periodic job at a time, even when multiple worker replicas are running.
+
+Queue processing is event driven: each worker keeps a min-heap of upcoming
+due times and sleeps until the earliest one, woken early by PostgreSQL
+``LISTEN/NOTIFY`` when a new item is committed. Periodic jobs that are not
+tied to a due time (barbarian growth, history retention) stay on APScheduler.
+
+With ``QUEUE_SHARD_COUNT`` above one, queue work is split into shards (see
+``services.sharding``), each guarded by its own advisory lock. Every run a
+replica walks all shards from its own starting offset and processes the ones
+no other replica currently holds, so replicas add throughput instead of only
+standing by.
 """
 
 from __future__ import annotations
 
 import logging
+import os
+import time
 from contextlib import contextmanager
-from threading import Lock
-from typing import Iterator
+from threading import Event, Lock, Thread
+from typing import Iterator, List
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy import text
 
+from . import models
+from .config import get_settings
 from .database import SessionLocal, engine
-from .services import barbarian_ai, queue as queue_service
+from .due_times import DueTimeQueue, LatenessMetrics, as_utc, listen_for_due_times
+from .pg_notify import NotificationListener
+from .services import anticheat_signals, barbarian_ai, message_bus, notification_outbox, progress_events, retention
+from .services import queue as queue_service
+from .services import event as event_service
+from .services import map_chunks  # noqa: F401  Registers map invalidation hooks.
+from .services.sharding import QueueShard, active_city_clause, active_movement_clause, all_shards
+from .utils import utc_now
 
 logger = logging.getLogger(__name__)
 
 scheduler = BackgroundScheduler(timezone="UTC")
 
+MAX_QUEUE_SHARDS = 64
+
 # Stable signed 64-bit keys reserved for Batallas Medievales background jobs.
 _JOB_LOCK_KEYS = {
     "barbarian_ai": 42130001,
     "queue_processing": 42130002,
+    "event_announcements": 42130003,
+    "anticheat_signals": 42130004,
+    "retention": 42130005,
+    **{f"queue_processing:{index}": 42131000 + index for index in range(MAX_QUEUE_SHARDS)},
 }
 _LOCAL_LOCKS = {name: Lock() for name in _JOB_LOCK_KEYS}
 
@@ -104,15 +132,275 @@ def run_barbarian_ai_job() -> bool:
     return _run_database_job("barbarian_ai", barbarian_ai.process_barbarian_growth)
 
 
+def run_event_announcement_job() -> bool:
+    """Announce world events whose start time has passed."""
+
+    return _run_database_job("event_announcements", event_service.announce_started_events)
+
+
+def run_anticheat_signal_job() -> bool:
+    """Analyze the anti-cheat signals queued by player actions."""
+
+    batch_size = get_settings().anticheat_signal_batch_size
+    return _run_database_job(
+        "anticheat_signals",
+        lambda db: anticheat_signals.process_signals(db, batch_size),
+    )
+
+
+def run_retention_job() -> bool:
+    """Archive and remove history rows older than their retention."""
+
+    return _run_database_job("retention", retention.run)
+
+
+class ShardMetrics:
+    """Per-shard throughput and lag of the queue runs made by this process."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._shards: dict[str, dict] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shards.clear()
+
+    def observe(self, shard_name: str, *, items: int, seconds: float, lag_seconds: float) -> dict:
+        with self._lock:
+            entry = self._shards.setdefault(
+                shard_name,
+                {"runs": 0, "items": 0, "busy_seconds": 0.0, "last_lag_seconds": 0.0, "max_lag_seconds": 0.0},
+            )
+            entry["runs"] += 1
+            entry["items"] += items
+            entry["busy_seconds"] += seconds
+            entry["last_lag_seconds"] = lag_seconds
+            entry["max_lag_seconds"] = max(entry["max_lag_seconds"], lag_seconds)
+            return dict(entry)
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            result = {}
+            for name, entry in self._shards.items():
+                busy = entry["busy_seconds"]
+                result[name] = {
+                    **entry,
+                    "items_per_second": entry["items"] / busy if busy > 0 else 0.0,
+                }
+            return result
+
+
+shard_metrics = ShardMetrics()
+
+
+def _process_shard(db, shard: QueueShard) -> None:
+    started = time.perf_counter()
+    oldest = queue_service.oldest_due_time(db, utc_now(), shard=shard)
+    lag_seconds = 0.0
+    if oldest is not None:
+        lag_seconds = max(0.0, (utc_now() - as_utc(oldest)).total_seconds())
+
+    finished = queue_service.process_all_queues(db, shard=shard)
+    items = sum(len(values) for values in finished.values())
+    entry = shard_metrics.observe(
+        shard.name,
+        items=items,
+        seconds=time.perf_counter() - started,
+        lag_seconds=lag_seconds,
+    )
+    if items:
+        logger.info("queue_shard_processed", extra={"shard": shard.name, "items": items, **entry})
+
+
+# Replicas start their walk over the shards at different offsets so that
+# concurrent runs rarely contend for the same lock.
+_shard_offset = os.getpid()
+
+
 def run_queue_processing_job() -> bool:
-    """Process due building, troop and movement queues once per interval."""
+    """Process due building, troop and movement queues once.
+
+    In sharded mode this returns ``True`` only when every shard was processed
+    by this run; shards held by another replica are left to that replica.
+    """
+
+    global _shard_offset
+
+    settings = get_settings()
+    if settings.queue_shard_count <= 1:
+        return _run_database_job("queue_processing", queue_service.process_all_queues)
+
+    shards = all_shards(settings.queue_shard_count, settings.queue_shard_mode)
+    _shard_offset += 1
+    start = _shard_offset % len(shards)
+    processed = 0
+    for shard in shards[start:] + shards[:start]:
+        if _run_database_job(shard.name, lambda db, shard=shard: _process_shard(db, shard)):
+            processed += 1
+    return processed == len(shards)
+
+
+def load_due_times(db, limit: int) -> List:
+    """Return up to ``limit`` upcoming due times per queue table.
+
+    Like the queue job itself, this leaves out the queues of inactive worlds.
+    """
+
+    building_due = (
+        db.query(models.BuildingQueue.finish_time)
+        .filter(active_city_clause(models.BuildingQueue.city_id))
+        .order_by(models.BuildingQueue.finish_time.asc())
+        .limit(limit)
+        .all()
+    )
+    troop_due = (
+        db.query(models.TroopQueue.finish_time)
+        .filter(active_city_clause(models.TroopQueue.city_id))
+        .order_by(models.TroopQueue.finish_time.asc())
+        .limit(limit)
+        .all()
+    )
+    movement_due = (
+        db.query(models.Movement.arrival_time)
+        .filter(models.Movement.status == "ongoing", active_movement_clause())
+        .order_by(models.Movement.arrival_time.asc())
+        .limit(limit)
+        .all()
+    )
+    return [row[0] for row in (*building_due, *troop_due, *movement_due)]
+
+
+class QueueWakeupLoop:
+    """Run the queue job exactly when the earliest known item becomes due.
+
+    The heap is refilled from the database after every run and at least every
+    ``resync_seconds``, so it only has to be a good hint: a lost notification
+    or an item written by a script without the ORM hook is picked up on the
+    next resync. Without a notification channel (SQLite) the resync interval
+    is ``poll_seconds`` instead.
+    """
+
+    def __init__(
+        self,
+        *,
+        poll_seconds: float,
+        resync_seconds: float,
+        preload_limit: int,
+        run_job=None,
+    ) -> None:
+        self.due_times = DueTimeQueue()
+        self.lateness = LatenessMetrics()
+        self._poll_seconds = poll_seconds
+        self._resync_seconds = resync_seconds
+        self._preload_limit = preload_limit
+        self._run_job = run_job or run_queue_processing_job
+        self._listener: NotificationListener | None = None
+        self._stop = Event()
+        self._thread: Thread | None = None
+        self._stalled = False
+
+    def _refresh(self) -> None:
+        db = SessionLocal()
+        try:
+            self.due_times.replace(load_due_times(db, self._preload_limit))
+        finally:
+            db.close()
+
+    def _wait(self, timeout: float) -> None:
+        if self._listener is not None:
+            # Bounded so that a stop request is noticed promptly.
+            self._listener.wait(min(timeout, self._poll_seconds))
+        else:
+            self._stop.wait(timeout)
+
+    def tick(self) -> bool:
+        """Run the queue job if something is due; return whether it ran."""
+
+        now = utc_now()
+        due = self.due_times.pop_due(now)
+        if not due:
+            return False
+        ran = self._run_job()
+        if ran:
+            resolved_at = utc_now()
+            self.lateness.observe(due, resolved_at)
+            logger.info("queue_lateness", extra=self.lateness.snapshot())
+        self._refresh()
+        # Another replica owns the lock, the job failed, or the run left items
+        # that were already due: they are retried after a poll interval, not
+        # immediately.
+        next_due = self.due_times.peek()
+        self._stalled = not ran or (next_due is not None and next_due <= now)
+        return ran
+
+    def run(self) -> None:
+        resync_seconds = self._poll_seconds
+        if engine.dialect.name == "postgresql":
+            try:
+                self._listener = listen_for_due_times(engine, self.due_times.push)
+                resync_seconds = self._resync_seconds
+            except Exception:
+                logger.exception("Due-time LISTEN unavailable; polling instead")
+
+        last_resync = utc_now()
+        self._refresh()
+        while not self._stop.is_set():
+            try:
+                self.tick()
+                now = utc_now()
+                if (now - last_resync).total_seconds() >= resync_seconds:
+                    self._refresh()
+                    last_resync = now
+                    # Items that fell due between runs are resolved right away.
+                    self.tick()
+
+                now = utc_now()
+                timeout = resync_seconds - (now - last_resync).total_seconds()
+                next_due = self.due_times.peek()
+                if next_due is not None:
+                    until_due = (next_due - now).total_seconds()
+                    if self._stalled:
+                        until_due = max(until_due, self._poll_seconds)
+                    timeout = min(timeout, until_due)
+                self._wait(max(timeout, 0.0))
+            except Exception:
+                logger.exception("Queue wake-up loop iteration failed")
+                self._stop.wait(self._poll_seconds)
+
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self.run, name="queue-wakeup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
 
-    return _run_database_job("queue_processing", queue_service.process_all_queues)
+_queue_loop: QueueWakeupLoop | None = None
+
+
+def get_queue_lateness() -> dict:
+    """Return lateness statistics of this worker's queue runs."""
+
+    if _queue_loop is None:
+        return LatenessMetrics().snapshot()
+    return _queue_loop.lateness.snapshot()
 
 
 def start_scheduler() -> None:
     """Configure and start the worker scheduler once in this process."""
 
+    global _queue_loop
+
     if scheduler.running:
         return
 
@@ -126,24 +414,65 @@ def start_scheduler() -> None:
         max_instances=1,
         misfire_grace_time=60,
     )
+
+    scheduler.add_job(
+        run_event_announcement_job,
+        trigger=IntervalTrigger(minutes=1),
+        id="event_announcements",
+        name="World event announcements",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        misfire_grace_time=60,
+    )
+
+    settings = get_settings()
+    scheduler.add_job(
+        run_anticheat_signal_job,
+        trigger=IntervalTrigger(seconds=settings.anticheat_signal_seconds),
+        id="anticheat_signals",
+        name="Anti-cheat signal analysis",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        misfire_grace_time=60,
+    )
+
     scheduler.add_job(
-        run_queue_processing_job,
-        trigger=IntervalTrigger(seconds=5),
-        id="queue_processing",
-        name="Queue Processing",
+        run_retention_job,
+        trigger=IntervalTrigger(minutes=settings.retention_interval_minutes),
+        id="retention",
+        name="History retention and archival",
         replace_existing=True,
         coalesce=True,
         max_instances=1,
-        misfire_grace_time=15,
+        misfire_grace_time=600,
+    )
+
+    _queue_loop = QueueWakeupLoop(
+        poll_seconds=settings.queue_poll_interval_seconds,
+        resync_seconds=settings.queue_resync_interval_seconds,
+        preload_limit=settings.queue_preload_limit,
     )
 
     scheduler.start()
+    _queue_loop.start()
+    notification_outbox.start_dispatcher()
     logger.info("Dedicated game scheduler started")
 
 
 def shutdown_scheduler() -> None:
     """Stop the scheduler without waiting for the process to be killed."""
 
+    global _queue_loop
+
+    if _queue_loop is not None:
+        _queue_loop.stop()
+        _queue_loop = None
     if scheduler.running:
         scheduler.shutdown(wait=True)
         logger.info("Dedicated game scheduler stopped")
+    notification_outbox.stop_dispatcher()
+    progress_events.flush_progress()
+    # Deliver real-time events still buffered by this worker.
+    message_bus.get_publisher().flush()
@@ -20,7 +20,7 @@ from .queue import (
     TroopQueueCreate,
     TroopQueueRead,
 )
-from .report import ReportCreate, ReportRead
+from .report import ReportCreate, ReportFeed, ReportRead, ReportSummary, ReportUnread
 from .oasis import OasisRead
 from .notification import NotificationRead
 from .user import Token, TokenData, UserCreate, UserRead
@@ -47,7 +47,7 @@ from .conquest import ConquestRequest, ConquestResult, FoundCityRequest
 from .protection import ProtectionStatus
 from .ranking import AllianceRanking, PlayerRanking
 from .log import LogCreate, LogRead
-from .market import MarketOfferCreate, MarketOfferResponse, TransportRequest
+from .market import MarketOfferCreate, MarketOfferResponse, MarketOrderBook, TransportRequest
 from .hero import HeroRead, HeroDistributePoints
 from .adventure import AdventureRead, AdventureClaimResponse
 from .season import SeasonCreate, SeasonInfo, SeasonRead, SeasonResultRead
@@ -79,8 +79,10 @@ from .wiki import (
     WikiArticleCreate,
     WikiArticleRead,
     WikiArticleUpdate,
+    WikiSearchPage,
+    WikiSearchResult,
 )
-from .chat import ChatMessageRead, ChatMessageCreate
+from .chat import ChatFilterTermRead, ChatFilterTermsCreate, ChatMessageRead, ChatMessageCreate
 
 __all__ = [
     "UserCreate",
@@ -103,6 +105,9 @@ __all__ = [
     "QueueStatus",
     "ReportCreate",
     "ReportRead",
+    "ReportFeed",
+    "ReportSummary",
+    "ReportUnread",
     "NotificationRead",
     "SpyReportCreate",
     "SpyReportRead",
@@ -130,6 +135,7 @@ __all__ = [
     "LogRead",
     "MarketOfferCreate",
     "MarketOfferResponse",
+    "MarketOrderBook",
     "TransportRequest",
     "HeroRead",
     "HeroDistributePoints",
@@ -174,7 +180,11 @@ __all__ = [
     "WikiArticleCreate",
     "WikiArticleRead",
     "WikiArticleUpdate",
+    "WikiSearchPage",
+    "WikiSearchResult",
     "WIKI_CATEGORIES",
+    "ChatFilterTermRead",
+    "ChatFilterTermsCreate",
     "ChatMessageRead",
     "ChatMessageCreate",
     "MapResponse",
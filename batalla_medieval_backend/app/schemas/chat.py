@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ChatMessageBase(BaseModel):
@@ -26,3 +26,19 @@ class ChatMessageRead(BaseModel):
     receiver_id: Optional[int]
     content: str
     timestamp: datetime
+
+
+class ChatFilterTermsCreate(BaseModel):
+    terms: List[str] = Field(min_length=1, max_length=20_000)
+    world_id: Optional[int] = None
+    language: Optional[str] = None
+
+
+class ChatFilterTermRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    term: str
+    world_id: Optional[int]
+    language: Optional[str]
+    created_at: datetime
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Literal
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -22,11 +22,17 @@ class MarketOfferResponse(MarketOfferBase):
     id: int
     city_id: int
     world_id: int
+    ratio: float
     created_at: datetime
     city_name: str | None = None
     owner_name: str | None = None
 
 
+class MarketOrderBook(BaseModel):
+    offers: List[MarketOfferResponse]
+    next_cursor: Optional[str] = None
+
+
 class TransportRequest(BaseModel):
     target_city_id: int
     wood: int = Field(0, ge=0)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -16,8 +17,32 @@ class ReportCreate(ReportBase):
     pass
 
 
-class ReportRead(ReportBase):
+class ReportSummary(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
+    city_id: int | None = None
+    world_id: int
+    report_type: str
+    outcome: str | None = None
+    loot_total: int = 0
+    attacker_city_id: int | None = None
+    defender_city_id: int | None = None
+    attacker_name: str | None = None
+    defender_name: str | None = None
     created_at: datetime
+
+
+class ReportRead(ReportSummary):
+    content: str
+
+
+class ReportFeed(BaseModel):
+    reports: List[ReportSummary]
+    next_cursor: Optional[str] = None
+
+
+class ReportUnread(BaseModel):
+    unread: int
+    latest_cursor: Optional[str] = None
+    read_cursor: Optional[str] = None
@@ -13,6 +13,8 @@ class SeasonBase(BaseModel):
     start_date: datetime
     end_date: Optional[datetime] = None
     is_active: bool
+    rollover_stage: Optional[str] = None
+    rollover_rows: int = 0
 
 
 class SeasonCreate(BaseModel):
@@ -29,6 +31,7 @@ class SeasonResultRead(BaseModel):
 
     user_id: int
     alliance_id: Optional[int] = None
+    alliance_name: Optional[str] = None
     rank: int
     points: int
     rewards: List[str]
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Literal
+from typing import List, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -40,3 +40,20 @@ class WikiArticleRead(WikiArticleBase):
     id: int
     created_at: datetime
     updated_at: datetime
+
+
+class WikiSearchResult(BaseModel):
+    id: int
+    title: str
+    category: Literal[
+        "buildings", "troops", "combat", "economy", "espionage", "events", "beginner"
+    ]
+    updated_at: datetime
+    snippet: str
+    score: float | None = None
+
+
+class WikiSearchPage(BaseModel):
+    results: List[WikiSearchResult]
+    total: int
+    next_offset: int | None = None
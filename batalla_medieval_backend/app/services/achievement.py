@@ -1,50 +1,74 @@
-from typing import Iterable, List
+from typing import Dict, Iterable, Tuple
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from .. import models
+from . import progress_events
 
 
-def _ensure_progress_entries(
-    db: Session, user_id: int, achievements: Iterable[models.Achievement]
-) -> List[models.AchievementProgress]:
-    achievement_ids = [achievement.id for achievement in achievements]
-    existing_progress = (
-        db.query(models.AchievementProgress)
-        .filter(
-            models.AchievementProgress.user_id == user_id,
-            models.AchievementProgress.achievement_id.in_(achievement_ids),
-        )
-        .all()
+def _progress_rows(
+    db: Session, user_ids: Iterable[int], achievement_ids: Iterable[int], *, lock: bool = False
+) -> Dict[Tuple[int, int], models.AchievementProgress]:
+    """Progress rows of ``user_ids`` for ``achievement_ids``, adding the missing ones."""
+
+    user_ids, achievement_ids = list(user_ids), list(achievement_ids)
+    query = db.query(models.AchievementProgress).filter(
+        models.AchievementProgress.user_id.in_(user_ids),
+        models.AchievementProgress.achievement_id.in_(achievement_ids),
     )
-    progress_by_id = {progress.achievement_id: progress for progress in existing_progress}
-
-    created = []
-    for achievement_id in achievement_ids:
-        if achievement_id not in progress_by_id:
-            progress = models.AchievementProgress(
-                user_id=user_id,
-                achievement_id=achievement_id,
-                current_progress=0,
-                status="pending",
-            )
-            db.add(progress)
-            created.append(progress)
-            progress_by_id[achievement_id] = progress
-    if created:
-        db.commit()
-        for progress in created:
-            db.refresh(progress)
-    return [progress_by_id[aid] for aid in achievement_ids]
+    if lock:
+        query = query.with_for_update()
+    rows = {(progress.user_id, progress.achievement_id): progress for progress in query}
+    for user_id in user_ids:
+        for achievement_id in achievement_ids:
+            if (user_id, achievement_id) not in rows:
+                progress = models.AchievementProgress(
+                    user_id=user_id,
+                    achievement_id=achievement_id,
+                    current_progress=0,
+                    status="pending",
+                )
+                db.add(progress)
+                rows[(user_id, achievement_id)] = progress
+    return rows
 
 
 def get_user_achievements(db: Session, user: models.User) -> list[tuple[models.Achievement, models.AchievementProgress]]:
-    achievements = db.query(models.Achievement).all()
+    achievements = db.query(models.Achievement).order_by(models.Achievement.id).all()
     if not achievements:
         return []
-    progress_entries = _ensure_progress_entries(db, user.id, achievements)
-    return list(zip(achievements, progress_entries))
+    rows = _progress_rows(db, [user.id], [achievement.id for achievement in achievements])
+    entries = [(achievement, rows[(user.id, achievement.id)]) for achievement in achievements]
+    if any(progress.id is None for _, progress in entries):
+        db.commit()
+    return entries
+
+
+def apply_progress(
+    db: Session,
+    changes: Dict[int, Tuple[int | float | None, int | float | None]],
+    rules: Iterable[progress_events.AchievementRule],
+    *,
+    lock: bool = False,
+) -> None:
+    """Apply ``(increment, absolute_value)`` per player to the achievements in ``rules``; no commit."""
+
+    rules = list(rules)
+    if not rules or not changes:
+        return
+    rows = _progress_rows(db, changes, [rule.id for rule in rules], lock=lock)
+    for user_id, (increment, absolute_value) in changes.items():
+        for rule in rules:
+            progress = rows[(user_id, rule.id)]
+            new_progress = progress.current_progress or 0
+            if absolute_value is not None:
+                new_progress = max(new_progress, int(absolute_value))
+            if increment is not None:
+                new_progress += int(increment)
+            progress.current_progress = min(new_progress, rule.requirement_value)
+            if progress.status == "pending" and progress.current_progress >= rule.requirement_value:
+                progress.status = "completed"
 
 
 def update_achievement_progress(
@@ -55,26 +79,10 @@ def update_achievement_progress(
     increment: int | float | None = None,
     absolute_value: int | float | None = None,
 ) -> None:
-    achievements = (
-        db.query(models.Achievement)
-        .filter(models.Achievement.requirement_type == requirement_type)
-        .all()
-    )
-    if not achievements:
+    rules = progress_events.definitions(db).achievements.get(requirement_type)
+    if not rules:
         return
-    progress_entries = _ensure_progress_entries(db, user_id, achievements)
-
-    for achievement, progress in zip(achievements, progress_entries):
-        new_progress = progress.current_progress
-        if absolute_value is not None:
-            new_progress = max(new_progress, int(absolute_value))
-        if increment is not None:
-            new_progress += int(increment)
-        new_progress = min(new_progress, achievement.requirement_value)
-        progress.current_progress = new_progress
-        if progress.status != "claimed" and progress.current_progress >= achievement.requirement_value:
-            progress.status = "completed"
-        db.add(progress)
+    apply_progress(db, {user_id: (increment, absolute_value)}, rules)
     db.commit()
 
 
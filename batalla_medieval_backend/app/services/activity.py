@@ -0,0 +1,125 @@
+"""Write-behind buffer for ``users.last_active_at``.
+
+Authenticated requests record the time they saw a user here instead of
+updating the row. A background thread coalesces the timestamps per user and
+writes them with a single ``UPDATE`` every ``activity_flush_seconds``; the
+web process flushes once more on shutdown. A crash loses at most one interval
+of last-seen times, which only feed inactivity metrics and bot cleanup.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from threading import Condition, Lock, Thread
+from typing import Dict
+
+from sqlalchemy import case, update
+
+from .. import models
+from ..config import get_settings
+from ..database import engine
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    def __init__(self, bind, flush_seconds: float) -> None:
+        self._bind = bind
+        self._flush_seconds = flush_seconds
+        self._pending: Dict[int, datetime] = {}
+        self._condition = Condition()
+        self._thread: Thread | None = None
+        self._stopped = False
+        self.flushed_rows = 0
+        self.flushes = 0
+
+    def touch(self, user_id: int, seen_at: datetime) -> None:
+        with self._condition:
+            current = self._pending.get(user_id)
+            if current is None or seen_at > current:
+                self._pending[user_id] = seen_at
+            if self._thread is None and not self._stopped:
+                self._thread = Thread(target=self._run, name="activity-flush", daemon=True)
+                self._thread.start()
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write every pending timestamp in one statement; return rows written."""
+
+        with self._condition:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        statement = (
+            update(models.User)
+            .where(models.User.id.in_(batch))
+            .values(last_active_at=case(batch, value=models.User.id))
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            with self._bind.begin() as connection:
+                connection.execute(statement)
+        except Exception:
+            logger.exception("Failed to flush last-seen times of %s users", len(batch))
+            with self._condition:
+                for user_id, seen_at in batch.items():
+                    current = self._pending.get(user_id)
+                    if current is None or seen_at > current:
+                        self._pending[user_id] = seen_at
+            return 0
+        self.flushes += 1
+        self.flushed_rows += len(batch)
+        return len(batch)
+
+    def stop(self) -> None:
+        """Stop the background thread and write what is still pending."""
+
+        with self._condition:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                self._condition.wait(self._flush_seconds)
+                if self._stopped:
+                    return
+            self.flush()
+
+
+_buffer: ActivityBuffer | None = None
+_buffer_lock = Lock()
+
+
+def get_buffer() -> ActivityBuffer:
+    global _buffer
+
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = ActivityBuffer(engine, get_settings().activity_flush_seconds)
+        return _buffer
+
+
+def record_activity(user_id: int, seen_at: datetime) -> None:
+    get_buffer().touch(user_id, seen_at)
+
+
+def flush_activity() -> None:
+    """Stop this process's buffer after writing what it holds (shutdown hook)."""
+
+    global _buffer
+
+    with _buffer_lock:
+        buffer, _buffer = _buffer, None
+    if buffer is not None:
+        buffer.stop()
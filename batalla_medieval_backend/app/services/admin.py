@@ -129,6 +129,8 @@ def set_building_level(
     else:
         building.level = new_level
 
+    if city.owner_id:
+        ranking.refresh_player_score(db, city.owner_id, city.world_id)
     log_action(
         db,
         admin_user.id,
@@ -161,6 +163,8 @@ def set_troop_amounts(
             troop.quantity = quantity
         updated_troops.append(troop)
 
+    if city.owner_id:
+        ranking.refresh_player_score(db, city.owner_id, city.world_id)
     log_action(db, admin_user.id, "set_troop_amounts", {"city_id": city_id, "troops": troop_amounts})
     db.commit()
     for troop in updated_troops:
@@ -226,6 +230,7 @@ def create_city(
     db.commit()
     db.refresh(city)
     production.recalculate_resources(db, city)
+    ranking.refresh_player_score(db, owner.id, world.id)
     log_action(
         db,
         admin_user.id,
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from .. import models
 from ..utils import utc_now
+from . import retention
 
 
 WELCOME_MESSAGE_SUBJECT = "Welcome to Batalla Medieval!"
@@ -64,7 +65,8 @@ def _delete_old_logs(db: Session, retention_days: int = 90) -> str:
         .filter(models.AdminBotLog.timestamp < cutoff)
         .delete()
     )
-    deleted_user_logs = db.query(models.Log).filter(models.Log.timestamp < cutoff).delete()
+    # Player logs are audit data: archive them like the retention job does.
+    deleted_user_logs = retention.expire(db, "logs", cutoff)
     _log_action(
         db,
         "cleanup_logs",
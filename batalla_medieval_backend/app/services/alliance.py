@@ -550,8 +550,11 @@ def send_mass_message(
         notification_service.create_notification(
             db,
             mem.user,
-            "New Alliance Message",
-            f"Alliance message: {subject}",
+            title="New Alliance Message",
+            body=f"Alliance message: {subject}",
+            notification_type="alliance_message",
+            allow_email=False,
+            commit=False,
         )
         count += 1
 
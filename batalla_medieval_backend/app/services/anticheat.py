@@ -1,11 +1,19 @@
 from __future__ import annotations
 
-from datetime import timedelta
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+
 from sqlalchemy.orm import Session
 
 from .. import models
+from ..due_times import as_utc
 from ..utils import utc_now
 
+# Kinds of ``AntiCheatSignal`` rows.
+ACTION = "action"
+MOVEMENT = "movement"
+
 
 def _persist(db: Session, *instances: object):
     for instance in instances:
@@ -48,10 +56,53 @@ def log_action(db: Session, user: models.User, action: str, details: str) -> mod
     return log
 
 
+class ActionClock:
+    """Last action time per user seen by this process, bounded LRU.
+
+    ``users.last_action_at`` is only written by the signal consumer, seconds
+    later, so the speed check reads this cache first. Actions of one user
+    spread over several web workers are compared with the persisted value.
+    """
+
+    def __init__(self, max_users: int = 100_000) -> None:
+        self._max_users = max_users
+        self._last: "OrderedDict[int, datetime]" = OrderedDict()
+        self._lock = Lock()
+
+    def swap(self, user_id: int, now: datetime) -> datetime | None:
+        """Record ``now`` for ``user_id`` and return the previous time."""
+
+        with self._lock:
+            previous = self._last.pop(user_id, None)
+            self._last[user_id] = now
+            if len(self._last) > self._max_users:
+                self._last.popitem(last=False)
+        return previous
+
+    def reset(self) -> None:
+        with self._lock:
+            self._last.clear()
+
+
+action_clock = ActionClock()
+
+
+def _signal(db: Session, user: models.User, kind: str, payload: dict) -> None:
+    """Queue ``payload`` for the consumer in the caller's transaction."""
+
+    db.add(models.AntiCheatSignal(user_id=user.id, kind=kind, payload=payload))
+
+
 def check_action_speed(db: Session, user: models.User, action_name: str):
+    """Freeze bots acting faster than a human could; no query unless flagged."""
+
     now = utc_now()
-    if user.last_action_at:
-        delta = (now - user.last_action_at).total_seconds()
+    previous = action_clock.swap(user.id, now)
+    if user.last_action_at is not None:
+        persisted = as_utc(user.last_action_at)
+        previous = persisted if previous is None else max(previous, persisted)
+    if previous is not None:
+        delta = (now - previous).total_seconds()
         if delta < 0.1:
             flag_violation(
                 db,
@@ -60,30 +111,7 @@ def check_action_speed(db: Session, user: models.User, action_name: str):
                 "critical",
                 f"Actions executed too quickly ({delta * 1000:.1f}ms) during {action_name}",
             )
-    user.last_action_at = now
-    db.add(user)
-    db.commit()
-
-
-def check_repeated_actions(db: Session, user: models.User, signature: str):
-    recent_logs = (
-        db.query(models.Log)
-        .filter(models.Log.user_id == user.id, models.Log.action == signature)
-        .order_by(models.Log.timestamp.desc())
-        .limit(5)
-        .all()
-    )
-    if len(recent_logs) >= 4:
-        newest = recent_logs[0].timestamp
-        oldest = recent_logs[-1].timestamp
-        if (newest - oldest) <= timedelta(seconds=5):
-            flag_violation(
-                db,
-                user,
-                "bot_detection",
-                "high",
-                f"Detected repeating pattern for action {signature} ({len(recent_logs)}x in 5s)",
-            )
+    _signal(db, user, ACTION, {"action": action_name})
 
 
 def check_multiaccount_ip(db: Session, user: models.User, client_ip: str | None):
@@ -108,43 +136,6 @@ def check_multiaccount_ip(db: Session, user: models.User, client_ip: str | None)
     db.commit()
 
 
-def check_repeated_account_interactions(
-    db: Session, origin_city: models.City, target_city: models.City, movement_type: str
-):
-    # Multi-account heuristics only make sense between two player-owned cities.
-    # Barbarian villages deliberately have owner_id=None.
-    if origin_city.owner is None or target_city.owner is None:
-        return
-
-    recent = (
-        db.query(models.Movement)
-        .filter(
-            models.Movement.origin_city_id == origin_city.id,
-            models.Movement.target_city_id == target_city.id,
-            models.Movement.movement_type == movement_type,
-        )
-        .order_by(models.Movement.created_at.desc())
-        .limit(5)
-        .all()
-    )
-    if len(recent) >= 4:
-        timestamps = [mv.arrival_time for mv in recent if mv.arrival_time]
-        if len(timestamps) >= 2:
-            intervals = [
-                abs((timestamps[i] - timestamps[i + 1]).total_seconds())
-                for i in range(len(timestamps) - 1)
-            ]
-            if intervals and max(intervals) - min(intervals) < 1:
-                flag_violation(
-                    db,
-                    origin_city.owner,
-                    "multiaccount_actions",
-                    "high",
-                    f"Repeated identical {movement_type} actions between "
-                    f"{origin_city.owner.username} and {target_city.owner.username}",
-                )
-
-
 def check_movement_legitimacy(
     db: Session,
     origin_city: models.City,
@@ -154,13 +145,21 @@ def check_movement_legitimacy(
     speed_used: float,
     spy_count: int = 0,
 ):
+    """Flag impossible arrivals now and queue the movement for the consumer.
+
+    The arrival check only needs the arguments and freezes synchronously.
+    Pattern and population checks need history, so they run in
+    ``anticheat_signals`` on the worker; the troops at home are recorded here,
+    before the movement reserves any, like the synchronous check did.
+    """
+
     if origin_city.owner is None:
         return
 
     now = utc_now()
     distance = ((origin_city.x - target_city.x) ** 2 + (origin_city.y - target_city.y) ** 2) ** 0.5
     min_hours = distance / max(speed_used, 0.01)
-    actual_hours = max(0.0, (arrival_time - now).total_seconds() / 3600)
+    actual_hours = max(0.0, (as_utc(arrival_time) - now).total_seconds() / 3600)
     if actual_hours + 0.01 < min_hours:
         flag_violation(
             db,
@@ -170,30 +169,21 @@ def check_movement_legitimacy(
             f"Arrival time {arrival_time} too fast for distance {distance:.2f} at speed {speed_used}",
         )
 
-    total_troops = sum(troop.quantity for troop in origin_city.troops)
-    if total_troops > origin_city.population_max:
-        flag_violation(
-            db,
-            origin_city.owner,
-            "fake_attack",
-            "high",
-            f"Troop count {total_troops} exceeds population {origin_city.population_max}",
-        )
-
-    check_repeated_account_interactions(db, origin_city, target_city, movement_type)
-
-    signature = f"movement:{movement_type}:{origin_city.id}->{target_city.id}"
-    log_action(db, origin_city.owner, signature, f"Scheduled arrival at {arrival_time}")
-    check_repeated_actions(db, origin_city.owner, signature)
-
-    if movement_type == "spy" and spy_count <= 0:
-        flag_violation(
-            db,
-            origin_city.owner,
-            "spy_exploit",
-            "medium",
-            "Invalid spy count provided",
-        )
+    _signal(
+        db,
+        origin_city.owner,
+        MOVEMENT,
+        {
+            "origin_city_id": origin_city.id,
+            "target_city_id": target_city.id,
+            "target_owner_id": target_city.owner_id,
+            "movement_type": movement_type,
+            "arrival_time": as_utc(arrival_time).isoformat(),
+            "spy_count": spy_count,
+            "origin_troops": sum(troop.quantity for troop in origin_city.troops),
+            "population_max": origin_city.population_max,
+        },
+    )
 
 
 def check_spy_result(db: Session, attacker: models.User, success_chance: float, success: bool):
@@ -0,0 +1,271 @@
+"""Sliding-window anti-cheat detectors fed by ``anti_cheat_signals``.
+
+Dispatch paths only run the checks that need no history (see
+``services.anticheat``) and queue a signal row in their own transaction. The
+worker drains the table every ``ANTICHEAT_SIGNAL_SECONDS`` in id order and
+rebuilds, for each batch, the short windows the detectors need from the
+audit logs earlier batches wrote (one ``movement:<type>:<origin>-><target>``
+row per movement, holding its arrival time):
+
+* the last five times of each signature of a user: four within five seconds
+  is a bot pattern;
+* the last five arrival times of each origin, target and movement type
+  between two players: evenly spaced arrivals suggest one person driving
+  both accounts.
+
+The windows live in the database, so patterns are found the same whichever
+replica drains the queue and across worker restarts. Troops above the
+origin's population are checked against the troops at home and the cap
+recorded in the signal at dispatch. Each batch writes its audit logs, flags
+and the latest ``users.last_action_at`` per user with a few multi-row
+statements, then deletes the signals it analyzed.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+from threading import Lock
+from typing import Deque, Dict, List, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..due_times import as_utc
+from .anticheat import MOVEMENT, action_clock
+
+WINDOW_SIZE = 5
+PATTERN_COUNT = 4
+PATTERN_SECONDS = 5.0
+ARRIVAL_PREFIX = "Scheduled arrival at "
+
+
+class SignalConsumer:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.analyzed = 0
+        self.flagged = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.analyzed = 0
+            self.flagged = 0
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"analyzed": self.analyzed, "flagged": self.flagged}
+
+    def process(self, db: Session, limit: int | None) -> int:
+        """Analyze up to ``limit`` queued signals; the caller commits."""
+
+        query = db.query(models.AntiCheatSignal).order_by(models.AntiCheatSignal.id)
+        if limit is not None:
+            query = query.limit(limit)
+        signals = query.all()
+        if not signals:
+            return 0
+
+        keys = {
+            (signal.user_id, _signature(signal.payload))
+            for signal in signals
+            if signal.kind == MOVEMENT
+        }
+        signatures, interactions = _windows(db, keys)
+        last_action: Dict[int, datetime] = {}
+        logs: List[dict] = []
+        flags: List[tuple] = []
+        for signal in signals:
+            at = as_utc(signal.created_at)
+            last_action[signal.user_id] = max(at, last_action.get(signal.user_id, at))
+            if signal.kind == MOVEMENT:
+                _movement(signal, at, signatures, interactions, logs, flags)
+        with self._lock:
+            self.analyzed += len(signals)
+            self.flagged += len(flags)
+
+        if logs:
+            db.execute(models.Log.__table__.insert(), logs)
+        if flags:
+            _write_flags(db, flags)
+        db.execute(
+            update(models.User),
+            [{"id": user_id, "last_action_at": at} for user_id, at in last_action.items()],
+        )
+        db.query(models.AntiCheatSignal).filter(
+            models.AntiCheatSignal.id.in_([signal.id for signal in signals])
+        ).delete(synchronize_session=False)
+        return len(signals)
+
+
+def _signature(payload: dict) -> str:
+    return f"movement:{payload['movement_type']}:{payload['origin_city_id']}->{payload['target_city_id']}"
+
+
+def _windows(
+    db: Session, keys: set
+) -> Tuple[Dict[Tuple[int, str], Deque[datetime]], Dict[str, Deque[datetime]]]:
+    """Seed the windows of ``(user id, signature)`` keys from their last logs.
+
+    Returns the action times per key and the arrival times per signature,
+    oldest first, with a single query.
+    """
+
+    signatures = {key: deque(maxlen=WINDOW_SIZE) for key in keys}
+    interactions = {signature: deque(maxlen=WINDOW_SIZE) for _, signature in keys}
+    if not keys:
+        return signatures, interactions
+
+    log = models.Log
+    rank = (
+        func.row_number()
+        .over(partition_by=(log.user_id, log.action), order_by=(log.timestamp.desc(), log.id.desc()))
+        .label("rank")
+    )
+    recent = (
+        db.query(log.user_id, log.action, log.timestamp, log.details, rank)
+        .filter(
+            log.user_id.in_({user_id for user_id, _ in keys}),
+            log.action.in_(set(interactions)),
+        )
+        .subquery()
+    )
+    rows = (
+        db.query(recent.c.user_id, recent.c.action, recent.c.timestamp, recent.c.details)
+        .filter(recent.c.rank <= WINDOW_SIZE)
+        .order_by(recent.c.rank.desc())
+        .all()
+    )
+    for user_id, action, timestamp, details in rows:
+        window = signatures.get((user_id, action))
+        if window is None:
+            continue
+        window.append(as_utc(timestamp))
+        try:
+            interactions[action].append(datetime.fromisoformat(details.removeprefix(ARRIVAL_PREFIX)))
+        except ValueError:
+            continue
+    return signatures, interactions
+
+
+def _movement(signal, at: datetime, signatures, interactions, logs: list, flags: list) -> None:
+    payload = signal.payload
+    movement_type = payload["movement_type"]
+    arrival_time = datetime.fromisoformat(payload["arrival_time"])
+    user_id = signal.user_id
+    signature = _signature(payload)
+
+    population_max = payload.get("population_max")
+    total_troops = payload.get("origin_troops", 0)
+    if population_max is not None and total_troops > population_max:
+        flags.append(
+            (
+                user_id,
+                at,
+                "fake_attack",
+                "high",
+                f"Troop count {total_troops} exceeds population {population_max}",
+            )
+        )
+
+    # Multi-account heuristics only make sense between two player-owned
+    # cities. Barbarian villages deliberately have owner_id=None.
+    target_owner_id = payload["target_owner_id"]
+    arrivals = interactions[signature]
+    if target_owner_id is not None and len(arrivals) >= PATTERN_COUNT:
+        previous = list(reversed(arrivals))
+        intervals = [
+            abs((previous[i] - previous[i + 1]).total_seconds())
+            for i in range(len(previous) - 1)
+        ]
+        if max(intervals) - min(intervals) < 1:
+            flags.append(
+                (user_id, at, "multiaccount_actions", "high", (movement_type, target_owner_id))
+            )
+    arrivals.append(arrival_time)
+
+    logs.append(
+        {
+            "user_id": user_id,
+            "action": signature,
+            "details": f"{ARRIVAL_PREFIX}{arrival_time}",
+            "timestamp": signal.created_at,
+        }
+    )
+    recent = signatures[(user_id, signature)]
+    recent.append(at)
+    if len(recent) >= PATTERN_COUNT and (at - recent[0]).total_seconds() <= PATTERN_SECONDS:
+        flags.append(
+            (
+                user_id,
+                at,
+                "bot_detection",
+                "high",
+                f"Detected repeating pattern for action {signature} ({len(recent)}x in 5s)",
+            )
+        )
+
+    if movement_type == "spy" and payload["spy_count"] <= 0:
+        flags.append((user_id, at, "spy_exploit", "medium", "Invalid spy count provided"))
+
+
+def _write_flags(db: Session, flags: List[tuple]) -> None:
+    # Account-interaction flags name both players; resolve them in one query.
+    user_ids = set()
+    for user_id, _, violation, _, details in flags:
+        if violation == "multiaccount_actions":
+            user_ids.update((user_id, details[1]))
+    names = {}
+    if user_ids:
+        names = dict(
+            db.query(models.User.id, models.User.username).filter(models.User.id.in_(user_ids))
+        )
+    rows = []
+    for user_id, at, violation, severity, details in flags:
+        if violation == "multiaccount_actions":
+            movement_type, target_owner_id = details
+            details = (
+                f"Repeated identical {movement_type} actions between "
+                f"{names.get(user_id)} and {names.get(target_owner_id)}"
+            )
+        rows.append(
+            {
+                "user_id": user_id,
+                "type_of_violation": violation,
+                "severity": severity,
+                "details": details,
+                "timestamp": at,
+                "reviewed_by_admin": False,
+                "resolved_status": "pending",
+            }
+        )
+    db.execute(models.AntiCheatFlag.__table__.insert(), rows)
+
+
+_consumer = SignalConsumer()
+
+
+def process_signals(db: Session, limit: int | None = None) -> int:
+    """Analyze every queued signal in batches of ``limit`` (one batch if None).
+
+    Full batches are committed as they go; the caller commits the last one.
+    """
+
+    total = 0
+    while True:
+        count = _consumer.process(db, limit)
+        total += count
+        if limit is None or count < limit:
+            return total
+        db.commit()
+
+
+def get_metrics() -> dict:
+    return _consumer.metrics()
+
+
+def reset() -> None:
+    """Forget the counters and the cached action times (tests)."""
+
+    _consumer.reset()
+    action_clock.reset()
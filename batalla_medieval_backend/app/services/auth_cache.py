@@ -0,0 +1,144 @@
+"""Per-process cache from access-token identity to user.
+
+Entries are keyed by the token's ``(sub, ver)`` and hold the user id plus the
+fields that decide whether a token is accepted. They expire after
+``auth_cache_ttl_seconds`` and are dropped in this process when a committed
+transaction changes a user's ``username``, ``auth_version``, ``is_verified``,
+``is_frozen`` or ``language``. Callers still load the row by primary key and
+re-check it, so an entry that is stale in another process can only cost a
+fallback lookup, never authenticate a revoked token.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Set, Tuple
+
+from sqlalchemy import event, inspect
+
+from .. import models
+from ..config import get_settings
+from ..database import SessionLocal
+
+settings = get_settings()
+
+_TRACKED_FIELDS = ("username", "auth_version", "is_verified", "is_frozen", "language")
+_SESSION_KEY = "auth_cache_users"
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    username: str
+    auth_version: int
+    is_verified: bool
+    is_frozen: bool
+    language: str
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            user_id=user.id,
+            username=user.username,
+            auth_version=user.auth_version,
+            is_verified=bool(user.is_verified),
+            is_frozen=bool(user.is_frozen),
+            language=user.language,
+        )
+
+    def matches(self, user: models.User) -> bool:
+        return self == Principal.from_user(user)
+
+
+_entries: Dict[Tuple[str, int], Tuple[Principal, float]] = {}
+_lock = Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def get(sub: str, ver: int | None) -> Principal | None:
+    if settings.auth_cache_ttl_seconds <= 0:
+        return None
+    key = (sub, ver)
+    with _lock:
+        cached = _entries.get(key)
+        if cached is None or cached[1] <= time.monotonic():
+            if cached is not None:
+                del _entries[key]
+            _stats["misses"] += 1
+            return None
+        _stats["hits"] += 1
+        return cached[0]
+
+
+def put(principal: Principal) -> None:
+    if settings.auth_cache_ttl_seconds <= 0:
+        return
+    expires_at = time.monotonic() + settings.auth_cache_ttl_seconds
+    with _lock:
+        _entries[(principal.username, principal.auth_version)] = (principal, expires_at)
+
+
+def resolve(db, sub: str, ver: int | None) -> Principal | None:
+    """Return the principal of a token's ``(sub, ver)``, loading it on a miss.
+
+    Returns ``None`` when no user has that username and ``auth_version``.
+    """
+
+    principal = get(sub, ver)
+    if principal is not None:
+        return principal
+    user = db.query(models.User).filter(models.User.username == sub).first()
+    if user is None or user.auth_version != ver:
+        return None
+    principal = Principal.from_user(user)
+    put(principal)
+    return principal
+
+
+def invalidate_users(user_ids: Set[int]) -> None:
+    if not user_ids:
+        return
+    with _lock:
+        stale = [key for key, (principal, _) in _entries.items() if principal.user_id in user_ids]
+        for key in stale:
+            del _entries[key]
+        _stats["invalidations"] += len(stale)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def get_stats() -> dict:
+    with _lock:
+        return {**_stats, "size": len(_entries)}
+
+
+def _after_flush(session, _flush_context) -> None:
+    changed: Set[int] = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, models.User) or obj.id is None:
+            continue
+        attrs = inspect(obj).attrs
+        if obj in session.deleted or any(
+            attrs[name].history.has_changes() for name in _TRACKED_FIELDS
+        ):
+            changed.add(obj.id)
+    if changed:
+        session.info.setdefault(_SESSION_KEY, set()).update(changed)
+
+
+def _after_commit(session) -> None:
+    invalidate_users(session.info.pop(_SESSION_KEY, set()))
+
+
+def _after_rollback(session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+event.listen(SessionLocal, "after_flush", _after_flush)
+event.listen(SessionLocal, "after_commit", _after_commit)
+event.listen(SessionLocal, "after_rollback", _after_rollback)
@@ -14,7 +14,8 @@ def process_barbarian_growth(db: Session):
 
     barbarian_cities = (
         db.query(models.City)
-        .filter(models.City.owner_id.is_(None))
+        .join(models.World, models.World.id == models.City.world_id)
+        .filter(models.City.owner_id.is_(None), models.World.is_active.is_(True))
         .limit(balance.BARBARIAN_AI_BATCH_SIZE)
         .all()
     )
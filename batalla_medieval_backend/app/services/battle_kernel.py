@@ -0,0 +1,326 @@
+"""Pure-data battle kernel shared by live combat and balance simulations.
+
+Nothing here touches the ORM: inputs are troop mappings (or count matrices)
+and plain numbers, outputs are dicts (or arrays). ``combat.resolve_battle``
+uses the scalar :func:`resolve` and then applies the result to cities and
+heroes; :func:`simulate` resolves many battles at once with NumPy so the
+balance team can run Monte Carlo sweeps over ``balance.py``. Both give the
+same losses for the same inputs.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from typing import Dict, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from . import balance
+
+UNIT_STATS = balance.unit_combat_stats_with_legacy_aliases()
+TROOP_CATEGORIES = ("infantry", "cavalry", "siege")
+HERO_BASE_BONUS = 100
+HERO_BONUS_PER_POINT = 10
+
+
+def hero_bonus(points: int) -> float:
+    """Attack or defense a hero adds to its side."""
+
+    return HERO_BASE_BONUS + points * HERO_BONUS_PER_POINT
+
+
+def split_attack(
+    troops: Mapping[str, int], hero_attack: float = 0.0
+) -> Tuple[Dict[str, float], float]:
+    """Return attack totals split by troop category and total attack value."""
+
+    attack_by_type = {category: 0.0 for category in TROOP_CATEGORIES}
+    total_attack = 0.0
+    for unit, amount in troops.items():
+        stats = UNIT_STATS.get(unit, None)
+        if not stats:
+            continue
+        attack_value = stats.get("attack", 0) * amount
+        attack_by_type[stats["type"]] += attack_value
+        total_attack += attack_value
+
+    if hero_attack:
+        attack_by_type["infantry"] += hero_attack
+        total_attack += hero_attack
+    return attack_by_type, total_attack
+
+
+def defense_values(troops: Mapping[str, int], hero_defense: float = 0.0) -> Dict[str, float]:
+    """Calculate defense values per troop category."""
+
+    defenses = {category: 0.0 for category in TROOP_CATEGORIES}
+    for unit, amount in troops.items():
+        stats = UNIT_STATS.get(unit)
+        if not stats:
+            continue
+        defenses["infantry"] += stats.get("def_inf", 0) * amount
+        defenses["cavalry"] += stats.get("def_cav", 0) * amount
+        defenses["siege"] += stats.get("def_siege", stats.get("def_inf", 0)) * amount
+
+    if hero_defense:
+        for category in TROOP_CATEGORIES:
+            defenses[category] += hero_defense
+    return defenses
+
+
+def wall_multiplier(level: int) -> float:
+    return 1.0 + level * balance.WALL_BONUS_PER_LEVEL
+
+
+def moral(attacker_strength: float, defender_strength: float) -> float:
+    """Calculate morale based on attacker and defender strengths."""
+
+    attacker_points = max(attacker_strength, 1)
+    defender_points = max(defender_strength, 1)
+    raw = math.sqrt(defender_points / attacker_points)
+    return min(balance.MORALE_MAX, max(balance.MORALE_MIN, raw))
+
+
+def random_luck() -> float:
+    return random.uniform(balance.LUCK_MIN, balance.LUCK_MAX)
+
+
+def weighted_defense(
+    defenses: Mapping[str, float],
+    attack_distribution: Mapping[str, float],
+    wall_bonus: float,
+) -> float:
+    """Weight defense by attack distribution and wall effects."""
+
+    total_attack = sum(attack_distribution.values()) or 1
+    ratios = {k: v / total_attack for k, v in attack_distribution.items()}
+    defense_value = (
+        defenses["infantry"] * ratios.get("infantry", 0)
+        + defenses["cavalry"] * ratios.get("cavalry", 0)
+        + defenses["siege"] * ratios.get("siege", 0)
+    )
+    return defense_value * wall_bonus
+
+
+def loss_ratios(effective_attack: float, defense_value: float) -> Tuple[float, float]:
+    """Determine attacker and defender loss ratios from strengths."""
+
+    if effective_attack <= 0:
+        return 1.0, 0.0
+    if defense_value <= 0:
+        return 0.0, 1.0
+
+    decisive = balance.DECISIVE_STRENGTH_RATIO
+    if effective_attack > defense_value * decisive:
+        return (max(0.05, (defense_value / effective_attack) ** 0.5)), 1.0
+    if defense_value > effective_attack * decisive:
+        return 1.0, max(0.05, (effective_attack / defense_value) ** 0.5)
+
+    balance_factor = effective_attack / defense_value
+    attacker_ratio = min(1.0, (1 / balance_factor) ** 0.5)
+    defender_ratio = min(1.0, balance_factor ** 0.5)
+    return attacker_ratio, defender_ratio
+
+
+def apply_losses(troops: Mapping[str, int], loss_ratio: float) -> Dict[str, int]:
+    return {
+        unit: min(amount, int(round(amount * loss_ratio)))
+        for unit, amount in troops.items()
+    }
+
+
+def resolve(
+    attacking_troops: Mapping[str, int],
+    defending_troops: Mapping[str, int],
+    *,
+    luck: float,
+    wall_bonus: float = 1.0,
+    hero_attack: float = 0.0,
+    hero_defense: float = 0.0,
+    use_moral: bool = True,
+) -> dict:
+    """Resolve one battle between two troop mappings."""
+
+    attack_distribution, base_attack = split_attack(attacking_troops, hero_attack)
+    defenses = defense_values(defending_troops, hero_defense)
+    battle_moral = moral(base_attack, sum(defenses.values())) if use_moral else 1.0
+
+    effective_attack = base_attack * battle_moral * (1 + luck)
+    defense_value = weighted_defense(defenses, attack_distribution, wall_bonus)
+    attacker_loss_ratio, defender_loss_ratio = loss_ratios(effective_attack, defense_value)
+    return {
+        "base_attack": base_attack,
+        "moral": battle_moral,
+        "luck": luck,
+        "effective_attack": effective_attack,
+        "defense_value": defense_value,
+        "attacker_loss_ratio": attacker_loss_ratio,
+        "defender_loss_ratio": defender_loss_ratio,
+        "attacker_losses": apply_losses(attacking_troops, attacker_loss_ratio),
+        "defender_losses": apply_losses(defending_troops, defender_loss_ratio),
+    }
+
+
+def _unit_tables(units: Sequence[str]):
+    attack = np.zeros((len(units), len(TROOP_CATEGORIES)))
+    defense = np.zeros((len(units), len(TROOP_CATEGORIES)))
+    for row, unit in enumerate(units):
+        stats = UNIT_STATS.get(unit)
+        if not stats:
+            continue
+        attack[row, TROOP_CATEGORIES.index(stats["type"])] = stats.get("attack", 0)
+        defense[row] = (
+            stats.get("def_inf", 0),
+            stats.get("def_cav", 0),
+            stats.get("def_siege", stats.get("def_inf", 0)),
+        )
+    return attack, defense
+
+
+def _simulate_numpy(attackers, defenders, units, luck, wall_bonus, hero_attack, hero_defense, use_moral):
+    attack_table, defense_table = _unit_tables(units)
+    attackers = np.asarray(attackers, dtype=float)
+    defenders = np.asarray(defenders, dtype=float)
+
+    attack_by_type = attackers @ attack_table
+    attack_by_type[:, 0] += hero_attack
+    base_attack = attack_by_type.sum(axis=1)
+    defenses = defenders @ defense_table + np.asarray(hero_defense, dtype=float)[..., None]
+
+    if use_moral:
+        raw = np.sqrt(np.maximum(defenses.sum(axis=1), 1) / np.maximum(base_attack, 1))
+        battle_moral = np.clip(raw, balance.MORALE_MIN, balance.MORALE_MAX)
+    else:
+        battle_moral = np.ones_like(base_attack)
+
+    effective_attack = base_attack * battle_moral * (1 + luck)
+    total = np.where(base_attack == 0, 1.0, base_attack)
+    defense_value = (defenses * (attack_by_type / total[:, None])).sum(axis=1) * wall_bonus
+
+    decisive = balance.DECISIVE_STRENGTH_RATIO
+    with np.errstate(divide="ignore", invalid="ignore"):
+        attack_over_defense = effective_attack / defense_value
+        defense_over_attack = defense_value / effective_attack
+        attacker_ratio = np.minimum(1.0, np.sqrt(defense_over_attack))
+        defender_ratio = np.minimum(1.0, np.sqrt(attack_over_defense))
+        attacker_wins = effective_attack > defense_value * decisive
+        defender_wins = defense_value > effective_attack * decisive
+        attacker_ratio = np.where(attacker_wins, np.maximum(0.05, np.sqrt(defense_over_attack)), attacker_ratio)
+        defender_ratio = np.where(attacker_wins, 1.0, defender_ratio)
+        attacker_ratio = np.where(defender_wins & ~attacker_wins, 1.0, attacker_ratio)
+        defender_ratio = np.where(
+            defender_wins & ~attacker_wins, np.maximum(0.05, np.sqrt(attack_over_defense)), defender_ratio
+        )
+    no_defense = defense_value <= 0
+    attacker_ratio = np.where(no_defense, 0.0, attacker_ratio)
+    defender_ratio = np.where(no_defense, 1.0, defender_ratio)
+    no_attack = effective_attack <= 0
+    attacker_ratio = np.where(no_attack, 1.0, attacker_ratio)
+    defender_ratio = np.where(no_attack, 0.0, defender_ratio)
+
+    return {
+        "moral": battle_moral,
+        "luck": luck,
+        "effective_attack": effective_attack,
+        "defense_value": defense_value,
+        "attacker_loss_ratio": attacker_ratio,
+        "defender_loss_ratio": defender_ratio,
+        "attacker_losses": np.minimum(attackers, np.rint(attackers * attacker_ratio[:, None])).astype(int),
+        "defender_losses": np.minimum(defenders, np.rint(defenders * defender_ratio[:, None])).astype(int),
+    }
+
+
+def _per_battle(value, count: int) -> list:
+    if isinstance(value, (int, float)):
+        return [float(value)] * count
+    values = [float(item) for item in value]
+    if len(values) != count:
+        raise ValueError("Per-battle parameters must have one value per battle")
+    return values
+
+
+def simulate(
+    attackers,
+    defenders,
+    units: Sequence[str],
+    *,
+    luck=None,
+    wall_bonus=1.0,
+    hero_attack=0.0,
+    hero_defense=0.0,
+    use_moral: bool = True,
+    seed: int | None = None,
+) -> dict:
+    """Resolve ``len(attackers)`` battles at once.
+
+    ``attackers`` and ``defenders`` are ``battles x len(units)`` count
+    matrices. ``luck`` defaults to a uniform draw inside the balance limits
+    for every battle; ``wall_bonus``, ``hero_attack`` and ``hero_defense``
+    take a scalar or one value per battle. Returns arrays keyed like
+    :func:`resolve`.
+    """
+
+    count = len(attackers)
+    if len(defenders) != count:
+        raise ValueError("Attacker and defender matrices must have the same number of battles")
+
+    rng = np.random.default_rng(seed)
+    if luck is None:
+        luck = rng.uniform(balance.LUCK_MIN, balance.LUCK_MAX, count)
+    return _simulate_numpy(
+        attackers,
+        defenders,
+        list(units),
+        np.asarray(_per_battle(luck, count)),
+        np.asarray(_per_battle(wall_bonus, count)),
+        np.asarray(_per_battle(hero_attack, count)),
+        np.asarray(_per_battle(hero_defense, count)),
+        use_moral,
+    )
+
+
+def run_simulation(
+    attacker: Mapping[str, int],
+    defender: Mapping[str, int],
+    *,
+    battles: int,
+    wall_level: int = 0,
+    seed: int | None = None,
+) -> dict:
+    """Monte Carlo one matchup ``battles`` times and summarize the outcomes."""
+
+    if battles < 1:
+        raise ValueError("At least one battle is required")
+    units = sorted(set(attacker) | set(defender))
+    attacker_row = [int(attacker.get(unit, 0)) for unit in units]
+    defender_row = [int(defender.get(unit, 0)) for unit in units]
+
+    started = time.perf_counter()
+    result = simulate(
+        [attacker_row] * battles,
+        [defender_row] * battles,
+        units,
+        wall_bonus=wall_multiplier(wall_level),
+        seed=seed,
+    )
+    elapsed = time.perf_counter() - started
+
+    attacker_means = result["attacker_losses"].mean(axis=0).tolist()
+    defender_losses = result["defender_losses"]
+    defender_means = defender_losses.mean(axis=0).tolist()
+    wins = int((defender_losses.sum(axis=1) >= sum(defender_row)).sum())
+
+    return {
+        "battles": battles,
+        "seconds": elapsed,
+        "battles_per_second": battles / elapsed if elapsed > 0 else float(battles),
+        "attacker_win_rate": wins / battles,
+        "mean_attacker_losses": {
+            unit: attacker_means[index] for index, unit in enumerate(units) if attacker_row[index]
+        },
+        "mean_defender_losses": {
+            unit: defender_means[index] for index, unit in enumerate(units) if defender_row[index]
+        },
+    }
@@ -16,6 +16,8 @@ from . import balance
 from . import notification as notification_service
 from . import premium as premium_service
 from . import production, quest as quest_service, ranking
+from . import world_membership
+from .sharding import QueueShard, active_city_clause
 
 logger = logging.getLogger(__name__)
 
@@ -94,6 +96,11 @@ def queue_upgrade(db: Session, city: models.City, building_name: str) -> models.
 
     city, production_gains = production.lock_and_recalculate_resources(db, city)
     db.expire(city, ["buildings"])
+    try:
+        world_membership.ensure_world_open(city.world)
+    except ValueError:
+        db.rollback()
+        raise
 
     existing_queue = (
         db.query(models.BuildingQueue)
@@ -203,7 +210,6 @@ def _run_completion_side_effects(db: Session, info: dict) -> None:
             "build_level",
             absolute_value=info["target_level"],
         )
-        ranking.recalculate_player_and_alliance_scores(db, owner_id, world_id)
         if info.get("world_won"):
             notification_service.create_notification(
                 db,
@@ -224,15 +230,19 @@ def _run_completion_side_effects(db: Session, info: dict) -> None:
         )
 
 
-def process_building_queues(db: Session) -> List[dict]:
+def process_building_queues(db: Session, shard: QueueShard | None = None) -> List[dict]:
     """Finalize each due queue at most once across concurrent processors."""
 
     now = utc_now()
+    query = db.query(models.BuildingQueue).filter(
+        models.BuildingQueue.finish_time <= now,
+        active_city_clause(models.BuildingQueue.city_id),
+    )
+    if shard is not None:
+        query = query.filter(shard.city_clause(models.BuildingQueue.city_id))
     finished_queues = (
-        db.query(models.BuildingQueue)
-        .filter(models.BuildingQueue.finish_time <= now)
-        .options(selectinload(models.BuildingQueue.city))
-        .order_by(models.BuildingQueue.id.asc())
+        query.options(selectinload(models.BuildingQueue.city))
+        .order_by(models.BuildingQueue.finish_time.asc(), models.BuildingQueue.id.asc())
         .with_for_update(skip_locked=True)
         .all()
     )
@@ -268,7 +278,18 @@ def process_building_queues(db: Session) -> List[dict]:
             db.add(building)
             db.flush()
 
+        previous_level = building.level
+        if building.name == "warehouse" and queue_entry.target_level > previous_level:
+            # Production up to now accrues against the old storage limit.
+            production.settle_resources(db, city, now)
         building.level = max(building.level, queue_entry.target_level)
+        ranking.apply_score_delta(
+            db,
+            city.owner_id,
+            city.world_id,
+            building_delta=(building.level - previous_level)
+            * ranking.BUILDING_POINTS_PER_LEVEL,
+        )
         world_won = False
         if building.name == "world_wonder" and building.level >= 100:
             world = (
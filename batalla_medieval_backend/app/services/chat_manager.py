@@ -1,14 +1,90 @@
+"""Chat connections and their fan-out.
+
+Every registered websocket gets a bounded queue of outgoing frames drained by
+its own sender task. ``broadcast`` serializes a message once and only
+enqueues the text, so a slow client delays nobody else. A client whose queue
+is full (``CHAT_SEND_QUEUE_SIZE``) loses the message or, with
+``CHAT_SLOW_CONSUMER=disconnect``, is disconnected; one whose send takes longer
+than ``CHAT_SEND_TIMEOUT_SECONDS`` is disconnected either way.
+"""
+
+import asyncio
+import json
+import logging
 from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Any, DefaultDict, Dict, Iterable, Optional, Set, Tuple
+from typing import Any, Callable, DefaultDict, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import WebSocket, status
+
+from ..config import get_settings
+from . import moderation, rate_limit
+
+logger = logging.getLogger(__name__)
 
-from fastapi import WebSocket
 
-from ..utils import utc_now
+class ChatConnection:
+    """Outgoing frames of one websocket, sent in order by one task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        *,
+        queue_size: int,
+        send_timeout: float,
+        on_failure: Callable[["ChatConnection"], None],
+    ) -> None:
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self._send_timeout = send_timeout
+        self._on_failure = on_failure
+        self._task: asyncio.Task | None = None
+
+    def offer(self, text: str) -> bool:
+        """Queue ``text`` without waiting; return False if the queue is full."""
+
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            text = await self.queue.get()
+            try:
+                async with asyncio.timeout(self._send_timeout):
+                    await self.websocket.send_text(text)
+            except Exception:
+                failed = True
+            else:
+                failed = False
+            finally:
+                self.queue.task_done()
+            if failed:
+                self._on_failure(self)
+                return
+
+    def cancel(self) -> None:
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        # Frames that will never be sent must not hold up ``ChatManager.drain``.
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
 
 
 class ChatManager:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        limiter: rate_limit.Limiter | None = None,
+        *,
+        queue_size: int | None = None,
+        send_timeout: float | None = None,
+        slow_consumer: str | None = None,
+    ) -> None:
+        settings = get_settings()
         # "global" means global within one game world. Worlds are independent
         # gameplay partitions and must never share chat recipients.
         self.global_connections: DefaultDict[int, Set[WebSocket]] = defaultdict(set)
@@ -16,8 +92,13 @@ class ChatManager:
         self.alliance_connections: DefaultDict[int, Set[WebSocket]] = defaultdict(set)
         self.private_connections: DefaultDict[Tuple[int, int], Set[WebSocket]] = defaultdict(set)
         self.connection_meta: Dict[WebSocket, Dict[str, Any]] = {}
-        self.last_message_at: Dict[int, datetime] = {}
-        self.bad_words = {"badword", "curse", "offensive"}
+        self.outboxes: Dict[WebSocket, ChatConnection] = {}
+        self.limiter = limiter or rate_limit.get_limiter()
+        self.queue_size = queue_size or settings.chat_send_queue_size
+        self.send_timeout = send_timeout or settings.chat_send_timeout_seconds
+        self.slow_consumer = slow_consumer or settings.chat_slow_consumer
+        self.dropped = 0
+        self.slow_disconnects = 0
 
     @staticmethod
     def _private_key(user_a: int, user_b: int) -> Tuple[int, int]:
@@ -52,11 +133,20 @@ class ChatManager:
             "alliance_id": alliance_id,
             "receiver_id": receiver_id,
         }
+        self.outboxes[websocket] = ChatConnection(
+            websocket,
+            queue_size=self.queue_size,
+            send_timeout=self.send_timeout,
+            on_failure=self._send_failed,
+        )
 
     def disconnect(self, websocket: WebSocket) -> None:
         meta = self.connection_meta.pop(websocket, None)
         if not meta:
             return
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox is not None:
+            outbox.cancel()
 
         channel = meta.get("channel")
         if channel == "global" and meta.get("world_id") is not None:
@@ -70,19 +160,12 @@ class ChatManager:
             self.private_connections[key].discard(websocket)
 
     def allow_message(self, user_id: int) -> bool:
-        now = utc_now()
-        last_sent = self.last_message_at.get(user_id)
-        if last_sent and now - last_sent < timedelta(seconds=1):
-            return False
-        self.last_message_at[user_id] = now
-        return True
+        return self.limiter.allow(rate_limit.CHAT_MESSAGE, str(user_id))
 
-    def filter_content(self, message: str) -> str:
-        filtered = message
-        for word in self.bad_words:
-            filtered = filtered.replace(word, "***") if filtered else filtered
-            filtered = filtered.replace(word.capitalize(), "***") if filtered else filtered
-        return filtered
+    async def filter_content(
+        self, message: str, *, world_id: Optional[int] = None, language: Optional[str] = None
+    ) -> str:
+        return await moderation.censor_async(message, world_id, language)
 
     async def broadcast(
         self,
@@ -107,11 +190,53 @@ class ChatManager:
         else:
             connections = []
 
+        # Serialized once for every recipient.
+        text = json.dumps(message)
         for connection in connections:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                self.disconnect(connection)
+            self._offer(connection, text)
+
+    async def send(self, websocket: WebSocket, message: Dict[str, Any]) -> None:
+        """Queue ``message`` for one connection, behind its pending broadcasts."""
+
+        self._offer(websocket, json.dumps(message))
+
+    def _offer(self, websocket: WebSocket, text: str) -> None:
+        outbox = self.outboxes.get(websocket)
+        if outbox is None or outbox.offer(text):
+            return
+        self.dropped += 1
+        if self.slow_consumer == "disconnect":
+            self.slow_disconnects += 1
+            self._close(websocket)
+
+    def _send_failed(self, outbox: ChatConnection) -> None:
+        self.slow_disconnects += 1
+        self._close(outbox.websocket)
+
+    def _close(self, websocket: WebSocket) -> None:
+        self.disconnect(websocket)
+        asyncio.get_running_loop().create_task(self._close_socket(websocket))
+
+    @staticmethod
+    async def _close_socket(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            logger.debug("Chat connection already closed", exc_info=True)
+
+    async def drain(self) -> None:
+        """Wait until every queued frame has been sent or given up."""
+
+        for outbox in list(self.outboxes.values()):
+            await outbox.queue.join()
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self.outboxes),
+            "queued": sum(outbox.queue.qsize() for outbox in self.outboxes.values()),
+            "dropped": self.dropped,
+            "slow_disconnects": self.slow_disconnects,
+        }
 
 
 chat_manager = ChatManager()
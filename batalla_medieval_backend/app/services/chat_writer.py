@@ -0,0 +1,103 @@
+"""Batched persistence of chat messages.
+
+The chat websocket hands each message to ``ChatWriter.write`` and awaits the
+id it was stored with. Messages arriving within ``CHAT_FLUSH_SECONDS`` of
+each other, from any connection, are written with one multi-row
+``INSERT ... RETURNING`` on a pooled connection in a worker thread, so no
+websocket holds a database session and the event loop never waits on the
+database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import List, Tuple
+
+from sqlalchemy import insert
+
+from .. import models
+from ..config import get_settings
+from ..database import engine
+
+logger = logging.getLogger(__name__)
+
+
+class ChatWriter:
+    def __init__(self, bind, flush_seconds: float, batch_size: int) -> None:
+        self._bind = bind
+        self._flush_seconds = flush_seconds
+        self._batch_size = batch_size
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.batches = 0
+        self.written = 0
+
+    def _ensure_task(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def write(self, row: dict) -> int:
+        """Queue ``row`` (``chat_messages`` columns) and return its id once stored."""
+
+        self._ensure_task()
+        future = self._loop.create_future()
+        self._pending.append((row, future))
+        self._wakeup.set()
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Let messages from other connections join this batch.
+            await asyncio.sleep(self._flush_seconds)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Store every queued message now."""
+
+        while self._pending:
+            batch = self._pending[: self._batch_size]
+            del self._pending[: self._batch_size]
+            try:
+                ids = await asyncio.to_thread(self._insert, [row for row, _ in batch])
+            except Exception as exc:
+                logger.exception("Failed to store %s chat messages", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.written += len(batch)
+            for (_, future), message_id in zip(batch, ids):
+                # The sender may have disconnected while it waited.
+                if not future.done():
+                    future.set_result(message_id)
+
+    def _insert(self, rows: List[dict]) -> List[int]:
+        statement = insert(models.ChatMessage).returning(
+            models.ChatMessage.id, sort_by_parameter_order=True
+        )
+        with self._bind.begin() as connection:
+            return connection.execute(statement, rows).scalars().all()
+
+    async def close(self) -> None:
+        """Store what is still queued and stop the flush task."""
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def metrics(self) -> dict:
+        return {"pending": len(self._pending), "batches": self.batches, "written": self.written}
+
+
+settings = get_settings()
+chat_writer = ChatWriter(engine, settings.chat_flush_seconds, settings.chat_batch_size)
@@ -1,12 +1,11 @@
 """Combat resolution helpers for calculating battle outcomes."""
 
 import json
-import math
 import random
 from typing import Dict, Tuple
 
 from .. import models
-from . import balance
+from . import balance, battle_kernel
 from . import event as event_service
 
 # Compatibility aliases. Canonical unit numbers live only in ``balance``.
@@ -19,28 +18,24 @@ def _wall_names() -> set[str]:
     return {balance.WALL_BUILDING_KEY, balance.LEGACY_WALL_BUILDING_NAME}
 
 
+def _hero_attack(hero: models.Hero | None) -> float:
+    if hero and hero.status == "moving":
+        return battle_kernel.hero_bonus(hero.attack_points)
+    return 0.0
+
+
+def _hero_defense(hero: models.Hero | None) -> float:
+    if hero and hero.status == "home":
+        return battle_kernel.hero_bonus(hero.defense_points)
+    return 0.0
+
+
 def _split_attack_by_type(
     troops: Dict[str, int], hero: models.Hero | None = None
 ) -> Tuple[Dict[str, float], float]:
     """Return attack totals split by troop category and total attack value."""
 
-    attack_by_type = {"infantry": 0.0, "cavalry": 0.0, "siege": 0.0}
-    total_attack = 0.0
-    for unit, amount in troops.items():
-        stats = UNIT_STATS.get(unit, None)
-        if not stats:
-            continue
-        unit_attack = stats.get("attack", 0)
-        attack_value = unit_attack * amount
-        attack_by_type[stats["type"]] += attack_value
-        total_attack += attack_value
-
-    if hero and hero.status == "moving":
-        hero_attack = 100 + (hero.attack_points * 10)
-        attack_by_type["infantry"] += hero_attack
-        total_attack += hero_attack
-
-    return attack_by_type, total_attack
+    return battle_kernel.split_attack(troops, _hero_attack(hero))
 
 
 def _defense_values(
@@ -48,22 +43,7 @@ def _defense_values(
 ) -> Dict[str, float]:
     """Calculate defense values per troop category."""
 
-    defenses = {"infantry": 0.0, "cavalry": 0.0, "siege": 0.0}
-    for unit, amount in defender_troops.items():
-        stats = UNIT_STATS.get(unit)
-        if not stats:
-            continue
-        defenses["infantry"] += stats.get("def_inf", 0) * amount
-        defenses["cavalry"] += stats.get("def_cav", 0) * amount
-        defenses["siege"] += stats.get("def_siege", stats.get("def_inf", 0)) * amount
-
-    if hero and hero.status == "home":
-        hero_def = 100 + (hero.defense_points * 10)
-        defenses["infantry"] += hero_def
-        defenses["cavalry"] += hero_def
-        defenses["siege"] += hero_def
-
-    return defenses
+    return battle_kernel.defense_values(defender_troops, _hero_defense(hero))
 
 
 def _wall_bonus(city: models.City) -> float:
@@ -72,66 +52,20 @@ def _wall_bonus(city: models.City) -> float:
     wall = next((b for b in city.buildings if b.name in _wall_names()), None)
     if not wall:
         return 1.0
-    return 1.0 + wall.level * WALL_BONUS_PER_LEVEL
-
-
-def _moral(attacker_strength: float, defender_strength: float) -> float:
-    """Calculate morale based on attacker and defender strengths."""
-
-    attacker_points = max(attacker_strength, 1)
-    defender_points = max(defender_strength, 1)
-    raw = math.sqrt(defender_points / attacker_points)
-    return min(balance.MORALE_MAX, max(balance.MORALE_MIN, raw))
+    return battle_kernel.wall_multiplier(wall.level)
 
 
 def _luck() -> float:
     """Return a random luck modifier inside the versioned balance limits."""
 
-    return random.uniform(balance.LUCK_MIN, balance.LUCK_MAX)
-
-
-def _weighted_defense(
-    defenses: Dict[str, float],
-    attack_distribution: Dict[str, float],
-    wall_multiplier: float,
-) -> float:
-    """Weight defense by attack distribution and wall effects."""
+    return battle_kernel.random_luck()
 
-    total_attack = sum(attack_distribution.values()) or 1
-    ratios = {k: v / total_attack for k, v in attack_distribution.items()}
-    defense_value = (
-        defenses["infantry"] * ratios.get("infantry", 0)
-        + defenses["cavalry"] * ratios.get("cavalry", 0)
-        + defenses["siege"] * ratios.get("siege", 0)
-    )
-    return defense_value * wall_multiplier
-
-
-def _loss_ratios(effective_attack: float, defense_value: float) -> Tuple[float, float]:
-    """Determine attacker and defender loss ratios from strengths."""
-
-    if effective_attack <= 0:
-        return 1.0, 0.0
-    if defense_value <= 0:
-        return 0.0, 1.0
-
-    decisive = balance.DECISIVE_STRENGTH_RATIO
-    if effective_attack > defense_value * decisive:
-        return (max(0.05, (defense_value / effective_attack) ** 0.5)), 1.0
-    if defense_value > effective_attack * decisive:
-        return 1.0, max(0.05, (effective_attack / defense_value) ** 0.5)
 
-    balance_factor = effective_attack / defense_value
-    attacker_ratio = min(1.0, (1 / balance_factor) ** 0.5)
-    defender_ratio = min(1.0, balance_factor ** 0.5)
-    return attacker_ratio, defender_ratio
-
-
-def _apply_losses(troops: Dict[str, int], loss_ratio: float) -> Dict[str, int]:
-    losses = {}
-    for unit, amount in troops.items():
-        losses[unit] = min(amount, int(round(amount * loss_ratio)))
-    return losses
+# Pure formulas live in ``battle_kernel``; these names are kept for callers.
+_moral = battle_kernel.moral
+_weighted_defense = battle_kernel.weighted_defense
+_loss_ratios = battle_kernel.loss_ratios
+_apply_losses = battle_kernel.apply_losses
 
 
 def _find_target_building(city: models.City, target_building: str):
@@ -159,25 +93,23 @@ def resolve_battle(
     if defender_hero and defender_hero.city_id != defender_city.id:
         defender_hero = None
 
-    attack_distribution, base_attack = _split_attack_by_type(
-        attacking_troops, attacker_hero
+    outcome = battle_kernel.resolve(
+        attacking_troops,
+        defender_troops,
+        luck=_luck(),
+        wall_bonus=_wall_bonus(defender_city),
+        hero_attack=_hero_attack(attacker_hero),
+        hero_defense=_hero_defense(defender_hero),
     )
-    defenses = _defense_values(defender_troops, defender_hero)
-    wall_multiplier = _wall_bonus(defender_city)
-
-    moral = _moral(base_attack, sum(defenses.values()))
-    luck_factor = _luck()
-
-    effective_attack = base_attack * moral * (1 + luck_factor)
-    defense_value = _weighted_defense(
-        defenses, attack_distribution, wall_multiplier
-    )
-
-    attacker_loss_ratio, defender_loss_ratio = _loss_ratios(
-        effective_attack, defense_value
-    )
-    attacker_losses = _apply_losses(attacking_troops, attacker_loss_ratio)
-    defender_losses = _apply_losses(defender_troops, defender_loss_ratio)
+    base_attack = outcome["base_attack"]
+    moral = outcome["moral"]
+    luck_factor = outcome["luck"]
+    effective_attack = outcome["effective_attack"]
+    defense_value = outcome["defense_value"]
+    attacker_loss_ratio = outcome["attacker_loss_ratio"]
+    defender_loss_ratio = outcome["defender_loss_ratio"]
+    attacker_losses = outcome["attacker_losses"]
+    defender_losses = outcome["defender_losses"]
 
     if attacker_hero and attacker_loss_ratio > 0.9:
         attacker_hero.health = 0
@@ -395,25 +327,16 @@ def resolve_oasis_battle(
     modifiers = modifiers or event_service.DEFAULT_MODIFIERS
     defender_troops = oasis.troops or {}
 
-    attack_distribution, base_attack = _split_attack_by_type(
-        attacking_troops, attacker_hero
-    )
-    defenses = _defense_values(defender_troops, None)
-    wall_multiplier = 1.0
-
-    moral = 1.0
-    luck_factor = _luck()
-
-    effective_attack = base_attack * moral * (1 + luck_factor)
-    defense_value = _weighted_defense(
-        defenses, attack_distribution, wall_multiplier
-    )
-
-    attacker_loss_ratio, defender_loss_ratio = _loss_ratios(
-        effective_attack, defense_value
+    outcome = battle_kernel.resolve(
+        attacking_troops,
+        defender_troops,
+        luck=_luck(),
+        hero_attack=_hero_attack(attacker_hero),
+        use_moral=False,
     )
-    attacker_losses = _apply_losses(attacking_troops, attacker_loss_ratio)
-    defender_losses = _apply_losses(defender_troops, defender_loss_ratio)
+    attacker_loss_ratio = outcome["attacker_loss_ratio"]
+    attacker_losses = outcome["attacker_losses"]
+    defender_losses = outcome["defender_losses"]
 
     if attacker_hero and attacker_loss_ratio > 0.9:
         attacker_hero.health = 0
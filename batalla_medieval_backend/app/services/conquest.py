@@ -3,7 +3,7 @@ from typing import Dict, Tuple
 from sqlalchemy.orm import Session
 
 from .. import models
-from . import balance, combat, production, world_gen
+from . import balance, combat, production, ranking, world_gen
 
 # Compatibility aliases. Expansion balance lives only in ``balance``.
 FOUNDING_COST = balance.CITY_FOUNDING_COST
@@ -60,13 +60,17 @@ def _lock_conquest_cities(
     return attacker, target
 
 
-def _apply_losses(city: models.City, losses: Dict[str, int]):
+def _apply_losses(city: models.City, losses: Dict[str, int]) -> Dict[str, int]:
+    removed: Dict[str, int] = {}
     for unit, loss in losses.items():
         troop = next((t for t in city.troops if t.unit_type == unit), None)
         if troop:
+            before = troop.quantity
             troop.quantity = max(0, troop.quantity - int(loss))
             if troop.quantity < 0:
                 raise ValueError("Troop quantity cannot become negative")
+            removed[unit] = before - troop.quantity
+    return removed
 
 
 def resolve_conquest(
@@ -89,13 +93,25 @@ def resolve_conquest(
         production.recalculate_resources(db, attacker_city, commit=False)
         production.recalculate_resources(db, target_city, commit=False)
 
+        previous_target_owner_id = target_city.owner_id
         battle_result = combat.resolve_battle(
             attacker_city,
             target_city,
             troops_sent,
         )
-        _apply_losses(attacker_city, battle_result.get("attacker_losses", {}))
+        attacker_removed = _apply_losses(
+            attacker_city, battle_result.get("attacker_losses", {})
+        )
         _apply_losses(target_city, battle_result.get("defender_losses", {}))
+        ranking.apply_score_delta(
+            db,
+            attacker_city.owner_id,
+            attacker_city.world_id,
+            troop_delta=-ranking.troop_points(attacker_removed),
+        )
+        ranking.transfer_city_score(
+            db, target_city, previous_target_owner_id, target_city.owner_id
+        )
 
         attacker_survivors = battle_result.get("attacker_survivors", {})
         defender_survivors = battle_result.get("defender_survivors", {})
@@ -169,6 +185,14 @@ def found_city(
         )
         db.add(starter)
 
+    ranking.apply_score_delta(
+        db,
+        owner.id,
+        new_city.world_id,
+        building_delta=ranking.building_points(
+            building["level"] for building in STARTER_BUILDINGS
+        ),
+    )
     db.commit()
     db.refresh(new_city)
     production.record_resource_gains(db, origin_city, production_gains)
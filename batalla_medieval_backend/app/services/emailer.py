@@ -12,6 +12,64 @@ def _smtp_details_provided() -> bool:
     return bool(settings.smtp_host and settings.from_email)
 
 
+def smtp_configured() -> bool:
+    return _smtp_details_provided()
+
+
+def _build_message(to_email: str, subject: str, body: str) -> MIMEText:
+    message = MIMEText(body)
+    message["Subject"] = subject
+    message["From"] = settings.from_email
+    message["To"] = to_email
+    return message
+
+
+class SMTPConnection:
+    """One SMTP session reused for many messages.
+
+    The session is opened on the first ``send`` and reopened once if the
+    server dropped it in between. Errors of a single message propagate to the
+    caller, which decides whether to retry it.
+    """
+
+    def __init__(self, timeout: float = 10) -> None:
+        self._timeout = timeout
+        self._server: smtplib.SMTP | None = None
+        self.connections = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=self._timeout)
+        try:
+            if settings.smtp_use_starttls:
+                server.starttls()
+            if settings.smtp_username and settings.smtp_password:
+                server.login(settings.smtp_username, settings.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        self.connections += 1
+        return server
+
+    def send(self, to_email: str, subject: str, body: str) -> None:
+        message = _build_message(to_email, subject, body).as_string()
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.sendmail(settings.from_email, [to_email], message)
+        except smtplib.SMTPServerDisconnected:
+            self._server = self._connect()
+            self._server.sendmail(settings.from_email, [to_email], message)
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+
 def send_email(to_email: str, subject: str, body: str) -> bool:
     """Send an account email through the configured SMTP server.
 
@@ -22,10 +80,7 @@ def send_email(to_email: str, subject: str, body: str) -> bool:
     if not _smtp_details_provided():
         return False
 
-    message = MIMEText(body)
-    message["Subject"] = subject
-    message["From"] = settings.from_email
-    message["To"] = to_email
+    message = _build_message(to_email, subject, body)
 
     try:
         with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=10) as server:
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from .. import models
 from . import balance
 from . import event as event_service
+from . import report as report_service
 
 
 def calculate_success(attacker_spies: int, defender_spies: int) -> float:
@@ -85,8 +86,8 @@ def resolve_spy(
     troops = {troop.unit_type: troop.quantity for troop in defender_city.troops}
     buildings = {building.name: building.level for building in defender_city.buildings}
 
-    attacker_report = models.Report(
-        city_id=attacker_city.id,
+    attacker_report = report_service.build_report(
+        attacker_city,
         world_id=movement.world_id,
         report_type="spy",
         content=build_report_content(
@@ -108,8 +109,8 @@ def resolve_spy(
         attacker_city_id=attacker_city.id,
         defender_city_id=defender_city.id,
     )
-    defender_report = models.Report(
-        city_id=defender_city.id,
+    defender_report = report_service.build_report(
+        defender_city,
         world_id=movement.world_id,
         report_type="spy",
         content=build_report_content(
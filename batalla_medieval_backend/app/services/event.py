@@ -1,16 +1,31 @@
-from datetime import datetime
-from typing import Dict
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Dict, Tuple
 
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
+from ..config import get_settings
 from ..utils import utc_now
-from . import balance
+from . import balance, notification
 
 # Compatibility aliases. Event balance data lives only in ``balance``.
 DEFAULT_MODIFIERS = balance.EVENT_DEFAULT_MODIFIERS
 EVENT_TEMPLATES = balance.EVENT_TEMPLATES
 
+# Process-local cache of active modifiers: world_id -> (modifiers, expires_at).
+# An entry never outlives the TTL nor the next start/end boundary of that
+# world's events, and create_event drops the world's entry in this process.
+_modifier_cache: Dict[int, tuple[Dict[str, float], datetime]] = {}
+_modifier_cache_lock = Lock()
+_modifier_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+# Process-local cache of each world's production_speed timeline:
+# world_id -> ((start, end, production_speed) of every event, expires_at).
+# It follows the TTL and the invalidations of the modifier cache.
+SpeedInterval = Tuple[datetime, datetime, float]
+_timeline_cache: Dict[int, tuple[Tuple[SpeedInterval, ...], datetime]] = {}
+
 
 def _merge_modifiers(custom: Dict[str, float] | None) -> Dict[str, float]:
     merged = DEFAULT_MODIFIERS.copy()
@@ -33,11 +48,136 @@ def get_active_event(db: Session, world_id: int = 1) -> models.WorldEvent | None
     )
 
 
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _load_modifiers(
+    db: Session, world_id: int, now: datetime
+) -> tuple[Dict[str, float], datetime | None]:
+    """Return the active modifiers and the next instant they may change."""
+
+    events = (
+        db.query(models.WorldEvent)
+        .filter(
+            models.WorldEvent.world_id == world_id,
+            models.WorldEvent.end_time >= now,
+        )
+        .all()
+    )
+    active = None
+    boundary = None
+    for event in events:
+        start_time = _as_utc(event.start_time)
+        if start_time <= now:
+            if active is None or start_time > _as_utc(active.start_time):
+                active = event
+        elif boundary is None or start_time < boundary:
+            boundary = start_time
+    if active is None:
+        return DEFAULT_MODIFIERS.copy(), boundary
+
+    end_time = _as_utc(active.end_time)
+    if boundary is None or end_time < boundary:
+        boundary = end_time
+    return _merge_modifiers(active.get_modifiers()), boundary
+
+
 def get_active_modifiers(db: Session, world_id: int = 1) -> Dict[str, float]:
-    event = get_active_event(db, world_id=world_id)
-    if not event:
-        return DEFAULT_MODIFIERS.copy()
-    return _merge_modifiers(event.get_modifiers())
+    now = utc_now()
+    with _modifier_cache_lock:
+        cached = _modifier_cache.get(world_id)
+        if cached is not None and now < cached[1]:
+            _modifier_cache_stats["hits"] += 1
+            return cached[0].copy()
+        _modifier_cache_stats["misses"] += 1
+
+    modifiers, boundary = _load_modifiers(db, world_id, now)
+    expires_at = now + timedelta(seconds=get_settings().event_cache_ttl_seconds)
+    if boundary is not None and boundary < expires_at:
+        # ``end_time`` is inclusive, so the entry expires just after it.
+        expires_at = boundary + timedelta(microseconds=1)
+    with _modifier_cache_lock:
+        _modifier_cache[world_id] = (modifiers, expires_at)
+    return modifiers.copy()
+
+
+def _production_timeline(db: Session, world_id: int) -> Tuple[SpeedInterval, ...]:
+    now = utc_now()
+    with _modifier_cache_lock:
+        cached = _timeline_cache.get(world_id)
+        if cached is not None and now < cached[1]:
+            return cached[0]
+
+    default = DEFAULT_MODIFIERS["production_speed"]
+    timeline = tuple(
+        (
+            _as_utc(event.start_time),
+            _as_utc(event.end_time),
+            float(event.get_modifiers().get("production_speed", default)),
+        )
+        for event in db.query(models.WorldEvent).filter(models.WorldEvent.world_id == world_id)
+    )
+    expires_at = now + timedelta(seconds=get_settings().event_cache_ttl_seconds)
+    with _modifier_cache_lock:
+        _timeline_cache[world_id] = (timeline, expires_at)
+    return timeline
+
+
+def production_speed_hours(db: Session, world_id: int, start: datetime, end: datetime) -> float:
+    """Hours from ``start`` to ``end`` weighted by the ``production_speed`` in force.
+
+    Event starts and ends split the window, and each piece counts at the
+    speed of the event active then (the latest started, as in
+    :func:`get_active_modifiers`), so accrual spanning an event boundary is
+    paid at the right rate whenever it is settled.
+    """
+
+    if end <= start:
+        return 0.0
+    default = DEFAULT_MODIFIERS["production_speed"]
+    events = [
+        interval for interval in _production_timeline(db, world_id)
+        if interval[0] < end and interval[1] > start
+    ]
+    if not events:
+        return default * (end - start).total_seconds() / 3600.0
+
+    points = sorted(
+        {start, end}
+        | {moment for event_start, event_end, _ in events for moment in (event_start, event_end) if start < moment < end}
+    )
+    weighted_seconds = 0.0
+    for begin, finish in zip(points, points[1:]):
+        middle = begin + (finish - begin) / 2
+        speed, started = default, None
+        for event_start, event_end, event_speed in events:
+            if event_start <= middle <= event_end and (started is None or event_start > started):
+                speed, started = event_speed, event_start
+        weighted_seconds += speed * (finish - begin).total_seconds()
+    return weighted_seconds / 3600.0
+
+
+def invalidate_modifier_cache(world_id: int | None = None) -> None:
+    """Drop cached modifiers for ``world_id`` (or every world) in this process."""
+
+    with _modifier_cache_lock:
+        if world_id is None:
+            _modifier_cache.clear()
+            _timeline_cache.clear()
+        else:
+            _modifier_cache.pop(world_id, None)
+            _timeline_cache.pop(world_id, None)
+        _modifier_cache_stats["invalidations"] += 1
+
+
+def get_modifier_cache_stats() -> Dict[str, int]:
+    """Return hit/miss counters of the modifier cache in this process."""
+
+    with _modifier_cache_lock:
+        return {**_modifier_cache_stats, "size": len(_modifier_cache)}
 
 
 def create_event(db: Session, payload: schemas.EventCreate) -> models.WorldEvent:
@@ -55,6 +195,38 @@ def create_event(db: Session, payload: schemas.EventCreate) -> models.WorldEvent
         modifiers=_merge_modifiers(template_modifiers),
     )
     db.add(event)
+    db.flush()
+    if _as_utc(event.start_time) <= utc_now():
+        _announce(db, event)
     db.commit()
     db.refresh(event)
-    return event
\ No newline at end of file
+    invalidate_modifier_cache(event.world_id)
+    return event
+
+
+def _announce(db: Session, event: models.WorldEvent) -> None:
+    notification.notify_event_started(db, event.world_id, event.name)
+    event.announced_at = utc_now()
+
+
+def announce_started_events(db: Session) -> int:
+    """Notify the worlds of events that started since the last run.
+
+    Events created with a future start are announced here by the worker;
+    each event is announced once. The caller commits.
+    """
+
+    now = utc_now()
+    events = (
+        db.query(models.WorldEvent)
+        .filter(
+            models.WorldEvent.announced_at.is_(None),
+            models.WorldEvent.start_time <= now,
+            models.WorldEvent.end_time >= now,
+        )
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for event in events:
+        _announce(db, event)
+    return len(events)
\ No newline at end of file
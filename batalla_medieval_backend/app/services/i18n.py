@@ -20,10 +20,29 @@ def get_language(language_code: str) -> Dict[str, Dict[str, str]]:
     return _load_language_file(language_code)
 
 
+@lru_cache(maxsize=None)
+def _language_codes() -> frozenset[str]:
+    return frozenset(path.stem for path in LANGUAGE_PATH.glob("*.json"))
+
+
 def available_languages() -> list[str]:
-    return [path.stem for path in LANGUAGE_PATH.glob("*.json")]
+    """Return the shipped language codes; the directory is scanned once."""
+
+    return sorted(_language_codes())
+
 
+def is_available(language_code: str | None) -> bool:
+    return language_code in _language_codes()
 
+
+def load_languages(default_language: str = DEFAULT_LANGUAGE) -> None:
+    """Read every language file and build its translator ahead of requests."""
+
+    for language_code in _language_codes():
+        get_translator(language_code, default_language)
+
+
+@lru_cache(maxsize=None)
 def get_translator(language_code: str, default_language: str = DEFAULT_LANGUAGE) -> Callable[[str, Optional[str]], str]:
     translations = get_language(language_code or default_language)
     fallback_translations = get_language(default_language)
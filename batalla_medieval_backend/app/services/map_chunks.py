@@ -0,0 +1,582 @@
+"""Process-local cache of map tiles in fixed-size chunks.
+
+A chunk is the ``CHUNK_SIZE`` x ``CHUNK_SIZE`` square of one world whose
+lower corner is a multiple of ``CHUNK_SIZE``. It holds precomputed entries for
+its cities and oases (owner, alliance, city and player points), loaded with
+one range query, and the tiles each map endpoint renders from them. A
+viewport is assembled from the chunks it overlaps.
+
+Chunks are dropped when a committed transaction touches what they show:
+cities (creation, conquest, relocation, renaming), their buildings and troops
+(scores), oases, alliance membership, alliance and user names. The changes
+are collected by an ORM ``after_flush`` hook and applied on commit. On
+PostgreSQL the hook also sends them with ``pg_notify`` so that the worker's
+conquests invalidate the chunks cached by every web replica. Score changes
+made with bulk ``UPDATE`` statements are not seen by the hook; they always
+accompany building or troop changes, which are. ``map_chunk_ttl_seconds``
+bounds the staleness of anything else.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, selectinload
+
+from .. import models
+from ..config import get_settings
+from ..database import SessionLocal, engine
+from ..pg_notify import MAX_PAYLOAD_BYTES, NotificationListener, notify
+from . import ranking
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CHUNK_SIZE = 16
+CHANNEL = "map_chunks"
+
+ChunkKey = Tuple[int, int, int]
+Render = Callable[[int, int, "CityEntry | None", "OasisEntry | None"], Any]
+
+
+def chunk_key(world_id: int, x: int, y: int) -> ChunkKey:
+    return (int(world_id), int(x) // CHUNK_SIZE, int(y) // CHUNK_SIZE)
+
+
+def chunk_keys(world_id: int, min_x: int, max_x: int, min_y: int, max_y: int) -> List[ChunkKey]:
+    """Return the keys of every chunk overlapping an inclusive rectangle."""
+
+    return [
+        (world_id, cx, cy)
+        for cx in range(min_x // CHUNK_SIZE, max_x // CHUNK_SIZE + 1)
+        for cy in range(min_y // CHUNK_SIZE, max_y // CHUNK_SIZE + 1)
+    ]
+
+
+@dataclass(frozen=True)
+class CityEntry:
+    city_id: int
+    name: str
+    owner_id: int | None
+    owner_name: str | None
+    alliance_id: int | None
+    alliance_name: str | None
+    points: int
+    player_points: int
+    tile_type: str | None
+
+
+@dataclass(frozen=True)
+class OasisEntry:
+    oasis_id: int
+    resource_type: str
+    bonus_percent: int | None
+    owner_city_id: int | None
+    owner_id: int | None
+    owner_name: str | None
+    alliance_id: int | None
+    alliance_name: str | None
+
+
+@dataclass
+class MapChunk:
+    key: ChunkKey
+    cities: Dict[Tuple[int, int], CityEntry] = field(default_factory=dict)
+    oases: Dict[Tuple[int, int], OasisEntry] = field(default_factory=dict)
+    _rendered: Dict[str, Dict[Tuple[int, int], Any]] = field(default_factory=dict)
+    _render_lock: Lock = field(default_factory=Lock)
+
+    @property
+    def city_ids(self) -> Set[int]:
+        return {entry.city_id for entry in self.cities.values()}
+
+    @property
+    def user_ids(self) -> Set[int]:
+        owners = {entry.owner_id for entry in self.cities.values()}
+        owners.update(entry.owner_id for entry in self.oases.values())
+        return {owner for owner in owners if owner}
+
+    @property
+    def alliance_ids(self) -> Set[int]:
+        alliances = {entry.alliance_id for entry in self.cities.values()}
+        alliances.update(entry.alliance_id for entry in self.oases.values())
+        return {alliance for alliance in alliances if alliance}
+
+    def tiles(self, kind: str, render: Render) -> Dict[Tuple[int, int], Any]:
+        """Return ``{(x, y): tile}`` for the whole chunk, rendering once per kind.
+
+        ``render`` may return ``None`` for coordinates that produce no tile.
+        """
+
+        rendered = self._rendered.get(kind)
+        if rendered is not None:
+            return rendered
+        with self._render_lock:
+            rendered = self._rendered.get(kind)
+            if rendered is None:
+                _, cx, cy = self.key
+                rendered = {}
+                for x in range(cx * CHUNK_SIZE, (cx + 1) * CHUNK_SIZE):
+                    for y in range(cy * CHUNK_SIZE, (cy + 1) * CHUNK_SIZE):
+                        tile = render(x, y, self.cities.get((x, y)), self.oases.get((x, y)))
+                        if tile is not None:
+                            rendered[(x, y)] = tile
+                self._rendered[kind] = rendered
+        return rendered
+
+
+@dataclass
+class ChunkChanges:
+    """Identifiers whose chunks a transaction made stale."""
+
+    chunks: Set[ChunkKey] = field(default_factory=set)
+    cities: Set[int] = field(default_factory=set)
+    users: Set[int] = field(default_factory=set)
+    alliances: Set[int] = field(default_factory=set)
+    everything: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.everything or self.chunks or self.cities or self.users or self.alliances
+        )
+
+    def update(self, other: "ChunkChanges") -> None:
+        self.everything = self.everything or other.everything
+        self.chunks |= other.chunks
+        self.cities |= other.cities
+        self.users |= other.users
+        self.alliances |= other.alliances
+
+    def to_payload(self) -> str:
+        if self.everything:
+            return json.dumps({"all": True})
+        return json.dumps(
+            {
+                "chunks": sorted(self.chunks),
+                "cities": sorted(self.cities),
+                "users": sorted(self.users),
+                "alliances": sorted(self.alliances),
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "ChunkChanges":
+        data = json.loads(payload)
+        return cls(
+            everything=bool(data.get("all")),
+            chunks={tuple(key) for key in data.get("chunks", [])},
+            cities=set(data.get("cities", [])),
+            users=set(data.get("users", [])),
+            alliances=set(data.get("alliances", [])),
+        )
+
+
+class ChunkCache:
+    """LRU of chunks with reverse indexes used for invalidation."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._chunks: "OrderedDict[ChunkKey, Tuple[MapChunk, float]]" = OrderedDict()
+        self._by_city: Dict[int, ChunkKey] = {}
+        self._by_user: Dict[int, Set[ChunkKey]] = {}
+        self._by_alliance: Dict[int, Set[ChunkKey]] = {}
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._chunks)
+
+    def get(self, keys: Iterable[ChunkKey], now: float) -> Dict[ChunkKey, MapChunk]:
+        found: Dict[ChunkKey, MapChunk] = {}
+        with self._lock:
+            for key in keys:
+                cached = self._chunks.get(key)
+                if cached is None or cached[1] <= now:
+                    self.stats["misses"] += 1
+                    continue
+                self._chunks.move_to_end(key)
+                found[key] = cached[0]
+                self.stats["hits"] += 1
+        return found
+
+    def store(
+        self, chunks: Iterable[MapChunk], generation: int, expires_at: float, max_chunks: int
+    ) -> None:
+        """Cache ``chunks`` unless an invalidation ran since they were read."""
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            for chunk in chunks:
+                self._discard(chunk.key)
+                self._chunks[chunk.key] = (chunk, expires_at)
+                for city_id in chunk.city_ids:
+                    self._by_city[city_id] = chunk.key
+                for user_id in chunk.user_ids:
+                    self._by_user.setdefault(user_id, set()).add(chunk.key)
+                for alliance_id in chunk.alliance_ids:
+                    self._by_alliance.setdefault(alliance_id, set()).add(chunk.key)
+            while len(self._chunks) > max_chunks:
+                self._discard(next(iter(self._chunks)))
+
+    def invalidate(self, changes: ChunkChanges) -> None:
+        if changes.everything:
+            self.clear()
+            return
+        with self._lock:
+            self._generation += 1
+            keys = set(changes.chunks)
+            owners = set(changes.users)
+            for city_id in changes.cities:
+                key = self._by_city.get(city_id)
+                if key is None:
+                    continue
+                keys.add(key)
+                cached = self._chunks.get(key)
+                if cached is not None:
+                    # Player points of the owner are shown on all their cities.
+                    owners.update(
+                        entry.owner_id
+                        for entry in cached[0].cities.values()
+                        if entry.city_id == city_id and entry.owner_id
+                    )
+            for user_id in owners:
+                keys |= self._by_user.get(user_id, set())
+            for alliance_id in changes.alliances:
+                keys |= self._by_alliance.get(alliance_id, set())
+            for key in keys:
+                if self._discard(key):
+                    self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._chunks.clear()
+            self._by_city.clear()
+            self._by_user.clear()
+            self._by_alliance.clear()
+
+    def _discard(self, key: ChunkKey) -> bool:
+        cached = self._chunks.pop(key, None)
+        if cached is None:
+            return False
+        chunk = cached[0]
+        for city_id in chunk.city_ids:
+            if self._by_city.get(city_id) == key:
+                del self._by_city[city_id]
+        for index, ids in ((self._by_user, chunk.user_ids), (self._by_alliance, chunk.alliance_ids)):
+            for item in ids:
+                keys = index.get(item)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[item]
+        return True
+
+
+_cache = ChunkCache()
+
+
+def _alliance_of(user: models.User | None, world_id: int) -> models.Alliance | None:
+    if not user:
+        return None
+    for membership in user.alliances:
+        alliance = membership.alliance
+        if alliance and alliance.world_id == world_id:
+            return alliance
+    return None
+
+
+def _load_chunks(db: Session, world_id: int, keys: List[ChunkKey]) -> List[MapChunk]:
+    """Build ``keys`` from one range query over their bounding box."""
+
+    min_x = min(key[1] for key in keys) * CHUNK_SIZE
+    max_x = (max(key[1] for key in keys) + 1) * CHUNK_SIZE - 1
+    min_y = min(key[2] for key in keys) * CHUNK_SIZE
+    max_y = (max(key[2] for key in keys) + 1) * CHUNK_SIZE - 1
+    chunks = {key: MapChunk(key=key) for key in keys}
+
+    owner_alliance = (
+        selectinload(models.City.owner)
+        .selectinload(models.User.alliances)
+        .selectinload(models.AllianceMember.alliance)
+    )
+    cities = (
+        db.query(models.City)
+        .options(
+            owner_alliance,
+            selectinload(models.City.buildings),
+            selectinload(models.City.troops),
+        )
+        .filter(
+            models.City.world_id == world_id,
+            models.City.x >= min_x,
+            models.City.x <= max_x,
+            models.City.y >= min_y,
+            models.City.y <= max_y,
+        )
+        .all()
+    )
+    oases = (
+        db.query(models.Oasis)
+        .options(selectinload(models.Oasis.owner_city).options(owner_alliance))
+        .filter(
+            models.Oasis.world_id == world_id,
+            models.Oasis.x >= min_x,
+            models.Oasis.x <= max_x,
+            models.Oasis.y >= min_y,
+            models.Oasis.y <= max_y,
+        )
+        .all()
+    )
+    player_points = ranking.get_points_by_user(
+        db, world_id, (city.owner_id for city in cities)
+    )
+
+    for city in cities:
+        chunk = chunks.get(chunk_key(world_id, city.x, city.y))
+        if chunk is None:
+            continue
+        alliance = _alliance_of(city.owner, world_id)
+        chunk.cities[(city.x, city.y)] = CityEntry(
+            city_id=city.id,
+            name=city.name,
+            owner_id=city.owner_id,
+            owner_name=city.owner.username if city.owner else None,
+            alliance_id=alliance.id if alliance else None,
+            alliance_name=alliance.name if alliance else None,
+            points=ranking.calculate_city_points(city),
+            player_points=player_points.get(city.owner_id, 0) if city.owner_id else 0,
+            tile_type=city.tile_type,
+        )
+    for oasis in oases:
+        chunk = chunks.get(chunk_key(world_id, oasis.x, oasis.y))
+        if chunk is None:
+            continue
+        owner_city = oasis.owner_city
+        owner = owner_city.owner if owner_city else None
+        alliance = _alliance_of(owner, world_id)
+        chunk.oases[(oasis.x, oasis.y)] = OasisEntry(
+            oasis_id=oasis.id,
+            resource_type=oasis.resource_type,
+            bonus_percent=oasis.bonus_percent,
+            owner_city_id=oasis.owner_city_id,
+            owner_id=owner_city.owner_id if owner_city else None,
+            owner_name=owner.username if owner else None,
+            alliance_id=alliance.id if alliance else None,
+            alliance_name=alliance.name if alliance else None,
+        )
+    return list(chunks.values())
+
+
+def get_chunks(db: Session, world_id: int, keys: List[ChunkKey]) -> Dict[ChunkKey, MapChunk]:
+    """Return the chunks for ``keys``, loading the missing ones together."""
+
+    _ensure_listener(db)
+    now = time.monotonic()
+    generation = _cache.generation
+    chunks = _cache.get(keys, now) if settings.map_chunk_ttl_seconds > 0 else {}
+    missing = [key for key in keys if key not in chunks]
+    if missing:
+        loaded = _load_chunks(db, world_id, missing)
+        if settings.map_chunk_ttl_seconds > 0:
+            _cache.store(
+                loaded,
+                generation,
+                now + settings.map_chunk_ttl_seconds,
+                settings.map_chunk_cache_size,
+            )
+        chunks.update((chunk.key, chunk) for chunk in loaded)
+    return chunks
+
+
+def viewport(
+    db: Session,
+    world_id: int,
+    min_x: int,
+    max_x: int,
+    min_y: int,
+    max_y: int,
+    kind: str,
+    render: Render,
+) -> List[Any]:
+    """Return the tiles of an inclusive rectangle, ``x`` major, from cached chunks.
+
+    ``kind`` names the tile format produced by ``render``; each chunk renders
+    every format once and reuses it until the chunk is invalidated.
+    """
+
+    chunks = get_chunks(db, world_id, chunk_keys(world_id, min_x, max_x, min_y, max_y))
+    rendered = {key: chunk.tiles(kind, render) for key, chunk in chunks.items()}
+    tiles: List[Any] = []
+    for x in range(min_x, max_x + 1):
+        cx = x // CHUNK_SIZE
+        for y in range(min_y, max_y + 1):
+            tile = rendered[(world_id, cx, y // CHUNK_SIZE)].get((x, y))
+            if tile is not None:
+                tiles.append(tile)
+    return tiles
+
+
+def invalidate(changes: ChunkChanges) -> None:
+    if changes:
+        _cache.invalidate(changes)
+
+
+def invalidate_all() -> None:
+    _cache.clear()
+
+
+def get_cache_stats() -> dict:
+    return {**_cache.stats, "size": len(_cache)}
+
+
+# -- change tracking -------------------------------------------------------
+
+_CITY_FIELDS = ("world_id", "x", "y", "owner_id", "name", "tile_type")
+_OASIS_FIELDS = ("owner_city_id", "resource_type", "bonus_percent")
+_SESSION_KEY = "map_chunk_changes"
+
+
+def _changed(obj, fields: Iterable[str]) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in fields)
+
+
+def _old_values(obj, name: str) -> list:
+    history = inspect(obj).attrs[name].history
+    return [value for value in (history.deleted or ()) if value is not None]
+
+
+def _position_keys(obj) -> Set[ChunkKey]:
+    keys: Set[ChunkKey] = set()
+    if None not in (obj.world_id, obj.x, obj.y):
+        keys.add(chunk_key(obj.world_id, obj.x, obj.y))
+    worlds = _old_values(obj, "world_id") or [obj.world_id]
+    xs = _old_values(obj, "x") or [obj.x]
+    ys = _old_values(obj, "y") or [obj.y]
+    for world_id in worlds:
+        for x in xs:
+            for y in ys:
+                if None not in (world_id, x, y):
+                    keys.add(chunk_key(world_id, x, y))
+    return keys
+
+
+def collect_changes(session: Session) -> ChunkChanges:
+    """Return what the pending flush changes on the map."""
+
+    changes = ChunkChanges()
+    deleted = set(session.deleted)
+    for obj in list(session.new) + list(session.dirty) + list(deleted):
+        is_new_or_deleted = obj in session.new or obj in deleted
+        if isinstance(obj, models.City):
+            if is_new_or_deleted or _changed(obj, _CITY_FIELDS):
+                changes.chunks |= _position_keys(obj)
+                if obj.id is not None:
+                    changes.cities.add(obj.id)
+                owners = {obj.owner_id, *_old_values(obj, "owner_id")}
+                changes.users |= {owner for owner in owners if owner}
+        elif isinstance(obj, (models.Building, models.Troop)):
+            fields = ("level",) if isinstance(obj, models.Building) else ("quantity",)
+            if (is_new_or_deleted or _changed(obj, fields)) and obj.city_id:
+                changes.cities.add(obj.city_id)
+        elif isinstance(obj, models.Oasis):
+            if is_new_or_deleted or _changed(obj, _OASIS_FIELDS):
+                changes.chunks |= _position_keys(obj)
+        elif isinstance(obj, models.AllianceMember):
+            changes.users |= {obj.user_id, *_old_values(obj, "user_id")} - {None}
+        elif isinstance(obj, models.Alliance):
+            if obj.id is not None and (is_new_or_deleted or _changed(obj, ("name",))):
+                changes.alliances.add(obj.id)
+        elif isinstance(obj, models.User):
+            if obj.id is not None and not is_new_or_deleted and _changed(obj, ("username",)):
+                changes.users.add(obj.id)
+    return changes
+
+
+def _after_flush(session: Session, _flush_context) -> None:
+    changes = collect_changes(session)
+    if not changes:
+        return
+    session.info.setdefault(_SESSION_KEY, ChunkChanges()).update(changes)
+    if session.get_bind().dialect.name == "postgresql":
+        payload = changes.to_payload()
+        if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+            payload = ChunkChanges(everything=True).to_payload()
+        notify(session.connection(), CHANNEL, payload)
+
+
+def _after_commit(session: Session) -> None:
+    changes = session.info.pop(_SESSION_KEY, None)
+    if changes:
+        invalidate(changes)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+event.listen(SessionLocal, "after_flush", _after_flush)
+event.listen(SessionLocal, "after_commit", _after_commit)
+event.listen(SessionLocal, "after_rollback", _after_rollback)
+
+
+# -- cross-process invalidation --------------------------------------------
+
+_listener_thread: Thread | None = None
+_listener_lock = Lock()
+_listener_stop = Event()
+
+
+def _handle_payload(payload: str) -> None:
+    try:
+        changes = ChunkChanges.from_payload(payload)
+    except (ValueError, TypeError):
+        logger.warning("Ignoring malformed map chunk notification: %r", payload)
+        return
+    invalidate(changes)
+
+
+def _listen(poll_seconds: float = 1.0) -> None:
+    listener = None
+    while not _listener_stop.is_set():
+        try:
+            if listener is None:
+                listener = NotificationListener(engine, CHANNEL, _handle_payload)
+                # Anything committed while disconnected was missed.
+                invalidate_all()
+            listener.wait(poll_seconds)
+        except Exception:
+            logger.exception("Map chunk listener failed; reconnecting")
+            if listener is not None:
+                listener.close()
+                listener = None
+            _listener_stop.wait(poll_seconds)
+    if listener is not None:
+        listener.close()
+
+
+def _ensure_listener(db: Session) -> None:
+    global _listener_thread
+
+    if _listener_thread is not None or db.get_bind().dialect.name != "postgresql":
+        return
+    with _listener_lock:
+        if _listener_thread is None:
+            _listener_stop.clear()
+            _listener_thread = Thread(target=_listen, name="map-chunks", daemon=True)
+            _listener_thread.start()
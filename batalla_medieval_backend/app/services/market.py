@@ -1,14 +1,14 @@
 import logging
 from datetime import timedelta
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy import or_
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
 from ..utils import utc_now
-from . import anticheat, balance
+from . import anticheat, balance, market_book
 from . import event as event_service
 from . import movement as movement_service
 from . import production
@@ -150,6 +150,7 @@ def _audit_transport_after_commit(
             movement.arrival_time,
             movement.speed_used or TRANSPORT_BASE_SPEED,
         )
+        db.commit()
     except Exception:
         db.rollback()
         logger.exception(
@@ -188,9 +189,12 @@ def create_offer(
         offer_amount=offer.offer_amount,
         request_type=offer.request_type,
         request_amount=offer.request_amount,
+        ratio=offer.request_amount / offer.offer_amount,
         is_alliance_only=offer.is_alliance_only,
     )
     db.add(db_offer)
+    db.flush()
+    market_book.stage_added(db, db_offer, city)
     db.commit()
     db.refresh(db_offer)
     production.record_resource_gains(db, city, production_gains)
@@ -233,63 +237,182 @@ def npc_trade(
     return city
 
 
-def get_offers(
+def _viewer_alliance_id(db: Session, world_id: int, user_id: Optional[int]) -> Optional[int]:
+    if not user_id:
+        return None
+    return (
+        db.query(models.AllianceMember.alliance_id)
+        .join(models.Alliance)
+        .filter(
+            models.AllianceMember.user_id == user_id,
+            models.Alliance.world_id == world_id,
+        )
+        .limit(1)
+        .scalar()
+    )
+
+
+def _alliance_cities(world_id: int, alliance_id: int):
+    return select(models.City.id).join(
+        models.AllianceMember, models.AllianceMember.user_id == models.City.owner_id
+    ).where(
+        models.AllianceMember.alliance_id == alliance_id,
+        models.City.world_id == world_id,
+    )
+
+
+def _offer_query(
     db: Session,
     world_id: int,
-    user_id: int = None,
-    filter_alliance: bool = False,
-    skip: int = 0,
-    limit: int = 100,
-) -> List[models.MarketOffer]:
+    alliance_id: Optional[int],
+    *,
+    filter_alliance: bool,
+    offer_type: Optional[str] = None,
+    request_type: Optional[str] = None,
+    min_ratio: Optional[float] = None,
+    max_ratio: Optional[float] = None,
+):
+    """Visible offers of a world with their city and owner names, best ratio first."""
+
+    offer = models.MarketOffer
     query = (
-        db.query(models.MarketOffer)
-        .join(models.City)
-        .filter(models.MarketOffer.world_id == world_id)
+        db.query(offer, models.City.name, models.User.username)
+        .join(models.City, models.City.id == offer.city_id)
+        .outerjoin(models.User, models.User.id == models.City.owner_id)
+        .filter(offer.world_id == world_id)
     )
-
-    if user_id:
-        user_alliance = (
-            db.query(models.AllianceMember)
-            .join(models.Alliance)
-            .filter(
-                models.AllianceMember.user_id == user_id,
-                models.Alliance.world_id == world_id,
+    # Alliance-only offers are visible to members of the seller's alliance
+    # in this world. Players without one only see public offers.
+    if alliance_id is None:
+        query = query.filter(offer.is_alliance_only.is_(False))
+    elif filter_alliance:
+        query = query.filter(offer.city_id.in_(_alliance_cities(world_id, alliance_id)))
+    else:
+        query = query.filter(
+            or_(
+                offer.is_alliance_only.is_(False),
+                offer.city_id.in_(_alliance_cities(world_id, alliance_id)),
             )
-            .first()
         )
+    if offer_type is not None:
+        query = query.filter(offer.offer_type == offer_type)
+    if request_type is not None:
+        query = query.filter(offer.request_type == request_type)
+    if min_ratio is not None:
+        query = query.filter(offer.ratio >= min_ratio)
+    if max_ratio is not None:
+        query = query.filter(offer.ratio <= max_ratio)
+    return query.order_by(offer.ratio.asc(), offer.id.asc())
+
+
+def _with_names(rows) -> List[models.MarketOffer]:
+    offers = []
+    for offer, city_name, owner_name in rows:
+        offer.city_name = city_name
+        offer.owner_name = owner_name
+        offers.append(offer)
+    return offers
+
+
+def encode_cursor(ratio: float, offer_id: int) -> str:
+    return f"{ratio!r}:{offer_id}"
+
 
-        if user_alliance:
-            alliance_id = user_alliance.alliance_id
-
-            if filter_alliance:
-                query = (
-                    query.join(models.User, models.City.owner_id == models.User.id)
-                    .join(
-                        models.AllianceMember,
-                        models.User.id == models.AllianceMember.user_id,
-                    )
-                    .filter(models.AllianceMember.alliance_id == alliance_id)
-                )
-            else:
-                query = query.join(
-                    models.User, models.City.owner_id == models.User.id
-                ).outerjoin(
-                    models.AllianceMember,
-                    models.User.id == models.AllianceMember.user_id,
-                )
-
-                query = query.filter(
-                    or_(
-                        models.MarketOffer.is_alliance_only == False,  # noqa: E712
-                        models.AllianceMember.alliance_id == alliance_id,
-                    )
-                )
-        else:
-            query = query.filter(models.MarketOffer.is_alliance_only == False)  # noqa: E712
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        ratio, offer_id = cursor.split(":")
+        return float(ratio), int(offer_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def _book_visibility(
+    db: Session, world_id: int, alliance_id: Optional[int], filter_alliance: bool
+) -> Callable[[market_book.BookEntry], bool]:
+    if alliance_id is None:
+        return lambda entry: not entry.is_alliance_only
+    allies: Set[int] = set(
+        db.execute(
+            select(models.AllianceMember.user_id).where(models.AllianceMember.alliance_id == alliance_id)
+        ).scalars()
+    )
+    if filter_alliance:
+        return lambda entry: entry.owner_id in allies
+    return lambda entry: not entry.is_alliance_only or entry.owner_id in allies
+
+
+def get_order_book(
+    db: Session,
+    world_id: int,
+    user_id: Optional[int] = None,
+    *,
+    offer_type: Optional[str] = None,
+    request_type: Optional[str] = None,
+    min_ratio: Optional[float] = None,
+    max_ratio: Optional[float] = None,
+    filter_alliance: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Tuple[list, Optional[str]]:
+    """Return one page of visible offers, cheapest first, and the next page's cursor.
+
+    Offers are ordered by ``ratio`` (requested per offered unit), then id, and
+    paged by keyset: the cursor is the last (ratio, id) returned. With
+    ``MARKET_BOOK_ENABLED`` the page comes from the in-memory book.
+    """
+
+    after = decode_cursor(cursor) if cursor else None
+    alliance_id = _viewer_alliance_id(db, world_id, user_id)
+    if market_book.enabled():
+        offers = market_book.query(
+            db,
+            world_id,
+            offer_type=offer_type,
+            request_type=request_type,
+            min_ratio=min_ratio,
+            max_ratio=max_ratio,
+            after=after,
+            visible=_book_visibility(db, world_id, alliance_id, filter_alliance),
+            limit=limit + 1,
+        )
     else:
-        query = query.filter(models.MarketOffer.is_alliance_only == False)  # noqa: E712
+        query = _offer_query(
+            db,
+            world_id,
+            alliance_id,
+            filter_alliance=filter_alliance,
+            offer_type=offer_type,
+            request_type=request_type,
+            min_ratio=min_ratio,
+            max_ratio=max_ratio,
+        )
+        if after is not None:
+            ratio, offer_id = after
+            offer = models.MarketOffer
+            query = query.filter(
+                or_(offer.ratio > ratio, and_(offer.ratio == ratio, offer.id > offer_id))
+            )
+        offers = _with_names(query.limit(limit + 1).all())
+
+    if len(offers) <= limit:
+        return offers, None
+    offers = offers[:limit]
+    return offers, encode_cursor(offers[-1].ratio, offers[-1].id)
+
+
+def get_offers(
+    db: Session,
+    world_id: int,
+    user_id: int = None,
+    filter_alliance: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[models.MarketOffer]:
+    """Offset-paged variant of :func:`get_order_book` kept for existing clients."""
 
-    return query.offset(skip).limit(limit).all()
+    alliance_id = _viewer_alliance_id(db, world_id, user_id)
+    query = _offer_query(db, world_id, alliance_id, filter_alliance=filter_alliance)
+    return _with_names(query.offset(skip).limit(limit).all())
 
 
 def accept_offer(db: Session, buyer_city: models.City, offer_id: int):
@@ -352,6 +475,7 @@ def accept_offer(db: Session, buyer_city: models.City, offer_id: int):
         buyer_resources = payment.copy()
         db.delete(offer)
         db.flush()
+        market_book.stage_removed(db, offer)
 
         seller_movement = _create_transport_uncommitted(
             db,
@@ -412,6 +536,7 @@ def cancel_offer(db: Session, city: models.City, offer_id: int):
     setattr(city, offer.offer_type, getattr(city, offer.offer_type) + offer.offer_amount)
 
     db.delete(offer)
+    market_book.stage_removed(db, offer)
     db.commit()
     production.record_resource_gains(db, city, production_gains)
 
@@ -0,0 +1,352 @@
+"""Optional process-local market order book (``MARKET_BOOK_ENABLED``).
+
+The open offers of a world are loaded once into lists sorted by exchange
+ratio and id: one list for every combination of offered and requested
+resource, including "any". Browsing the market is then a bisect to the
+cursor and a scan of one page instead of a query.
+
+``services.market`` stages the offers it creates, accepts or cancels on the
+session; the changes are applied to the book when the transaction commits
+and dropped on rollback. On PostgreSQL they are also sent with
+``pg_notify`` so that every web replica applies them. Anything else that
+changes an offer (a conquered city changing owner, an offer deleted outside
+the market service) is picked up when the book is reloaded after
+``MARKET_BOOK_TTL_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..database import SessionLocal, engine
+from ..pg_notify import NotificationListener, notify
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CHANNEL = "market_book"
+
+BookKey = Tuple[float, int]
+Pair = Tuple[Optional[str], Optional[str]]
+
+
+@dataclass(frozen=True)
+class BookEntry:
+    """What the market list shows of one open offer."""
+
+    id: int
+    city_id: int
+    world_id: int
+    owner_id: Optional[int]
+    offer_type: str
+    offer_amount: int
+    request_type: str
+    request_amount: int
+    ratio: float
+    is_alliance_only: bool
+    created_at: datetime
+    city_name: Optional[str]
+    owner_name: Optional[str]
+
+    @property
+    def key(self) -> BookKey:
+        return (self.ratio, self.id)
+
+    def pairs(self) -> Tuple[Pair, ...]:
+        return (
+            (None, None),
+            (self.offer_type, None),
+            (None, self.request_type),
+            (self.offer_type, self.request_type),
+        )
+
+    def to_payload(self) -> dict:
+        return {**asdict(self), "created_at": self.created_at.isoformat()}
+
+    @classmethod
+    def from_payload(cls, data: dict) -> "BookEntry":
+        return cls(**{**data, "created_at": datetime.fromisoformat(data["created_at"])})
+
+
+def entry_for(offer: models.MarketOffer, city: models.City) -> BookEntry:
+    owner = city.owner
+    return BookEntry(
+        id=offer.id,
+        city_id=offer.city_id,
+        world_id=offer.world_id,
+        owner_id=city.owner_id,
+        offer_type=offer.offer_type,
+        offer_amount=offer.offer_amount,
+        request_type=offer.request_type,
+        request_amount=offer.request_amount,
+        ratio=offer.ratio,
+        is_alliance_only=bool(offer.is_alliance_only),
+        created_at=offer.created_at,
+        city_name=city.name,
+        owner_name=owner.username if owner else None,
+    )
+
+
+class WorldBook:
+    def __init__(self, entries: Iterable[BookEntry], expires_at: float) -> None:
+        self.expires_at = expires_at
+        self._entries: Dict[int, BookEntry] = {}
+        self._keys: Dict[Pair, List[BookKey]] = {}
+        for entry in sorted(entries, key=lambda entry: entry.key):
+            self._entries[entry.id] = entry
+            for pair in entry.pairs():
+                self._keys.setdefault(pair, []).append(entry.key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: BookEntry) -> None:
+        self.remove(entry.id)
+        self._entries[entry.id] = entry
+        for pair in entry.pairs():
+            insort(self._keys.setdefault(pair, []), entry.key)
+
+    def remove(self, offer_id: int) -> None:
+        entry = self._entries.pop(offer_id, None)
+        if entry is None:
+            return
+        for pair in entry.pairs():
+            keys = self._keys[pair]
+            index = bisect_left(keys, entry.key)
+            if index < len(keys) and keys[index] == entry.key:
+                del keys[index]
+
+    def scan(
+        self,
+        pair: Pair,
+        *,
+        min_ratio: Optional[float],
+        max_ratio: Optional[float],
+        after: Optional[BookKey],
+        visible: Callable[[BookEntry], bool],
+        limit: int,
+    ) -> List[BookEntry]:
+        keys = self._keys.get(pair, [])
+        start = 0
+        if min_ratio is not None:
+            start = bisect_left(keys, (min_ratio,))
+        if after is not None:
+            start = max(start, bisect_right(keys, after))
+        page: List[BookEntry] = []
+        for index in range(start, len(keys)):
+            ratio, offer_id = keys[index]
+            if max_ratio is not None and ratio > max_ratio:
+                break
+            entry = self._entries[offer_id]
+            if visible(entry):
+                page.append(entry)
+                if len(page) == limit:
+                    break
+        return page
+
+
+_books: Dict[int, WorldBook] = {}
+_lock = Lock()
+_generation = 0
+_stats = {"hits": 0, "loads": 0, "updates": 0}
+
+
+def _load(db: Session, world_id: int, expires_at: float) -> WorldBook:
+    offer, city, user = models.MarketOffer, models.City, models.User
+    rows = (
+        db.query(offer, city.owner_id, city.name, user.username)
+        .join(city, city.id == offer.city_id)
+        .outerjoin(user, user.id == city.owner_id)
+        .filter(offer.world_id == world_id)
+        .all()
+    )
+    return WorldBook(
+        (
+            BookEntry(
+                id=row.id,
+                city_id=row.city_id,
+                world_id=row.world_id,
+                owner_id=owner_id,
+                offer_type=row.offer_type,
+                offer_amount=row.offer_amount,
+                request_type=row.request_type,
+                request_amount=row.request_amount,
+                ratio=row.ratio,
+                is_alliance_only=bool(row.is_alliance_only),
+                created_at=row.created_at,
+                city_name=city_name,
+                owner_name=owner_name,
+            )
+            for row, owner_id, city_name, owner_name in rows
+        ),
+        expires_at,
+    )
+
+
+def enabled() -> bool:
+    return settings.market_book_enabled
+
+
+def get_book(db: Session, world_id: int) -> WorldBook:
+    """Return the book of ``world_id``, loading it if missing or expired."""
+
+    _ensure_listener(db)
+    now = time.monotonic()
+    with _lock:
+        book = _books.get(world_id)
+        if book is not None and book.expires_at > now:
+            _stats["hits"] += 1
+            return book
+        generation = _generation
+    book = _load(db, world_id, now + settings.market_book_ttl_seconds)
+    with _lock:
+        _stats["loads"] += 1
+        # An offer changed while loading: serve this copy but do not keep it.
+        if generation == _generation:
+            _books[world_id] = book
+    return book
+
+
+def query(
+    db: Session,
+    world_id: int,
+    *,
+    offer_type: Optional[str],
+    request_type: Optional[str],
+    min_ratio: Optional[float],
+    max_ratio: Optional[float],
+    after: Optional[BookKey],
+    visible: Callable[[BookEntry], bool],
+    limit: int,
+) -> List[BookEntry]:
+    book = get_book(db, world_id)
+    with _lock:
+        return book.scan(
+            (offer_type, request_type),
+            min_ratio=min_ratio,
+            max_ratio=max_ratio,
+            after=after,
+            visible=visible,
+            limit=limit,
+        )
+
+
+def _apply(changes: dict) -> None:
+    global _generation
+
+    with _lock:
+        _generation += 1
+        _stats["updates"] += 1
+        book = _books.get(changes["world_id"])
+        if book is None:
+            return
+        for offer_id in changes.get("removed", []):
+            book.remove(offer_id)
+        for data in changes.get("added", []):
+            book.add(BookEntry.from_payload(data))
+
+
+def get_stats() -> dict:
+    with _lock:
+        return {**_stats, "worlds": len(_books), "offers": sum(len(book) for book in _books.values())}
+
+
+def reset() -> None:
+    with _lock:
+        _books.clear()
+
+
+# -- changes staged by services.market -------------------------------------
+
+_SESSION_KEY = "market_book_changes"
+
+
+def _stage(db: Session, changes: dict) -> None:
+    db.info.setdefault(_SESSION_KEY, []).append(changes)
+    if db.get_bind().dialect.name == "postgresql":
+        notify(db.connection(), CHANNEL, json.dumps(changes, separators=(",", ":")))
+
+
+def stage_added(db: Session, offer: models.MarketOffer, city: models.City) -> None:
+    """Add a flushed offer to the books once ``db`` commits."""
+
+    if settings.market_book_enabled:
+        entry = entry_for(offer, city)
+        _stage(db, {"world_id": offer.world_id, "added": [entry.to_payload()], "removed": []})
+
+
+def stage_removed(db: Session, offer: models.MarketOffer) -> None:
+    """Remove an offer from the books once ``db`` commits."""
+
+    if settings.market_book_enabled:
+        _stage(db, {"world_id": offer.world_id, "added": [], "removed": [offer.id]})
+
+
+def _after_commit(session: Session) -> None:
+    for changes in session.info.pop(_SESSION_KEY, []):
+        _apply(changes)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+event.listen(SessionLocal, "after_commit", _after_commit)
+event.listen(SessionLocal, "after_rollback", _after_rollback)
+
+
+# -- cross-process updates -------------------------------------------------
+
+_listener_thread: Thread | None = None
+_listener_lock = Lock()
+_listener_stop = Event()
+
+
+def _handle_payload(payload: str) -> None:
+    try:
+        _apply(json.loads(payload))
+    except (ValueError, TypeError, KeyError):
+        logger.warning("Ignoring malformed market book notification: %r", payload)
+
+
+def _listen(poll_seconds: float = 1.0) -> None:
+    listener = None
+    while not _listener_stop.is_set():
+        try:
+            if listener is None:
+                listener = NotificationListener(engine, CHANNEL, _handle_payload)
+                # Anything committed while disconnected was missed.
+                reset()
+            listener.wait(poll_seconds)
+        except Exception:
+            logger.exception("Market book listener failed; reconnecting")
+            if listener is not None:
+                listener.close()
+                listener = None
+            _listener_stop.wait(poll_seconds)
+    if listener is not None:
+        listener.close()
+
+
+def _ensure_listener(db: Session) -> None:
+    global _listener_thread
+
+    if _listener_thread is not None or db.get_bind().dialect.name != "postgresql":
+        return
+    with _listener_lock:
+        if _listener_thread is None:
+            _listener_stop.clear()
+            _listener_thread = Thread(target=_listen, name="market-book", daemon=True)
+            _listener_thread.start()
@@ -0,0 +1,230 @@
+"""Cross-process delivery of real-time events to the Socket.IO server.
+
+Any process (API or worker) publishes events with :func:`publish`. They are
+buffered and handed to the configured bus in batches; the web process
+subscribes to the bus and fans the events out to Socket.IO rooms.
+
+Backends:
+
+* ``memory``: delivery inside the publishing process only. Used in tests and
+  single-process development, where the API also resolves everything.
+* ``postgres``: batches travel as ``NOTIFY`` payloads on :data:`CHANNEL`, so
+  events published by the worker reach every web replica.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from threading import Condition, Event, Lock, Thread
+from typing import Callable, Iterable, List
+
+from ..config import get_settings
+from ..pg_notify import MAX_PAYLOAD_BYTES, NotificationListener, notify
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "socket_events"
+
+Message = dict
+Handler = Callable[[List[Message]], None]
+
+
+def make_message(event: str, data, rooms: Iterable[str]) -> Message:
+    return {
+        "event": event,
+        "data": data,
+        "rooms": sorted(set(rooms)),
+        "published_at": time.time(),
+    }
+
+
+def encode_batches(messages: List[Message], limit: int = MAX_PAYLOAD_BYTES) -> List[str]:
+    """Pack ``messages`` into as few JSON arrays as fit in ``limit`` bytes each."""
+
+    payloads: List[str] = []
+    current: List[str] = []
+    size = 2
+    for message in messages:
+        encoded = json.dumps(message, separators=(",", ":"), default=str)
+        encoded_size = len(encoded.encode("utf-8"))
+        if encoded_size + 2 > limit:
+            logger.warning(
+                "Dropping oversized real-time event",
+                extra={"socket_event": message.get("event"), "bytes": encoded_size},
+            )
+            continue
+        if current and size + encoded_size + 1 > limit:
+            payloads.append("[" + ",".join(current) + "]")
+            current, size = [], 2
+        current.append(encoded)
+        size += encoded_size + 1
+    if current:
+        payloads.append("[" + ",".join(current) + "]")
+    return payloads
+
+
+class InMemoryBus:
+    """Deliver batches synchronously to subscribers of this process."""
+
+    def __init__(self) -> None:
+        self._handlers: List[Handler] = []
+        self._lock = Lock()
+
+    def publish(self, messages: List[Message]) -> None:
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            handler(list(messages))
+
+    def subscribe(self, handler: Handler) -> None:
+        with self._lock:
+            self._handlers.append(handler)
+
+    def unsubscribe(self, handler: Handler) -> None:
+        with self._lock:
+            if handler in self._handlers:
+                self._handlers.remove(handler)
+
+
+class PostgresBus:
+    """Send batches as ``NOTIFY`` payloads and listen on a dedicated thread."""
+
+    def __init__(self, engine, poll_seconds: float = 1.0) -> None:
+        self._engine = engine
+        self._poll_seconds = poll_seconds
+        self._handlers: List[Handler] = []
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def publish(self, messages: List[Message]) -> None:
+        payloads = encode_batches(messages)
+        if not payloads:
+            return
+        with self._engine.begin() as connection:
+            for payload in payloads:
+                notify(connection, CHANNEL, payload)
+
+    def _dispatch(self, payload: str) -> None:
+        messages = json.loads(payload)
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            handler(messages)
+
+    def _listen(self) -> None:
+        listener = None
+        while not self._stop.is_set():
+            try:
+                if listener is None:
+                    listener = NotificationListener(self._engine, CHANNEL, self._dispatch)
+                listener.wait(self._poll_seconds)
+            except Exception:
+                logger.exception("Real-time bus listener failed; reconnecting")
+                if listener is not None:
+                    listener.close()
+                    listener = None
+                self._stop.wait(self._poll_seconds)
+        if listener is not None:
+            listener.close()
+
+    def subscribe(self, handler: Handler) -> None:
+        with self._lock:
+            self._handlers.append(handler)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = Thread(target=self._listen, name="socket-bus", daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, handler: Handler) -> None:
+        with self._lock:
+            if handler in self._handlers:
+                self._handlers.remove(handler)
+            thread = self._thread if not self._handlers else None
+            if thread is not None:
+                self._thread = None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+
+class BatchingPublisher:
+    """Buffer published messages and flush them to the bus in batches.
+
+    A background thread flushes every ``flush_seconds`` or as soon as
+    ``max_batch`` messages are waiting, so callers on request or worker
+    threads never block on the bus.
+    """
+
+    def __init__(self, bus, *, flush_seconds: float, max_batch: int) -> None:
+        self.bus = bus
+        self._flush_seconds = flush_seconds
+        self._max_batch = max_batch
+        self._buffer: List[Message] = []
+        self._condition = Condition()
+        self._thread: Thread | None = None
+        self.published = 0
+
+    def publish(self, message: Message) -> None:
+        with self._condition:
+            self._buffer.append(message)
+            self.published += 1
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="socket-publisher", daemon=True)
+                self._thread.start()
+            if len(self._buffer) >= self._max_batch:
+                self._condition.notify()
+
+    def depth(self) -> int:
+        with self._condition:
+            return len(self._buffer)
+
+    def flush(self) -> None:
+        with self._condition:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            try:
+                self.bus.publish(batch)
+            except Exception:
+                logger.exception("Failed to publish %s real-time events", len(batch))
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if len(self._buffer) < self._max_batch:
+                    self._condition.wait(self._flush_seconds)
+            self.flush()
+
+
+_publisher: BatchingPublisher | None = None
+_publisher_lock = Lock()
+
+
+def get_publisher() -> BatchingPublisher:
+    """Return this process's publisher, building the configured bus once."""
+
+    global _publisher
+
+    with _publisher_lock:
+        if _publisher is None:
+            settings = get_settings()
+            if settings.socket_bus_backend == "postgres":
+                from ..database import engine
+
+                bus = PostgresBus(engine)
+            else:
+                bus = InMemoryBus()
+            _publisher = BatchingPublisher(
+                bus,
+                flush_seconds=settings.socket_bus_flush_seconds,
+                max_batch=settings.socket_bus_max_batch,
+            )
+        return _publisher
+
+
+def publish(event: str, data, rooms: Iterable[str]) -> None:
+    """Queue ``event`` for delivery to ``rooms`` on every web replica."""
+
+    get_publisher().publish(make_message(event, data, rooms))
@@ -0,0 +1,312 @@
+"""Chat word filter.
+
+The censored terms of a chat scope (the built-in defaults, plus the
+``chat_filter_terms`` rows that apply to everything, to the world and to the
+sender's language) are compiled once into an Aho-Corasick automaton.
+Messages and terms are compared after Unicode compatibility decomposition,
+removal of accents and case folding, so ``CÚRSE`` matches ``curse``. Each
+message is scanned once, whatever the number of terms, and every matched
+stretch of the original text becomes ``***``.
+
+Compiled filters are cached per ``(world, language)``. After
+``CHAT_FILTER_RELOAD_SECONDS`` the row count and latest ``created_at`` of the
+scope are checked (terms are only ever added or removed, and an addition
+always moves the latest time even when SQLite reuses a deleted id), and the
+filter is only rebuilt when they changed; changes made through this module
+also invalidate the local cache at once.
+
+The chat socket calls ``censor_async``: the check and any rebuild run in a
+worker thread, one at a time per scope, while messages keep being censored
+with the previous filter. Only the first message of a scope waits for it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import unicodedata
+from collections import deque
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TERMS = ("badword", "curse", "offensive")
+MASK = "***"
+
+_fold_cache: Dict[str, str] = {}
+
+
+def _fold_char(char: str) -> str:
+    folded = _fold_cache.get(char)
+    if folded is None:
+        decomposed = unicodedata.normalize("NFKD", char)
+        folded = "".join(part for part in decomposed if not unicodedata.combining(part)).casefold()
+        _fold_cache[char] = folded
+    return folded
+
+
+def fold(text: str) -> str:
+    """Return ``text`` as terms and messages are compared."""
+
+    if text.isascii():
+        return text.lower()
+    return "".join(_fold_char(char) for char in text)
+
+
+class WordFilter:
+    """An Aho-Corasick automaton over folded terms."""
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        # Length of the longest term ending in each state, 0 if none.
+        self._match: List[int] = [0]
+        fail: List[int] = [0]
+        self.size = 0
+        for term in {fold(term.strip()) for term in terms}:
+            if not term:
+                continue
+            state = 0
+            for char in term:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._match.append(0)
+                    fail.append(0)
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._match[state] = len(term)
+            self.size += 1
+
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                self._match[next_state] = max(self._match[next_state], self._match[fail[next_state]])
+        self._fail = fail
+
+    def _spans(self, folded: str) -> List[Tuple[int, int]]:
+        goto, fail, match = self._goto, self._fail, self._match
+        spans: List[Tuple[int, int]] = []
+        state = 0
+        for index, char in enumerate(folded):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            length = match[state]
+            if length:
+                start = index - length + 1
+                # A longer term can cover earlier matches; keep one span.
+                while spans and start < spans[-1][1]:
+                    start = min(start, spans.pop()[0])
+                spans.append((start, index + 1))
+        return spans
+
+    def censor(self, text: str) -> str:
+        if self.size == 0 or not text:
+            return text
+        if text.isascii():
+            folded = text.lower()
+            origin = None
+        else:
+            # Folding can change the length (``ß`` -> ``ss``), so remember
+            # which original character each folded one came from.
+            pieces, origin = [], []
+            for position, char in enumerate(text):
+                folded_char = _fold_char(char)
+                pieces.append(folded_char)
+                origin.extend([position] * len(folded_char))
+            folded = "".join(pieces)
+        spans = self._spans(folded)
+        if not spans:
+            return text
+
+        parts, cursor = [], 0
+        for start, end in spans:
+            if origin is not None:
+                start, end = origin[start], origin[end - 1] + 1
+            if start < cursor:
+                start = cursor
+            parts.append(text[cursor:start])
+            parts.append(MASK)
+            cursor = end
+        parts.append(text[cursor:])
+        return "".join(parts)
+
+
+_filters: Dict[Tuple[Optional[int], Optional[str]], Tuple[WordFilter, tuple, float]] = {}
+_filters_lock = Lock()
+# Scopes being checked in the background by ``censor_async``.
+_refreshing: set = set()
+_stats = {"hits": 0, "checks": 0, "compiles": 0}
+
+
+def _scope(query, world_id: Optional[int], language: Optional[str]):
+    term = models.ChatFilterTerm
+    return query.filter(
+        or_(term.world_id.is_(None), term.world_id == world_id),
+        or_(term.language.is_(None), term.language == language),
+    )
+
+
+def _signature(db: Session, world_id: Optional[int], language: Optional[str]) -> tuple:
+    term = models.ChatFilterTerm
+    return tuple(_scope(db.query(func.count(term.id), func.max(term.created_at)), world_id, language).one())
+
+
+def get_filter(
+    world_id: Optional[int] = None, language: Optional[str] = None, db: Session | None = None
+) -> WordFilter:
+    """Return the compiled filter of a chat scope, rebuilding it if its terms changed."""
+
+    key = (world_id, language)
+    now = time.monotonic()
+    with _filters_lock:
+        cached = _filters.get(key)
+    if cached is not None and cached[2] > now:
+        _stats["hits"] += 1
+        return cached[0]
+
+    session = db or SessionLocal()
+    try:
+        _stats["checks"] += 1
+        signature = _signature(session, world_id, language)
+        if cached is not None and cached[1] == signature:
+            word_filter = cached[0]
+        else:
+            terms = _scope(session.query(models.ChatFilterTerm.term), world_id, language).all()
+            word_filter = WordFilter([*DEFAULT_TERMS, *(term for term, in terms)])
+            _stats["compiles"] += 1
+    finally:
+        if db is None:
+            session.close()
+
+    expires_at = now + get_settings().chat_filter_reload_seconds
+    with _filters_lock:
+        _filters[key] = (word_filter, signature, expires_at)
+    return word_filter
+
+
+def censor(text: str, world_id: Optional[int] = None, language: Optional[str] = None) -> str:
+    return get_filter(world_id, language).censor(text)
+
+
+def _refresh(world_id: Optional[int], language: Optional[str]) -> None:
+    try:
+        get_filter(world_id, language)
+    except Exception:
+        logger.exception("chat_filter_reload_failed", extra={"world_id": world_id, "language": language})
+    finally:
+        with _filters_lock:
+            _refreshing.discard((world_id, language))
+
+
+async def censor_async(text: str, world_id: Optional[int] = None, language: Optional[str] = None) -> str:
+    """``censor`` for the event loop, never querying or compiling on it."""
+
+    key = (world_id, language)
+    with _filters_lock:
+        cached = _filters.get(key)
+        stale = cached is None or cached[2] <= time.monotonic()
+        start = stale and cached is not None and key not in _refreshing
+        if start:
+            _refreshing.add(key)
+    if cached is None:
+        word_filter = await asyncio.to_thread(get_filter, world_id, language)
+        return word_filter.censor(text)
+    if start:
+        asyncio.get_running_loop().run_in_executor(None, _refresh, world_id, language)
+    elif not stale:
+        _stats["hits"] += 1
+    return cached[0].censor(text)
+
+
+def invalidate(world_id: Optional[int] = None) -> None:
+    """Make the next message of the affected scopes check their terms again."""
+
+    with _filters_lock:
+        for key in list(_filters):
+            if world_id is None or key[0] in (world_id, None):
+                word_filter, signature, _ = _filters[key]
+                _filters[key] = (word_filter, signature, 0.0)
+
+
+def get_stats() -> Dict[str, int]:
+    with _filters_lock:
+        return {
+            **_stats,
+            "filters": len(_filters),
+            "terms": sum(word_filter.size for word_filter, _, _ in _filters.values()),
+        }
+
+
+def reset() -> None:
+    with _filters_lock:
+        _filters.clear()
+        _refreshing.clear()
+
+
+def list_terms(
+    db: Session, world_id: Optional[int] = None, language: Optional[str] = None
+) -> List[models.ChatFilterTerm]:
+    term = models.ChatFilterTerm
+    query = db.query(term)
+    if world_id is not None:
+        query = query.filter(term.world_id == world_id)
+    if language is not None:
+        query = query.filter(term.language == language)
+    return query.order_by(term.id.asc()).all()
+
+
+def add_terms(
+    db: Session, terms: Iterable[str], world_id: Optional[int] = None, language: Optional[str] = None
+) -> int:
+    """Store the terms not yet listed for exactly this world and language."""
+
+    if world_id is not None and db.get(models.World, world_id) is None:
+        raise HTTPException(status_code=404, detail="World not found")
+    term = models.ChatFilterTerm
+    existing = {
+        fold(value)
+        for value, in db.query(term.term).filter(
+            term.world_id.is_(None) if world_id is None else term.world_id == world_id,
+            term.language.is_(None) if language is None else term.language == language,
+        )
+    }
+    rows = []
+    for value in terms:
+        value = value.strip()
+        if value and fold(value) not in existing:
+            existing.add(fold(value))
+            rows.append({"term": value, "world_id": world_id, "language": language})
+    if rows:
+        db.execute(models.ChatFilterTerm.__table__.insert(), rows)
+    db.commit()
+    invalidate(world_id)
+    return len(rows)
+
+
+def remove_term(db: Session, term_id: int) -> None:
+    term = db.get(models.ChatFilterTerm, term_id)
+    if term is None:
+        raise HTTPException(status_code=404, detail="Term not found")
+    world_id = term.world_id
+    db.delete(term)
+    db.commit()
+    invalidate(world_id)
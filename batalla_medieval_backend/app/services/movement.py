@@ -6,17 +6,23 @@ import json
 import logging
 import math
 from datetime import timedelta
+from collections import defaultdict
 from typing import Any, Dict, List
 
 from sqlalchemy.orm import Session, selectinload
 
 from .. import models
+from ..config import get_settings
 from ..utils import utc_now
 from . import anticheat, balance, combat, espionage
 from . import event as event_service
 from . import notification as notification_service
 from . import production
 from . import quest as quest_service
+from . import ranking
+from . import report as report_service
+from . import world_membership
+from .sharding import QueueShard, active_movement_clause
 
 logger = logging.getLogger(__name__)
 
@@ -125,6 +131,13 @@ def _reserve_payload_and_create(
         for unit, amount in reserved_troops.items():
             by_type[unit].quantity -= amount
             db.add(by_type[unit])
+        # Troops on the march do not count towards ranking until they arrive.
+        ranking.apply_score_delta(
+            db,
+            city.owner_id,
+            city.world_id,
+            troop_delta=-ranking.troop_points(reserved_troops),
+        )
 
     if movement_type == "transport":
         if not resources:
@@ -205,6 +218,7 @@ def send_movement(
 ) -> models.Movement:
     """Validate, reserve and persist a player movement atomically."""
 
+    world_membership.ensure_world_open(origin_city.world)
     _validate_target_type(movement_type, target_city_id, target_oasis_id)
     normalized_troops = _normalize_troops(troops)
     normalized_resources = _normalize_resources(resources)
@@ -255,9 +269,10 @@ def send_movement(
     distance = math.hypot(origin_city.x - target_x, origin_city.y - target_y)
     arrival_time = utc_now() + timedelta(hours=distance / speed)
 
-    # Anti-cheat helpers currently own their commits. They therefore run before
-    # any troops/resources are reserved so a helper failure cannot strand a
-    # paid payload without a movement record.
+    # Anti-cheat only commits when it flags a violation; otherwise its signals
+    # join the movement's transaction and are analyzed by the worker. It runs
+    # before any troops/resources are reserved so a flag commit cannot strand
+    # a paid payload without a movement record.
     if origin_city.owner:
         anticheat.check_action_speed(db, origin_city.owner, "movement")
         if target_city is not None:
@@ -301,18 +316,81 @@ def send_movement(
     return movement_obj
 
 
+class _ResolutionBatch:
+    """Per-batch state shared by the resolvers of one worker transaction.
+
+    Troop rows of every target city are prefetched with the movements, so
+    arrivals update an in-memory index instead of querying one row per unit
+    per movement. Ranking deltas are summed per owner and written once when
+    the batch is flushed.
+    """
+
+    def __init__(self, movements: List[models.Movement]):
+        self._troops: Dict[tuple[int, str], models.Troop] = {}
+        self._score_deltas: Dict[tuple[int, int], list[int]] = defaultdict(lambda: [0, 0])
+        for movement in movements:
+            city = movement.target_city
+            if city is not None:
+                for troop in city.troops:
+                    self._troops[(troop.city_id, troop.unit_type)] = troop
+
+    def add_troops(self, city: models.City, troops: Dict[str, Any]) -> Dict[str, int]:
+        """Credit ``troops`` to ``city`` and return the amounts applied."""
+
+        arrived: Dict[str, int] = {}
+        for unit, raw_amount in (troops or {}).items():
+            amount = int(raw_amount)
+            if amount <= 0:
+                continue
+            troop = self._troops.get((city.id, unit))
+            if troop is None:
+                troop = models.Troop(city_id=city.id, unit_type=unit, quantity=0)
+                city.troops.append(troop)
+                self._troops[(city.id, unit)] = troop
+            troop.quantity += amount
+            arrived[unit] = amount
+        self.add_score(city.owner_id, city.world_id, troop_delta=ranking.troop_points(arrived))
+        return arrived
+
+    def add_score(
+        self,
+        user_id: int | None,
+        world_id: int,
+        *,
+        building_delta: int = 0,
+        troop_delta: int = 0,
+    ) -> None:
+        if not user_id:
+            return
+        entry = self._score_deltas[(user_id, world_id)]
+        entry[0] += building_delta
+        entry[1] += troop_delta
+
+    def flush(self, db: Session) -> None:
+        db.flush()
+        for (user_id, world_id), (building_delta, troop_delta) in self._score_deltas.items():
+            ranking.apply_score_delta(
+                db,
+                user_id,
+                world_id,
+                building_delta=building_delta,
+                troop_delta=troop_delta,
+            )
+        self._score_deltas.clear()
+
+
 def _add_report(
     db: Session,
     *,
-    city_id: int,
+    city: models.City,
     world_id: int,
     report_type: str,
     content: str,
     attacker_city_id: int | None,
     defender_city_id: int | None,
 ) -> models.Report:
-    report = models.Report(
-        city_id=city_id,
+    report = report_service.build_report(
+        city,
         world_id=world_id,
         report_type=report_type,
         content=content,
@@ -360,21 +438,32 @@ def _apply_hero_xp_without_commit(hero: models.Hero | None, xp_amount: int) -> N
         hero.level += 1
 
 
-def _apply_defender_losses(defender: models.City, losses: Dict[str, int]) -> None:
+def _apply_defender_losses(defender: models.City, losses: Dict[str, int]) -> Dict[str, int]:
+    """Apply battle losses and return the quantities actually removed."""
+
     by_type = {troop.unit_type: troop for troop in defender.troops}
+    removed: Dict[str, int] = {}
     for unit, loss in losses.items():
         troop = by_type.get(unit)
         if troop and loss > 0:
+            before = troop.quantity
             troop.quantity = max(0, troop.quantity - int(loss))
+            removed[unit] = before - troop.quantity
+    return removed
 
 
-def _resolve_attack_core(db: Session, movement: models.Movement) -> List[dict[str, Any]]:
+def _resolve_attack_core(
+    db: Session, movement: models.Movement, batch: _ResolutionBatch
+) -> List[dict[str, Any]]:
     attacker = movement.origin_city
     defender = movement.target_city
     if not attacker or not defender:
         return []
 
     original_defender_owner_id = defender.owner_id
+    # Loot is taken from the stored balance, so bring it up to date first.
+    production.settle_resources(db, defender, utc_now())
+    defender_levels_before = sum(int(building.level) for building in defender.buildings)
     attacker_resources_before = {
         resource: float(getattr(attacker, resource)) for resource in RESOURCE_FIELDS
     }
@@ -393,14 +482,41 @@ def _resolve_attack_core(db: Session, movement: models.Movement) -> List[dict[st
     for resource, before in attacker_resources_before.items():
         setattr(attacker, resource, before)
 
-    _apply_defender_losses(defender, result.get("defender_losses", {}))
+    removed_troops = _apply_defender_losses(defender, result.get("defender_losses", {}))
+    defender_levels_after = sum(int(building.level) for building in defender.buildings)
+    batch.add_score(
+        original_defender_owner_id,
+        movement.world_id,
+        building_delta=(defender_levels_after - defender_levels_before)
+        * ranking.BUILDING_POINTS_PER_LEVEL,
+        troop_delta=-ranking.troop_points(removed_troops),
+    )
+    if defender.owner_id != original_defender_owner_id:
+        city_buildings = ranking.building_points(
+            building.level for building in defender.buildings
+        )
+        city_troops = ranking.troop_points(
+            {troop.unit_type: troop.quantity for troop in defender.troops}
+        )
+        batch.add_score(
+            original_defender_owner_id,
+            movement.world_id,
+            building_delta=-city_buildings,
+            troop_delta=-city_troops,
+        )
+        batch.add_score(
+            defender.owner_id,
+            movement.world_id,
+            building_delta=city_buildings,
+            troop_delta=city_troops,
+        )
     if attacker.owner and attacker.owner.hero:
         _apply_hero_xp_without_commit(attacker.owner.hero, result.get("xp_gained", 0))
 
     content = combat.build_battle_report_content(attacker, defender, result)
     _add_report(
         db,
-        city_id=attacker.id,
+        city=attacker,
         world_id=movement.world_id,
         report_type="battle",
         content=content,
@@ -409,7 +525,7 @@ def _resolve_attack_core(db: Session, movement: models.Movement) -> List[dict[st
     )
     _add_report(
         db,
-        city_id=defender.id,
+        city=defender,
         world_id=movement.world_id,
         report_type="battle",
         content=content,
@@ -497,6 +613,10 @@ def _resolve_oasis_attack_core(
     effects: List[dict[str, Any]] = []
     conquered = bool(result.get("conquered") or result.get("conquest"))
     if conquered:
+        # The oasis bonus changes the attacker's rate from now on.
+        production.settle_resources(db, attacker, utc_now())
+        if oasis.owner_city is not None:
+            production.settle_resources(db, oasis.owner_city, utc_now())
         oasis.owner_city_id = attacker.id
         oasis.troops = {}
         if attacker.owner_id:
@@ -515,7 +635,7 @@ def _resolve_oasis_attack_core(
     content = combat.build_oasis_report_content(attacker, oasis, result)
     _add_report(
         db,
-        city_id=attacker.id,
+        city=attacker,
         world_id=movement.world_id,
         report_type="battle",
         content=content,
@@ -574,7 +694,11 @@ def _resolve_spy_core(db: Session, movement: models.Movement) -> List[dict[str,
     return []
 
 
-def _credit_resources_with_storage(city: models.City, resources: Dict[str, int]) -> None:
+def _credit_resources_with_storage(
+    db: Session, city: models.City, resources: Dict[str, int]
+) -> None:
+    if any(int(amount or 0) > 0 for amount in resources.values()):
+        production.settle_resources(db, city, utc_now())
     limit = production.get_storage_limit(city)
     for resource in RESOURCE_FIELDS:
         amount = max(int(resources.get(resource, 0) or 0), 0)
@@ -583,29 +707,15 @@ def _credit_resources_with_storage(city: models.City, resources: Dict[str, int])
             setattr(city, resource, min(current + amount, limit))
 
 
-def _resolve_return_core(db: Session, movement: models.Movement) -> None:
+def _resolve_return_core(
+    db: Session, movement: models.Movement, batch: _ResolutionBatch
+) -> None:
     city = movement.target_city
     if not city:
         return
 
-    for unit, raw_amount in (movement.troops or {}).items():
-        amount = int(raw_amount)
-        if amount <= 0:
-            continue
-        troop = (
-            db.query(models.Troop)
-            .filter(
-                models.Troop.city_id == city.id,
-                models.Troop.unit_type == unit,
-            )
-            .first()
-        )
-        if not troop:
-            troop = models.Troop(city_id=city.id, unit_type=unit, quantity=0)
-            db.add(troop)
-        troop.quantity += amount
-
-    _credit_resources_with_storage(city, movement.resources or {})
+    batch.add_troops(city, movement.troops or {})
+    _credit_resources_with_storage(db, city, movement.resources or {})
     from_city = movement.origin_city or city
     content = json.dumps(
         {
@@ -617,7 +727,7 @@ def _resolve_return_core(db: Session, movement: models.Movement) -> None:
     )
     _add_report(
         db,
-        city_id=city.id,
+        city=city,
         world_id=movement.world_id,
         report_type="return",
         content=content,
@@ -626,27 +736,14 @@ def _resolve_return_core(db: Session, movement: models.Movement) -> None:
     )
 
 
-def _resolve_reinforce_core(db: Session, movement: models.Movement) -> None:
+def _resolve_reinforce_core(
+    db: Session, movement: models.Movement, batch: _ResolutionBatch
+) -> None:
     receiver = movement.target_city
     sender = movement.origin_city
     if not receiver or not sender:
         return
-    for unit, raw_amount in (movement.troops or {}).items():
-        amount = int(raw_amount)
-        if amount <= 0:
-            continue
-        troop = (
-            db.query(models.Troop)
-            .filter(
-                models.Troop.city_id == receiver.id,
-                models.Troop.unit_type == unit,
-            )
-            .first()
-        )
-        if not troop:
-            troop = models.Troop(city_id=receiver.id, unit_type=unit, quantity=0)
-            db.add(troop)
-        troop.quantity += amount
+    batch.add_troops(receiver, movement.troops or {})
 
     content = json.dumps(
         {
@@ -656,10 +753,10 @@ def _resolve_reinforce_core(db: Session, movement: models.Movement) -> None:
             "troops": movement.troops or {},
         }
     )
-    for city_id in {sender.id, receiver.id}:
+    for city in {sender.id: sender, receiver.id: receiver}.values():
         _add_report(
             db,
-            city_id=city_id,
+            city=city,
             world_id=movement.world_id,
             report_type="reinforce",
             content=content,
@@ -675,7 +772,7 @@ def _resolve_transport_core(
     sender = movement.origin_city
     if not receiver or not sender:
         return []
-    _credit_resources_with_storage(receiver, movement.resources or {})
+    _credit_resources_with_storage(db, receiver, movement.resources or {})
 
     content = json.dumps(
         {
@@ -685,10 +782,10 @@ def _resolve_transport_core(
             "resources": movement.resources or {},
         }
     )
-    for city_id in {sender.id, receiver.id}:
+    for city in {sender.id: sender, receiver.id: receiver}.values():
         _add_report(
             db,
-            city_id=city_id,
+            city=city,
             world_id=movement.world_id,
             report_type="trade",
             content=content,
@@ -758,31 +855,71 @@ def _run_resolution_effect(db: Session, effect: dict[str, Any]) -> None:
             )
 
 
-def resolve_due_movements(db: Session) -> List[models.Movement]:
-    """Resolve each due movement exactly once inside the worker transaction."""
+def _lock_heroes(db: Session, movements: List[models.Movement]) -> None:
+    """Lock the heroes a batch may award XP to.
 
-    now = utc_now()
+    Heroes belong to users, not worlds, so two shards can resolve battles of
+    the same hero concurrently. Re-reading them under a row lock, in id order,
+    before any change serializes those writers without deadlocks.
+    """
+
+    user_ids = {
+        city.owner_id
+        for movement in movements
+        for city in (movement.origin_city, movement.target_city)
+        if city is not None and city.owner_id
+    }
+    if not user_ids:
+        return
+    (
+        db.query(models.Hero)
+        .filter(models.Hero.user_id.in_(user_ids))
+        .order_by(models.Hero.id.asc())
+        .with_for_update()
+        .populate_existing()
+        .all()
+    )
+
+
+def _lock_due_batch(
+    db: Session, now, batch_size: int, shard: QueueShard | None = None
+) -> List[models.Movement]:
+    query = db.query(models.Movement).filter(
+        models.Movement.arrival_time <= now,
+        models.Movement.status == "ongoing",
+        active_movement_clause(),
+    )
+    if shard is not None:
+        query = query.filter(shard.movement_clause())
     movements = (
-        db.query(models.Movement)
-        .options(
-            selectinload(models.Movement.origin_city).selectinload(models.City.owner),
+        query.options(
+            selectinload(models.Movement.origin_city)
+            .selectinload(models.City.owner)
+            .selectinload(models.User.hero),
             selectinload(models.Movement.origin_city).selectinload(models.City.buildings),
-            selectinload(models.Movement.target_city).selectinload(models.City.owner),
+            selectinload(models.Movement.target_city)
+            .selectinload(models.City.owner)
+            .selectinload(models.User.hero),
             selectinload(models.Movement.target_city).selectinload(models.City.troops),
             selectinload(models.Movement.target_city).selectinload(models.City.buildings),
+            # Rates for settling production before credits and loot.
+            selectinload(models.Movement.target_city).selectinload(models.City.world),
+            selectinload(models.Movement.target_city).selectinload(models.City.oases),
             selectinload(models.Movement.target_oasis),
         )
-        .filter(
-            models.Movement.arrival_time <= now,
-            models.Movement.status == "ongoing",
-        )
-        .order_by(models.Movement.id.asc())
+        # Earliest arrivals first; ix_movements_due serves both the filter
+        # and the order.
+        .order_by(models.Movement.arrival_time.asc(), models.Movement.id.asc())
+        .limit(batch_size)
         .with_for_update(skip_locked=True)
         .all()
     )
-    if not movements:
-        return []
+    _lock_heroes(db, movements)
+    return movements
+
 
+def _resolve_batch(db: Session, movements: List[models.Movement]) -> List[dict[str, Any]]:
+    batch = _ResolutionBatch(movements)
     effects: List[dict[str, Any]] = []
     for movement in movements:
         if movement.movement_type == "spy":
@@ -791,13 +928,13 @@ def resolve_due_movements(db: Session) -> List[models.Movement]:
             if movement.target_oasis_id is not None:
                 effects.extend(_resolve_oasis_attack_core(db, movement))
             else:
-                effects.extend(_resolve_attack_core(db, movement))
+                effects.extend(_resolve_attack_core(db, movement, batch))
         elif movement.movement_type == "reinforce":
-            _resolve_reinforce_core(db, movement)
+            _resolve_reinforce_core(db, movement, batch)
         elif movement.movement_type == "transport":
             effects.extend(_resolve_transport_core(db, movement))
         elif movement.movement_type == "return":
-            _resolve_return_core(db, movement)
+            _resolve_return_core(db, movement, batch)
         elif movement.movement_type == "transport_return":
             if movement.target_city and movement.target_city.owner_id:
                 effects.append(
@@ -816,23 +953,56 @@ def resolve_due_movements(db: Session) -> List[models.Movement]:
         movement.status = "completed"
         db.add(movement)
 
-    db.commit()
+    batch.flush(db)
+    return effects
 
-    for effect in effects:
-        try:
-            _run_resolution_effect(db, effect)
-        except Exception:
-            db.rollback()
-            logger.exception(
-                "Post-resolution side effect failed",
-                extra={"effect_type": effect.get("type")},
-            )
 
-    logger.info(
-        "movements_resolved",
-        extra={"movement_ids": [movement.id for movement in movements]},
-    )
-    return movements
+def resolve_due_movements(
+    db: Session, batch_size: int | None = None, shard: QueueShard | None = None
+) -> List[models.Movement]:
+    """Resolve each due movement exactly once, in bounded worker transactions.
+
+    Due movements are claimed ``batch_size`` at a time (default
+    ``settings.movement_batch_size``) with ``SKIP LOCKED`` and each batch is
+    committed before the next one is claimed, so row locks are never held
+    across an arbitrarily large wave of arrivals. Movements created while
+    resolving (returns, transport returns) always arrive after ``now`` and
+    are left for a later tick. ``shard`` restricts the run to the movements
+    of one worker shard.
+    """
+
+    batch_size = batch_size or get_settings().movement_batch_size
+    if batch_size <= 0:
+        raise ValueError("Movement batch size must be positive")
+
+    now = utc_now()
+    resolved: List[models.Movement] = []
+    while True:
+        movements = _lock_due_batch(db, now, batch_size, shard)
+        if not movements:
+            break
+
+        effects = _resolve_batch(db, movements)
+        db.commit()
+        resolved.extend(movements)
+
+        for effect in effects:
+            try:
+                _run_resolution_effect(db, effect)
+            except Exception:
+                db.rollback()
+                logger.exception(
+                    "Post-resolution side effect failed",
+                    extra={"effect_type": effect.get("type")},
+                )
+
+        logger.info(
+            "movements_resolved",
+            extra={"movement_ids": [movement.id for movement in movements]},
+        )
+        if len(movements) < batch_size:
+            break
+    return resolved
 
 
 # Compatibility entrypoints kept for old callers. They now share the single
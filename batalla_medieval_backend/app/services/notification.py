@@ -1,20 +1,39 @@
 from __future__ import annotations
 
-from typing import Iterable
-import asyncio
 import logging
 
+from sqlalchemy import JSON, DateTime, insert, literal, select
 from sqlalchemy.orm import Session
-from asgiref.sync import async_to_sync
 
 from .. import models
-from . import emailer, socket_manager
+from ..utils import utc_now
+from . import emailer, notification_outbox
 
 logger = logging.getLogger(__name__)
 
 EMAIL_NOTIFICATION_TYPES = {"attack_incoming", "building_complete", "event_started"}
 
 
+def _socket_payload(notification_id: int, title: str, body: str, notification_type: str, created_at) -> dict:
+    return {
+        "id": notification_id,
+        "title": title,
+        "body": body,
+        "type": notification_type,
+        "created_at": created_at.isoformat(),
+        "read": False,
+    }
+
+
+def _wants_email(user: models.User, notification_type: str, allow_email: bool) -> bool:
+    return (
+        allow_email
+        and bool(user.email_notifications)
+        and notification_type in EMAIL_NOTIFICATION_TYPES
+        and emailer.smtp_configured()
+    )
+
+
 def create_notification(
     db: Session,
     user: models.User,
@@ -23,54 +42,63 @@ def create_notification(
     body: str,
     notification_type: str,
     allow_email: bool = True,
+    commit: bool = True,
 ) -> models.Notification:
+    """Store a notification and queue its deliveries in the same transaction.
+
+    Socket and email delivery happen later through the outbox dispatcher.
+    With ``commit=False`` the rows join the caller's transaction and are only
+    delivered if it commits.
+    """
+
     notification = models.Notification(
         user_id=user.id,
         title=title,
         body=body,
         type=notification_type,
+        read=False,
+        created_at=utc_now(),
     )
     db.add(notification)
-    db.commit()
-    db.refresh(notification)
-
-    # Send WebSocket notification
-    try:
-        payload = {
-            "id": notification.id,
-            "title": notification.title,
-            "body": notification.body,
-            "type": notification.type,
-            "created_at": notification.created_at.isoformat(),
-            "read": notification.read
-        }
-        
-        # Check if there is a running event loop
-        try:
-            loop = asyncio.get_running_loop()
-            loop.create_task(socket_manager.notify_user(user.id, "notification", payload))
-        except RuntimeError:
-            # No running loop (e.g. sync thread), use async_to_sync or run_until_complete
-            # However, async_to_sync requires the loop to be running in main thread usually?
-            # Or it creates a new loop.
-            # A simpler way for fire-and-forget in sync context:
-            asyncio.run(socket_manager.notify_user(user.id, "notification", payload))
-    except Exception as e:
-        logger.error(f"Failed to send websocket notification: {e}")
-
-    if allow_email and user.email_notifications and notification_type in EMAIL_NOTIFICATION_TYPES:
-        emailer.send_email(user.email, title, body)
+    db.flush()
+
+    db.add(
+        models.NotificationOutbox(
+            user_id=user.id,
+            channel=notification_outbox.SOCKET,
+            payload=_socket_payload(
+                notification.id, title, body, notification_type, notification.created_at
+            ),
+        )
+    )
+    if _wants_email(user, notification_type, allow_email):
+        db.add(
+            models.NotificationOutbox(
+                user_id=user.id,
+                channel=notification_outbox.EMAIL,
+                payload={"subject": title, "body": body},
+            )
+        )
+    db.flush()
+    notification_outbox.announce(db)
 
+    if commit:
+        db.commit()
+        db.refresh(notification)
     return notification
 
 
-def list_notifications(db: Session, user: models.User) -> list[models.Notification]:
-    return (
+def list_notifications(
+    db: Session, user: models.User, limit: int | None = None
+) -> list[models.Notification]:
+    query = (
         db.query(models.Notification)
         .filter(models.Notification.user_id == user.id)
-        .order_by(models.Notification.created_at.desc())
-        .all()
+        .order_by(models.Notification.created_at.desc(), models.Notification.id.desc())
     )
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 
 def mark_as_read(
@@ -91,17 +119,98 @@ def mark_as_read(
     return notification
 
 
-def notify_global_event(db: Session, users: Iterable[models.User], event_name: str) -> None:
-    for user in users:
-        create_notification(
-            db,
-            user,
-            title="Evento global iniciado",
-            body=f"El evento '{event_name}' ha comenzado en tu mundo.",
-            notification_type="event_started",
+def mark_type_as_read(db: Session, user: models.User, notification_type: str) -> int:
+    """Mark every unread notification of ``notification_type`` of ``user`` as read.
+
+    World broadcasts carry no per-user id; clients acknowledge them by type.
+    """
+
+    updated = (
+        db.query(models.Notification)
+        .filter(
+            models.Notification.user_id == user.id,
+            models.Notification.type == notification_type,
+            models.Notification.read.is_(False),
         )
+        .update({"read": True}, synchronize_session=False)
+    )
+    db.commit()
+    return updated
 
 
-def notify_event_started(db: Session, event_name: str) -> None:
-    users = db.query(models.User).all()
-    notify_global_event(db, users, event_name)
+def notify_world(
+    db: Session,
+    world_id: int,
+    *,
+    title: str,
+    body: str,
+    notification_type: str,
+    allow_email: bool = True,
+) -> int:
+    """Notify every member of a world with ``INSERT ... SELECT`` statements.
+
+    One statement writes the notifications and, when email applies, one more
+    queues the emails of opted-in members in the outbox. Connected members
+    get a single broadcast to the world room after the caller commits, with
+    everything needed to show it but the id, which differs per member:
+    clients mark it read by type (``mark_type_as_read``). Returns the number
+    of notifications written.
+    """
+
+    now = utc_now()
+    members = select(models.PlayerWorld.user_id).where(models.PlayerWorld.world_id == world_id)
+    written = db.execute(
+        insert(models.Notification).from_select(
+            ["user_id", "title", "body", "type", "read", "created_at"],
+            members.add_columns(
+                literal(title),
+                literal(body),
+                literal(notification_type),
+                literal(False),
+                literal(now, DateTime()),
+            ),
+        )
+    ).rowcount
+
+    if allow_email and notification_type in EMAIL_NOTIFICATION_TYPES and emailer.smtp_configured():
+        db.execute(
+            insert(models.NotificationOutbox).from_select(
+                ["user_id", "channel", "payload", "attempts", "available_at", "created_at"],
+                members.join(models.User, models.User.id == models.PlayerWorld.user_id)
+                .where(models.User.email_notifications.is_(True))
+                .add_columns(
+                    literal(notification_outbox.EMAIL),
+                    literal({"subject": title, "body": body}, JSON()),
+                    literal(0),
+                    literal(now, DateTime()),
+                    literal(now, DateTime()),
+                ),
+            )
+        )
+        notification_outbox.announce(db)
+
+    notification_outbox.broadcast_on_commit(
+        db,
+        world_id,
+        {
+            "title": title,
+            "body": body,
+            "type": notification_type,
+            "world_id": world_id,
+            "created_at": now.isoformat(),
+            "read": False,
+        },
+    )
+    return written
+
+
+def notify_event_started(db: Session, world_id: int, event_name: str) -> int:
+    """Tell the members of ``world_id`` that an event started; the caller commits."""
+
+    return notify_world(
+        db,
+        world_id,
+        title="Evento global iniciado",
+        body=f"El evento '{event_name}' ha comenzado en tu mundo.",
+        notification_type="event_started",
+    )
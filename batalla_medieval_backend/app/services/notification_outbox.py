@@ -0,0 +1,384 @@
+"""Delivery of notifications through the ``notification_outbox`` table.
+
+``notification.create_notification`` writes the notification and one outbox
+row per channel in the caller's transaction, so a rolled-back domain change
+never notifies anyone and a committed one is always delivered. A dispatcher
+thread (in the worker and in the web process) drains the table in batches:
+
+* claims up to ``notification_batch_size`` due rows by pushing their
+  ``available_at`` forward as a lease, so concurrent dispatchers never send
+  the same row twice while it is in flight;
+* publishes the socket rows to the message bus, one publish per distinct
+  payload;
+* sends the email rows over one reused SMTP connection, to the address the
+  user has at delivery time;
+* deletes delivered rows and reschedules failed ones with exponential
+  backoff, giving up after ``notification_max_attempts``.
+
+Notifications written for a whole world at once skip the socket rows: the
+writer registers one room broadcast with :func:`broadcast_on_commit`.
+
+Committing outbox rows wakes the dispatcher of the same process; on
+PostgreSQL a ``NOTIFY`` wakes the other processes too. Otherwise dispatchers
+poll every ``notification_dispatch_seconds``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime, timedelta
+from threading import Condition, Lock, Thread
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..database import SessionLocal, engine
+from ..pg_notify import NotificationListener, notify
+from ..utils import utc_now
+from . import emailer, socket_manager
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "notification_outbox"
+SOCKET = "socket"
+EMAIL = "email"
+
+# Rows whose dispatcher died mid-batch become due again after this lease.
+CLAIM_SECONDS = 300
+MAX_RETRY_SECONDS = 3600
+
+_SESSION_KEY = "notification_outbox_written"
+_BROADCASTS_KEY = "notification_world_broadcasts"
+
+
+def announce(db: Session) -> None:
+    """Mark ``db``'s transaction as having written outbox rows."""
+
+    db.info[_SESSION_KEY] = True
+    if db.get_bind().dialect.name == "postgresql":
+        notify(db.connection(), CHANNEL, "")
+
+
+def broadcast_on_commit(db: Session, world_id: int, payload: dict) -> None:
+    """Publish ``payload`` to the world's room once ``db`` commits.
+
+    Used for notifications written in bulk for a whole world: one room emit
+    replaces a socket row per player.
+    """
+
+    db.info.setdefault(_BROADCASTS_KEY, []).append((world_id, payload))
+
+
+def retry_delay(attempts: int, base_seconds: float) -> float:
+    return min(base_seconds * 2 ** max(attempts - 1, 0), MAX_RETRY_SECONDS)
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        batch_size: int,
+        max_attempts: int,
+        retry_seconds: float,
+        poll_seconds: float,
+        mailer_factory: Callable[[], emailer.SMTPConnection] = emailer.SMTPConnection,
+    ) -> None:
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._retry_seconds = retry_seconds
+        self._poll_seconds = poll_seconds
+        self._mailer_factory = mailer_factory
+        self._mailer: emailer.SMTPConnection | None = None
+        self._condition = Condition()
+        self._woken = False
+        self._stopped = False
+        self._thread: Thread | None = None
+        self._run_lock = Lock()
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+
+    def _claim(self, db: Session, now: datetime) -> List[models.NotificationOutbox]:
+        outbox = models.NotificationOutbox
+        ids = db.scalars(
+            select(outbox.id)
+            .where(outbox.failed_at.is_(None), outbox.available_at <= now)
+            .order_by(outbox.id)
+            .limit(self._batch_size)
+        ).all()
+        if not ids:
+            return []
+        lease = now + timedelta(seconds=CLAIM_SECONDS)
+        db.execute(
+            update(outbox)
+            .where(outbox.id.in_(ids), outbox.available_at <= now)
+            .values(available_at=lease)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        # Rows another dispatcher claimed first keep that dispatcher's lease.
+        return db.scalars(
+            select(outbox)
+            .where(outbox.id.in_(ids), outbox.available_at == lease)
+            .order_by(outbox.id)
+        ).all()
+
+    def _send_sockets(self, rows: List[models.NotificationOutbox]) -> None:
+        groups: Dict[str, Tuple[dict, List[int]]] = {}
+        for row in rows:
+            key = json.dumps(row.payload, sort_keys=True, default=str)
+            groups.setdefault(key, (row.payload, []))[1].append(row.user_id)
+        for payload, user_ids in groups.values():
+            socket_manager.publish_to_users(user_ids, "notification", payload)
+
+    def _send_email(self, row: models.NotificationOutbox, to_email: str | None) -> None:
+        if not to_email:
+            raise ValueError("user has no email address")
+        if self._mailer is None:
+            self._mailer = self._mailer_factory()
+        payload = row.payload
+        try:
+            self._mailer.send(to_email, payload["subject"], payload["body"])
+        except Exception:
+            # Drop a session that may be half-broken; the next row reconnects.
+            self._close_mailer()
+            raise
+
+    def _close_mailer(self) -> None:
+        mailer, self._mailer = self._mailer, None
+        if mailer is not None:
+            mailer.close()
+
+    def dispatch_batch(self, now: datetime | None = None) -> int:
+        """Deliver one batch of due rows; return how many rows were claimed."""
+
+        now = now or utc_now()
+        db = self._session_factory()
+        try:
+            rows = self._claim(db, now)
+            if not rows:
+                return 0
+            delivered: List[int] = []
+            failures: List[Tuple[models.NotificationOutbox, str]] = []
+
+            socket_rows = [row for row in rows if row.channel == SOCKET]
+            try:
+                self._send_sockets(socket_rows)
+                delivered.extend(row.id for row in socket_rows)
+            except Exception as exc:
+                logger.exception("Failed to publish %s socket notifications", len(socket_rows))
+                failures.extend((row, repr(exc)) for row in socket_rows)
+
+            email_rows = [row for row in rows if row.channel == EMAIL]
+            # Addresses are read at delivery time, so a changed email is honoured.
+            addresses: Dict[int, str] = {}
+            if email_rows:
+                addresses = dict(
+                    db.execute(
+                        select(models.User.id, models.User.email).where(
+                            models.User.id.in_({row.user_id for row in email_rows})
+                        )
+                    ).all()
+                )
+            for row in email_rows:
+                try:
+                    self._send_email(row, addresses.get(row.user_id))
+                    delivered.append(row.id)
+                except Exception as exc:
+                    failures.append((row, repr(exc)))
+
+            if delivered:
+                db.execute(
+                    delete(models.NotificationOutbox)
+                    .where(models.NotificationOutbox.id.in_(delivered))
+                    .execution_options(synchronize_session=False)
+                )
+            for row, error in failures:
+                row.attempts += 1
+                row.last_error = error[:500]
+                if row.attempts >= self._max_attempts:
+                    row.failed_at = now
+                    self.failed += 1
+                else:
+                    row.available_at = now + timedelta(
+                        seconds=retry_delay(row.attempts, self._retry_seconds)
+                    )
+                    self.retried += 1
+            db.commit()
+            self.delivered += len(delivered)
+            self.batches += 1
+            if failures:
+                logger.warning(
+                    "notification_outbox_failures",
+                    extra={"failed_rows": len(failures), "claimed_rows": len(rows)},
+                )
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def drain(self, now: datetime | None = None) -> int:
+        """Deliver batches until no due row is left; return rows claimed."""
+
+        total = 0
+        with self._run_lock:
+            try:
+                while True:
+                    claimed = self.dispatch_batch(now)
+                    total += claimed
+                    if claimed < self._batch_size:
+                        return total
+            finally:
+                self._close_mailer()
+
+    def wake(self) -> None:
+        with self._condition:
+            self._woken = True
+            self._condition.notify_all()
+
+    def start(self) -> None:
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = Thread(target=self._run, name="notification-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def _wait(self, listener: NotificationListener | None) -> None:
+        if listener is not None:
+            listener.wait(self._poll_seconds)
+            return
+        with self._condition:
+            if not self._woken and not self._stopped:
+                self._condition.wait(self._poll_seconds)
+            self._woken = False
+
+    def _run(self) -> None:
+        listener = None
+        try:
+            while True:
+                with self._condition:
+                    if self._stopped:
+                        return
+                    self._woken = False
+                try:
+                    self.drain()
+                    if listener is None and engine.dialect.name == "postgresql":
+                        listener = NotificationListener(engine, CHANNEL, lambda _payload: self.wake())
+                except Exception:
+                    logger.exception("Notification outbox dispatch failed")
+                    if listener is not None:
+                        listener.close()
+                        listener = None
+                self._wait(listener)
+        finally:
+            if listener is not None:
+                listener.close()
+
+    def metrics(self) -> dict:
+        return {
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+_dispatcher: OutboxDispatcher | None = None
+_dispatcher_lock = Lock()
+
+
+def get_dispatcher() -> OutboxDispatcher:
+    global _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            settings = get_settings()
+            _dispatcher = OutboxDispatcher(
+                SessionLocal,
+                batch_size=settings.notification_batch_size,
+                max_attempts=settings.notification_max_attempts,
+                retry_seconds=settings.notification_retry_seconds,
+                poll_seconds=settings.notification_dispatch_seconds,
+            )
+        return _dispatcher
+
+
+def start_dispatcher() -> None:
+    get_dispatcher().start()
+
+
+def stop_dispatcher() -> None:
+    """Stop this process's dispatcher; rows left behind stay in the table."""
+
+    global _dispatcher
+
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None:
+        dispatcher.stop()
+
+
+def dispatch_pending(now: datetime | None = None) -> int:
+    """Drain the outbox from the calling thread (tests, scripts, admin)."""
+
+    return get_dispatcher().drain(now)
+
+
+def get_outbox_stats(db: Session) -> dict:
+    """Return queued and dead rows per channel plus this replica's counters."""
+
+    outbox = models.NotificationOutbox
+    counts = db.execute(
+        select(outbox.channel, outbox.failed_at.is_(None), func.count())
+        .group_by(outbox.channel, outbox.failed_at.is_(None))
+    ).all()
+    pending = {SOCKET: 0, EMAIL: 0}
+    failed = {SOCKET: 0, EMAIL: 0}
+    for channel, is_pending, count in counts:
+        (pending if is_pending else failed)[channel] = count
+    dispatcher = _dispatcher
+    return {
+        "pending": pending,
+        "failed": failed,
+        "dispatcher": dispatcher.metrics() if dispatcher is not None else None,
+    }
+
+
+def _after_commit(session) -> None:
+    for world_id, payload in session.info.pop(_BROADCASTS_KEY, []):
+        socket_manager.publish_to_worlds([world_id], "notification", payload)
+    if session.info.pop(_SESSION_KEY, False):
+        dispatcher = _dispatcher
+        if dispatcher is not None and dispatcher.running:
+            dispatcher.wake()
+
+
+def _after_rollback(session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+    session.info.pop(_BROADCASTS_KEY, None)
+
+
+event.listen(SessionLocal, "after_commit", _after_commit)
+event.listen(SessionLocal, "after_rollback", _after_rollback)
@@ -2,10 +2,12 @@ from datetime import timezone
 from typing import Dict
 
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from .. import models
 from ..utils import utc_now
 from . import balance, event as event_service
+from . import progress_events
 
 # Compatibility aliases. The objects and values are owned by ``balance``.
 PRODUCTION_RATES = balance.PRODUCTION_RATES_PER_HOUR
@@ -30,11 +32,9 @@ def get_storage_limit(city: models.City) -> float:
     return balance.get_storage_capacity(warehouse_level)
 
 
-def get_production_per_hour(db: Session, city: models.City) -> Dict[str, float]:
-    """Return resource rates expressed strictly in units per hour."""
+def _base_production_per_hour(city: models.City) -> Dict[str, float]:
+    """Hourly rates before the ``production_speed`` of world events."""
 
-    modifiers = event_service.get_active_modifiers(db, world_id=city.world_id)
-    rate_multiplier = modifiers.get("production_speed", 1.0)
     world_modifier = city.world.resource_modifier if city.world else 1.0
 
     oasis_bonuses = {resource: 0.0 for resource in balance.RESOURCE_FIELDS}
@@ -43,16 +43,25 @@ def get_production_per_hour(db: Session, city: models.City) -> Dict[str, float]:
         if oasis.resource_type in oasis_bonuses:
             oasis_bonuses[oasis.resource_type] += oasis.bonus_percent / 100.0
 
-    total_multiplier = rate_multiplier * world_modifier
-
     production = {}
     for resource, rate in PRODUCTION_RATES.items():
         bonus = oasis_bonuses.get(resource, 0.0)
-        production[resource] = rate * total_multiplier * (1.0 + bonus)
+        production[resource] = rate * world_modifier * (1.0 + bonus)
 
     return production
 
 
+def get_production_per_hour(db: Session, city: models.City) -> Dict[str, float]:
+    """Return resource rates expressed strictly in units per hour."""
+
+    modifiers = event_service.get_active_modifiers(db, world_id=city.world_id)
+    rate_multiplier = modifiers.get("production_speed", 1.0)
+    return {
+        resource: rate * rate_multiplier
+        for resource, rate in _base_production_per_hour(city).items()
+    }
+
+
 def lock_city_for_update(db: Session, city: models.City | int) -> models.City:
     """Reload and row-lock a city for an economic transaction.
 
@@ -75,51 +84,112 @@ def lock_city_for_update(db: Session, city: models.City | int) -> models.City:
     return locked_city
 
 
-def recalculate_resources(
-    db: Session,
-    city: models.City,
-    return_gains: bool = False,
-    *,
-    commit: bool = True,
-) -> models.City | tuple[models.City, Dict[str, float]]:
-    """Accrue passive resources from an hourly rate.
+def _accrue(
+    db: Session, city: models.City, now
+) -> tuple[Dict[str, float], Dict[str, float]]:
+    """Return ``(values, gains)`` for ``city`` at ``now`` in closed form.
 
-    ``commit=False`` is used inside larger economic transactions so callers can
-    keep a PostgreSQL row lock until validation, payment and the domain record
-    are committed together.
+    Balances grow linearly from ``last_production`` and are clamped to the
+    storage limit; loyalty recovers towards 100. World events change the rate
+    mid-window, so the window is weighted by the ``production_speed`` in
+    force over each part of it. Nothing on ``city`` is modified.
     """
 
-    now = utc_now()
     last_prod = _ensure_timezone(city.last_production or now)
     elapsed_hours = max((now - last_prod).total_seconds() / 3600.0, 0.0)
+    values: Dict[str, float] = {
+        resource: float(getattr(city, resource)) for resource in PRODUCTION_RATES
+    }
+    values["loyalty"] = float(city.loyalty)
+    gains = {resource: 0.0 for resource in PRODUCTION_RATES}
     if elapsed_hours == 0:
-        gains = {resource: 0.0 for resource in PRODUCTION_RATES}
-        return (city, gains) if return_gains else city
+        return values, gains
 
-    production_rates = get_production_per_hour(db, city)
+    production_hours = event_service.production_speed_hours(db, city.world_id, last_prod, now)
     storage_limit = get_storage_limit(city)
 
-    gains: Dict[str, float] = {}
-    for resource, rate in production_rates.items():
-        produced = rate * elapsed_hours
-        current_value = float(getattr(city, resource))
-
+    for resource, rate in _base_production_per_hour(city).items():
+        current_value = values[resource]
         if current_value >= storage_limit:
-            new_value = current_value
-            actual_gain = 0.0
-        else:
-            new_value = min(current_value + produced, storage_limit)
-            actual_gain = max(new_value - current_value, 0.0)
-
-        gains[resource] = actual_gain
-        setattr(city, resource, new_value)
+            continue
+        new_value = min(current_value + rate * production_hours, storage_limit)
+        gains[resource] = max(new_value - current_value, 0.0)
+        values[resource] = new_value
 
     loyalty_gain = LOYALTY_RECOVERY_PER_HOUR * elapsed_hours
-    city.loyalty = min(100.0, city.loyalty + loyalty_gain)
+    values["loyalty"] = min(100.0, values["loyalty"] + loyalty_gain)
+    return values, gains
+
+
+def project_resources(db: Session, city: models.City, now=None) -> Dict[str, float]:
+    """Return the city's current resources and loyalty without writing.
+
+    This is the read path: the stored row only changes when resources are
+    spent or credited, or when a production rate or the storage limit is about
+    to change (see :func:`settle_resources`).
+    """
+
+    values, _ = _accrue(db, city, _ensure_timezone(now or utc_now()))
+    return values
+
+
+def show_current_resources(db: Session, city: models.City, now=None) -> models.City:
+    """Present projected resources on ``city`` for a read-only response.
+
+    The values and ``last_production`` are installed as if loaded from the
+    database, so the instance is not dirty and no UPDATE is ever emitted for
+    it. The projected state is equivalent to the stored one; writers must still
+    go through :func:`lock_city_for_update`, which reloads the row.
+    """
+
+    now = _ensure_timezone(now or utc_now())
+    for field, value in project_resources(db, city, now).items():
+        set_committed_value(city, field, value)
+    set_committed_value(city, "last_production", now)
+    return city
+
+
+def settle_resources(db: Session, city: models.City, now=None) -> Dict[str, float]:
+    """Fold accrued production into the stored balance and return the gains.
+
+    Call this on a city that is about to be written (spend, credit, loot) or
+    whose production rate or storage limit is about to change, so the closed
+    form never spans two different rates. It neither flushes nor commits.
+    """
+
+    now = _ensure_timezone(now or utc_now())
+    values, gains = _accrue(db, city, now)
+    for field, value in values.items():
+        setattr(city, field, value)
 
     # Always consume elapsed time, including while storage is full. Otherwise a
     # player could spend after being capped and receive an artificial backlog.
     city.last_production = now
+    return gains
+
+
+def recalculate_resources(
+    db: Session,
+    city: models.City,
+    return_gains: bool = False,
+    *,
+    commit: bool = True,
+) -> models.City | tuple[models.City, Dict[str, float]]:
+    """Accrue passive resources from an hourly rate and persist them.
+
+    Read-only callers should use :func:`project_resources` or
+    :func:`show_current_resources` instead. ``commit=False`` is used inside
+    larger economic transactions so callers can keep a PostgreSQL row lock
+    until validation, payment and the domain record are committed together.
+    """
+
+    now = utc_now()
+    last_prod = _ensure_timezone(city.last_production or now)
+    if now <= last_prod:
+        gains = {resource: 0.0 for resource in PRODUCTION_RATES}
+        return (city, gains) if return_gains else city
+
+    gains = settle_resources(db, city, now)
 
     db.add(city)
     if commit:
@@ -150,20 +220,19 @@ def lock_and_recalculate_resources(
 def record_resource_gains(
     db: Session, city: models.City, gains: Dict[str, float]
 ) -> None:
-    """Record achievement progress after the enclosing transaction commits."""
+    """Record quest and achievement progress after the enclosing commit.
+
+    Gains are only known when production is settled into the stored balance,
+    so collection progress advances on writes, not on reads. The progress is
+    buffered and written in batches (services.progress_events), so this does
+    not touch the database.
+    """
 
     generated_total = sum(max(float(value), 0.0) for value in gains.values())
     if generated_total <= 0 or not city.owner_id:
         return
 
-    from .achievement import update_achievement_progress
-
-    update_achievement_progress(
-        db,
-        city.owner_id,
-        "resources_collected",
-        increment=int(generated_total),
-    )
+    progress_events.record_resources_collected(city.owner_id, int(generated_total))
 
 
 def _validate_cost(cost: Dict[str, float]) -> None:
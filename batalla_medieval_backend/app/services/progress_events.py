@@ -0,0 +1,239 @@
+"""Dispatch of game events to quest and achievement progress.
+
+Quest and achievement definitions only change with a deploy or a seed, so
+each process indexes them by the event that advances them the first time an
+event arrives: quests by ``requirements["type"]``, achievements by
+``requirement_type``. An event then reads and writes only the progress rows
+of the definitions it can advance, creating those rows on first use.
+
+``resources_collected`` fires on nearly every economic write. Those events
+are summed per player here and a background thread applies them every
+``PROGRESS_FLUSH_SECONDS`` in one transaction; the web process and the
+worker flush once more on shutdown. A crash loses at most one interval of
+collection progress, which is not authoritative game state.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from threading import Condition, Lock, Thread
+from typing import Any, Dict, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+RESOURCES_COLLECTED = "resources_collected"
+
+
+@dataclass(frozen=True)
+class QuestRule:
+    id: int
+    requirements: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    id: int
+    requirement_value: int
+
+
+@dataclass(frozen=True)
+class DefinitionIndex:
+    quests: Dict[str, Tuple[QuestRule, ...]] = field(default_factory=dict)
+    achievements: Dict[str, Tuple[AchievementRule, ...]] = field(default_factory=dict)
+    quest_ids: Tuple[int, ...] = ()
+    achievement_ids: Tuple[int, ...] = ()
+
+
+_index: DefinitionIndex | None = None
+_index_lock = Lock()
+
+
+def _load(db: Session) -> DefinitionIndex:
+    from . import quest as quest_service
+
+    quests: Dict[str, list] = {}
+    quest_ids = []
+    for quest in quest_service.ensure_default_quests(db):
+        requirements = dict(quest.requirements or {})
+        quests.setdefault(requirements.get("type"), []).append(QuestRule(quest.id, requirements))
+        quest_ids.append(quest.id)
+
+    achievements: Dict[str, list] = {}
+    achievement_ids = []
+    for achievement in db.query(models.Achievement).order_by(models.Achievement.id):
+        achievements.setdefault(achievement.requirement_type, []).append(
+            AchievementRule(achievement.id, int(achievement.requirement_value))
+        )
+        achievement_ids.append(achievement.id)
+
+    return DefinitionIndex(
+        quests={event_type: tuple(rules) for event_type, rules in quests.items()},
+        achievements={event_type: tuple(rules) for event_type, rules in achievements.items()},
+        quest_ids=tuple(quest_ids),
+        achievement_ids=tuple(achievement_ids),
+    )
+
+
+def definitions(db: Session) -> DefinitionIndex:
+    """Return this process's index of quest and achievement definitions."""
+
+    global _index
+
+    index = _index
+    if index is not None:
+        return index
+    with _index_lock:
+        if _index is None:
+            _index = _load(db)
+        return _index
+
+
+def invalidate() -> None:
+    """Forget the definition index; the next event reloads it."""
+
+    global _index
+
+    with _index_lock:
+        _index = None
+
+
+# -- resources_collected ---------------------------------------------------
+
+
+def apply_resources_collected(db: Session, collected: Dict[int, int]) -> None:
+    """Advance the collection quests and achievements of each player; no commit."""
+
+    from . import achievement as achievement_service
+    from . import quest as quest_service
+
+    index = definitions(db)
+    quest_service.apply_event(
+        db,
+        RESOURCES_COLLECTED,
+        {user_id: {"amount": amount} for user_id, amount in collected.items()},
+        index.quests.get(RESOURCES_COLLECTED, ()),
+        lock=True,
+    )
+    achievement_service.apply_progress(
+        db,
+        {user_id: (amount, None) for user_id, amount in collected.items()},
+        index.achievements.get(RESOURCES_COLLECTED, ()),
+        lock=True,
+    )
+
+
+class CollectionBuffer:
+    def __init__(self, session_factory, flush_seconds: float) -> None:
+        self._session_factory = session_factory
+        self._flush_seconds = flush_seconds
+        self._pending: Dict[int, int] = {}
+        self._condition = Condition()
+        self._thread: Thread | None = None
+        self._stopped = False
+        self.events = 0
+        self.flushes = 0
+
+    def add(self, user_id: int, amount: int) -> None:
+        with self._condition:
+            self._pending[user_id] = self._pending.get(user_id, 0) + amount
+            self.events += 1
+            if self._thread is None and not self._stopped:
+                self._thread = Thread(target=self._run, name="progress-flush", daemon=True)
+                self._thread.start()
+
+    def pending(self) -> Dict[int, int]:
+        with self._condition:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        """Apply every pending total in one transaction; return players updated."""
+
+        with self._condition:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        db = self._session_factory()
+        try:
+            apply_resources_collected(db, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to flush collection progress of %s players", len(batch))
+            with self._condition:
+                for user_id, amount in batch.items():
+                    self._pending[user_id] = self._pending.get(user_id, 0) + amount
+            return 0
+        finally:
+            db.close()
+        self.flushes += 1
+        return len(batch)
+
+    def stop(self, flush: bool = True) -> None:
+        """Stop the background thread and, by default, apply what is pending."""
+
+        with self._condition:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join()
+        if flush:
+            self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                self._condition.wait(self._flush_seconds)
+                if self._stopped:
+                    return
+            self.flush()
+
+
+_buffer: CollectionBuffer | None = None
+_buffer_lock = Lock()
+
+
+def get_buffer() -> CollectionBuffer:
+    global _buffer
+
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = CollectionBuffer(SessionLocal, get_settings().progress_flush_seconds)
+        return _buffer
+
+
+def record_resources_collected(user_id: int, amount: int) -> None:
+    if amount > 0:
+        get_buffer().add(user_id, amount)
+
+
+def flush_progress() -> None:
+    """Stop this process's buffer after applying what it holds (shutdown hook)."""
+
+    global _buffer
+
+    with _buffer_lock:
+        buffer, _buffer = _buffer, None
+    if buffer is not None:
+        buffer.stop()
+
+
+def reset() -> None:
+    """Drop the index and any pending progress without writing it (tests)."""
+
+    global _buffer
+
+    invalidate()
+    with _buffer_lock:
+        buffer, _buffer = _buffer, None
+    if buffer is not None:
+        buffer.stop(flush=False)
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Tuple
 
 from sqlalchemy.orm import Session
 
 from .. import models
+from . import progress_events
 
 DEFAULT_QUESTS: List[Dict[str, Any]] = [
     {
@@ -91,112 +92,144 @@ DEFAULT_QUESTS: List[Dict[str, Any]] = [
 
 
 def ensure_default_quests(db: Session) -> List[models.Quest]:
-    quests: List[models.Quest] = []
-    for quest_def in DEFAULT_QUESTS:
-        quest = db.query(models.Quest).filter(models.Quest.quest_id == quest_def["quest_id"]).first()
-        if not quest:
-            quest = models.Quest(**quest_def)
-            db.add(quest)
-            db.commit()
-            db.refresh(quest)
-        quests.append(quest)
-    return quests
-
-
-def _ensure_progress_entries(db: Session, user: models.User) -> List[models.QuestProgress]:
-    quests = ensure_default_quests(db)
-    progresses: List[models.QuestProgress] = []
-    for quest in quests:
-        progress = (
-            db.query(models.QuestProgress)
-            .filter(models.QuestProgress.quest_id == quest.id, models.QuestProgress.user_id == user.id)
-            .first()
-        )
-        if not progress:
-            progress = models.QuestProgress(user_id=user.id, quest_id=quest.id, status="pending", progress_data={})
-            db.add(progress)
-            db.commit()
-            db.refresh(progress)
-        progresses.append(progress)
-    return progresses
+    existing = {quest.quest_id: quest for quest in db.query(models.Quest)}
+    missing = [
+        models.Quest(**quest_def)
+        for quest_def in DEFAULT_QUESTS
+        if quest_def["quest_id"] not in existing
+    ]
+    if missing:
+        db.add_all(missing)
+        db.commit()
+        existing.update((quest.quest_id, quest) for quest in missing)
+    return [existing[quest_def["quest_id"]] for quest_def in DEFAULT_QUESTS]
+
+
+def _progress_rows(
+    db: Session, user_ids: Iterable[int], quest_ids: Iterable[int], *, lock: bool = False
+) -> Dict[Tuple[int, int], models.QuestProgress]:
+    """Progress rows of ``user_ids`` for ``quest_ids``, adding the missing ones."""
+
+    user_ids, quest_ids = list(user_ids), list(quest_ids)
+    query = db.query(models.QuestProgress).filter(
+        models.QuestProgress.user_id.in_(user_ids),
+        models.QuestProgress.quest_id.in_(quest_ids),
+    )
+    if lock:
+        query = query.with_for_update()
+    rows = {(progress.user_id, progress.quest_id): progress for progress in query}
+    for user_id in user_ids:
+        for quest_id in quest_ids:
+            if (user_id, quest_id) not in rows:
+                progress = models.QuestProgress(
+                    user_id=user_id, quest_id=quest_id, status="pending", progress_data={}
+                )
+                db.add(progress)
+                rows[(user_id, quest_id)] = progress
+    return rows
 
 
 def _mark_completed(progress: models.QuestProgress) -> None:
     progress.status = "completed"
 
 
-def _maybe_complete_building(progress: models.QuestProgress, event_data: Dict[str, Any]) -> bool:
-    req = progress.quest.requirements
-    required_building = req.get("building_type")
-    required_level = req.get("level", 1)
-    if (
-        progress.quest.requirements.get("type") == "building_finished"
-        and event_data.get("building_type") == required_building
-        and event_data.get("level", 0) >= required_level
-    ):
-        _mark_completed(progress)
-        return True
-    return False
-
-
-def _maybe_complete_training(progress: models.QuestProgress, event_data: Dict[str, Any]) -> bool:
-    if progress.quest.requirements.get("type") != "troops_trained":
-        return False
-    unit_type = progress.quest.requirements.get("unit_type")
-    required_amount = progress.quest.requirements.get("amount", 0)
-    if event_data.get("unit_type") != unit_type:
-        return False
-    current_amount = progress.progress_data.get("trained", 0)
-    progress.progress_data["trained"] = current_amount + event_data.get("amount", 0)
-    if progress.progress_data["trained"] >= required_amount:
+def _add_progress(progress: models.QuestProgress, key: str, amount: int | float) -> int | float:
+    # Assign a new dict: in-place changes to a JSON column are not persisted.
+    data = dict(progress.progress_data or {})
+    data[key] = data.get(key, 0) + amount
+    progress.progress_data = data
+    return data[key]
+
+
+def _maybe_complete_building(
+    requirements: Dict[str, Any], progress: models.QuestProgress, event_data: Dict[str, Any]
+) -> None:
+    if event_data.get("building_type") == requirements.get("building_type") and event_data.get(
+        "level", 0
+    ) >= requirements.get("level", 1):
         _mark_completed(progress)
-        return True
-    return False
-
-
-def _maybe_complete_resources(progress: models.QuestProgress, event_data: Dict[str, Any]) -> bool:
-    if progress.quest.requirements.get("type") != "resources_collected":
-        return False
-    required_amount = progress.quest.requirements.get("amount", 0)
-    collected = progress.progress_data.get("collected", 0)
-    collected += sum(event_data.get(resource, 0) for resource in ("wood", "clay", "iron"))
-    progress.progress_data["collected"] = collected
-    if collected >= required_amount:
+
+
+def _maybe_complete_training(
+    requirements: Dict[str, Any], progress: models.QuestProgress, event_data: Dict[str, Any]
+) -> None:
+    if event_data.get("unit_type") != requirements.get("unit_type"):
+        return
+    if _add_progress(progress, "trained", event_data.get("amount", 0)) >= requirements.get("amount", 0):
         _mark_completed(progress)
-        return True
-    return False
 
 
-def _maybe_complete_simple(progress: models.QuestProgress, event_type: str) -> bool:
-    req_type = progress.quest.requirements.get("type")
-    if req_type in {"alliance_joined", "attack_sent", "spy_sent"} and req_type == event_type:
+def _maybe_complete_resources(
+    requirements: Dict[str, Any], progress: models.QuestProgress, event_data: Dict[str, Any]
+) -> None:
+    if _add_progress(progress, "collected", event_data.get("amount", 0)) >= requirements.get("amount", 0):
         _mark_completed(progress)
-        return True
-    return False
+
+
+def _maybe_complete_simple(
+    requirements: Dict[str, Any], progress: models.QuestProgress, event_data: Dict[str, Any]
+) -> None:
+    _mark_completed(progress)
+
+
+_HANDLERS = {
+    "building_finished": _maybe_complete_building,
+    "troops_trained": _maybe_complete_training,
+    progress_events.RESOURCES_COLLECTED: _maybe_complete_resources,
+    "alliance_joined": _maybe_complete_simple,
+    "attack_sent": _maybe_complete_simple,
+    "spy_sent": _maybe_complete_simple,
+}
+
+
+def apply_event(
+    db: Session,
+    event_type: str,
+    event_data_by_user: Dict[int, Dict[str, Any]],
+    rules: Iterable[progress_events.QuestRule],
+    *,
+    lock: bool = False,
+) -> None:
+    """Advance the pending quests in ``rules`` for each player; no commit."""
+
+    rules = list(rules)
+    handler = _HANDLERS.get(event_type)
+    if not rules or handler is None or not event_data_by_user:
+        return
+    rows = _progress_rows(db, event_data_by_user, [rule.id for rule in rules], lock=lock)
+    for user_id, event_data in event_data_by_user.items():
+        for rule in rules:
+            progress = rows[(user_id, rule.id)]
+            if progress.status == "pending":
+                handler(rule.requirements, progress, event_data)
 
 
 def handle_event(db: Session, user: models.User, event_type: str, event_data: Dict[str, Any] | None = None) -> None:
+    """Advance the quests that ``event_type`` can complete for ``user``.
+
+    Resource collection is buffered and applied in batches (see
+    services.progress_events).
+    """
+
     event_data = event_data or {}
-    progresses = _ensure_progress_entries(db, user)
-    for progress in progresses:
-        if progress.status != "pending":
-            continue
-        changed = False
-        if event_type == "building_finished":
-            changed = _maybe_complete_building(progress, event_data)
-        elif event_type == "troops_trained":
-            changed = _maybe_complete_training(progress, event_data)
-        elif event_type == "resources_collected":
-            changed = _maybe_complete_resources(progress, event_data)
-        else:
-            changed = _maybe_complete_simple(progress, event_type)
-        if changed:
-            db.add(progress)
+    if event_type == progress_events.RESOURCES_COLLECTED:
+        collected = sum(max(float(event_data.get(resource, 0) or 0), 0.0) for resource in ("wood", "clay", "iron"))
+        progress_events.record_resources_collected(user.id, int(collected))
+        return
+    rules = progress_events.definitions(db).quests.get(event_type)
+    if not rules:
+        return
+    apply_event(db, event_type, {user.id: event_data}, rules)
     db.commit()
 
 
 def list_quests_for_user(db: Session, user: models.User) -> List[models.QuestProgress]:
-    return _ensure_progress_entries(db, user)
+    quest_ids = progress_events.definitions(db).quest_ids
+    rows = _progress_rows(db, [user.id], quest_ids)
+    progresses = [rows[(user.id, quest_id)] for quest_id in quest_ids]
+    if any(progress.id is None for progress in progresses):
+        db.commit()
+    return progresses
 
 
 def _apply_resource_reward(user: models.User, resources: Dict[str, Any]) -> None:
@@ -1,21 +1,24 @@
 """Helpers to process build, troop, and movement queues."""
 
 import logging
+from datetime import datetime
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session, selectinload
 
 from .. import models
 from . import building, movement, notification as notification_service, troops
+from .sharding import QueueShard, active_city_clause, active_movement_clause
 
 logger = logging.getLogger(__name__)
 
 
-def process_all_queues(db: Session) -> dict:
+def process_all_queues(db: Session, shard: QueueShard | None = None) -> dict:
     """Process all queue types and send completion notifications."""
 
-    finished_buildings = building.process_building_queues(db)
-    finished_troops = troops.process_troop_queues(db)
-    finished_movements = movement.resolve_due_movements(db)
+    finished_buildings = building.process_building_queues(db, shard=shard)
+    finished_troops = troops.process_troop_queues(db, shard=shard)
+    finished_movements = movement.resolve_due_movements(db, shard=shard)
 
     for finished in finished_buildings:
         city = (
@@ -67,6 +70,41 @@ def process_all_queues(db: Session) -> dict:
     }
 
 
+def oldest_due_time(
+    db: Session, now: datetime, shard: QueueShard | None = None
+) -> datetime | None:
+    """Return the earliest due time that is already past, if any."""
+
+    building_query = db.query(func.min(models.BuildingQueue.finish_time)).filter(
+        models.BuildingQueue.finish_time <= now,
+        active_city_clause(models.BuildingQueue.city_id),
+    )
+    troop_query = db.query(func.min(models.TroopQueue.finish_time)).filter(
+        models.TroopQueue.finish_time <= now,
+        active_city_clause(models.TroopQueue.city_id),
+    )
+    movement_query = db.query(func.min(models.Movement.arrival_time)).filter(
+        models.Movement.arrival_time <= now,
+        models.Movement.status == "ongoing",
+        active_movement_clause(),
+    )
+    if shard is not None:
+        building_query = building_query.filter(shard.city_clause(models.BuildingQueue.city_id))
+        troop_query = troop_query.filter(shard.city_clause(models.TroopQueue.city_id))
+        movement_query = movement_query.filter(shard.movement_clause())
+
+    due_times = [
+        value
+        for value in (
+            building_query.scalar(),
+            troop_query.scalar(),
+            movement_query.scalar(),
+        )
+        if value is not None
+    ]
+    return min(due_times) if due_times else None
+
+
 def get_active_queues_for_user(db: Session, user: models.User, world_id: int | None = None) -> dict:
     """Return all active queues owned by a user, optionally scoped to a world."""
 
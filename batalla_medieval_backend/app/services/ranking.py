@@ -1,9 +1,25 @@
-from typing import Dict, List
+"""Player and alliance ranking backed by the materialized ``player_scores`` table.
 
-from sqlalchemy import func
+Scores are kept current by small deltas applied inside the same transaction
+as the game change that caused them (queue completion, troop dispatch and
+return, battle losses, city ownership changes). ``rebuild_scores`` recomputes
+everything from buildings and troops, and ``check_score_consistency`` compares
+the stored rows with the original on-the-fly calculation.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Mapping
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from .. import models
+from ..utils import utc_now
+
+logger = logging.getLogger(__name__)
 
 TROOP_VALUES: Dict[str, int] = {
     "basic_infantry": 2,
@@ -15,17 +31,30 @@ TROOP_VALUES: Dict[str, int] = {
     "ram": 8,
     "catapult": 10,
 }
+BUILDING_POINTS_PER_LEVEL = 5
+DEFAULT_RANKING_LIMIT = 100
+MAX_RANKING_LIMIT = 500
+
+
+def troop_points(troops: Mapping[str, int]) -> int:
+    """Return ranking points for a ``{unit_type: quantity}`` mapping."""
+
+    return sum(
+        int(quantity) * TROOP_VALUES.get(unit_type, 1)
+        for unit_type, quantity in troops.items()
+    )
+
+
+def building_points(levels: Iterable[int]) -> int:
+    return sum(int(level) for level in levels) * BUILDING_POINTS_PER_LEVEL
 
 
 def calculate_city_points(city: models.City) -> int:
     """Return the same score components used by player ranking, scoped to one city."""
 
-    building_points = sum(int(building.level) for building in city.buildings) * 5
-    troop_points = sum(
-        int(troop.quantity) * TROOP_VALUES.get(troop.unit_type, 1)
-        for troop in city.troops
+    return building_points(building.level for building in city.buildings) + troop_points(
+        {troop.unit_type: troop.quantity for troop in city.troops}
     )
-    return building_points + troop_points
 
 
 def _calculate_building_points(db: Session, user_id: int, world_id: int) -> int:
@@ -35,7 +64,7 @@ def _calculate_building_points(db: Session, user_id: int, world_id: int) -> int:
         .filter(models.City.owner_id == user_id, models.City.world_id == world_id)
         .scalar()
     )
-    return int(total_levels) * 5
+    return int(total_levels) * BUILDING_POINTS_PER_LEVEL
 
 
 def _calculate_troop_points(db: Session, user_id: int, world_id: int) -> int:
@@ -46,29 +75,227 @@ def _calculate_troop_points(db: Session, user_id: int, world_id: int) -> int:
         .group_by(models.Troop.unit_type)
         .all()
     )
-    points = 0
-    for unit_type, quantity in troop_totals:
-        points += int(quantity) * TROOP_VALUES.get(unit_type, 1)
-    return points
+    return troop_points(dict(troop_totals))
 
 
 def calculate_player_points(db: Session, user: models.User, world_id: int) -> int:
-    building_points = _calculate_building_points(db, user.id, world_id)
-    troop_points = _calculate_troop_points(db, user.id, world_id)
-    return building_points + troop_points
+    """Compute a player's score from scratch (the reference calculation)."""
+
+    building_total = _calculate_building_points(db, user.id, world_id)
+    troop_total = _calculate_troop_points(db, user.id, world_id)
+    return building_total + troop_total
 
 
-def _get_user_points_map(db: Session, users: List[models.User], world_id: int) -> Dict[int, int]:
-    return {user.id: calculate_player_points(db, user, world_id) for user in users}
+def _upsert_score(
+    db: Session,
+    user_id: int,
+    world_id: int,
+    building_total: int,
+    troop_total: int,
+) -> models.PlayerScore:
+    score = (
+        db.query(models.PlayerScore)
+        .filter(
+            models.PlayerScore.user_id == user_id,
+            models.PlayerScore.world_id == world_id,
+        )
+        .one_or_none()
+    )
+    if score is None:
+        score = models.PlayerScore(user_id=user_id, world_id=world_id)
+        try:
+            with db.begin_nested():
+                score.building_points = building_total
+                score.troop_points = troop_total
+                score.points = building_total + troop_total
+                score.updated_at = utc_now()
+                db.add(score)
+            return score
+        except IntegrityError:
+            # A concurrent transaction inserted the row first; fall through and
+            # overwrite it with the absolute values computed here.
+            score = (
+                db.query(models.PlayerScore)
+                .filter(
+                    models.PlayerScore.user_id == user_id,
+                    models.PlayerScore.world_id == world_id,
+                )
+                .one()
+            )
 
+    score.building_points = building_total
+    score.troop_points = troop_total
+    score.points = building_total + troop_total
+    score.updated_at = utc_now()
+    db.add(score)
+    return score
 
-def calculate_alliance_points(db: Session, alliance: models.Alliance, world_id: int) -> int:
-    users = [member.user for member in alliance.members]
-    user_points = _get_user_points_map(db, users, world_id)
-    return sum(user_points.values())
 
+def refresh_player_score(db: Session, user_id: int, world_id: int) -> models.PlayerScore:
+    """Recompute one player's materialized score from buildings and troops.
+
+    Pending ORM changes are flushed first so the aggregate queries see them.
+    The caller owns the transaction.
+    """
+
+    db.flush()
+    return _upsert_score(
+        db,
+        user_id,
+        world_id,
+        _calculate_building_points(db, user_id, world_id),
+        _calculate_troop_points(db, user_id, world_id),
+    )
+
+
+def apply_score_delta(
+    db: Session,
+    user_id: int | None,
+    world_id: int,
+    *,
+    building_delta: int = 0,
+    troop_delta: int = 0,
+) -> None:
+    """Shift a player's materialized score inside the caller's transaction.
+
+    Deltas are applied with a single ``UPDATE ... SET points = points + n`` so
+    concurrent workers never lose increments. When the player has no row yet,
+    the score is computed from scratch instead; callers must therefore apply
+    the delta after mutating the domain rows it describes.
+    """
+
+    if not user_id or (not building_delta and not troop_delta):
+        return
+
+    result = db.execute(
+        update(models.PlayerScore)
+        .where(
+            models.PlayerScore.user_id == user_id,
+            models.PlayerScore.world_id == world_id,
+        )
+        .values(
+            building_points=models.PlayerScore.building_points + int(building_delta),
+            troop_points=models.PlayerScore.troop_points + int(troop_delta),
+            points=models.PlayerScore.points + int(building_delta) + int(troop_delta),
+            updated_at=utc_now(),
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+    if not result.rowcount:
+        refresh_player_score(db, user_id, world_id)
+
+
+def transfer_city_score(
+    db: Session,
+    city: models.City,
+    previous_owner_id: int | None,
+    new_owner_id: int | None,
+) -> None:
+    """Move a city's full score between owners after a change of ownership."""
+
+    if previous_owner_id == new_owner_id:
+        return
+    city_buildings = building_points(building.level for building in city.buildings)
+    city_troops = troop_points({troop.unit_type: troop.quantity for troop in city.troops})
+    apply_score_delta(
+        db,
+        previous_owner_id,
+        city.world_id,
+        building_delta=-city_buildings,
+        troop_delta=-city_troops,
+    )
+    if new_owner_id:
+        # The ownership change is already on the city row; a missing score row
+        # is therefore rebuilt with this city included.
+        apply_score_delta(
+            db,
+            new_owner_id,
+            city.world_id,
+            building_delta=city_buildings,
+            troop_delta=city_troops,
+        )
+
+
+def _scored_owner_rows(db: Session, world_id: int | None):
+    building_query = (
+        db.query(
+            models.City.owner_id,
+            models.City.world_id,
+            func.coalesce(func.sum(models.Building.level), 0),
+        )
+        .outerjoin(models.Building, models.Building.city_id == models.City.id)
+        .filter(models.City.owner_id.isnot(None))
+        .group_by(models.City.owner_id, models.City.world_id)
+    )
+    troop_query = (
+        db.query(
+            models.City.owner_id,
+            models.City.world_id,
+            models.Troop.unit_type,
+            func.coalesce(func.sum(models.Troop.quantity), 0),
+        )
+        .join(models.Troop, models.Troop.city_id == models.City.id)
+        .filter(models.City.owner_id.isnot(None))
+        .group_by(models.City.owner_id, models.City.world_id, models.Troop.unit_type)
+    )
+    if world_id is not None:
+        building_query = building_query.filter(models.City.world_id == world_id)
+        troop_query = troop_query.filter(models.City.world_id == world_id)
+
+    totals: Dict[tuple[int, int], list[int]] = {}
+    for owner_id, row_world_id, levels in building_query.all():
+        totals[(owner_id, row_world_id)] = [int(levels) * BUILDING_POINTS_PER_LEVEL, 0]
+    for owner_id, row_world_id, unit_type, quantity in troop_query.all():
+        entry = totals.setdefault((owner_id, row_world_id), [0, 0])
+        entry[1] += troop_points({unit_type: quantity})
+    return totals
+
+
+def rebuild_scores(db: Session, world_id: int | None = None) -> int:
+    """Recompute every materialized score (optionally for one world) from scratch.
+
+    Uses two grouped aggregate queries regardless of the number of players.
+    Returns the number of score rows written. The caller owns the commit.
+    """
+
+    totals = _scored_owner_rows(db, world_id)
+    delete_query = db.query(models.PlayerScore)
+    if world_id is not None:
+        delete_query = delete_query.filter(models.PlayerScore.world_id == world_id)
+    delete_query.delete(synchronize_session=False)
 
-def get_player_ranking(db: Session, world_id: int) -> List[Dict[str, int | str | int]]:
+    now = utc_now()
+    db.bulk_insert_mappings(
+        models.PlayerScore,
+        [
+            {
+                "user_id": owner_id,
+                "world_id": row_world_id,
+                "building_points": building_total,
+                "troop_points": troop_total,
+                "points": building_total + troop_total,
+                "updated_at": now,
+            }
+            for (owner_id, row_world_id), (building_total, troop_total) in totals.items()
+        ],
+    )
+    db.flush()
+    logger.info(
+        "player_scores_rebuilt",
+        extra={"world_id": world_id, "rows": len(totals)},
+    )
+    return len(totals)
+
+
+def check_score_consistency(db: Session, world_id: int) -> List[Dict[str, int | None]]:
+    """Return every player whose stored score differs from the reference calculation."""
+
+    stored = {
+        score.user_id: score.points
+        for score in db.query(models.PlayerScore)
+        .filter(models.PlayerScore.world_id == world_id)
+        .all()
+    }
     users = (
         db.query(models.User)
         .join(models.City, models.City.owner_id == models.User.id)
@@ -76,56 +303,154 @@ def get_player_ranking(db: Session, world_id: int) -> List[Dict[str, int | str |
         .distinct()
         .all()
     )
-    ranking = [
+    mismatches: List[Dict[str, int | None]] = []
+    seen: set[int] = set()
+    for user in users:
+        seen.add(user.id)
+        expected = calculate_player_points(db, user, world_id)
+        if stored.get(user.id) != expected:
+            mismatches.append(
+                {"user_id": user.id, "stored": stored.get(user.id), "expected": expected}
+            )
+    for user_id, points in stored.items():
+        if user_id not in seen and points != 0:
+            mismatches.append({"user_id": user_id, "stored": points, "expected": 0})
+    return mismatches
+
+
+def ensure_world_scores(db: Session, world_id: int) -> None:
+    """Materialize a world on first read when it predates the score table."""
+
+    has_scores = db.query(
+        db.query(models.PlayerScore.id)
+        .filter(models.PlayerScore.world_id == world_id)
+        .exists()
+    ).scalar()
+    if has_scores:
+        return
+    has_players = db.query(
+        db.query(models.City.id)
+        .filter(models.City.world_id == world_id, models.City.owner_id.isnot(None))
+        .exists()
+    ).scalar()
+    if has_players:
+        rebuild_scores(db, world_id)
+        db.commit()
+
+
+def get_player_ranking(
+    db: Session,
+    world_id: int,
+    limit: int | None = None,
+    offset: int = 0,
+) -> List[Dict[str, int | str | int]]:
+    ensure_world_scores(db, world_id)
+    query = (
+        db.query(
+            models.PlayerScore.user_id,
+            models.PlayerScore.points,
+            models.User.username,
+            models.User.attacker_points,
+            models.User.defender_points,
+        )
+        .join(models.User, models.User.id == models.PlayerScore.user_id)
+        .filter(models.PlayerScore.world_id == world_id)
+        .order_by(models.PlayerScore.points.desc(), models.PlayerScore.user_id.asc())
+        .offset(offset)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return [
         {
-            "user_id": user.id,
-            "username": user.username,
-            "points": calculate_player_points(db, user, world_id),
-            "attacker_points": user.attacker_points,
-            "defender_points": user.defender_points,
+            "user_id": row.user_id,
+            "username": row.username,
+            "points": row.points,
+            "attacker_points": row.attacker_points,
+            "defender_points": row.defender_points,
             "world_id": world_id,
         }
-        for user in users
+        for row in query.all()
     ]
-    ranking.sort(key=lambda entry: entry["points"], reverse=True)
-    return ranking
 
 
-def get_alliance_ranking(db: Session, world_id: int) -> List[Dict[str, int | str | int]]:
-    alliances = db.query(models.Alliance).filter(models.Alliance.world_id == world_id).all()
-    users = (
-        db.query(models.User)
-        .join(models.City, models.City.owner_id == models.User.id)
-        .filter(models.City.world_id == world_id)
-        .distinct()
-        .all()
+def get_alliance_ranking(
+    db: Session,
+    world_id: int,
+    limit: int | None = None,
+    offset: int = 0,
+) -> List[Dict[str, int | str | int]]:
+    ensure_world_scores(db, world_id)
+    points = func.coalesce(func.sum(models.PlayerScore.points), 0)
+    query = (
+        db.query(models.Alliance.id, models.Alliance.name, points.label("points"))
+        .outerjoin(models.AllianceMember, models.AllianceMember.alliance_id == models.Alliance.id)
+        .outerjoin(
+            models.PlayerScore,
+            (models.PlayerScore.user_id == models.AllianceMember.user_id)
+            & (models.PlayerScore.world_id == world_id),
+        )
+        .filter(models.Alliance.world_id == world_id)
+        .group_by(models.Alliance.id, models.Alliance.name)
+        .order_by(points.desc(), models.Alliance.id.asc())
+        .offset(offset)
     )
-    user_points = _get_user_points_map(db, users, world_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return [
+        {
+            "alliance_id": row.id,
+            "name": row.name,
+            "points": int(row.points),
+            "world_id": world_id,
+        }
+        for row in query.all()
+    ]
 
-    ranking = []
-    for alliance in alliances:
-        points = sum(user_points.get(member.user_id, 0) for member in alliance.members)
-        ranking.append(
-            {
-                "alliance_id": alliance.id,
-                "name": alliance.name,
-                "points": points,
-                "world_id": world_id,
-            }
+
+def get_points_by_user(db: Session, world_id: int, user_ids: Iterable[int]) -> Dict[int, int]:
+    """Return materialized points for ``user_ids`` with a single query."""
+
+    ids = {user_id for user_id in user_ids if user_id}
+    if not ids:
+        return {}
+    ensure_world_scores(db, world_id)
+    rows = (
+        db.query(models.PlayerScore.user_id, models.PlayerScore.points)
+        .filter(
+            models.PlayerScore.world_id == world_id,
+            models.PlayerScore.user_id.in_(ids),
         )
+        .all()
+    )
+    return {user_id: int(points) for user_id, points in rows}
+
 
-    ranking.sort(key=lambda entry: entry["points"], reverse=True)
-    return ranking
+def calculate_alliance_points(db: Session, alliance: models.Alliance, world_id: int) -> int:
+    member_ids = [member.user_id for member in alliance.members]
+    if not member_ids:
+        return 0
+    total = (
+        db.query(func.coalesce(func.sum(models.PlayerScore.points), 0))
+        .filter(
+            models.PlayerScore.world_id == world_id,
+            models.PlayerScore.user_id.in_(member_ids),
+        )
+        .scalar()
+    )
+    return int(total)
 
 
 def recalculate_player_and_alliance_scores(db: Session, user_id: int, world_id: int) -> None:
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        return
+    """Refresh one player's materialized score and commit it.
 
-    calculate_player_points(db, user, world_id)
-    for membership in user.alliances:
-        calculate_alliance_points(db, membership.alliance, world_id)
+    Alliance scores are aggregated from player rows at read time, so there is
+    nothing else to persist.
+    """
+
+    if not db.query(models.User.id).filter(models.User.id == user_id).first():
+        return
+    refresh_player_score(db, user_id, world_id)
+    db.commit()
 
 
 def search_players(db: Session, world_id: int, query: str) -> List[models.User]:
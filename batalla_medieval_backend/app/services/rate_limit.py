@@ -0,0 +1,273 @@
+"""Request rate limiting with sliding-window counters.
+
+A :class:`RateLimit` allows ``limit`` hits per ``window_seconds`` for each key
+(client IP, user id). The sliding-window counter keeps two integers per key:
+the hits of the current fixed window and of the previous one, weighted by
+how much of the previous window still overlaps the sliding window. Memory per
+key is constant, whatever the request rate.
+
+Only allowed hits are counted. The weighting assumes hits were spread evenly
+over the previous window, so the limit is approximate at window boundaries.
+
+Backends (``RATE_LIMIT_BACKEND``):
+
+* ``memory``: counters in this process, bounded by ``RATE_LIMIT_MAX_KEYS``
+  (least recently used keys are evicted first) and swept of idle keys. Each
+  web worker enforces its own limit.
+* ``database``: one row per key and window in ``rate_limit_counters``,
+  incremented with an atomic upsert, so the limit holds across workers and
+  replicas. Expired rows are deleted periodically.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, Tuple
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import delete, distinct, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .. import models
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    name: str
+    limit: int
+    window_seconds: float
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    retry_after: float
+
+
+PUBLIC_API = RateLimit("public_api", 60, 60)
+CHAT_MESSAGE = RateLimit("chat_message", 1, 1)
+AUTH_LOGIN = RateLimit("auth_login", 20, 60)
+AUTH_REGISTER = RateLimit("auth_register", 10, 3600)
+AUTH_EMAIL = RateLimit("auth_email", 5, 900)
+
+
+def _window(policy: RateLimit, now: float) -> Tuple[int, float]:
+    """Return the index of the fixed window holding ``now`` and its elapsed share."""
+
+    position = now / policy.window_seconds
+    index = math.floor(position)
+    return index, position - index
+
+
+def _decide(policy: RateLimit, current: int, previous: int, elapsed: float) -> RateLimitResult:
+    estimate = previous * (1.0 - elapsed) + current
+    if estimate <= policy.limit:
+        return RateLimitResult(True, 0.0)
+    # Time until the weighted previous window has decayed enough, or until
+    # the current window rolls over if it alone exceeds the limit.
+    if current > policy.limit or previous == 0:
+        retry_after = (1.0 - elapsed) * policy.window_seconds
+    else:
+        retry_after = ((estimate - policy.limit) / previous) * policy.window_seconds
+    return RateLimitResult(False, max(retry_after, 0.0))
+
+
+class MemoryBackend:
+    """Per-process counters with LRU eviction and an idle-key sweep."""
+
+    # Idle keys removed per hit; enough to keep up without a sweeper thread.
+    SWEEP_PER_HIT = 4
+
+    def __init__(self, max_keys: int) -> None:
+        self._max_keys = max_keys
+        # (policy, key) -> (window index, current hits, previous hits, expires at),
+        # least recently hit first.
+        self._counters: "OrderedDict[Tuple[str, str], Tuple[int, int, int, float]]" = OrderedDict()
+        self._lock = Lock()
+        self.evictions = 0
+
+    def hit(self, policy: RateLimit, key: str, now: float) -> RateLimitResult:
+        index, elapsed = _window(policy, now)
+        counter_key = (policy.name, key)
+        with self._lock:
+            stored = self._counters.pop(counter_key, None)
+            if stored is None or stored[0] < index - 1:
+                current, previous = 0, 0
+            elif stored[0] == index - 1:
+                current, previous = 0, stored[1]
+            else:
+                current, previous = stored[1], stored[2]
+            result = _decide(policy, current + 1, previous, elapsed)
+            if result.allowed:
+                current += 1
+            self._counters[counter_key] = (
+                index,
+                current,
+                previous,
+                (index + 2) * policy.window_seconds,
+            )
+            self._sweep(now)
+        return result
+
+    def _sweep(self, now: float) -> None:
+        for _ in range(self.SWEEP_PER_HIT):
+            counter_key, stored = next(iter(self._counters.items()))
+            if stored[3] > now:
+                break
+            del self._counters[counter_key]
+            self.evictions += 1
+        while len(self._counters) > self._max_keys:
+            self._counters.popitem(last=False)
+            self.evictions += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._counters)
+
+
+class DatabaseBackend:
+    """Counters shared by every process through ``rate_limit_counters``."""
+
+    def __init__(self, engine, prune_seconds: float = 60.0) -> None:
+        self._engine = engine
+        self._prune_seconds = prune_seconds
+        self._next_prune = 0.0
+        self._insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+
+    def hit(self, policy: RateLimit, key: str, now: float) -> RateLimitResult:
+        index, elapsed = _window(policy, now)
+        counter_key = f"{policy.name}:{key}"
+        table = models.RateLimitCounter.__table__
+        statement = self._insert(table).values(
+            key=counter_key,
+            window_index=index,
+            hits=1,
+            expires_at=(index + 2) * policy.window_seconds,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.key, table.c.window_index],
+            set_={"hits": table.c.hits + 1},
+        ).returning(table.c.hits)
+        current_row = (table.c.key == counter_key) & (table.c.window_index == index)
+        with self._engine.begin() as connection:
+            # The upsert counts the hit and locks the row, so concurrent
+            # workers see each other's hits.
+            current = connection.execute(statement).scalar_one()
+            previous = connection.execute(
+                select(table.c.hits).where(
+                    table.c.key == counter_key, table.c.window_index == index - 1
+                )
+            ).scalar()
+            result = _decide(policy, current, previous or 0, elapsed)
+            if not result.allowed:
+                connection.execute(
+                    update(table).where(current_row).values(hits=table.c.hits - 1)
+                )
+            if now >= self._next_prune:
+                self._next_prune = now + self._prune_seconds
+                connection.execute(delete(table).where(table.c.expires_at < now))
+        return result
+
+    def reset(self) -> None:
+        with self._engine.begin() as connection:
+            connection.execute(delete(models.RateLimitCounter.__table__))
+
+    def size(self) -> int:
+        with self._engine.connect() as connection:
+            table = models.RateLimitCounter.__table__
+            return connection.execute(select(func.count(distinct(table.c.key)))).scalar_one()
+
+
+class Limiter:
+    def __init__(self, backend, clock: Callable[[], float] = time.time) -> None:
+        self.backend = backend
+        self._clock = clock
+        self._lock = Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def hit(self, policy: RateLimit, key: str) -> RateLimitResult:
+        result = self.backend.hit(policy, key, self._clock())
+        with self._lock:
+            stats = self._stats.setdefault(policy.name, {"allowed": 0, "denied": 0})
+            stats["allowed" if result.allowed else "denied"] += 1
+        return result
+
+    def allow(self, policy: RateLimit, key: str) -> bool:
+        return self.hit(policy, key).allowed
+
+    def reset(self) -> None:
+        self.backend.reset()
+        with self._lock:
+            self._stats.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            policies = {name: dict(counts) for name, counts in self._stats.items()}
+        return {"keys": self.backend.size(), "policies": policies}
+
+
+_limiter: Limiter | None = None
+_limiter_lock = Lock()
+
+
+def get_limiter() -> Limiter:
+    """Return this process's limiter, building the configured backend once."""
+
+    global _limiter
+
+    with _limiter_lock:
+        if _limiter is None:
+            settings = get_settings()
+            if settings.rate_limit_backend == "database":
+                from ..database import engine
+
+                backend = DatabaseBackend(engine)
+            else:
+                backend = MemoryBackend(settings.rate_limit_max_keys)
+            _limiter = Limiter(backend)
+        return _limiter
+
+
+def reset() -> None:
+    """Forget every counter (tests, admin)."""
+
+    get_limiter().reset()
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "anonymous"
+
+
+def enforce(policy: RateLimit, key: str, detail: str | None = None) -> None:
+    """Count a hit for ``key`` and raise 429 with ``Retry-After`` when over."""
+
+    result = get_limiter().hit(policy, key)
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail
+            or f"Rate limit exceeded. Max {policy.limit} requests per {policy.window_seconds:g} seconds.",
+            headers={"Retry-After": str(max(1, math.ceil(result.retry_after)))},
+        )
+
+
+def limit_by_ip(policy: RateLimit, detail: str | None = None) -> Callable[[Request], None]:
+    """Build a FastAPI dependency that limits each client IP by ``policy``."""
+
+    def dependency(request: Request) -> None:
+        enforce(policy, client_ip(request), detail)
+
+    return dependency
@@ -1,6 +1,96 @@
+"""Report delivery and the paginated report feed.
+
+Each report keeps its full JSON ``content``, but the inbox only reads the
+summary columns filled in when the report is written (recipient, outcome,
+resource total and the two names shown in the header). The feed is ordered
+newest first and paged by keyset on ``(created_at, id)``; the content of a
+report is loaded only when it is opened. Each world membership stores the
+cursor of the newest report the player has seen, so polling for unread
+reports is a bounded index range count.
+"""
+
 import json
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session, defer
+
 from .. import models
+from .balance import RESOURCE_FIELDS
+
+# The unread counter stops here; clients show "99+" style badges.
+UNREAD_COUNT_LIMIT = 100
+
+ReportKey = Tuple[datetime, int]
+
+
+def _resource_total(resources: dict | None) -> int:
+    return sum(int((resources or {}).get(resource) or 0) for resource in RESOURCE_FIELDS)
+
+
+def _side_alive(side: dict) -> bool:
+    losses = side.get("losses") or {}
+    return any(count - losses.get(unit, 0) > 0 for unit, count in (side.get("initial") or {}).items())
+
+
+def summarize(report: models.Report) -> None:
+    """Fill the summary columns of ``report`` from its content.
+
+    ``outcome`` is seen from the recipient: ``victory`` or ``defeat`` for
+    battles and espionage, ``None`` for deliveries.
+    """
+
+    try:
+        content = json.loads(report.content)
+    except (TypeError, ValueError):
+        content = None
+    if not isinstance(content, dict):
+        report.loot_total = 0
+        return
+
+    is_attacker = report.city_id == report.attacker_city_id
+    attacker = content.get("attacker") or content.get("sender") or content.get("from") or {}
+    defender = content.get("defender") or content.get("receiver") or {}
+    report.attacker_name = attacker.get("name")
+    report.defender_name = defender.get("name")
+
+    if report.report_type == "battle":
+        attacker_won = _side_alive(attacker) and not _side_alive(defender)
+        report.outcome = "victory" if attacker_won == is_attacker else "defeat"
+        report.loot_total = _resource_total(content.get("loot"))
+    elif report.report_type == "spy":
+        succeeded = bool(content.get("success"))
+        report.outcome = "victory" if succeeded == is_attacker else "defeat"
+        report.loot_total = 0
+    else:
+        report.loot_total = _resource_total(content.get("resources"))
+
+
+def build_report(
+    city: models.City,
+    *,
+    world_id: int,
+    report_type: str,
+    content: str,
+    attacker_city_id: int | None,
+    defender_city_id: int | None,
+) -> models.Report:
+    """A summarized report delivered to ``city`` and its current owner; not added to the session."""
+
+    report = models.Report(
+        city_id=city.id,
+        owner_id=city.owner_id,
+        world_id=world_id,
+        report_type=report_type,
+        content=content,
+        attacker_city_id=attacker_city_id,
+        defender_city_id=defender_city_id,
+    )
+    summarize(report)
+    return report
+
 
 def create_trade_report(db: Session, sender: models.City, receiver: models.City, resources: dict[str, int]):
     content = json.dumps({
@@ -9,20 +99,20 @@ def create_trade_report(db: Session, sender: models.City, receiver: models.City,
         "receiver": {"id": receiver.id, "name": receiver.name},
         "resources": resources
     })
-    
+
     # Report for sender
-    db.add(models.Report(
-        city_id=sender.id,
+    db.add(build_report(
+        sender,
         world_id=sender.world_id,
         report_type="trade",
         content=content,
         attacker_city_id=sender.id,
         defender_city_id=receiver.id
     ))
-    
+
     # Report for receiver
-    db.add(models.Report(
-        city_id=receiver.id,
+    db.add(build_report(
+        receiver,
         world_id=receiver.world_id,
         report_type="trade",
         content=content,
@@ -38,9 +128,9 @@ def create_return_report(db: Session, city: models.City, from_city: models.City,
         "troops": troops,
         "resources": resources or {}
     })
-    
-    db.add(models.Report(
-        city_id=city.id,
+
+    db.add(build_report(
+        city,
         world_id=city.world_id,
         report_type="return",
         content=content,
@@ -56,20 +146,20 @@ def create_reinforce_report(db: Session, sender: models.City, receiver: models.C
         "receiver": {"id": receiver.id, "name": receiver.name},
         "troops": troops
     })
-    
+
     # Report for sender
-    db.add(models.Report(
-        city_id=sender.id,
+    db.add(build_report(
+        sender,
         world_id=sender.world_id,
         report_type="reinforce",
         content=content,
         attacker_city_id=sender.id,
         defender_city_id=receiver.id
     ))
-    
+
     # Report for receiver
-    db.add(models.Report(
-        city_id=receiver.id,
+    db.add(build_report(
+        receiver,
         world_id=receiver.world_id,
         report_type="reinforce",
         content=content,
@@ -77,3 +167,131 @@ def create_reinforce_report(db: Session, sender: models.City, receiver: models.C
         defender_city_id=receiver.id
     ))
     db.commit()
+
+
+# -- feed ------------------------------------------------------------------
+
+
+def encode_cursor(created_at: datetime, report_id: int) -> str:
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return f"{created_at.isoformat()}:{report_id}"
+
+
+def decode_cursor(cursor: str) -> ReportKey:
+    try:
+        created_at, _, report_id = cursor.rpartition(":")
+        return datetime.fromisoformat(created_at), int(report_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def _key(report: models.Report) -> str:
+    return encode_cursor(report.created_at, report.id)
+
+
+def _newer_than(key: ReportKey):
+    created_at, report_id = key
+    report = models.Report
+    return or_(
+        report.created_at > created_at,
+        and_(report.created_at == created_at, report.id > report_id),
+    )
+
+
+def _older_than(key: ReportKey):
+    created_at, report_id = key
+    report = models.Report
+    return or_(
+        report.created_at < created_at,
+        and_(report.created_at == created_at, report.id < report_id),
+    )
+
+
+def _inbox(db: Session, user_id: int, world_id: int):
+    return db.query(models.Report).filter(
+        models.Report.owner_id == user_id, models.Report.world_id == world_id
+    )
+
+
+def list_reports(
+    db: Session,
+    user_id: int,
+    world_id: int,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[models.Report], Optional[str]]:
+    """Return one page of report summaries, newest first, and the next page's cursor.
+
+    The cursor is the last ``(created_at, id)`` returned; ``content`` is not loaded.
+    """
+
+    query = _inbox(db, user_id, world_id).options(defer(models.Report.content))
+    if cursor:
+        query = query.filter(_older_than(decode_cursor(cursor)))
+    reports = (
+        query.order_by(models.Report.created_at.desc(), models.Report.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(reports) <= limit:
+        return reports, None
+    reports = reports[:limit]
+    return reports, _key(reports[-1])
+
+
+def get_report(db: Session, user_id: int, report_id: int) -> models.Report:
+    report = (
+        db.query(models.Report)
+        .filter(models.Report.id == report_id, models.Report.owner_id == user_id)
+        .first()
+    )
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return report
+
+
+def _read_key(membership: models.PlayerWorld) -> Optional[ReportKey]:
+    if membership.reports_read_at is None:
+        return None
+    return membership.reports_read_at, membership.reports_read_id
+
+
+def unread_reports(db: Session, membership: models.PlayerWorld, since: Optional[str] = None) -> dict:
+    """Count the reports newer than ``since`` (default: the stored read cursor).
+
+    The count stops at ``UNREAD_COUNT_LIMIT``. ``latest_cursor`` is the newest
+    report, to be passed back once the player has seen it.
+    """
+
+    user_id, world_id = membership.user_id, membership.world_id
+    read_key = decode_cursor(since) if since else _read_key(membership)
+    newer = _inbox(db, user_id, world_id).with_entities(models.Report.id)
+    if read_key is not None:
+        newer = newer.filter(_newer_than(read_key))
+    unread = db.execute(
+        select(func.count()).select_from(newer.limit(UNREAD_COUNT_LIMIT).subquery())
+    ).scalar_one()
+    latest = (
+        _inbox(db, user_id, world_id)
+        .with_entities(models.Report.created_at, models.Report.id)
+        .order_by(models.Report.created_at.desc(), models.Report.id.desc())
+        .first()
+    )
+    return {
+        "unread": unread,
+        "latest_cursor": encode_cursor(*latest) if latest else None,
+        "read_cursor": encode_cursor(*read_key) if read_key else None,
+    }
+
+
+def mark_read(db: Session, membership: models.PlayerWorld, cursor: str) -> dict:
+    """Move the stored read cursor forward to ``cursor``; it never moves back."""
+
+    key = decode_cursor(cursor)
+    current = _read_key(membership)
+    if current is None or key > current:
+        membership.reports_read_at, membership.reports_read_id = key
+        db.commit()
+    return unread_reports(db, membership)
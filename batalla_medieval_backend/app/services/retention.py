@@ -0,0 +1,317 @@
+"""Retention and archival of the append-only history tables.
+
+``logs``, ``reports``, ``chat_messages`` and ``notifications`` only ever
+grow. The worker runs ``run`` every ``RETENTION_INTERVAL_MINUTES``: rows
+older than the retention of their table (``RETENTION_<TABLE>_DAYS``, see
+docs/BETA_PRIVACY_RETENTION_TERMS.md) are written to gzip-compressed JSON
+Lines files under ``ARCHIVE_DIR`` and then removed from the database.
+
+On PostgreSQL the tables are partitioned by month (migration 0016) and each
+run creates the partitions of the coming months. A partition that lies
+entirely before the cutoff is archived and dropped whole, which leaves no
+dead rows to vacuum; the month that straddles the cutoff is kept until it
+expires completely. Rows that fell into the default partition, and the
+tables on SQLite, are archived and deleted in batches of
+``RETENTION_BATCH_SIZE`` rows, one transaction per batch.
+
+An archive file is complete on disk (written, flushed and renamed into
+place) before its rows are deleted. Files are named after the first row
+they hold, so a run interrupted between the two steps writes the same file
+again instead of a second copy. With ``ARCHIVE_RETENTION_DAYS`` set, files
+older than that are deleted too.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import column, delete, select, table, text
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..database import Base
+from ..utils import utc_now
+
+logger = logging.getLogger(__name__)
+
+# Partitions created ahead of the current month.
+PARTITION_MONTHS_AHEAD = 2
+
+
+@dataclass(frozen=True)
+class RetainedTable:
+    name: str
+    column: str
+    setting: str
+
+    @property
+    def table(self):
+        return Base.metadata.tables[self.name]
+
+    def days(self, settings) -> int:
+        return getattr(settings, self.setting)
+
+
+RETAINED_TABLES: Tuple[RetainedTable, ...] = (
+    RetainedTable("logs", "timestamp", "retention_logs_days"),
+    RetainedTable("reports", "created_at", "retention_reports_days"),
+    RetainedTable("chat_messages", "timestamp", "retention_chat_days"),
+    RetainedTable("notifications", "created_at", "retention_notifications_days"),
+)
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table_name: str, month: datetime) -> str:
+    return f"{table_name}_p{month:%Y%m}"
+
+
+_PARTITION = re.compile(
+    rf"^({'|'.join(re.escape(spec.name) for spec in RETAINED_TABLES)})_(p\d{{6}}|default)$"
+)
+
+
+def is_partition(name: str) -> bool:
+    """Whether ``name`` is a partition of a retained table rather than a model table."""
+
+    return _PARTITION.match(name) is not None
+
+
+# -- archive files ---------------------------------------------------------
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+
+def write_archive(directory: Path, spec: RetainedTable, rows: Sequence[dict]) -> Path:
+    """Write ``rows`` to a compressed file and return its path once durable."""
+
+    first = rows[0]
+    stamp = first[spec.column]
+    target = directory / spec.name / f"{stamp:%Y-%m}" / f"{spec.name}-{first['id']:012d}.jsonl.gz"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".tmp")
+    with open(partial, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as archive:
+            for row in rows:
+                archive.write(json.dumps(dict(row), default=_encode, separators=(",", ":")).encode())
+                archive.write(b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, target)
+    return target
+
+
+def read_archive(path: Path) -> List[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        return [json.loads(line) for line in archive]
+
+
+def purge_archives(directory: Path, cutoff: datetime) -> int:
+    """Delete archive files written before ``cutoff``; return how many."""
+
+    removed = 0
+    for path in directory.glob("*/*/*.jsonl.gz"):
+        if datetime.fromtimestamp(path.stat().st_mtime, timezone.utc) < cutoff:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+# -- PostgreSQL partitions -------------------------------------------------
+
+
+def is_partitioned(db: Session, table_name: str) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(
+        db.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = partrelid "
+                "WHERE relname = :name AND pg_table_is_visible(pg_class.oid)"
+            ),
+            {"name": table_name},
+        ).scalar()
+    )
+
+
+def monthly_partitions(db: Session, table_name: str) -> List[Tuple[str, datetime]]:
+    """Return the ``(name, month)`` of each monthly partition, oldest first."""
+
+    names = db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = inhparent "
+            "JOIN pg_class child ON child.oid = inhrelid "
+            "WHERE parent.relname = :name AND pg_table_is_visible(parent.oid)"
+        ),
+        {"name": table_name},
+    ).scalars()
+    pattern = re.compile(rf"^{re.escape(table_name)}_p(\d{{4}})(\d{{2}})$")
+    partitions = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, datetime(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(db: Session, table_name: str, month: datetime) -> None:
+    name = partition_name(table_name, month)
+    db.execute(
+        text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table_name}" '
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+        )
+    )
+
+
+def ensure_partitions(db: Session, table_name: str, now: datetime) -> None:
+    """Create the partitions of this month and the next ``PARTITION_MONTHS_AHEAD``."""
+
+    current = month_start(now)
+    for offset in range(PARTITION_MONTHS_AHEAD + 1):
+        month = add_months(current, offset)
+        try:
+            with db.begin_nested():
+                create_partition(db, table_name, month)
+        except Exception:
+            # Rows of that month already sit in the default partition (the
+            # job did not run for months). They expire from there instead.
+            logger.exception(
+                "retention_partition_failed",
+                extra={"table": table_name, "month": f"{month:%Y-%m}"},
+            )
+    db.commit()
+
+
+# -- expiry ----------------------------------------------------------------
+
+
+def _source(spec: RetainedTable, name: str):
+    """The retained table, or one of its partitions, as a selectable."""
+
+    if name == spec.name:
+        return spec.table
+    return table(name, *(column(col.name, col.type) for col in spec.table.columns))
+
+
+def _archive_partition(
+    db: Session, spec: RetainedTable, name: str, directory: Path, batch_size: int
+) -> int:
+    source = _source(spec, name)
+    archived, after = 0, 0
+    while True:
+        rows = (
+            db.execute(select(source).where(source.c.id > after).order_by(source.c.id).limit(batch_size))
+            .mappings()
+            .all()
+        )
+        if not rows:
+            break
+        write_archive(directory, spec, rows)
+        archived += len(rows)
+        after = rows[-1]["id"]
+    db.execute(text(f'DROP TABLE "{name}"'))
+    db.commit()
+    return archived
+
+
+def _delete_expired(
+    db: Session, spec: RetainedTable, name: str, cutoff: datetime, directory: Path, batch_size: int
+) -> int:
+    source = _source(spec, name)
+    stamp = source.c[spec.column]
+    archived = 0
+    while True:
+        rows = (
+            db.execute(
+                select(source)
+                .where(stamp < cutoff)
+                .order_by(stamp, source.c.id)
+                .limit(batch_size)
+            )
+            .mappings()
+            .all()
+        )
+        if not rows:
+            break
+        write_archive(directory, spec, rows)
+        db.execute(delete(source).where(source.c.id.in_([row["id"] for row in rows])))
+        db.commit()
+        archived += len(rows)
+    return archived
+
+
+def expire_table(
+    db: Session,
+    spec: RetainedTable,
+    cutoff: datetime,
+    directory: Path,
+    batch_size: int,
+) -> int:
+    """Archive and remove the rows of ``spec`` older than ``cutoff``."""
+
+    if not is_partitioned(db, spec.name):
+        return _delete_expired(db, spec, spec.name, cutoff, directory, batch_size)
+
+    naive_cutoff = cutoff.astimezone(timezone.utc).replace(tzinfo=None)
+    archived = 0
+    for name, month in monthly_partitions(db, spec.name):
+        if add_months(month, 1) <= naive_cutoff:
+            archived += _archive_partition(db, spec, name, directory, batch_size)
+    archived += _delete_expired(db, spec, f"{spec.name}_default", cutoff, directory, batch_size)
+    return archived
+
+
+def expire(db: Session, table_name: str, cutoff: datetime) -> int:
+    """Archive and remove the rows of ``table_name`` older than ``cutoff``."""
+
+    settings = get_settings()
+    spec = next(spec for spec in RETAINED_TABLES if spec.name == table_name)
+    return expire_table(db, spec, cutoff, Path(settings.archive_dir), settings.retention_batch_size)
+
+
+def run(db: Session, now: datetime | None = None) -> Dict[str, int]:
+    """Apply the retention of every table; return the rows archived per table."""
+
+    settings = get_settings()
+    now = now or utc_now()
+    directory = Path(settings.archive_dir)
+    archived: Dict[str, int] = {}
+    for spec in RETAINED_TABLES:
+        if is_partitioned(db, spec.name):
+            ensure_partitions(db, spec.name, now.astimezone(timezone.utc).replace(tzinfo=None))
+        days = spec.days(settings)
+        if not days:
+            continue
+        archived[spec.name] = expire_table(
+            db,
+            spec,
+            now - timedelta(days=days),
+            directory,
+            settings.retention_batch_size,
+        )
+    if settings.archive_retention_days:
+        purge_archives(directory, now - timedelta(days=settings.archive_retention_days))
+    if any(archived.values()):
+        logger.info("retention_archived", extra={"archived": archived, "archive_dir": str(directory)})
+    return archived
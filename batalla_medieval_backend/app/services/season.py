@@ -1,13 +1,72 @@
-from datetime import datetime
-from typing import List
+"""Seasons and the world rollover that ends them.
+
+Ending a season first marks the world inactive, which freezes it: the API
+refuses new movements, training and building there, and the queue and
+barbarian jobs skip it, so the ranking and the rows being deleted stop
+changing. The rollover then runs in stages recorded on the ``Season`` row,
+each made of short transactions of at most ``SEASON_ROLLOVER_CHUNK_SIZE``
+rows:
+
+1. ``snapshot``: the world's ranking is read in keyset order (points, then
+   user id) and written to ``season_results`` with multi-row inserts. The
+   alliance of each player in that world comes from the same query.
+2. ``reset``: the world's game state is deleted table by table, children
+   before parents, in batches of ids. References kept by other worlds'
+   rows or by the season results are cleared first. Before the cities go,
+   the earlier steps are checked again and repeated from the first one
+   that still matches rows, which catches anything written by requests
+   already under way when the world was frozen.
+
+The row also counts the rows written or deleted so far, so progress can be
+followed while the rollover runs. If the process dies, calling
+``end_current_season`` again resumes from the last committed chunk: the last
+season result gives the ranking cursor and each deletion step is simply
+repeated. Starting the next season reactivates the world. Private messages
+and audit logs are not world data and are kept.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Callable, List
 
 from fastapi import HTTPException
+from sqlalchemy import and_, delete, insert, or_, select, update
 from sqlalchemy.orm import Session
 
 from .. import models
+from ..config import get_settings
 from ..utils import utc_now
 from . import ranking as ranking_service
 
+logger = logging.getLogger(__name__)
+
+SNAPSHOT = "snapshot"
+RESET = "reset"
+DONE = "done"
+
+
+def _set_world_active(db: Session, world_id: str, active: bool) -> None:
+    try:
+        world = int(world_id)
+    except ValueError:
+        return
+    db.query(models.World).filter(models.World.id == world).update(
+        {"is_active": active}, synchronize_session=False
+    )
+
+
+def _rollover_in_progress(db: Session, world_id: str) -> models.Season | None:
+    return (
+        db.query(models.Season)
+        .filter(
+            models.Season.world_id == world_id,
+            models.Season.rollover_stage.in_([SNAPSHOT, RESET]),
+        )
+        .first()
+    )
+
 
 def _deactivate_existing_seasons(db: Session, world_id: str) -> None:
     existing = (
@@ -21,7 +80,10 @@ def _deactivate_existing_seasons(db: Session, world_id: str) -> None:
 
 
 def start_new_season(db: Session, world_id: str, name: str) -> models.Season:
+    if _rollover_in_progress(db, world_id) is not None:
+        raise HTTPException(status_code=409, detail="The previous season is still being closed")
     _deactivate_existing_seasons(db, world_id)
+    _set_world_active(db, world_id, True)
     db.commit()
 
     season_identifier = f"{world_id}-{int(utc_now().timestamp())}"
@@ -50,65 +112,222 @@ def _assign_rewards(rank: int) -> List[str]:
     return ["season_participant"]
 
 
-def _snapshot_rankings(db: Session, season: models.Season) -> List[models.SeasonResult]:
-    ranking = ranking_service.get_player_ranking(db)
-    results: List[models.SeasonResult] = []
-    for index, entry in enumerate(ranking, start=1):
-        alliance_member = (
-            db.query(models.AllianceMember)
-            .filter(models.AllianceMember.user_id == entry["user_id"])
-            .first()
-        )
-        rewards = _assign_rewards(index)
-        season_result = models.SeasonResult(
-            season_id=season.id,
-            user_id=entry["user_id"],
-            alliance_id=alliance_member.alliance_id if alliance_member else None,
-            rank=index,
-            points=int(entry.get("points", 0)),
-        )
-        season_result.set_rewards(rewards)
-        db.add(season_result)
-        results.append(season_result)
-    db.commit()
-    for result in results:
-        db.refresh(result)
-    return results
-
-
-def _reset_world_state(db: Session) -> None:
-    db.query(models.Movement).delete(synchronize_session=False)
-    db.query(models.BuildingQueue).delete(synchronize_session=False)
-    db.query(models.TroopQueue).delete(synchronize_session=False)
-    db.query(models.Troop).delete(synchronize_session=False)
-    db.query(models.Building).delete(synchronize_session=False)
-    db.query(models.Report).delete(synchronize_session=False)
-    db.query(models.SpyReport).delete(synchronize_session=False)
-    db.query(models.Message).delete(synchronize_session=False)
-    db.query(models.Log).delete(synchronize_session=False)
-    db.query(models.AllianceChatMessage).delete(synchronize_session=False)
-    db.query(models.AllianceInvitation).delete(synchronize_session=False)
-    db.query(models.AllianceMember).delete(synchronize_session=False)
-    db.query(models.Alliance).delete(synchronize_session=False)
-    db.query(models.City).delete(synchronize_session=False)
+def _commit_chunk(db: Session, season: models.Season, rows: int, on_progress) -> None:
+    season.rollover_rows += rows
     db.commit()
+    logger.info(
+        "season_rollover_progress",
+        extra={
+            "season_id": season.season_id,
+            "stage": season.rollover_stage,
+            "step": season.rollover_step,
+            "rows": season.rollover_rows,
+        },
+    )
+    if on_progress is not None:
+        on_progress(season)
 
 
-def end_current_season(db: Session, world_id: str) -> List[models.SeasonResult]:
-    season = (
-        db.query(models.Season)
-        .filter(models.Season.world_id == world_id, models.Season.is_active.is_(True))
+def _snapshot_rankings(
+    db: Session, season: models.Season, world_id: int, chunk_size: int, on_progress
+) -> None:
+    ranking_service.ensure_world_scores(db, world_id)
+    membership = (
+        select(
+            models.AllianceMember.user_id,
+            models.Alliance.id.label("alliance_id"),
+            models.Alliance.name.label("alliance_name"),
+        )
+        .join(models.Alliance, models.Alliance.id == models.AllianceMember.alliance_id)
+        .where(models.Alliance.world_id == world_id)
+        .subquery()
+    )
+    score = models.PlayerScore
+    ranking = (
+        select(
+            score.user_id,
+            score.points,
+            membership.c.alliance_id,
+            membership.c.alliance_name,
+        )
+        .outerjoin(membership, membership.c.user_id == score.user_id)
+        .where(score.world_id == world_id)
+        .order_by(score.points.desc(), score.user_id.asc())
+        .limit(chunk_size)
+    )
+
+    # Resume after the last committed chunk, if any.
+    previous = (
+        db.query(models.SeasonResult)
+        .filter(models.SeasonResult.season_id == season.id)
+        .order_by(models.SeasonResult.rank.desc())
         .first()
     )
-    if not season:
-        raise HTTPException(status_code=404, detail="No active season found for this world")
+    rank = previous.rank if previous else 0
+    last = (previous.points, previous.user_id) if previous else None
+    while True:
+        query = ranking
+        if last is not None:
+            points, user_id = last
+            query = query.where(
+                or_(score.points < points, and_(score.points == points, score.user_id > user_id))
+            )
+        rows = db.execute(query).all()
+        if not rows:
+            return
+        results = []
+        for row in rows:
+            rank += 1
+            results.append(
+                {
+                    "season_id": season.id,
+                    "user_id": row.user_id,
+                    "alliance_id": row.alliance_id,
+                    "alliance_name": row.alliance_name,
+                    "rank": rank,
+                    "points": int(row.points or 0),
+                    "rewards": json.dumps(_assign_rewards(rank)),
+                }
+            )
+        db.execute(insert(models.SeasonResult), results)
+        _commit_chunk(db, season, len(results), on_progress)
+        last = (rows[-1].points, rows[-1].user_id)
 
-    season.end_date = utc_now()
-    season.is_active = False
-    results = _snapshot_rankings(db, season)
-    _reset_world_state(db)
-    db.commit()
-    return results
+
+def _reset_steps(world_id: int) -> list:
+    """Return the ordered (table, column to clear or None to delete, condition) steps."""
+
+    cities = select(models.City.id).where(models.City.world_id == world_id)
+    alliances = select(models.Alliance.id).where(models.Alliance.world_id == world_id)
+    threads = select(models.ForumThread.id).where(models.ForumThread.alliance_id.in_(alliances))
+    spy = models.SpyReport
+    return [
+        (models.Movement, None, models.Movement.world_id == world_id),
+        (models.BuildingQueue, None, models.BuildingQueue.city_id.in_(cities)),
+        (models.TroopQueue, None, models.TroopQueue.city_id.in_(cities)),
+        (models.Troop, None, models.Troop.city_id.in_(cities)),
+        (models.Building, None, models.Building.city_id.in_(cities)),
+        (models.Research, None, models.Research.city_id.in_(cities)),
+        (models.Report, None, models.Report.world_id == world_id),
+        (
+            spy,
+            None,
+            or_(
+                spy.city_id.in_(cities),
+                spy.attacker_city_id.in_(cities),
+                spy.defender_city_id.in_(cities),
+            ),
+        ),
+        (models.MarketOffer, None, models.MarketOffer.world_id == world_id),
+        (models.Hero, "city_id", models.Hero.city_id.in_(cities)),
+        (models.Oasis, "owner_city_id", models.Oasis.owner_city_id.in_(cities)),
+        (models.PlayerWorld, "starting_city_id", models.PlayerWorld.starting_city_id.in_(cities)),
+        (models.ChatMessage, None, models.ChatMessage.alliance_id.in_(alliances)),
+        (models.AllianceChatMessage, None, models.AllianceChatMessage.alliance_id.in_(alliances)),
+        (models.AllianceInvitation, None, models.AllianceInvitation.alliance_id.in_(alliances)),
+        (models.ForumPost, None, models.ForumPost.thread_id.in_(threads)),
+        (models.ForumThread, None, models.ForumThread.alliance_id.in_(alliances)),
+        (
+            models.Diplomacy,
+            None,
+            or_(
+                models.Diplomacy.alliance_a_id.in_(alliances),
+                models.Diplomacy.alliance_b_id.in_(alliances),
+            ),
+        ),
+        (models.AllianceMember, None, models.AllianceMember.alliance_id.in_(alliances)),
+        # Results keep the alliance name; the row itself is deleted below.
+        (models.SeasonResult, "alliance_id", models.SeasonResult.alliance_id.in_(alliances)),
+        (models.World, "winner_alliance_id", models.World.winner_alliance_id.in_(alliances)),
+        (models.Alliance, None, models.Alliance.world_id == world_id),
+        (models.City, None, models.City.world_id == world_id),
+        (models.PlayerScore, None, models.PlayerScore.world_id == world_id),
+    ]
+
+
+def _first_step_with_rows(db: Session, steps: list) -> int | None:
+    for index, (model, _, condition) in enumerate(steps):
+        if db.query(select(model.id).where(condition).exists()).scalar():
+            return index
+    return None
+
+
+def _reset_world_state(
+    db: Session, season: models.Season, world_id: int, chunk_size: int, on_progress
+) -> None:
+    steps = _reset_steps(world_id)
+    while season.rollover_step < len(steps):
+        model, column, condition = steps[season.rollover_step]
+        if model is models.City:
+            leftover = _first_step_with_rows(db, steps[: season.rollover_step])
+            if leftover is not None:
+                season.rollover_step = leftover
+                db.commit()
+                continue
+        batch = model.id.in_(select(model.id).where(condition).limit(chunk_size))
+        if column is None:
+            statement = delete(model).where(batch)
+        else:
+            statement = update(model).where(batch).values({column: None})
+        while True:
+            affected = db.execute(statement.execution_options(synchronize_session=False)).rowcount
+            if not affected:
+                break
+            _commit_chunk(db, season, affected, on_progress)
+        season.rollover_step += 1
+        db.commit()
+
+
+def end_current_season(
+    db: Session,
+    world_id: str,
+    *,
+    chunk_size: int | None = None,
+    on_progress: Callable[[models.Season], None] | None = None,
+) -> List[models.SeasonResult]:
+    """Close the active season of ``world_id``, or resume an interrupted rollover.
+
+    ``on_progress`` is called with the season after every committed chunk.
+    """
+
+    try:
+        world = int(world_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid world id") from None
+    chunk_size = chunk_size or get_settings().season_rollover_chunk_size
+
+    season = _rollover_in_progress(db, world_id)
+    if season is None:
+        season = (
+            db.query(models.Season)
+            .filter(models.Season.world_id == world_id, models.Season.is_active.is_(True))
+            .first()
+        )
+        if not season:
+            raise HTTPException(status_code=404, detail="No active season found for this world")
+        season.end_date = utc_now()
+        season.is_active = False
+        season.rollover_stage = SNAPSHOT
+        season.rollover_step = 0
+        season.rollover_rows = 0
+        _set_world_active(db, world_id, False)
+        db.commit()
+
+    if season.rollover_stage == SNAPSHOT:
+        _snapshot_rankings(db, season, world, chunk_size, on_progress)
+        season.rollover_stage = RESET
+        db.commit()
+    if season.rollover_stage == RESET:
+        _reset_world_state(db, season, world, chunk_size, on_progress)
+        season.rollover_stage = DONE
+        db.commit()
+
+    return (
+        db.query(models.SeasonResult)
+        .filter(models.SeasonResult.season_id == season.id)
+        .order_by(models.SeasonResult.rank.asc())
+        .all()
+    )
 
 
 def get_season_info(db: Session) -> dict:
@@ -0,0 +1,76 @@
+"""Partitioning of queue work into shards that worker replicas claim.
+
+A shard is a residue class of a partition key: ``key % count == index``.
+With ``mode="world"`` the key is the world id, so every queue of a world is
+processed by the same replica. With ``mode="city"`` building and troop queues
+use their city id and movements use the city they arrive at (origin city for
+oasis attacks), which spreads a single busy world across replicas.
+
+Queues of inactive worlds (ended, or frozen while a season rollover clears
+them) are left alone by every shard.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Literal
+
+from sqlalchemy import func, select
+
+from .. import models
+
+ShardMode = Literal["world", "city"]
+
+
+@dataclass(frozen=True)
+class QueueShard:
+    index: int
+    count: int
+    mode: ShardMode = "world"
+
+    def __post_init__(self) -> None:
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"Invalid queue shard {self.index}/{self.count}")
+        if self.mode not in ("world", "city"):
+            raise ValueError(f"Unknown queue shard mode: {self.mode}")
+
+    @property
+    def name(self) -> str:
+        return f"queue_processing:{self.index}"
+
+    def city_clause(self, city_column):
+        """Filter rows whose ``city_column`` falls into this shard."""
+
+        if self.mode == "city":
+            return city_column % self.count == self.index
+        return city_column.in_(
+            select(models.City.id).where(models.City.world_id % self.count == self.index)
+        )
+
+    def movement_clause(self):
+        """Filter movements that this shard resolves."""
+
+        if self.mode == "city":
+            key = func.coalesce(models.Movement.target_city_id, models.Movement.origin_city_id)
+            return key % self.count == self.index
+        return models.Movement.world_id % self.count == self.index
+
+
+def active_city_clause(city_column):
+    """Filter rows whose ``city_column`` is a city of an active world."""
+
+    return city_column.in_(
+        select(models.City.id)
+        .join(models.World, models.World.id == models.City.world_id)
+        .where(models.World.is_active.is_(True))
+    )
+
+
+def active_movement_clause():
+    """Filter movements of active worlds."""
+
+    return models.Movement.world_id.in_(select(models.World.id).where(models.World.is_active.is_(True)))
+
+
+def all_shards(count: int, mode: ShardMode = "world") -> List[QueueShard]:
+    return [QueueShard(index=index, count=count, mode=mode) for index in range(count)]
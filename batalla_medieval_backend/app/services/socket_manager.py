@@ -1,5 +1,8 @@
+import asyncio
+import json
 import logging
-from typing import Optional
+import time
+from typing import List, Optional
 
 import jwt
 import socketio
@@ -7,6 +10,7 @@ import socketio
 from .. import models
 from ..config import get_settings
 from ..database import SessionLocal
+from . import message_bus
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -48,6 +52,19 @@ def authenticate_socket_token(token: Optional[str]) -> int:
         db.close()
 
 
+def member_world_ids(user_id: int) -> List[int]:
+    db = SessionLocal()
+    try:
+        return [
+            world_id
+            for (world_id,) in db.query(models.PlayerWorld.world_id).filter(
+                models.PlayerWorld.user_id == user_id
+            )
+        ]
+    finally:
+        db.close()
+
+
 sio = socketio.AsyncServer(
     async_mode="asgi",
     cors_allowed_origins=settings.cors_origins,
@@ -67,6 +84,10 @@ async def connect(sid, environ, auth):
     room = f"user_{user_id}"
     await sio.save_session(sid, {"user_id": user_id})
     await sio.enter_room(sid, room)
+    # World rooms carry broadcasts such as event starts; worlds joined later
+    # are picked up on the next connection.
+    for world_id in member_world_ids(user_id):
+        await sio.enter_room(sid, f"world_{world_id}")
     await sio.emit("joined", {"room": room}, to=sid)
     logger.info("Socket connected: sid=%s user_id=%s room=%s", sid, user_id, room)
     return True
@@ -89,3 +110,136 @@ async def notify_user(user_id: int, event: str, data: dict):
 async def broadcast(event: str, data: dict):
     """Broadcast to all connected users."""
     await sio.emit(event, data)
+
+
+def publish_to_users(user_ids, event: str, data: dict) -> None:
+    """Queue ``event`` for the personal rooms of ``user_ids`` from any process.
+
+    Safe to call from worker threads and processes without an event loop:
+    delivery goes through the message bus to the web process.
+    """
+
+    rooms = [f"user_{user_id}" for user_id in user_ids]
+    if rooms:
+        message_bus.publish(event, data, rooms)
+
+
+def publish_to_worlds(world_ids, event: str, data: dict) -> None:
+    """Queue ``event`` for every connected member of ``world_ids``."""
+
+    rooms = [f"world_{world_id}" for world_id in world_ids]
+    if rooms:
+        message_bus.publish(event, data, rooms)
+
+
+class EventRelay:
+    """Fan bus batches out to Socket.IO rooms with grouped emits.
+
+    Bus handlers may run on any thread; batches are handed to the event loop
+    and drained by one task, which merges identical events for different
+    rooms into a single ``emit`` with a room list.
+    """
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._bus = None
+        self._pending = 0
+        self.reset_metrics()
+
+    def reset_metrics(self) -> None:
+        self.delivered = 0
+        self.emits = 0
+        self._latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+
+    def _put(self, messages: List[dict]) -> None:
+        if self._queue is None:
+            return
+        self._pending += len(messages)
+        self._queue.put_nowait(messages)
+
+    def _enqueue(self, messages: List[dict]) -> None:
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._put, messages)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._bus = message_bus.get_publisher().bus
+        self._bus.subscribe(self._enqueue)
+        self._task = asyncio.create_task(self._consume())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._bus.unsubscribe(self._enqueue)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+        self._loop = None
+
+    async def deliver(self, messages: List[dict]) -> None:
+        grouped: dict[tuple[str, str], dict] = {}
+        for message in messages:
+            key = (message["event"], json.dumps(message["data"], sort_keys=True, default=str))
+            group = grouped.setdefault(
+                key, {"event": message["event"], "data": message["data"], "rooms": set()}
+            )
+            group["rooms"].update(message["rooms"])
+
+        for group in grouped.values():
+            try:
+                await sio.emit(group["event"], group["data"], room=sorted(group["rooms"]))
+                self.emits += 1
+            except Exception:
+                logger.exception("Error relaying %s to %s rooms", group["event"], len(group["rooms"]))
+
+        now = time.time()
+        for message in messages:
+            latency = max(0.0, now - float(message.get("published_at", now)))
+            self._latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            self.latency_last = latency
+        self.delivered += len(messages)
+
+    async def _consume(self) -> None:
+        while True:
+            messages = list(await self._queue.get())
+            while not self._queue.empty():
+                messages.extend(self._queue.get_nowait())
+            self._pending -= len(messages)
+            await self.deliver(messages)
+
+    def metrics(self) -> dict:
+        publisher = message_bus.get_publisher()
+        return {
+            "published": publisher.published,
+            "publish_queue_depth": publisher.depth(),
+            "relay_queue_depth": self._pending,
+            "delivered": self.delivered,
+            "emits": self.emits,
+            "latency_mean_seconds": self._latency_total / self.delivered if self.delivered else 0.0,
+            "latency_max_seconds": self.latency_max,
+            "latency_last_seconds": self.latency_last,
+        }
+
+
+relay = EventRelay()
+
+
+async def start_event_relay() -> None:
+    await relay.start()
+
+
+async def stop_event_relay() -> None:
+    await relay.stop()
@@ -15,7 +15,8 @@ from . import balance
 from . import event as event_service
 from . import premium as premium_service
 from . import production, quest as quest_service, ranking, research as research_service
-from . import unit_catalog
+from . import unit_catalog, world_membership
+from .sharding import QueueShard, active_city_clause
 
 logger = logging.getLogger(__name__)
 REFUND_FACTOR = balance.QUEUE_REFUND_FACTOR
@@ -80,6 +81,11 @@ def queue_training(
     status = premium_service.get_or_create_status(db, city.owner)
     city, production_gains = production.lock_and_recalculate_resources(db, city)
     db.expire(city, ["buildings"])
+    try:
+        world_membership.ensure_world_open(city.world)
+    except ValueError:
+        db.rollback()
+        raise
 
     existing_queue = (
         db.query(models.TroopQueue)
@@ -171,7 +177,6 @@ def _run_training_side_effects(db: Session, info: dict) -> None:
             "train_troops",
             increment=info["amount"],
         )
-        ranking.recalculate_player_and_alliance_scores(db, owner_id, world_id)
     except Exception:
         db.rollback()
         logger.exception(
@@ -184,15 +189,19 @@ def _run_training_side_effects(db: Session, info: dict) -> None:
         )
 
 
-def process_troop_queues(db: Session) -> List[dict]:
+def process_troop_queues(db: Session, shard: QueueShard | None = None) -> List[dict]:
     """Process each completed training queue at most once."""
 
     now = utc_now()
+    query = db.query(models.TroopQueue).filter(
+        models.TroopQueue.finish_time <= now,
+        active_city_clause(models.TroopQueue.city_id),
+    )
+    if shard is not None:
+        query = query.filter(shard.city_clause(models.TroopQueue.city_id))
     finished_queues = (
-        db.query(models.TroopQueue)
-        .filter(models.TroopQueue.finish_time <= now)
-        .options(selectinload(models.TroopQueue.city))
-        .order_by(models.TroopQueue.id.asc())
+        query.options(selectinload(models.TroopQueue.city))
+        .order_by(models.TroopQueue.finish_time.asc(), models.TroopQueue.id.asc())
         .with_for_update(skip_locked=True)
         .all()
     )
@@ -229,6 +238,12 @@ def process_troop_queues(db: Session) -> List[dict]:
             db.flush()
 
         troop.quantity += queue_entry.amount
+        ranking.apply_score_delta(
+            db,
+            city.owner_id,
+            city.world_id,
+            troop_delta=ranking.troop_points({queue_entry.troop_type: queue_entry.amount}),
+        )
         internal_info.append(
             {
                 "city_id": queue_entry.city_id,
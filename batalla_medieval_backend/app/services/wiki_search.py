@@ -0,0 +1,392 @@
+"""Full-text search over the wiki.
+
+Each article keeps its title and its Markdown body as folded plain text
+(``search_title`` and ``search_body``): markup removed, then compatibility
+decomposition, accents dropped and case folded as in services.moderation, so
+``Estadísticas``, ``ESTADISTICAS`` and ``estadisticas`` are one word in
+Spanish, Portuguese and English alike. A query matches the articles holding
+every one of its words, ignoring common short words of the three languages;
+unless the query ends with a space its last word also matches as a prefix,
+so results follow the player while typing. Title words weigh more than body
+words.
+
+On PostgreSQL the folded columns back a GIN full-text index
+(``ix_wiki_articles_search``) and matching and ranking run in the database.
+Elsewhere each process keeps an inverted index of the articles ranked with
+BM25. It is built on the first search and updated in place by the create and
+edit endpoints; after ``WIKI_INDEX_RELOAD_SECONDS`` the article count and
+latest edit are checked again, so changes made by other processes show up.
+
+Results are paged by offset, like the rankings, and carry a short excerpt of
+the body around the first matching word.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from .moderation import fold
+
+TITLE_WEIGHT = 3.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A prefix matches at most this many distinct words.
+PREFIX_EXPANSIONS = 50
+SNIPPET_CHARS = 160
+
+# Keep in sync with alembic revision 0018.
+PG_INDEX = "ix_wiki_articles_search"
+PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', search_title), 'A') || "
+    "setweight(to_tsvector('simple', search_body), 'B')"
+)
+
+STOPWORDS = frozenset(
+    """
+    al als an and are as at be by con da das de del do dos el em en es for from
+    in is la las lo los na nas no nos of on or os para por que se su sus the to
+    um uma un una uno with
+    """.split()
+)
+
+_MARKUP = re.compile(r"[#*`|>\[\]~]+|-{2,}")
+_SPACE = re.compile(r"\s+")
+_WORD = re.compile(r"[^\W_]+")
+
+
+def plain_text(markdown: str) -> str:
+    """``markdown`` without its markup characters, on a single line."""
+
+    return _SPACE.sub(" ", _MARKUP.sub(" ", markdown or "")).strip()
+
+
+def words(folded: str) -> List[str]:
+    """The indexed words of already folded text."""
+
+    return [
+        word
+        for word in _WORD.findall(folded)
+        if (len(word) > 1 or word.isdigit()) and word not in STOPWORDS
+    ]
+
+
+def prepare(article: models.WikiArticle) -> None:
+    """Fill the search columns of ``article`` from its title and body."""
+
+    article.search_title = fold(plain_text(article.title))
+    article.search_body = fold(plain_text(article.content_markdown))
+
+
+@dataclass(frozen=True)
+class Query:
+    words: Tuple[str, ...]
+    prefix: Optional[str] = None
+
+
+def parse(q: str | None) -> Optional[Query]:
+    """The words of a search box; ``None`` when nothing searchable is left."""
+
+    raw = _WORD.findall(fold(q or ""))
+    prefix = None
+    if raw and not q[-1].isspace():
+        prefix = raw.pop()
+    terms = tuple(dict.fromkeys(words(" ".join(raw))))
+    if prefix in STOPWORDS and terms:
+        prefix = None
+    if not terms and not prefix:
+        return None
+    return Query(terms, prefix)
+
+
+class SearchIndex:
+    """An inverted index of folded article words."""
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._lengths: Dict[int, float] = {}
+        self._terms: Dict[int, Tuple[str, ...]] = {}
+        self._total_length = 0.0
+        self._vocabulary: List[str] | None = None
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, article_id: int, search_title: str, search_body: str) -> None:
+        """Index an article, replacing what was indexed for it before."""
+
+        weights: Dict[str, float] = {}
+        for word in words(search_title):
+            weights[word] = weights.get(word, 0.0) + TITLE_WEIGHT
+        for word in words(search_body):
+            weights[word] = weights.get(word, 0.0) + 1.0
+        with self._lock:
+            self._remove(article_id)
+            for word, weight in weights.items():
+                postings = self._postings.get(word)
+                if postings is None:
+                    postings = self._postings[word] = {}
+                    self._vocabulary = None
+                postings[article_id] = weight
+            length = sum(weights.values())
+            self._lengths[article_id] = length
+            self._total_length += length
+            self._terms[article_id] = tuple(weights)
+
+    def remove(self, article_id: int) -> None:
+        with self._lock:
+            self._remove(article_id)
+
+    def _remove(self, article_id: int) -> None:
+        terms = self._terms.pop(article_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(article_id)
+        for word in terms:
+            postings = self._postings[word]
+            del postings[article_id]
+            if not postings:
+                del self._postings[word]
+                self._vocabulary = None
+
+    def _expand(self, prefix: str) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        position = bisect_left(vocabulary, prefix)
+        expansions = []
+        while (
+            position < len(vocabulary)
+            and vocabulary[position].startswith(prefix)
+            and len(expansions) < PREFIX_EXPANSIONS
+        ):
+            expansions.append(vocabulary[position])
+            position += 1
+        return expansions
+
+    def search(self, query: Query) -> List[Tuple[float, int]]:
+        """``(score, article id)`` of every match, best first."""
+
+        with self._lock:
+            groups = [[word] for word in query.words]
+            if query.prefix:
+                groups.append(self._expand(query.prefix))
+            matches = []
+            for terms in groups:
+                frequencies: Dict[int, float] = {}
+                for term in terms:
+                    for article_id, weight in self._postings.get(term, {}).items():
+                        frequencies[article_id] = frequencies.get(article_id, 0.0) + weight
+                if not frequencies:
+                    return []
+                matches.append(frequencies)
+
+            matches.sort(key=len)
+            candidates = set(matches[0]).intersection(*matches[1:])
+            documents = len(self._lengths)
+            average_length = self._total_length / documents
+            scores = dict.fromkeys(candidates, 0.0)
+            for frequencies in matches:
+                found = len(frequencies)
+                idf = math.log(1 + (documents - found + 0.5) / (found + 0.5))
+                for article_id in candidates:
+                    frequency = frequencies[article_id]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[article_id] / average_length)
+                    scores[article_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return sorted(((score, article_id) for article_id, score in scores.items()), key=lambda hit: (-hit[0], hit[1]))
+
+
+def snippet(markdown: str, query: Optional[Query] = None, width: int = SNIPPET_CHARS) -> str:
+    """About ``width`` characters of the body, starting near the first match."""
+
+    body = plain_text(markdown)
+    start = 0
+    if query is not None:
+        for match in _WORD.finditer(body):
+            word = fold(match.group())
+            if word in query.words or (query.prefix and word.startswith(query.prefix)):
+                start = match.start()
+                break
+    begin = max(0, start - width // 4)
+    if begin:
+        space = body.find(" ", begin, start)
+        begin = space + 1 if space >= 0 else start
+    end = begin + width
+    if end >= len(body):
+        end = len(body)
+    else:
+        space = body.rfind(" ", begin, end)
+        end = space if space > start else end
+    return ("…" if begin else "") + body[begin:end].strip() + ("…" if end < len(body) else "")
+
+
+# -- process index ---------------------------------------------------------
+
+
+_index: SearchIndex | None = None
+_signature: tuple | None = None
+_expires_at = 0.0
+_lock = Lock()
+_stats = {"searches": 0, "checks": 0, "builds": 0, "updates": 0}
+
+
+def _signature_of(db: Session) -> tuple:
+    article = models.WikiArticle
+    return tuple(db.query(func.count(article.id), func.max(article.id), func.max(article.updated_at)).one())
+
+
+def _build(db: Session) -> SearchIndex:
+    index = SearchIndex()
+    article = models.WikiArticle
+    for article_id, search_title, search_body in db.query(article.id, article.search_title, article.search_body):
+        index.add(article_id, search_title, search_body)
+    return index
+
+
+def get_index(db: Session) -> SearchIndex:
+    """This process's index, rebuilt when the articles changed elsewhere."""
+
+    global _index, _signature, _expires_at
+
+    now = time.monotonic()
+    with _lock:
+        index, signature, expires_at = _index, _signature, _expires_at
+    if index is not None and expires_at > now:
+        return index
+
+    _stats["checks"] += 1
+    current = _signature_of(db)
+    if index is None or current != signature:
+        index = _build(db)
+        _stats["builds"] += 1
+    with _lock:
+        _index, _signature = index, current
+        _expires_at = now + get_settings().wiki_index_reload_seconds
+    return index
+
+
+def article_saved(db: Session, article: models.WikiArticle) -> None:
+    """Apply a committed create or edit to this process's index."""
+
+    global _signature
+
+    with _lock:
+        index = _index
+    if index is None:
+        return
+    index.add(article.id, article.search_title, article.search_body)
+    _stats["updates"] += 1
+    signature = _signature_of(db)
+    with _lock:
+        if _index is index:
+            _signature = signature
+
+
+def get_stats() -> Dict[str, int]:
+    with _lock:
+        return {**_stats, "articles": len(_index) if _index is not None else 0}
+
+
+def reset() -> None:
+    global _index, _signature, _expires_at
+
+    with _lock:
+        _index, _signature, _expires_at = None, None, 0.0
+
+
+# -- search ----------------------------------------------------------------
+
+
+def _tsquery(query: Query) -> str:
+    # Words only hold letters and digits, so they need no escaping.
+    terms = [f"'{word}'" for word in query.words]
+    if query.prefix:
+        terms.append(f"'{query.prefix}':*")
+    return " & ".join(terms)
+
+
+def _rank_postgres(db: Session, query: Query, limit: int, offset: int) -> Tuple[List[Tuple[float, int]], int]:
+    rows = db.execute(
+        text(
+            f"SELECT id, ts_rank({PG_DOCUMENT}, q) AS rank, count(*) OVER () AS total "
+            f"FROM wiki_articles, to_tsquery('simple', :query) AS q "
+            f"WHERE {PG_DOCUMENT} @@ q "
+            "ORDER BY rank DESC, id LIMIT :limit OFFSET :offset"
+        ),
+        {"query": _tsquery(query), "limit": limit, "offset": offset},
+    ).all()
+    if not rows and offset:
+        total = db.execute(
+            text(f"SELECT count(*) FROM wiki_articles WHERE {PG_DOCUMENT} @@ to_tsquery('simple', :query)"),
+            {"query": _tsquery(query)},
+        ).scalar_one()
+        return [], total
+    return [(float(row.rank), row.id) for row in rows], rows[0].total if rows else 0
+
+
+def _result(article: models.WikiArticle, query: Optional[Query], score: Optional[float]) -> dict:
+    return {
+        "id": article.id,
+        "title": article.title,
+        "category": article.category,
+        "updated_at": article.updated_at,
+        "snippet": snippet(article.content_markdown, query),
+        "score": score,
+    }
+
+
+def search(db: Session, q: str | None = None, *, limit: int = 20, offset: int = 0) -> dict:
+    """One page of articles matching ``q``, best first.
+
+    Without ``q`` every article is listed, newest first; a ``q`` made only of
+    ignored words matches nothing.
+    """
+
+    _stats["searches"] += 1
+    query = parse(q)
+    article = models.WikiArticle
+    if query is None and q and q.strip():
+        return {"results": [], "total": 0, "next_offset": None}
+    if query is None:
+        total = db.query(func.count(article.id)).scalar()
+        articles = (
+            db.query(article)
+            .order_by(article.updated_at.desc(), article.id.desc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+        results = [_result(item, None, None) for item in articles]
+    else:
+        if db.get_bind().dialect.name == "postgresql":
+            hits, total = _rank_postgres(db, query, limit, offset)
+        else:
+            ranked = get_index(db).search(query)
+            hits, total = ranked[offset:offset + limit], len(ranked)
+        by_id = {
+            item.id: item
+            for item in db.query(article).filter(article.id.in_([article_id for _, article_id in hits]))
+        }
+        results = [
+            _result(by_id[article_id], query, round(score, 4))
+            for score, article_id in hits
+            if article_id in by_id
+        ]
+
+    next_offset = offset + limit
+    return {
+        "results": results,
+        "total": total,
+        "next_offset": next_offset if next_offset < total else None,
+    }
@@ -1,4 +1,5 @@
 import random
+from functools import lru_cache
 
 from sqlalchemy.orm import Session
 
@@ -87,8 +88,14 @@ def create_world(db: Session, name: str, speed: float = 1.0) -> models.World:
     return world
 
 
-def get_tile_type(x: int, y: int) -> str:
-    """Return a deterministic tile type without mutating global RNG state."""
+# Tile codes stored in ``TerrainGrid``. The order is part of the grid format.
+TILE_TYPES: tuple[str, ...] = ("grass", "forest", "mountain", "water")
+_TILE_CODES = {tile_type: code for code, tile_type in enumerate(TILE_TYPES)}
+DEFAULT_MAP_SIZE = 100
+
+
+def _compute_tile_type(x: int, y: int) -> str:
+    """Reference terrain function. Every cached grid is derived from it."""
 
     rng = random.Random(f"{x},{y}")
     value = rng.random()
@@ -101,6 +108,80 @@ def get_tile_type(x: int, y: int) -> str:
     return "grass"
 
 
+class TerrainGrid:
+    """Materialized terrain for the square ``[0, size)`` x ``[0, size)``.
+
+    Cells are one byte each, stored column-major by ``x`` so the tiles of one
+    ``x`` and a contiguous ``y`` range are a single slice. Coordinates outside
+    the grid fall back to the reference function, so lookups always agree
+    with ``_compute_tile_type``.
+    """
+
+    __slots__ = ("size", "_cells")
+
+    def __init__(self, size: int, cells: bytes):
+        if len(cells) != size * size:
+            raise ValueError("Terrain grid data does not match its size")
+        self.size = size
+        self._cells = cells
+
+    @classmethod
+    def build(cls, size: int) -> "TerrainGrid":
+        if size < 0:
+            raise ValueError("Terrain grid size cannot be negative")
+        cells = bytearray(size * size)
+        for x in range(size):
+            base = x * size
+            for y in range(size):
+                cells[base + y] = _TILE_CODES[_compute_tile_type(x, y)]
+        return cls(size, bytes(cells))
+
+    def tile_type(self, x: int, y: int) -> str:
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return TILE_TYPES[self._cells[x * self.size + y]]
+        return _compute_tile_type(x, y)
+
+    def column(self, x: int, min_y: int, max_y: int) -> list[str]:
+        """Return tile types for ``x`` and every ``y`` in ``[min_y, max_y]``."""
+
+        if not 0 <= x < self.size:
+            return [_compute_tile_type(x, y) for y in range(min_y, max_y + 1)]
+        low = max(min_y, 0)
+        high = min(max_y, self.size - 1)
+        tiles = [_compute_tile_type(x, y) for y in range(min_y, min(low, max_y + 1))]
+        if low <= high:
+            base = x * self.size
+            tiles.extend(TILE_TYPES[code] for code in self._cells[base + low : base + high + 1])
+        tiles.extend(
+            _compute_tile_type(x, y) for y in range(max(high + 1, min_y), max_y + 1)
+        )
+        return tiles
+
+    def rectangle(
+        self, min_x: int, max_x: int, min_y: int, max_y: int
+    ) -> dict[tuple[int, int], str]:
+        """Return ``{(x, y): tile_type}`` for an inclusive rectangle."""
+
+        tiles: dict[tuple[int, int], str] = {}
+        for x in range(min_x, max_x + 1):
+            for y, tile_type in zip(range(min_y, max_y + 1), self.column(x, min_y, max_y)):
+                tiles[(x, y)] = tile_type
+        return tiles
+
+
+@lru_cache(maxsize=8)
+def get_terrain_grid(map_size: int = DEFAULT_MAP_SIZE) -> TerrainGrid:
+    """Return the per-process terrain grid for a map size, building it once."""
+
+    return TerrainGrid.build(max(int(map_size), 0))
+
+
+def get_tile_type(x: int, y: int) -> str:
+    """Return a deterministic tile type without mutating global RNG state."""
+
+    return get_terrain_grid().tile_type(x, y)
+
+
 def _coordinate_is_free(db: Session, world_id: int, x: int, y: int) -> bool:
     city_exists = (
         db.query(models.City.id)
@@ -135,13 +216,14 @@ def find_spawn_location(db: Session, world_id: int, map_size: int) -> tuple[int,
         raise ValueError("World map size must be positive")
 
     rng = random.SystemRandom()
+    terrain = get_terrain_grid(map_size)
 
     # Try random locations first for performance.
     for _ in range(50):
         x = rng.randrange(map_size)
         y = rng.randrange(map_size)
 
-        if _coordinate_is_free(db, world_id, x, y) and get_tile_type(x, y) != "water":
+        if terrain.tile_type(x, y) != "water" and _coordinate_is_free(db, world_id, x, y):
             return x, y
 
     # Fall back to a deterministic expanding search around the map center.
@@ -156,7 +238,7 @@ def find_spawn_location(db: Session, world_id: int, map_size: int) -> tuple[int,
                 if not (0 <= x < map_size and 0 <= y < map_size):
                     continue
 
-                if _coordinate_is_free(db, world_id, x, y) and get_tile_type(x, y) != "water":
+                if terrain.tile_type(x, y) != "water" and _coordinate_is_free(db, world_id, x, y):
                     return x, y
 
     raise ValueError("No valid spawn location found")
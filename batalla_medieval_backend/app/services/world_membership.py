@@ -7,7 +7,7 @@ starting city and active-world pointer either all exist together or none do.
 from sqlalchemy.orm import Session
 
 from .. import models
-from . import world_gen
+from . import ranking, world_gen
 
 
 class WorldNotAvailableError(ValueError):
@@ -53,6 +53,13 @@ def require_world_membership(
     return membership
 
 
+def ensure_world_open(world: models.World | None) -> None:
+    """Refuse new game state in an ended world or one being rolled over."""
+
+    if world is not None and not world.is_active:
+        raise WorldNotAvailableError("World is no longer active")
+
+
 def _get_locked_active_world(db: Session, world_id: int) -> models.World:
     world = (
         db.query(models.World)
@@ -189,6 +196,7 @@ def join_world(
                     world=world,
                 )
             membership.starting_city_id = starting_city.id
+            ranking.refresh_player_score(db, locked_user.id, world.id)
 
         locked_user.world_id = world.id
         db.add(locked_user)
@@ -167,7 +167,19 @@ export const api = {
     return axiosClient.post('/movement/', finalPayload);
   },
   getMovements: ({ worldId }) => axiosClient.get('/movement/', { params: { world_id: worldId } }),
-  getReports: ({ worldId }) => axiosClient.get('/report/', { params: { world_id: worldId } }),
+  getReports: ({ worldId, cursor }) =>
+    axiosClient.get('/report/', { params: { world_id: worldId, ...(cursor ? { cursor } : {}) } }),
+  getReport: (reportId) => axiosClient.get(`/report/${reportId}`),
+  getUnreadReports: ({ worldId }) => axiosClient.get('/report/unread', { params: { world_id: worldId } }),
+  markReportsRead: ({ worldId, cursor }) =>
+    axiosClient.post('/report/read', null, { params: { world_id: worldId, cursor } }),
+  searchWiki: ({ q, offset } = {}) =>
+    axiosClient.get('/wiki/search', { params: { ...(q ? { q } : {}), ...(offset ? { offset } : {}) } }),
+  getWikiArticle: (articleId) => axiosClient.get(`/wiki/article/${articleId}`),
+  getNotifications: ({ limit } = {}) =>
+    axiosClient.get('/notification/list', { params: limit ? { limit } : {} }),
+  markNotificationRead: (notificationId) => axiosClient.patch(`/notification/read/${notificationId}`),
+  markNotificationsReadByType: (type) => axiosClient.patch('/notification/read', null, { params: { type } }),
   getAlliance: (worldId) => axiosClient.get('/alliance', {
     params: worldId ? { world_id: worldId } : {},
   }),
@@ -2,6 +2,27 @@ import { useEffect } from 'react';
 import { useSocket } from '../context/SocketContext';
 import toast, { Toaster } from 'react-hot-toast';
 import soundManager from '../services/sound';
+import { api } from '../api/axiosClient';
+
+// World broadcasts carry no per-player id, so they are acknowledged by type.
+const markRead = (data) => {
+    const request = data.id
+        ? api.markNotificationRead(data.id)
+        : api.markNotificationsReadByType(data.type);
+    request.catch(err => console.error(err));
+};
+
+// Clicking a toast dismisses it and marks the notification as read.
+const content = (data, text) => (t) => (
+    <span
+        onClick={() => {
+            markRead(data);
+            toast.dismiss(t.id);
+        }}
+    >
+        {text}
+    </span>
+);
 
 const NotificationListener = () => {
     const socket = useSocket();
@@ -15,7 +36,7 @@ const NotificationListener = () => {
             // Play sound
             if (data.type === 'attack_incoming') {
                 soundManager.playSFX('attack_incoming');
-                toast.error(`¡ATAQUE ENTRANTE! ${data.body}`, {
+                toast.error(content(data, `¡ATAQUE ENTRANTE! ${data.body}`), {
                     duration: 10000,
                     position: 'top-center',
                     style: {
@@ -26,7 +47,7 @@ const NotificationListener = () => {
                 });
             } else if (data.type === 'building_complete') {
                 soundManager.playSFX('building_complete');
-                toast.success(data.title, {
+                toast.success(content(data, data.title), {
                     style: {
                         background: '#22c55e',
                         color: '#fff',
@@ -34,7 +55,7 @@ const NotificationListener = () => {
                 });
             } else if (data.type === 'troop_trained') {
                 soundManager.playSFX('troop_trained');
-                toast.success(data.title, {
+                toast.success(content(data, data.title), {
                     style: {
                         background: '#3b82f6',
                         color: '#fff',
@@ -42,7 +63,7 @@ const NotificationListener = () => {
                 });
             } else {
                 soundManager.playSFX('message_received');
-                toast(data.title);
+                toast(content(data, data.title));
             }
         };
 
@@ -1,4 +1,5 @@
-import { useMemo, useState } from 'react';
+import { useEffect, useMemo, useState } from 'react';
+import { api } from '../api/axiosClient';
 import { formatDate, formatNumber } from '../utils/format';
 import { TROOP_TYPES } from '../utils/gameMath';
 
@@ -105,19 +106,29 @@ const CrackedWallIcon = () => (
 
 const ReportCard = ({ report }) => {
   const [expanded, setExpanded] = useState(false);
+  // The feed only carries the summary; the full content is fetched on first open.
+  const [content, setContent] = useState(null);
+
+  useEffect(() => {
+    if (!expanded || content !== null) return;
+    api.getReport(report.id)
+      .then(({ data }) => setContent(data.content))
+      .catch(() => setExpanded(false));
+  }, [expanded, content, report.id]);
 
   const parsedContent = useMemo(() => {
+    if (content === null) return null;
     try {
-      return JSON.parse(report.content);
+      return JSON.parse(content);
     } catch (e) {
       return null; // Legacy HTML content
     }
-  }, [report.content]);
+  }, [content]);
 
   const isBattle = report.report_type === 'battle';
   const isSpy = report.report_type === 'spy';
 
-  if (!parsedContent) {
+  if (content !== null && !parsedContent) {
     // Legacy HTML rendering
     return (
       <div className="card bg-black/40 border border-amber-900/30 p-4">
@@ -127,18 +138,17 @@ const ReportCard = ({ report }) => {
         </div>
         <div 
           className="prose prose-invert prose-sm max-w-none"
-          dangerouslySetInnerHTML={{ __html: report.content }} 
+          dangerouslySetInnerHTML={{ __html: content }} 
         />
       </div>
     );
   }
 
-  // New JSON rendering
+  const { attacker_name: attackerName, defender_name: defenderName, outcome, loot_total: lootTotal } = report;
   const { 
     attacker, defender, loot, wall_damage, loyalty_change, conquest, moral, luck, success, 
     resources, troops, buildings,
-    sender, receiver, from // New fields
-  } = parsedContent;
+  } = parsedContent || {};
 
   const isTrade = report.report_type === 'trade';
   const isReturn = report.report_type === 'return';
@@ -160,8 +170,8 @@ const ReportCard = ({ report }) => {
         <div className="flex-1">
           <div className="flex justify-between items-center">
             <h3 className="font-bold text-amber-100 text-lg">
-              {isBattle && `Batalla en ${defender.name}`}
-              {isSpy && `Espionaje en ${defender.name}`}
+              {isBattle && `Batalla en ${defenderName}`}
+              {isSpy && `Espionaje en ${defenderName}`}
               {isTrade && `Comercio`}
               {isReturn && `Tropas regresaron`}
               {isReinforce && `Refuerzos`}
@@ -170,40 +180,43 @@ const ReportCard = ({ report }) => {
           </div>
           
           <div className="flex items-center gap-2 text-sm mt-1">
-            {isBattle && (
-              <>
-                <span className="text-red-400 font-semibold">{attacker.name}</span>
-                <span className="text-gray-500">vs</span>
-                <span className="text-blue-400 font-semibold">{defender.name}</span>
-              </>
-            )}
-            {isSpy && (
+            {(isBattle || isSpy) && (
               <>
-                <span className="text-red-400 font-semibold">{attacker.name}</span>
+                <span className="text-red-400 font-semibold">{attackerName}</span>
                 <span className="text-gray-500">vs</span>
-                <span className="text-blue-400 font-semibold">{defender.name}</span>
+                <span className="text-blue-400 font-semibold">{defenderName}</span>
               </>
             )}
             {isTrade && (
               <>
-                <span className="text-green-400 font-semibold">{sender?.name}</span>
+                <span className="text-green-400 font-semibold">{attackerName}</span>
                 <span className="text-gray-500">→</span>
-                <span className="text-green-400 font-semibold">{receiver?.name}</span>
+                <span className="text-green-400 font-semibold">{defenderName}</span>
               </>
             )}
             {isReturn && (
               <>
                 <span className="text-gray-400">Desde:</span>
-                <span className="text-blue-400 font-semibold">{from?.name}</span>
+                <span className="text-blue-400 font-semibold">{attackerName}</span>
               </>
             )}
             {isReinforce && (
               <>
-                <span className="text-purple-400 font-semibold">{sender?.name}</span>
+                <span className="text-purple-400 font-semibold">{attackerName}</span>
                 <span className="text-gray-500">→</span>
-                <span className="text-purple-400 font-semibold">{receiver?.name}</span>
+                <span className="text-purple-400 font-semibold">{defenderName}</span>
               </>
             )}
+            {outcome && (
+              <span className={`ml-auto font-semibold ${outcome === 'victory' ? 'text-green-400' : 'text-red-400'}`}>
+                {outcome === 'victory' ? 'Victoria' : 'Derrota'}
+              </span>
+            )}
+            {lootTotal > 0 && (
+              <span className={`${outcome ? '' : 'ml-auto '}flex items-center gap-1 text-amber-200`}>
+                <span className="text-gray-400">Recursos:</span> {formatNumber(lootTotal)}
+              </span>
+            )}
           </div>
         </div>
 
@@ -215,7 +228,12 @@ const ReportCard = ({ report }) => {
       </div>
 
       {/* Expanded Details */}
-      {expanded && (
+      {expanded && !parsedContent && (
+        <div className="p-4 border-t border-gray-800 bg-black/20">
+          <div className="skeleton h-24 w-full" />
+        </div>
+      )}
+      {expanded && parsedContent && (
         <div className="p-4 border-t border-gray-800 bg-black/20 space-y-6">
           
           {/* Trade Details */}
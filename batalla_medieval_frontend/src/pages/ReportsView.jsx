@@ -3,7 +3,7 @@ import ReportCard from '../components/ReportCard';
 import { useCityStore } from '../store/cityStore';
 
 const ReportsView = () => {
-  const { reports, loadReports } = useCityStore();
+  const { reports, reportsCursor, loadReports, loadMoreReports } = useCityStore();
 
   useEffect(() => {
     loadReports().catch(() => {});
@@ -22,6 +22,13 @@ const ReportsView = () => {
           <ReportCard key={r.id} report={r} />
         ))}
       </div>
+      {reportsCursor && (
+        <div className="flex justify-center">
+          <button type="button" className="btn" onClick={() => loadMoreReports().catch(() => {})}>
+            Cargar más
+          </button>
+        </div>
+      )}
     </div>
   );
 };
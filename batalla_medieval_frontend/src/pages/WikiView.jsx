@@ -1,35 +1,54 @@
 import { useEffect, useState } from 'react';
-import axiosClient from '../api/axiosClient';
+import { api } from '../api/axiosClient';
 import ReactMarkdown from 'react-markdown';
 
 const WikiView = () => {
+  const [query, setQuery] = useState('');
   const [articles, setArticles] = useState([]);
+  const [nextOffset, setNextOffset] = useState(null);
   const [selectedArticle, setSelectedArticle] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    fetchArticles();
-  }, []);
+    const timer = setTimeout(() => fetchArticles(query), 250);
+    return () => clearTimeout(timer);
+  }, [query]);
 
-  const fetchArticles = () => {
-    setLoading(true);
-    axiosClient.get('/wiki/search')
+  const fetchArticles = (q, offset = 0) => {
+    setLoading(offset === 0);
+    api.searchWiki({ q, offset })
       .then(res => {
-        setArticles(res.data);
-        if (res.data.length > 0) {
-          setSelectedArticle(res.data[0]);
+        const { results, next_offset } = res.data;
+        setArticles(prev => (offset ? [...prev, ...results] : results));
+        setNextOffset(next_offset);
+        if (!offset && results.length > 0 && !selectedArticle) {
+          selectArticle(results[0]);
         }
       })
       .catch(err => console.error(err))
       .finally(() => setLoading(false));
   };
 
+  const selectArticle = (article) => {
+    setSelectedArticle(article);
+    api.getWikiArticle(article.id)
+      .then(res => setSelectedArticle(current => (current?.id === article.id ? res.data : current)))
+      .catch(err => console.error(err));
+  };
+
   return (
     <div className="h-[calc(100vh-8rem)] flex flex-col md:flex-row gap-6">
       {/* Sidebar List */}
       <div className="w-full md:w-1/3 lg:w-1/4 bg-black/20 rounded-xl border border-amber-900/30 overflow-hidden flex flex-col">
         <div className="p-4 border-b border-amber-900/30 bg-amber-900/10">
           <h2 className="text-xl font-bold text-amber-100">Enciclopedia</h2>
+          <input
+            type="search"
+            value={query}
+            onChange={e => setQuery(e.target.value)}
+            placeholder="Buscar..."
+            className="input input-sm input-bordered w-full mt-3"
+          />
         </div>
         <div className="flex-1 overflow-y-auto p-2 space-y-1">
           {loading ? (
@@ -38,7 +57,7 @@ const WikiView = () => {
             articles.map(article => (
               <button
                 key={article.id}
-                onClick={() => setSelectedArticle(article)}
+                onClick={() => selectArticle(article)}
                 className={`w-full text-left px-4 py-3 rounded-lg transition-colors ${
                   selectedArticle?.id === article.id 
                     ? 'bg-amber-700/30 text-amber-100 border border-amber-600/30' 
@@ -47,9 +66,15 @@ const WikiView = () => {
               >
                 <div className="font-medium">{article.title}</div>
                 <div className="text-xs opacity-60 truncate">{article.category}</div>
+                {query && <div className="text-xs opacity-60 line-clamp-2">{article.snippet}</div>}
               </button>
             ))
           )}
+          {!loading && nextOffset && (
+            <button type="button" className="btn btn-sm w-full" onClick={() => fetchArticles(query, nextOffset)}>
+              Cargar más
+            </button>
+          )}
         </div>
       </div>
 
@@ -72,7 +97,7 @@ const WikiView = () => {
                     td: ({node, ...props}) => <td className="p-3 border-b border-gray-800" {...props} />,
                   }}
                 >
-                  {selectedArticle.content_markdown}
+                  {selectedArticle.content_markdown ?? selectedArticle.snippet}
                 </ReactMarkdown>
               </div>
             </div>
@@ -27,6 +27,7 @@ export const useCityStore = create((set, get) => ({
   queues: { buildings: [], troops: [] },
   movements: [],
   reports: [],
+  reportsCursor: null,
   alliance: null,
   messages: [],
   async loadCity() {
@@ -137,7 +138,19 @@ export const useCityStore = create((set, get) => ({
     const city = get().currentCity;
     if (!city || !city.world_id) return { reports: [] };
     const { data } = await api.getReports({ worldId: city.world_id });
-    set({ reports: data.reports });
+    set({ reports: data.reports, reportsCursor: data.next_cursor });
+    const { data: unread } = await api.getUnreadReports({ worldId: city.world_id });
+    if (unread.unread > 0 && unread.latest_cursor) {
+      await api.markReportsRead({ worldId: city.world_id, cursor: unread.latest_cursor });
+    }
+    return data;
+  },
+  async loadMoreReports() {
+    const city = get().currentCity;
+    const cursor = get().reportsCursor;
+    if (!city || !city.world_id || !cursor) return { reports: [] };
+    const { data } = await api.getReports({ worldId: city.world_id, cursor });
+    set({ reports: [...get().reports, ...data.reports], reportsCursor: data.next_cursor });
     return data;
   },
   async loadAlliance() {
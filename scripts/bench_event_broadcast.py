@@ -0,0 +1,98 @@
+"""Measure how long announcing a world event to all its players takes.
+
+Seeds ``--players`` members of one world (``--email-share`` of them with email
+notifications) plus ``--outsiders`` players of another world in a throwaway
+SQLite database, then times ``notify_event_started`` and its commit: the
+multi-row inserts of notifications and queued emails and the single
+broadcast to the world room. Email delivery is left to the outbox dispatcher
+and not timed. Run from the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_event_broadcast.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import select
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench_event_broadcast_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from app import models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.services import emailer, message_bus, notification  # noqa: E402
+
+
+def _seed(players: int, outsiders: int, email_share: float) -> int:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        world_ids = [
+            connection.execute(
+                models.World.__table__.insert().values(
+                    name=name, speed_modifier=1.0, resource_modifier=1.0
+                )
+            ).inserted_primary_key[0]
+            for name in ("Bench", "Other")
+        ]
+        total = players + outsiders
+        connection.execute(
+            models.User.__table__.insert(),
+            [
+                {
+                    "username": f"bench{index}",
+                    "email": f"bench{index}@example.com",
+                    "hashed_password": "placeholder",
+                    "email_notifications": index % 100 < email_share * 100,
+                    "auth_version": 0,
+                    "language": "es",
+                }
+                for index in range(total)
+            ],
+        )
+        user_ids = connection.execute(select(models.User.id).order_by(models.User.id)).scalars().all()
+        connection.execute(
+            models.PlayerWorld.__table__.insert(),
+            [
+                {"user_id": user_id, "world_id": world_ids[index >= players]}
+                for index, user_id in enumerate(user_ids)
+            ],
+        )
+    return world_ids[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=50_000)
+    parser.add_argument("--outsiders", type=int, default=10_000)
+    parser.add_argument("--email-share", type=float, default=0.2)
+    args = parser.parse_args()
+
+    emailer.settings.smtp_host = "127.0.0.1"
+    emailer.settings.from_email = "juego@example.com"
+    world_id = _seed(args.players, args.outsiders, args.email_share)
+
+    publisher = message_bus.get_publisher()
+    published = publisher.published
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        written = notification.notify_event_started(db, world_id, "Bench")
+        db.commit()
+        elapsed = time.perf_counter() - started
+        queued = db.query(models.NotificationOutbox).count()
+    finally:
+        db.close()
+
+    print(
+        f"{written:,} notifications and {queued:,} queued emails in {elapsed:.2f}s "
+        f"({written / elapsed:,.0f}/s), {publisher.published - published} socket broadcast"
+    )
+
+
+if __name__ == "__main__":
+    main()
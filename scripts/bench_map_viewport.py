@@ -0,0 +1,147 @@
+"""Measure map viewport requests per second with and without the chunk cache.
+
+Builds a throwaway SQLite world of ``--map-size`` squared tiles with
+``--cities`` cities (each with buildings and troops), ``--oases`` oases and
+players spread over ``--alliances`` alliances, then serves ``--requests``
+random viewports of ``--radius`` through the ``/map/tiles`` and
+``/public-api/map`` handlers. The cold run disables the cache
+(``map_chunk_ttl_seconds = 0``); the cached run is timed after one warm-up
+pass over the same viewports. Run from the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_map_viewport.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench_map_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from app import models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.routers import map as map_router  # noqa: E402
+from app.routers import public_api  # noqa: E402
+from app.services import map_chunks, world_gen  # noqa: E402
+
+
+def _seed(map_size: int, cities: int, oases: int, alliances: int) -> int:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    db = SessionLocal()
+    try:
+        world = models.World(
+            name="Bench", speed_modifier=1.0, resource_modifier=1.0, map_size=map_size
+        )
+        db.add(world)
+        db.flush()
+        positions = rng.sample(range(map_size * map_size), cities + oases)
+        alliance_ids = []
+        for index in range(cities):
+            owner = models.User(
+                username=f"bench{index}",
+                email=f"bench{index}@example.com",
+                hashed_password="placeholder",
+            )
+            db.add(owner)
+            db.flush()
+            if len(alliance_ids) < alliances:
+                alliance = models.Alliance(
+                    name=f"Alliance {index}", leader_id=owner.id, world_id=world.id
+                )
+                db.add(alliance)
+                db.flush()
+                alliance_ids.append(alliance.id)
+            db.add(models.AllianceMember(alliance_id=rng.choice(alliance_ids), user_id=owner.id))
+            x, y = divmod(positions[index], map_size)
+            city = models.City(
+                name=f"City {index}", owner_id=owner.id, world_id=world.id, x=x, y=y
+            )
+            db.add(city)
+            db.flush()
+            for name in ("warehouse", "barracks", "wall", "market"):
+                db.add(models.Building(city_id=city.id, name=name, level=rng.randint(1, 10)))
+            for unit in ("basic_infantry", "archer", "heavy_infantry"):
+                db.add(models.Troop(city_id=city.id, unit_type=unit, quantity=rng.randint(0, 200)))
+        for position in positions[cities:]:
+            x, y = divmod(position, map_size)
+            db.add(
+                models.Oasis(
+                    world_id=world.id, x=x, y=y, resource_type="wood", bonus_percent=25
+                )
+            )
+        db.commit()
+        return world.id
+    finally:
+        db.close()
+
+
+def _serve(world_id: int, map_size: int, radius: int, centers, endpoint: str) -> float:
+    render = map_router._tile_renderer(world_gen.get_terrain_grid(map_size))
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for x, y in centers:
+            if endpoint == "tiles":
+                map_chunks.viewport(
+                    db,
+                    world_id,
+                    x - radius,
+                    x + radius,
+                    y - radius,
+                    y + radius,
+                    kind=f"tiles:{map_size}",
+                    render=render,
+                )
+            else:
+                public_api.get_map_viewport(world_id, x, y, radius=radius, db=db)
+            db.rollback()
+        return time.perf_counter() - started
+    finally:
+        db.close()
+
+
+def _run(
+    label: str, world_id: int, map_size: int, radius: int, requests: int, warm: bool
+) -> None:
+    rng = random.Random(11)
+    centers = [
+        (rng.randrange(map_size), rng.randrange(map_size)) for _ in range(requests)
+    ]
+    map_chunks.invalidate_all()
+    for endpoint in ("tiles", "public"):
+        if warm:
+            _serve(world_id, map_size, radius, centers, endpoint)
+        elapsed = _serve(world_id, map_size, radius, centers, endpoint)
+        print(f"{label:>6} {endpoint:>6}: {requests / elapsed:,.0f} viewports/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map-size", type=int, default=200)
+    parser.add_argument("--cities", type=int, default=2000)
+    parser.add_argument("--oases", type=int, default=500)
+    parser.add_argument("--alliances", type=int, default=100)
+    parser.add_argument("--radius", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    world_id = _seed(args.map_size, args.cities, args.oases, args.alliances)
+    print(
+        f"{args.map_size}x{args.map_size} world, {args.cities} cities, "
+        f"{args.oases} oases, radius {args.radius}"
+    )
+    ttl = map_chunks.settings.map_chunk_ttl_seconds
+    map_chunks.settings.map_chunk_ttl_seconds = 0
+    _run("cold", world_id, args.map_size, args.radius, args.requests, warm=False)
+    map_chunks.settings.map_chunk_ttl_seconds = ttl
+    _run("cached", world_id, args.map_size, args.radius, args.requests, warm=True)
+
+
+if __name__ == "__main__":
+    main()
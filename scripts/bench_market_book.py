@@ -0,0 +1,206 @@
+"""Measure market browsing with ``--offers`` open offers in one world.
+
+Seeds a throwaway SQLite world with ``--sellers`` players in alliances of 20
+and ``--offers`` random offers (a tenth of them alliance-only), then times
+one page of ``--page-size`` offers at increasing depths:
+
+* ``offset``: the previous ``get_offers`` query (joins through the seller's
+  alliance memberships, ``OFFSET`` paging, no ordering);
+* ``keyset``: ``get_order_book`` on the database, following cursors;
+* ``memory``: ``get_order_book`` with the in-memory book, after loading it.
+
+Each row also runs a filtered query (wood for iron up to ratio 1). Run from
+the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_market_book.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench_market_book_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from sqlalchemy import or_, select  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.services import market, market_book  # noqa: E402
+
+RESOURCES = ("wood", "clay", "iron")
+
+
+def _seed(sellers: int, offers: int) -> tuple[int, int]:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    with engine.begin() as connection:
+        world_id = connection.execute(
+            models.World.__table__.insert().values(name="Bench", speed_modifier=1.0, resource_modifier=1.0)
+        ).inserted_primary_key[0]
+        connection.execute(
+            models.User.__table__.insert(),
+            [
+                {
+                    "username": f"seller{index}",
+                    "email": f"seller{index}@example.com",
+                    "hashed_password": "placeholder",
+                    "auth_version": 0,
+                    "language": "es",
+                }
+                for index in range(sellers)
+            ],
+        )
+        user_ids = connection.execute(select(models.User.id).order_by(models.User.id)).scalars().all()
+        connection.execute(
+            models.City.__table__.insert(),
+            [
+                {
+                    "name": f"Market {index}",
+                    "owner_id": user_id,
+                    "world_id": world_id,
+                    "x": index % 500,
+                    "y": index // 500,
+                    "wood": 0,
+                    "clay": 0,
+                    "iron": 0,
+                    "population_max": 100,
+                }
+                for index, user_id in enumerate(user_ids)
+            ],
+        )
+        city_ids = connection.execute(select(models.City.id).order_by(models.City.id)).scalars().all()
+        connection.execute(
+            models.Alliance.__table__.insert(),
+            [
+                {"name": f"Alliance {index}", "leader_id": leader, "world_id": world_id}
+                for index, leader in enumerate(user_ids[::20])
+            ],
+        )
+        alliance_ids = connection.execute(select(models.Alliance.id).order_by(models.Alliance.id)).scalars().all()
+        connection.execute(
+            models.AllianceMember.__table__.insert(),
+            [
+                {"alliance_id": alliance_ids[index // 20], "user_id": user_id, "rank": 1}
+                for index, user_id in enumerate(user_ids)
+            ],
+        )
+        rows = []
+        for _ in range(offers):
+            offer_type, request_type = rng.sample(RESOURCES, 2)
+            offer_amount = rng.randint(1, 20) * 50
+            request_amount = rng.randint(1, 20) * 50
+            rows.append(
+                {
+                    "city_id": rng.choice(city_ids),
+                    "world_id": world_id,
+                    "offer_type": offer_type,
+                    "offer_amount": offer_amount,
+                    "request_type": request_type,
+                    "request_amount": request_amount,
+                    "ratio": request_amount / offer_amount,
+                    "is_alliance_only": rng.random() < 0.1,
+                }
+            )
+        connection.execute(models.MarketOffer.__table__.insert(), rows)
+    # The viewer: a member of the first alliance.
+    return world_id, user_ids[1]
+
+
+def _offset_page(db, world_id: int, user_id: int, skip: int, limit: int):
+    """The query ``get_offers`` ran before the order book."""
+
+    alliance_id = market._viewer_alliance_id(db, world_id, user_id)
+    query = (
+        db.query(models.MarketOffer)
+        .join(models.City)
+        .filter(models.MarketOffer.world_id == world_id)
+        .join(models.User, models.City.owner_id == models.User.id)
+        .outerjoin(models.AllianceMember, models.User.id == models.AllianceMember.user_id)
+        .filter(
+            or_(
+                models.MarketOffer.is_alliance_only == False,  # noqa: E712
+                models.AllianceMember.alliance_id == alliance_id,
+            )
+        )
+    )
+    return query.offset(skip).limit(limit).all()
+
+
+def _timed(callback) -> float:
+    started = time.perf_counter()
+    callback()
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offers", type=int, default=100_000)
+    parser.add_argument("--sellers", type=int, default=2_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    world_id, viewer = _seed(args.sellers, args.offers)
+    db = SessionLocal()
+    depths = [1, 10, 100, 1_000]
+    filtered = {"offer_type": "wood", "request_type": "iron", "max_ratio": 1.0}
+
+    def cursors(**filters) -> dict:
+        """Cursor leading to each page depth, found by walking the pages."""
+
+        found, cursor = {1: None}, None
+        for page in range(1, max(depths)):
+            _, cursor = market.get_order_book(
+                db, world_id, viewer, cursor=cursor, limit=args.page_size, **filters
+            )
+            if cursor is None:
+                break
+            found[page + 1] = cursor
+        return found
+
+    def keyset(cursor_map: dict, depth: int, **filters) -> str:
+        if depth not in cursor_map:
+            return "-"
+        times = [
+            _timed(
+                lambda: market.get_order_book(
+                    db, world_id, viewer, cursor=cursor_map[depth], limit=args.page_size, **filters
+                )
+            )
+            for _ in range(args.repeat)
+        ]
+        return f"{statistics.median(times):.2f}"
+
+    try:
+        all_cursors, filtered_cursors = cursors(), cursors(**filtered)
+        print(f"{args.offers:,} offers, page of {args.page_size}, median ms per page")
+        print(f"{'page':>6} {'offset':>9} {'keyset':>9} {'memory':>9} {'keyset*':>9} {'memory*':>9}")
+        results = {}
+        for depth in depths:
+            offset = statistics.median(
+                _timed(lambda: _offset_page(db, world_id, viewer, (depth - 1) * args.page_size, args.page_size))
+                for _ in range(args.repeat)
+            )
+            results[depth] = [f"{offset:.2f}", keyset(all_cursors, depth), keyset(filtered_cursors, depth, **filtered)]
+
+        market_book.settings.market_book_enabled = True
+        load = _timed(lambda: market_book.get_book(db, world_id))
+        for depth in depths:
+            offset, database, database_filtered = results[depth]
+            memory = keyset(all_cursors, depth)
+            memory_filtered = keyset(filtered_cursors, depth, **filtered)
+            print(f"{depth:>6} {offset:>9} {database:>9} {memory:>9} {database_filtered:>9} {memory_filtered:>9}")
+        print(f"(* wood for iron up to ratio 1; loading the in-memory book took {load:.0f} ms)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
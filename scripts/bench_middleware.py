@@ -0,0 +1,93 @@
+"""Measure the per-request cost of the language middleware and authentication.
+
+Serves ``--requests`` requests through a minimal FastAPI app backed by a
+throwaway SQLite database, with and without ``LanguageMiddleware``, for an
+anonymous endpoint and for one that depends on ``get_current_user``. Reports
+microseconds per request. Run from the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_middleware.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench_middleware_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from fastapi import Depends, FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.middleware.language import LanguageMiddleware  # noqa: E402
+from app.routers.auth import create_access_token, get_current_user  # noqa: E402
+
+
+def _seed() -> str:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = models.User(
+            username="bench",
+            email="bench@example.com",
+            hashed_password="placeholder",
+            is_verified=True,
+            language="es",
+        )
+        db.add(user)
+        db.commit()
+        return create_access_token(
+            {"sub": user.username, "type": "access", "ver": user.auth_version}
+        )
+    finally:
+        db.close()
+
+
+def _app(with_middleware: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    @app.get("/me")
+    def me(user: models.User = Depends(get_current_user)):
+        return {"id": user.id}
+
+    if with_middleware:
+        app.add_middleware(LanguageMiddleware)
+    return app
+
+
+def _time(client: TestClient, path: str, headers: dict, requests: int) -> float:
+    for _ in range(20):
+        client.get(path, headers=headers)
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.text
+    return elapsed / requests * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {_seed()}", "Accept-Language": "en"}
+    for with_middleware in (False, True):
+        client = TestClient(_app(with_middleware))
+        label = "with middleware" if with_middleware else "no middleware"
+        for path in ("/ping", "/me"):
+            micros = _time(client, path, headers, args.requests)
+            print(f"{label:>16} {path:<5}: {micros:,.0f} us/request")
+
+
+if __name__ == "__main__":
+    main()
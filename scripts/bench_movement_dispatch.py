@@ -0,0 +1,130 @@
+"""Measure the latency of ``send_movement`` including its anti-cheat checks.
+
+Seeds ``--players`` attackers, each owning a city with troops, and as many
+defender cities in a throwaway SQLite database, then dispatches
+``--dispatches`` attacks round-robin (each attacker cycles over
+``--targets`` defenders) and reports the p50/p99/max dispatch latency.
+``--overpopulated`` attackers hold more troops than their population allows,
+so their dispatches raise ``fake_attack`` flags. After the dispatches the
+anti-cheat signal consumer is drained and timed separately, since it runs on
+the worker. The violations found are listed by type so runs of different
+implementations can be compared. Run from the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_movement_dispatch.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench_movement_dispatch_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from app import models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.services import anticheat_signals, movement  # noqa: E402
+from app.utils import utc_now  # noqa: E402
+
+
+def _seed(players: int, overpopulated: int) -> list[tuple[int, int]]:
+    """Return (origin city id, target city id) pairs, one per attacker."""
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        world = models.World(name="Bench", speed_modifier=1.0, resource_modifier=1.0)
+        db.add(world)
+        db.flush()
+        cities = []
+        for index in range(2 * players):
+            owner = models.User(
+                username=f"bench{index}",
+                email=f"bench{index}@example.com",
+                hashed_password="placeholder",
+            )
+            db.add(owner)
+            db.flush()
+            city = models.City(
+                name=f"Bench {index}",
+                owner_id=owner.id,
+                world_id=world.id,
+                x=index % 100,
+                y=index // 100,
+                population_max=100 if index < overpopulated else 100_000,
+                last_production=utc_now(),
+            )
+            db.add(city)
+            cities.append(city)
+        db.flush()
+        db.add_all(
+            models.Troop(city_id=city.id, unit_type="basic_infantry", quantity=50_000)
+            for city in cities[:players]
+        )
+        db.commit()
+        return [(city.id, cities[players + index].id) for index, city in enumerate(cities[:players])]
+    finally:
+        db.close()
+
+
+def _percentile(samples: list[float], share: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--dispatches", type=int, default=2_000)
+    parser.add_argument("--targets", type=int, default=3)
+    parser.add_argument("--overpopulated", type=int, default=5)
+    args = parser.parse_args()
+
+    pairs = _seed(args.players, args.overpopulated)
+    targets = [target for _, target in pairs]
+    latencies = []
+    for index in range(args.dispatches):
+        player = index % len(pairs)
+        origin_id = pairs[player][0]
+        round_number = index // len(pairs)
+        target_id = targets[(player + round_number % args.targets) % len(targets)]
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            origin = db.get(models.City, origin_id)
+            movement.send_movement(db, origin, target_id, "attack", {"basic_infantry": 1})
+            latencies.append(time.perf_counter() - started)
+        finally:
+            db.close()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        analyzed = anticheat_signals.process_signals(db, limit=None)
+        db.commit()
+        analysis = time.perf_counter() - started
+        flags = Counter(
+            f"{violation}/{severity}"
+            for violation, severity in db.query(
+                models.AntiCheatFlag.type_of_violation, models.AntiCheatFlag.severity
+            )
+        )
+    finally:
+        db.close()
+
+    print(
+        f"{len(latencies)} dispatches: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+        f"p99 {_percentile(latencies, 0.99) * 1000:.2f} ms, max {max(latencies) * 1000:.2f} ms"
+    )
+    print(f"consumer: {analyzed} signals analyzed in {analysis:.2f}s")
+    for name, count in sorted(flags.items()):
+        print(f"  {name}: {count}")
+
+
+if __name__ == "__main__":
+    main()
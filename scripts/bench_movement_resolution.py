@@ -0,0 +1,96 @@
+"""Time the worker resolving N simultaneous arrivals.
+
+Every run builds a throwaway SQLite database with ``--players`` owners, each
+receiving ``--arrivals`` returning armies that land at the same instant, and
+resolves them with the given batch sizes. Run from the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_movement_resolution.py --batch-sizes 1 100 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench_movement_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from app import models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.services import movement as movement_service  # noqa: E402
+from app.utils import utc_now  # noqa: E402
+
+
+def _seed(players: int, arrivals: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        world = models.World(name="Bench", speed_modifier=1.0, resource_modifier=1.0)
+        db.add(world)
+        db.flush()
+        arrival = utc_now() - timedelta(seconds=1)
+        for index in range(players):
+            owner = models.User(
+                username=f"bench{index}",
+                email=f"bench{index}@example.com",
+                hashed_password="placeholder",
+            )
+            db.add(owner)
+            db.flush()
+            city = models.City(
+                name=f"Bench {index}", owner_id=owner.id, world_id=world.id, x=index, y=0
+            )
+            db.add(city)
+            db.flush()
+            db.add(models.Troop(city_id=city.id, unit_type="basic_infantry", quantity=10))
+            db.add_all(
+                models.Movement(
+                    origin_city_id=city.id,
+                    target_city_id=city.id,
+                    world_id=world.id,
+                    movement_type="return",
+                    troops={"basic_infantry": 5, "archer": 2},
+                    resources={"wood": 10},
+                    spy_count=0,
+                    arrival_time=arrival,
+                    speed_used=1.0,
+                    status="ongoing",
+                )
+                for _ in range(arrivals)
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--arrivals", type=int, default=10)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 500])
+    args = parser.parse_args()
+
+    total = args.players * args.arrivals
+    print(f"{total} simultaneous arrivals over {args.players} cities")
+    for batch_size in args.batch_sizes:
+        _seed(args.players, args.arrivals)
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            resolved = movement_service.resolve_due_movements(db, batch_size=batch_size)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        assert len(resolved) == total
+        print(
+            f"batch_size={batch_size:>5}: {elapsed:.2f} s "
+            f"({total / elapsed:,.0f} movements/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Measure ``notify_event_started`` throughput with the notification outbox.
+
+Seeds ``--users`` players (``--email-share`` of them with email notifications)
+in a throwaway SQLite database and starts a local fake SMTP server. The
+``legacy`` run reproduces the previous path on ``--legacy-users`` players
+(its per-user commits expire every loaded user, so it grows quadratically):
+one committed notification per user, an immediate socket publish and one
+SMTP connection per email. The ``outbox`` run calls ``notify_event_started``
+(multi-row inserts in one commit) and drains the outbox with the batched
+dispatcher. Run from the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_notifications.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socketserver
+import tempfile
+import threading
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench_notifications_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from app import models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.services import emailer, notification, notification_outbox, socket_manager  # noqa: E402
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        self.server.connections += 1
+        self.wfile.write(b"220 fake\r\n")
+        while True:
+            line = self.rfile.readline()
+            command = line[:4].upper()
+            if not line or command == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            if command == b"DATA":
+                self.wfile.write(b"354 go ahead\r\n")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages += 1
+            self.wfile.write(b"250 ok\r\n")
+
+
+def _start_smtp() -> socketserver.ThreadingTCPServer:
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    emailer.settings.smtp_host = "127.0.0.1"
+    emailer.settings.smtp_port = server.server_address[1]
+    emailer.settings.smtp_use_starttls = False
+    emailer.settings.smtp_username = ""
+    emailer.settings.from_email = "juego@example.com"
+    return server
+
+
+def _seed(users: int, email_share: float) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(
+            models.User.__table__.insert(),
+            [
+                {
+                    "username": f"bench{index}",
+                    "email": f"bench{index}@example.com",
+                    "hashed_password": "placeholder",
+                    "email_notifications": index < users * email_share,
+                    "auth_version": 0,
+                    "language": "es",
+                }
+                for index in range(users)
+            ],
+        )
+
+
+def _legacy(event_name: str) -> None:
+    db = SessionLocal()
+    try:
+        for user in db.query(models.User).all():
+            row = models.Notification(
+                user_id=user.id,
+                title="Evento global iniciado",
+                body=f"El evento '{event_name}' ha comenzado en tu mundo.",
+                type="event_started",
+            )
+            db.add(row)
+            db.commit()
+            db.refresh(row)
+            socket_manager.publish_to_users(
+                [user.id],
+                "notification",
+                {"id": row.id, "title": row.title, "body": row.body, "type": row.type},
+            )
+            if user.email_notifications:
+                emailer.send_email(user.email, row.title, row.body)
+    finally:
+        db.close()
+
+
+def _outbox(event_name: str) -> float:
+    db = SessionLocal()
+    try:
+        notification.notify_event_started(db, event_name)
+    finally:
+        db.close()
+    enqueued = time.perf_counter()
+    notification_outbox.dispatch_pending()
+    return enqueued
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--legacy-users", type=int, default=1_000)
+    parser.add_argument("--email-share", type=float, default=0.2)
+    args = parser.parse_args()
+
+    smtp = _start_smtp()
+    print(f"{args.email_share:.0%} of users with email notifications")
+    for label, users in (("legacy", args.legacy_users), ("outbox", args.users)):
+        _seed(users, args.email_share)
+        smtp.connections = smtp.messages = 0
+        started = time.perf_counter()
+        if label == "legacy":
+            _legacy("Bench")
+            enqueued = time.perf_counter()
+        else:
+            enqueued = _outbox("Bench")
+        finished = time.perf_counter()
+        print(
+            f"{label:>6} {users:>6} users: {users / (finished - started):,.0f} notifications/s "
+            f"(write {enqueued - started:.2f}s, delivery {finished - enqueued:.2f}s, "
+            f"{smtp.messages} emails over {smtp.connections} SMTP connections)"
+        )
+
+
+if __name__ == "__main__":
+    main()
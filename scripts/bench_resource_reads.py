@@ -0,0 +1,103 @@
+"""Compare write-on-read accrual with closed-form resource reads.
+
+Builds a throwaway SQLite database with ``--cities`` cities and reads every
+city ``--reads`` times, first persisting accrual on each read (the former
+``recalculate_resources`` read path) and then projecting it with
+``show_current_resources``. Reports reads per second and the number of
+``UPDATE`` statements issued. Run from the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_resource_reads.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench_resources_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from sqlalchemy import event  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.services import production  # noqa: E402
+from app.utils import utc_now  # noqa: E402
+
+_statements = {"update": 0}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_updates(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith("UPDATE"):
+        _statements["update"] += 1
+
+
+def _seed(cities: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        world = models.World(name="Bench", speed_modifier=1.0, resource_modifier=1.0)
+        db.add(world)
+        db.flush()
+        start = utc_now() - timedelta(hours=1)
+        for index in range(cities):
+            owner = models.User(
+                username=f"bench{index}",
+                email=f"bench{index}@example.com",
+                hashed_password="placeholder",
+            )
+            db.add(owner)
+            db.flush()
+            db.add(
+                models.City(
+                    name=f"Bench {index}",
+                    owner_id=owner.id,
+                    world_id=world.id,
+                    x=index,
+                    y=0,
+                    last_production=start,
+                )
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run(label: str, cities: int, reads: int, read) -> None:
+    _seed(cities)
+    _statements["update"] = 0
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for _ in range(reads):
+            for city in db.query(models.City).all():
+                read(db, city)
+            db.rollback()
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    total = cities * reads
+    print(
+        f"{label:>12}: {elapsed:.2f} s ({total / elapsed:,.0f} reads/s), "
+        f"{_statements['update']} UPDATE statements"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.reads} reads of {args.cities} cities")
+    _run("write-on-read", args.cities, args.reads, production.recalculate_resources)
+    _run("closed form", args.cities, args.reads, production.show_current_resources)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Measure a season rollover of a large world.
+
+Seeds ``--cities`` cities spread over ``--players`` players (one building
+and one troop row per city, players grouped in alliances of 50) in the world
+being closed, plus a small second world that must survive, in a throwaway
+SQLite database. Then times ``end_current_season`` and reports the longest
+gap between two commits, which bounds how long a chunk holds its locks. Run
+from the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_season_rollover.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench_season_rollover_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from sqlalchemy import select  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.services import season  # noqa: E402
+from app.utils import utc_now  # noqa: E402
+
+
+def _seed(world_id: int, players: int, cities: int, offset: int) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            models.User.__table__.insert(),
+            [
+                {
+                    "username": f"bench{world_id}-{index}",
+                    "email": f"bench{world_id}-{index}@example.com",
+                    "hashed_password": "placeholder",
+                    "auth_version": 0,
+                    "language": "es",
+                }
+                for index in range(players)
+            ],
+        )
+        user_ids = connection.execute(
+            select(models.User.id).where(models.User.username.like(f"bench{world_id}-%"))
+        ).scalars().all()
+        connection.execute(
+            models.City.__table__.insert(),
+            [
+                {
+                    "name": f"City {index}",
+                    "owner_id": user_ids[index % players],
+                    "world_id": world_id,
+                    "x": index % 1000,
+                    "y": index // 1000,
+                    "wood": 0,
+                    "clay": 0,
+                    "iron": 0,
+                    "population_max": 100,
+                }
+                for index in range(cities)
+            ],
+        )
+        city_ids = connection.execute(
+            select(models.City.id).where(models.City.world_id == world_id)
+        ).scalars().all()
+        connection.execute(
+            models.Building.__table__.insert(),
+            [{"city_id": city_id, "name": "barracks", "level": 3} for city_id in city_ids],
+        )
+        connection.execute(
+            models.Troop.__table__.insert(),
+            [{"city_id": city_id, "unit_type": "basic_infantry", "quantity": 10} for city_id in city_ids],
+        )
+        connection.execute(
+            models.PlayerScore.__table__.insert(),
+            [
+                {
+                    "user_id": user_id,
+                    "world_id": world_id,
+                    "building_points": 0,
+                    "troop_points": 0,
+                    "points": (index * 7919) % 100_000,
+                    "updated_at": utc_now(),
+                }
+                for index, user_id in enumerate(user_ids)
+            ],
+        )
+        leaders = user_ids[::50]
+        connection.execute(
+            models.Alliance.__table__.insert(),
+            [
+                {"name": f"Alliance {offset + index}", "leader_id": leader, "world_id": world_id}
+                for index, leader in enumerate(leaders)
+            ],
+        )
+        alliance_ids = connection.execute(
+            select(models.Alliance.id).where(models.Alliance.world_id == world_id)
+        ).scalars().all()
+        connection.execute(
+            models.AllianceMember.__table__.insert(),
+            [
+                {"alliance_id": alliance_ids[index // 50], "user_id": user_id, "rank": 1}
+                for index, user_id in enumerate(user_ids)
+            ],
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=100_000)
+    parser.add_argument("--players", type=int, default=20_000)
+    parser.add_argument("--chunk-size", type=int, default=1_000)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for name in ("Bench", "Other"):
+            connection.execute(
+                models.World.__table__.insert().values(name=name, speed_modifier=1.0, resource_modifier=1.0)
+            )
+    _seed(1, args.players, args.cities, 0)
+    _seed(2, 100, 500, args.players)
+
+    db = SessionLocal()
+    try:
+        season.start_new_season(db, "1", "Bench")
+        commits = [time.perf_counter()]
+        chunks = {}
+
+        def on_progress(current: models.Season) -> None:
+            commits.append(time.perf_counter())
+            chunks[current.rollover_stage] = chunks.get(current.rollover_stage, 0) + 1
+
+        started = commits[0]
+        results = season.end_current_season(db, "1", chunk_size=args.chunk_size, on_progress=on_progress)
+        elapsed = time.perf_counter() - started
+        rows = db.query(models.Season).one().rollover_rows
+        survivors = db.query(models.City).filter(models.City.world_id == 2).count()
+    finally:
+        db.close()
+
+    longest = max(later - earlier for earlier, later in zip(commits, commits[1:]))
+    print(
+        f"{args.cities:,} cities, {len(results):,} results: {elapsed:.2f}s, {rows:,} rows "
+        f"in {chunks.get('snapshot', 0)} snapshot and {chunks.get('reset', 0)} reset chunks, "
+        f"longest chunk {longest * 1000:.0f} ms; other world kept {survivors} cities"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare terrain lookup throughput before and after the materialized grid.
+
+Run from the repository root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/bench_terrain.py --map-size 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.services import world_gen
+
+
+def _rate(tiles: int, seconds: float) -> str:
+    return f"{tiles / seconds:,.0f} tiles/s" if seconds > 0 else "inf tiles/s"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map-size", type=int, default=100)
+    parser.add_argument("--radius", type=int, default=20)
+    parser.add_argument("--viewports", type=int, default=200)
+    args = parser.parse_args()
+
+    side = args.radius * 2 + 1
+    center = args.map_size // 2
+    min_xy, max_xy = center - args.radius, center + args.radius
+    tiles = side * side * args.viewports
+
+    started = time.perf_counter()
+    for _ in range(args.viewports):
+        for x in range(min_xy, max_xy + 1):
+            for y in range(min_xy, max_xy + 1):
+                world_gen._compute_tile_type(x, y)
+    legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    grid = world_gen.TerrainGrid.build(args.map_size)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(args.viewports):
+        for x in range(min_xy, max_xy + 1):
+            for y in range(min_xy, max_xy + 1):
+                grid.tile_type(x, y)
+    lookup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(args.viewports):
+        grid.rectangle(min_xy, max_xy, min_xy, max_xy)
+    rectangle = time.perf_counter() - started
+
+    print(f"viewport: {side}x{side} tiles, {args.viewports} viewports")
+    print(f"grid build ({args.map_size}x{args.map_size}): {build * 1000:.1f} ms")
+    print(f"per-tile random.Random (before): {_rate(tiles, legacy)}")
+    print(f"grid tile_type lookup (after):   {_rate(tiles, lookup)}")
+    print(f"grid rectangle slicing (after):  {_rate(tiles, rectangle)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Load test the chat websocket with thousands of simulated clients.
+
+Seeds ``--clients`` verified players of one world in a throwaway SQLite
+database, starts the application with uvicorn in a child process and opens
+one ``/chat/global`` websocket per player. ``--senders`` of them then post
+``--rounds`` messages each, two seconds apart to stay under the chat rate
+limit, while every client records when each message reaches it. Reports
+stored messages, deliveries per second, delivery latency and how many
+clients the server disconnected as slow consumers. Run from the repository
+root::
+
+    PYTHONPATH=batalla_medieval_backend python scripts/load_chat.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="load_chat_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'load.db')}"
+
+import websockets  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+from app.routers.auth import create_access_token  # noqa: E402
+
+
+def _seed(clients: int) -> list[str]:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        world_id = connection.execute(
+            models.World.__table__.insert().values(name="Load", speed_modifier=1.0, resource_modifier=1.0)
+        ).inserted_primary_key[0]
+        connection.execute(
+            models.User.__table__.insert(),
+            [
+                {
+                    "username": f"load{index}",
+                    "email": f"load{index}@example.com",
+                    "hashed_password": "placeholder",
+                    "auth_version": 0,
+                    "language": "es",
+                    "is_verified": True,
+                    "world_id": world_id,
+                }
+                for index in range(clients)
+            ],
+        )
+        user_ids = connection.execute(select(models.User.id).order_by(models.User.id)).scalars().all()
+        connection.execute(
+            models.PlayerWorld.__table__.insert(),
+            [{"user_id": user_id, "world_id": world_id} for user_id in user_ids],
+        )
+    return [
+        create_access_token({"sub": f"load{index}", "type": "access", "ver": 0})
+        for index in range(clients)
+    ]
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def _wait_for_server(port: int) -> None:
+    for _ in range(200):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.05)
+            continue
+        writer.close()
+        return
+    raise RuntimeError("server did not start")
+
+
+class Client:
+    def __init__(self, url: str, sent: dict) -> None:
+        self.url = url
+        self.sent = sent
+        self.latencies: list[float] = []
+        self.closed_by_server = False
+        self.connection = None
+
+    async def connect(self) -> None:
+        self.connection = await websockets.connect(self.url, max_queue=None, open_timeout=60)
+
+    async def listen(self) -> None:
+        try:
+            async for text in self.connection:
+                message = json.loads(text)
+                sent_at = self.sent.get(message.get("content"))
+                if sent_at is not None:
+                    self.latencies.append(time.perf_counter() - sent_at)
+        except websockets.ConnectionClosed:
+            pass
+        if self.connection.close_code == 1013:
+            self.closed_by_server = True
+
+
+async def _run(args: argparse.Namespace, tokens: list[str], port: int) -> dict:
+    sent: dict[str, float] = {}
+    clients = [Client(f"ws://127.0.0.1:{port}/chat/global?token={token}", sent) for token in tokens]
+    for start in range(0, len(clients), 200):
+        await asyncio.gather(*(client.connect() for client in clients[start : start + 200]))
+    listeners = [asyncio.create_task(client.listen()) for client in clients]
+
+    async def post(index: int, client: Client) -> None:
+        for round_number in range(args.rounds):
+            content = f"load {index}-{round_number}"
+            sent[content] = time.perf_counter()
+            try:
+                await client.connection.send(json.dumps({"content": content}))
+            except websockets.ConnectionClosed:
+                # Disconnected as a slow consumer itself.
+                return
+            await asyncio.sleep(2.05)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(post(index, client) for index, client in enumerate(clients[: args.senders])))
+    # Give the last round time to arrive everywhere.
+    await asyncio.sleep(2)
+    elapsed = time.perf_counter() - started
+
+    for client in clients:
+        await client.connection.close()
+    await asyncio.gather(*listeners)
+    # Let the server finish its side of the closing handshakes.
+    await asyncio.sleep(1)
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    return {
+        "elapsed": elapsed,
+        "sent": len(sent),
+        "latencies": latencies,
+        "slow_disconnects": sum(client.closed_by_server for client in clients),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=2_000)
+    parser.add_argument("--senders", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    tokens = _seed(args.clients)
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:socket_app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=os.environ.copy(),
+    )
+    try:
+        asyncio.run(_wait_for_server(port))
+        result = asyncio.run(_run(args, tokens, port))
+    finally:
+        server.terminate()
+        server.wait()
+
+    with engine.connect() as connection:
+        stored = connection.execute(select(func.count()).select_from(models.ChatMessage)).scalar_one()
+    latencies = result["latencies"]
+    expected = result["sent"] * args.clients
+    print(
+        f"{args.clients:,} clients, {result['sent']:,} messages sent, {stored:,} stored; "
+        f"{len(latencies):,}/{expected:,} deliveries "
+        f"({len(latencies) / result['elapsed']:,.0f}/s), "
+        f"latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms; "
+        f"{result['slow_disconnects']} slow consumers disconnected"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,37 @@ os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
 from app.database import Base, engine, SessionLocal, get_db  # noqa: E402
 from app.main import app  # noqa: E402
 from app import models  # noqa: E402
+from app.services import event as event_service  # noqa: E402
+from app.services import (  # noqa: E402
+    activity,
+    anticheat_signals,
+    auth_cache,
+    map_chunks,
+    market_book,
+    moderation,
+    progress_events,
+    rate_limit,
+    wiki_search,
+)
 
 
 def setup_database():
+    activity.flush_activity()
+    auth_cache.clear()
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    event_service.invalidate_modifier_cache()
+    map_chunks.invalidate_all()
+    anticheat_signals.reset()
+    moderation.reset()
+    market_book.reset()
+    progress_events.reset()
+    wiki_search.reset()
+
+
+@pytest.fixture(autouse=True)
+def _reset_rate_limits():
+    rate_limit.reset()
 
 
 def create_world(db):
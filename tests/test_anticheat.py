@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+from app import models
+from app.services import anticheat, anticheat_signals, movement
+from app.utils import utc_now
+
+
+def _troops(db_session, city, quantity):
+    db_session.add(models.Troop(city_id=city.id, unit_type="basic_infantry", quantity=quantity))
+    db_session.commit()
+
+
+def test_dispatch_queues_signals_and_the_consumer_finds_the_pattern(
+    db_session, user, city, second_city, monkeypatch
+):
+    _troops(db_session, city, 10)
+    # Space the actions out so the synchronous speed check stays quiet.
+    offsets = iter(range(100))
+    monkeypatch.setattr(anticheat, "utc_now", lambda: utc_now() + timedelta(seconds=next(offsets)))
+
+    for _ in range(4):
+        movement.send_movement(db_session, city, second_city.id, "reinforce", {"basic_infantry": 1})
+
+    assert db_session.query(models.AntiCheatFlag).count() == 0
+    assert db_session.query(models.Log).count() == 0
+    assert db_session.query(models.AntiCheatSignal).count() == 8
+
+    assert anticheat_signals.process_signals(db_session, limit=3) == 8
+    db_session.commit()
+
+    flag = db_session.query(models.AntiCheatFlag).one()
+    assert (flag.type_of_violation, flag.severity) == ("bot_detection", "high")
+    assert f"movement:reinforce:{city.id}->{second_city.id}" in flag.details
+    assert db_session.query(models.Log).count() == 4
+    assert db_session.query(models.AntiCheatSignal).count() == 0
+    db_session.refresh(user)
+    assert user.last_action_at is not None and not user.is_frozen
+
+
+def test_windows_are_rebuilt_from_the_logs_of_earlier_batches(
+    db_session, user, city, second_city, monkeypatch
+):
+    _troops(db_session, city, 10)
+    offsets = iter(range(100))
+    monkeypatch.setattr(anticheat, "utc_now", lambda: utc_now() + timedelta(seconds=next(offsets)))
+
+    for batch in range(2):
+        for _ in range(2):
+            movement.send_movement(db_session, city, second_city.id, "reinforce", {"basic_infantry": 1})
+        # Another replica, or a restarted worker, drains the second batch.
+        assert anticheat_signals.SignalConsumer().process(db_session, None) == 4
+        db_session.commit()
+
+    flag = db_session.query(models.AntiCheatFlag).one()
+    assert flag.type_of_violation == "bot_detection"
+    assert "(4x in 5s)" in flag.details
+
+
+def test_population_is_checked_against_the_troops_at_dispatch(db_session, user, city, second_city):
+    city.population_max = 10
+    db_session.commit()
+    _troops(db_session, city, 12)
+
+    movement.send_movement(db_session, city, second_city.id, "reinforce", {"basic_infantry": 3})
+    signal = (
+        db_session.query(models.AntiCheatSignal)
+        .filter(models.AntiCheatSignal.kind == anticheat.MOVEMENT)
+        .one()
+    )
+    assert (signal.payload["origin_troops"], signal.payload["population_max"]) == (12, 10)
+
+    # Disbanding troops before the worker runs does not hide the violation.
+    db_session.query(models.Troop).filter(models.Troop.city_id == city.id).delete()
+    db_session.commit()
+    anticheat_signals.process_signals(db_session)
+    db_session.commit()
+
+    flag = db_session.query(models.AntiCheatFlag).one()
+    assert flag.details == "Troop count 12 exceeds population 10"
+
+
+def test_actions_too_close_together_freeze_the_account_synchronously(
+    db_session, user, city, second_city
+):
+    _troops(db_session, city, 10)
+
+    for _ in range(2):
+        movement.send_movement(db_session, city, second_city.id, "reinforce", {"basic_infantry": 1})
+
+    db_session.refresh(user)
+    assert user.is_frozen
+    flag = db_session.query(models.AntiCheatFlag).one()
+    assert (flag.type_of_violation, flag.severity) == ("bot_detection", "critical")
+
+
+def test_consumer_flags_evenly_spaced_attacks_and_overpopulated_cities(db_session, user, city):
+    other = models.User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.flush()
+    target = models.City(name="Other", owner_id=other.id, world_id=city.world_id, x=9, y=9)
+    db_session.add(target)
+    db_session.commit()
+
+    first_arrival = utc_now() + timedelta(hours=1)
+    for index in range(5):
+        db_session.add(
+            models.AntiCheatSignal(
+                user_id=user.id,
+                kind=anticheat.MOVEMENT,
+                payload={
+                    "origin_city_id": city.id,
+                    "target_city_id": target.id,
+                    "target_owner_id": other.id,
+                    "movement_type": "attack",
+                    "arrival_time": (first_arrival + timedelta(minutes=10 * index)).isoformat(),
+                    "spy_count": 0,
+                    "origin_troops": 8 if index < 4 else 13,
+                    "population_max": 10,
+                },
+                created_at=utc_now() - timedelta(minutes=10 * (5 - index)),
+            )
+        )
+    db_session.commit()
+
+    assert anticheat_signals.process_signals(db_session) == 5
+    db_session.commit()
+
+    flags = db_session.query(models.AntiCheatFlag).all()
+    assert sorted(flag.type_of_violation for flag in flags) == ["fake_attack", "multiaccount_actions"]
+    details = {flag.type_of_violation: flag.details for flag in flags}
+    assert details["fake_attack"] == "Troop count 13 exceeds population 10"
+    assert details["multiaccount_actions"] == "Repeated identical attack actions between tester and other"
@@ -33,6 +33,9 @@ MVP_HTTP_CONTRACT = {
     ("GET", "/map/tiles"),
     ("GET", "/map/oasis/{oasis_id}"),
     ("GET", "/report/"),
+    ("GET", "/report/unread"),
+    ("POST", "/report/read"),
+    ("GET", "/report/{report_id}"),
     ("GET", "/ranking/players"),
     ("GET", "/ranking/alliances"),
     ("GET", "/ranking/search"),
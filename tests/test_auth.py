@@ -2,9 +2,12 @@ from urllib.parse import parse_qs, urlparse
 
 import httpx
 
+from sqlalchemy import event
+
 from app import models
-from app.routers.auth import get_password_hash
-from app.services import emailer
+from app.database import engine
+from app.routers.auth import create_access_token, get_password_hash
+from app.services import activity, auth_cache, emailer
 
 
 PASSWORD = "Castle12345"
@@ -129,3 +132,69 @@ def test_frozen_user_cannot_login_or_reuse_existing_http_session(client, db_sess
         data={"username": user.username, "password": PASSWORD},
     )
     assert second_login.status_code == 403
+
+
+def test_authenticated_reads_do_not_write_and_flush_last_seen_in_bulk(
+    client, db_session, user
+):
+    headers = {
+        "Authorization": "Bearer "
+        + create_access_token({"sub": user.username, "type": "access", "ver": user.auth_version})
+    }
+    before = user.last_active_at
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lstrip().split()[0].upper())
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        for _ in range(3):
+            assert client.get("/auth/me", headers=headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert "UPDATE" not in statements
+    assert auth_cache.get_stats()["hits"] >= 2
+    assert activity.get_buffer().pending() == 1
+
+    activity.flush_activity()
+    db_session.expire_all()
+    assert db_session.get(models.User, user.id).last_active_at > before
+
+
+def test_auth_cache_is_dropped_when_a_session_is_revoked(client, db_session, user):
+    token = create_access_token({"sub": user.username, "type": "access", "ver": user.auth_version})
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert auth_cache.get(user.username, user.auth_version) is not None
+
+    user.is_frozen = True
+    db_session.commit()
+
+    assert auth_cache.get(user.username, user.auth_version) is None
+    assert client.get("/auth/me", headers=headers).status_code == 403
+
+
+def test_middleware_and_dependency_share_one_token_lookup(client, db_session, user):
+    user.language = "es"
+    db_session.commit()
+    token = create_access_token({"sub": user.username, "type": "access", "ver": user.auth_version})
+    lookups = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "users.username =" in statement:
+            lookups.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(
+            "/auth/me",
+            headers={"Authorization": f"Bearer {token}", "Accept-Language": "en"},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Language"] == "es"
+    assert len(lookups) == 1
@@ -0,0 +1,105 @@
+import pytest
+
+from app import models
+from app.routers.auth import create_access_token
+from app.services import battle_kernel, combat
+
+
+def _headers(user: models.User) -> dict[str, str]:
+    return {
+        "Authorization": "Bearer "
+        + create_access_token(
+            {"sub": user.username, "type": "access", "ver": user.auth_version}
+        )
+    }
+
+
+def test_resolve_battle_delegates_to_the_pure_kernel(db_session, city, second_city, monkeypatch):
+    db_session.add_all(
+        [
+            models.Troop(city_id=second_city.id, unit_type="heavy_infantry", quantity=30),
+            models.Building(city_id=second_city.id, name=combat.WALL_NAME, level=3),
+        ]
+    )
+    db_session.commit()
+    db_session.refresh(second_city)
+    monkeypatch.setattr(combat, "_luck", lambda: 0.1)
+    attackers = {"basic_infantry": 60, "fast_cavalry": 10}
+
+    expected = battle_kernel.resolve(
+        attackers,
+        {"heavy_infantry": 30},
+        luck=0.1,
+        wall_bonus=battle_kernel.wall_multiplier(3),
+    )
+    result = combat.resolve_battle(city, second_city, attackers)
+
+    assert result["attacker_losses"] == expected["attacker_losses"]
+    assert result["defender_losses"] == expected["defender_losses"]
+    assert result["moral"] == expected["moral"]
+    assert result["effective_attack"] == expected["effective_attack"]
+    assert result["defense_value"] == expected["defense_value"]
+
+
+def test_vectorized_simulation_matches_the_scalar_kernel():
+    units = ["archer", "basic_infantry", "fast_cavalry", "heavy_infantry", "ram"]
+    attackers = [[40, 100, 0, 0, 2], [0, 10, 50, 0, 0], [0, 0, 0, 0, 0], [5, 5, 5, 5, 5]]
+    defenders = [[0, 0, 0, 80, 0], [30, 30, 0, 0, 0], [10, 0, 0, 0, 0], [0, 0, 0, 0, 0]]
+    luck = [0.2, -0.1, 0.0, 0.05]
+    wall_bonus = [1.25, 1.0, 1.5, 1.0]
+    hero_defense = [0.0, 120.0, 0.0, 0.0]
+
+    vectorized = battle_kernel.simulate(
+        attackers, defenders, units, luck=luck, wall_bonus=wall_bonus, hero_defense=hero_defense
+    )
+
+    for index, (attacker_row, defender_row) in enumerate(zip(attackers, defenders)):
+        scalar = battle_kernel.resolve(
+            dict(zip(units, attacker_row)),
+            dict(zip(units, defender_row)),
+            luck=luck[index],
+            wall_bonus=wall_bonus[index],
+            hero_defense=hero_defense[index],
+        )
+        assert vectorized["attacker_losses"][index].tolist() == [scalar["attacker_losses"][unit] for unit in units]
+        assert vectorized["defender_losses"][index].tolist() == [scalar["defender_losses"][unit] for unit in units]
+        assert vectorized["attacker_loss_ratio"][index] == pytest.approx(scalar["attacker_loss_ratio"])
+        assert vectorized["defender_loss_ratio"][index] == pytest.approx(scalar["defender_loss_ratio"])
+        assert vectorized["moral"][index] == pytest.approx(scalar["moral"])
+
+
+def test_admin_batch_simulation_reports_throughput(client, db_session):
+    admin = models.User(
+        username="balance_admin",
+        email="balance_admin@example.com",
+        hashed_password="placeholder",
+        is_verified=True,
+        is_admin=True,
+    )
+    db_session.add(admin)
+    db_session.commit()
+
+    response = client.post(
+        "/admin/simulate/battles",
+        headers=_headers(admin),
+        json={
+            "attacker": {"basic_infantry": 100},
+            "defender": {"heavy_infantry": 20},
+            "wall_level": 2,
+            "battles": 500,
+            "seed": 7,
+        },
+    )
+    assert response.status_code == 200, response.text
+    summary = response.json()
+    assert summary["battles"] == 500
+    assert summary["battles_per_second"] > 0
+    assert 0.0 <= summary["attacker_win_rate"] <= 1.0
+    assert set(summary["mean_defender_losses"]) == {"heavy_infantry"}
+
+    rejected = client.post(
+        "/admin/simulate/battles",
+        headers=_headers(admin),
+        json={"attacker": {"dragon": 1}, "defender": {}, "battles": 1},
+    )
+    assert rejected.status_code == 400
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+from app import models
+from app.database import engine
+from app.routers.auth import create_access_token
+from app.services import world_membership
+from app.services.chat_manager import ChatManager
+from app.services.chat_writer import ChatWriter
+from app.utils import utc_now
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.messages = []
+        self.closed_with = None
+
+    async def send_text(self, text):
+        self.messages.append(json.loads(text))
+
+    async def close(self, code):
+        self.closed_with = code
+
+
+class StalledSocket(RecordingSocket):
+    async def send_text(self, text):
+        await asyncio.Event().wait()
+
+
+def _fan_out(manager: ChatManager, count: int) -> tuple[RecordingSocket, StalledSocket]:
+    fast, slow = RecordingSocket(), StalledSocket()
+
+    async def run():
+        for socket, user_id in ((fast, 1), (slow, 2)):
+            manager.register_connection(socket, channel="global", user_id=user_id, world_id=7)
+        for index in range(count):
+            await manager.broadcast(
+                channel="global", message={"content": str(index)}, sender_id=1, world_id=7
+            )
+            # The stalled send never finishes, so ``drain`` would wait forever.
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    return fast, slow
+
+
+def test_slow_consumer_is_disconnected_without_holding_up_the_channel():
+    manager = ChatManager(queue_size=1, slow_consumer="disconnect")
+
+    fast, slow = _fan_out(manager, 4)
+
+    assert [message["content"] for message in fast.messages] == ["0", "1", "2", "3"]
+    assert slow.closed_with == 1013
+    assert slow not in manager.global_connections[7]
+    assert manager.stats()["slow_disconnects"] == 1
+
+
+def test_slow_consumer_only_loses_messages_in_drop_mode():
+    manager = ChatManager(queue_size=1, slow_consumer="drop")
+
+    fast, slow = _fan_out(manager, 4)
+
+    assert len(fast.messages) == 4
+    assert slow.closed_with is None
+    assert slow in manager.global_connections[7]
+    assert manager.stats()["dropped"] == 2
+
+
+def test_writer_stores_concurrent_messages_in_batches(db_session, user):
+    world = db_session.query(models.World).first()
+    writer = ChatWriter(engine, flush_seconds=0.01, batch_size=2)
+
+    async def run():
+        rows = [
+            {
+                "user_id": user.id,
+                "world_id": world.id,
+                "channel": "global",
+                "content": f"mensaje {index}",
+                "timestamp": utc_now(),
+            }
+            for index in range(3)
+        ]
+        ids = await asyncio.gather(*(writer.write(row) for row in rows))
+        await writer.close()
+        return ids
+
+    ids = asyncio.run(run())
+
+    stored = {message.id: message.content for message in db_session.query(models.ChatMessage)}
+    assert stored == {ids[0]: "mensaje 0", ids[1]: "mensaje 1", ids[2]: "mensaje 2"}
+    assert writer.metrics() == {"pending": 0, "batches": 2, "written": 3}
+
+
+def test_websocket_message_is_stored_and_echoed_with_its_id(client, db_session, user):
+    world = db_session.query(models.World).first()
+    world_membership.join_world(db_session, user, world.id)
+    db_session.refresh(user)
+    token = create_access_token({"sub": user.username, "type": "access", "ver": user.auth_version})
+
+    with client.websocket_connect(f"/chat/global?token={token}") as websocket:
+        websocket.send_json({"content": "hola"})
+        message = websocket.receive_json()
+
+    stored = db_session.get(models.ChatMessage, message["id"])
+    assert (stored.content, stored.world_id, stored.user_id) == ("hola", world.id, user.id)
+    assert (message["username"], message["channel"]) == (user.username, "global")
@@ -1,4 +1,5 @@
 import asyncio
+import json
 
 from app import models
 from app.routers.auth import create_access_token
@@ -9,8 +10,8 @@ class DummySocket:
     def __init__(self):
         self.messages = []
 
-    async def send_json(self, message):
-        self.messages.append(message)
+    async def send_text(self, text):
+        self.messages.append(json.loads(text))
 
 
 def _headers(user: models.User) -> dict[str, str]:
@@ -61,14 +62,17 @@ def test_global_realtime_broadcast_is_partitioned_by_world():
     )
 
     payload = {"content": "solo mundo 101"}
-    asyncio.run(
-        manager.broadcast(
+
+    async def broadcast():
+        await manager.broadcast(
             channel="global",
             message=payload,
             sender_id=1,
             world_id=101,
         )
-    )
+        await manager.drain()
+
+    asyncio.run(broadcast())
 
     assert world_one_socket.messages == [payload]
     assert world_two_socket.messages == []
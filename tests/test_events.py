@@ -1,7 +1,7 @@
 from datetime import datetime, timezone, timedelta
 
-from app import models
-from app.services import balance, combat, event
+from app import models, schemas
+from app.services import balance, combat, emailer, event, notification, notification_outbox
 
 
 def test_event_modifiers_and_creation(db_session):
@@ -61,3 +61,140 @@ def test_loot_modifier_increases_effective_carry_without_overdrawing(
     assert second_city.wood >= 0
     assert second_city.clay >= 0
     assert second_city.iron >= 0
+
+
+def test_active_modifiers_are_cached_until_the_next_event_boundary(
+    db_session, monkeypatch
+):
+    now = datetime(2026, 9, 1, 12, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(event, "utc_now", lambda: now)
+    db_session.add(
+        models.WorldEvent(
+            world_id=1,
+            name="Marcha forzada",
+            description="",
+            start_time=now + timedelta(minutes=5),
+            end_time=now + timedelta(minutes=10),
+            modifiers={"movement_speed": 1.5},
+        )
+    )
+    db_session.commit()
+    event.invalidate_modifier_cache()
+    before = event.get_modifier_cache_stats()
+
+    assert event.get_active_modifiers(db_session)["movement_speed"] == 1.0
+    assert event.get_active_modifiers(db_session)["movement_speed"] == 1.0
+    stats = event.get_modifier_cache_stats()
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["hits"] - before["hits"] == 1
+
+    # The cached entry expires at the start boundary even though the TTL has not.
+    now = now + timedelta(minutes=5)
+    assert event.get_active_modifiers(db_session)["movement_speed"] == 1.5
+    now = now + timedelta(minutes=5, seconds=1)
+    assert event.get_active_modifiers(db_session)["movement_speed"] == 1.0
+
+
+def test_create_event_invalidates_cached_modifiers(db_session):
+    assert event.get_active_modifiers(db_session)["production_speed"] == 1.0
+
+    created = event.create_event(
+        db_session,
+        schemas.EventCreate(
+            event_type=next(iter(event.EVENT_TEMPLATES)),
+            world_id=1,
+            start_time=datetime.now(timezone.utc) - timedelta(minutes=1),
+            end_time=datetime.now(timezone.utc) + timedelta(hours=1),
+        ),
+    )
+
+    assert event.get_active_modifiers(db_session) == event._merge_modifiers(
+        created.get_modifiers()
+    )
+
+
+def _member(db_session, name: str, world_id: int, email_notifications: bool) -> models.User:
+    member = models.User(
+        username=name,
+        email=f"{name}@example.com",
+        hashed_password="x",
+        email_notifications=email_notifications,
+    )
+    db_session.add(member)
+    db_session.flush()
+    db_session.add(models.PlayerWorld(user_id=member.id, world_id=world_id))
+    return member
+
+
+def test_event_start_notifies_world_members_in_bulk(db_session, monkeypatch):
+    monkeypatch.setattr(emailer, "smtp_configured", lambda: True)
+    broadcasts = []
+    monkeypatch.setattr(
+        notification_outbox.socket_manager,
+        "publish_to_worlds",
+        lambda world_ids, name, data: broadcasts.append((list(world_ids), name, data)),
+    )
+    other_world = models.World(name="Otro", speed_modifier=1.0, resource_modifier=1.0)
+    db_session.add(other_world)
+    db_session.flush()
+    opted_in = _member(db_session, "opted_in", 1, True)
+    quiet = _member(db_session, "quiet", 1, False)
+    outsider = _member(db_session, "outsider", other_world.id, True)
+    db_session.commit()
+
+    created = event.create_event(
+        db_session,
+        schemas.EventCreate(
+            event_type=next(iter(event.EVENT_TEMPLATES)),
+            world_id=1,
+            start_time=datetime.now(timezone.utc) - timedelta(minutes=1),
+            end_time=datetime.now(timezone.utc) + timedelta(hours=1),
+        ),
+    )
+
+    notified = {row.user_id for row in db_session.query(models.Notification)}
+    assert notified == {opted_in.id, quiet.id}
+    assert outsider.id not in notified
+    outbox = db_session.query(models.NotificationOutbox).all()
+    assert [(row.user_id, row.channel) for row in outbox] == [(opted_in.id, "email")]
+    # One emit for the room: everything to show the toast, but no per-member id.
+    ((rooms, name, payload),) = broadcasts
+    assert (rooms, name) == ([1], "notification")
+    (latest,) = notification.list_notifications(db_session, quiet, limit=1)
+    assert payload == {
+        "title": latest.title,
+        "body": latest.body,
+        "type": "event_started",
+        "world_id": 1,
+        "created_at": payload["created_at"],
+        "read": False,
+    }
+    assert notification.mark_type_as_read(db_session, quiet, "event_started") == 1
+    assert notification.list_notifications(db_session, quiet)[0].read
+    assert not notification.list_notifications(db_session, opted_in)[0].read
+    assert created.announced_at is not None
+    # Already announced: the worker job does not notify again.
+    assert event.announce_started_events(db_session) == 0
+
+
+def test_future_events_are_announced_once_by_the_worker(db_session, monkeypatch):
+    monkeypatch.setattr(notification_outbox.socket_manager, "publish_to_worlds", lambda *args: None)
+    member = _member(db_session, "member", 1, False)
+    db_session.commit()
+    created = event.create_event(
+        db_session,
+        schemas.EventCreate(
+            event_type=next(iter(event.EVENT_TEMPLATES)),
+            world_id=1,
+            start_time=datetime.now(timezone.utc) + timedelta(hours=1),
+            end_time=datetime.now(timezone.utc) + timedelta(hours=2),
+        ),
+    )
+    assert db_session.query(models.Notification).count() == 0
+
+    created.start_time = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    assert event.announce_started_events(db_session) == 1
+    db_session.commit()
+    assert event.announce_started_events(db_session) == 0
+    assert [row.user_id for row in db_session.query(models.Notification)] == [member.id]
@@ -0,0 +1,102 @@
+from app import models
+from app.routers.auth import create_access_token
+from app.services import map_chunks, world_membership
+
+
+def _headers(user: models.User) -> dict[str, str]:
+    token = create_access_token(
+        {
+            "sub": user.username,
+            "type": "access",
+            "ver": user.auth_version,
+        }
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _tile(response, x: int, y: int) -> dict:
+    assert response.status_code == 200, response.text
+    return next(tile for tile in response.json()["tiles"] if tile["x"] == x and tile["y"] == y)
+
+
+def _rival(db_session, world_id: int) -> tuple[models.User, models.City]:
+    rival = models.User(username="rival", email="rival@example.com", hashed_password="x")
+    db_session.add(rival)
+    db_session.flush()
+    city = models.City(name="Rival Keep", owner_id=rival.id, world_id=world_id, x=30, y=31)
+    db_session.add(city)
+    db_session.commit()
+    return rival, city
+
+
+def test_viewport_is_served_from_chunks_and_refreshed_on_changes(client, db_session, user):
+    world = db_session.query(models.World).first()
+    world_membership.join_world(db_session, user, world.id)
+    rival, rival_city = _rival(db_session, world.id)
+    headers = _headers(user)
+    params = {"world_id": world.id, "x": 30, "y": 30, "radius": 3}
+
+    tile = _tile(client.get("/map/tiles", params=params, headers=headers), 30, 31)
+    assert tile["city_id"] == rival_city.id
+    assert tile["owner_name"] == "rival"
+    assert tile["points"] == 0
+    stats = map_chunks.get_cache_stats()
+
+    _tile(client.get("/map/tiles", params=params, headers=headers), 30, 31)
+    assert map_chunks.get_cache_stats()["hits"] > stats["hits"]
+    assert map_chunks.get_cache_stats()["misses"] == stats["misses"]
+
+    # Score change: a new building on the city.
+    db_session.add(models.Building(city_id=rival_city.id, name="barracks", level=3))
+    db_session.commit()
+    tile = _tile(client.get("/map/tiles", params=params, headers=headers), 30, 31)
+    assert tile["points"] > 0
+
+    # Alliance change of the owner.
+    alliance = models.Alliance(name="Norte", leader_id=rival.id, world_id=world.id)
+    db_session.add(alliance)
+    db_session.flush()
+    db_session.add(models.AllianceMember(alliance_id=alliance.id, user_id=rival.id))
+    db_session.commit()
+    tile = _tile(client.get("/map/tiles", params=params, headers=headers), 30, 31)
+    assert tile["alliance_name"] == "Norte"
+
+    # Conquest and relocation.
+    rival_city.owner_id = user.id
+    rival_city.x = 32
+    db_session.commit()
+    response = client.get("/map/tiles", params=params, headers=headers)
+    assert _tile(response, 30, 31)["city_id"] is None
+    moved = _tile(response, 32, 31)
+    assert moved["city_id"] == rival_city.id
+    assert moved["owner_name"] == "tester"
+    assert moved["alliance_name"] is None
+
+
+def test_public_viewport_uses_player_points_and_sees_new_cities(client, db_session, user):
+    world = db_session.query(models.World).first()
+    params = {"world_id": world.id, "x": 30, "y": 30, "radius": 2}
+
+    response = client.get("/public-api/map", params=params)
+    assert response.status_code == 200
+    assert all(tile["city"] is None for tile in response.json())
+
+    _, rival_city = _rival(db_session, world.id)
+    response = client.get("/public-api/map", params=params)
+    entry = next(tile["city"] for tile in response.json() if tile["city"])
+    assert entry["city_id"] == rival_city.id
+    assert entry["owner"] == "r***l"
+
+
+def test_rolled_back_changes_do_not_invalidate(db_session, city):
+    chunks = map_chunks.get_chunks(db_session, city.world_id, [map_chunks.chunk_key(city.world_id, 0, 0)])
+    assert list(chunks.values())[0].cities[(0, 0)].city_id == city.id
+    stats = map_chunks.get_cache_stats()
+
+    city.name = "Renamed"
+    db_session.flush()
+    db_session.rollback()
+
+    assert map_chunks.get_cache_stats()["invalidations"] == stats["invalidations"]
+    payload = map_chunks.ChunkChanges(chunks={(1, 0, 0)}, users={4}).to_payload()
+    assert map_chunks.ChunkChanges.from_payload(payload).chunks == {(1, 0, 0)}
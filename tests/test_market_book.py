@@ -0,0 +1,118 @@
+import pytest
+
+from app import models, schemas
+from app.services import market, market_book
+from app.utils import utc_now
+
+
+def _player_city(db_session, name: str, world_id: int, x: int) -> models.City:
+    player = models.User(username=name, email=f"{name}@example.com", hashed_password="x")
+    db_session.add(player)
+    db_session.flush()
+    city = models.City(
+        name=f"{name} town",
+        owner_id=player.id,
+        world_id=world_id,
+        x=x,
+        y=0,
+        wood=1000,
+        clay=1000,
+        iron=1000,
+        last_production=utc_now(),
+    )
+    db_session.add(city)
+    db_session.flush()
+    db_session.add(models.Building(city_id=city.id, name="market", level=5))
+    return city
+
+
+def _offer(db_session, city, offer_type, offer_amount, request_type, request_amount, alliance_only=False):
+    offer = models.MarketOffer(
+        city_id=city.id,
+        world_id=city.world_id,
+        offer_type=offer_type,
+        offer_amount=offer_amount,
+        request_type=request_type,
+        request_amount=request_amount,
+        ratio=request_amount / offer_amount,
+        is_alliance_only=alliance_only,
+    )
+    db_session.add(offer)
+    db_session.flush()
+    return offer.id
+
+
+def _ids(offers):
+    return [offer.id for offer in offers]
+
+
+@pytest.fixture()
+def book(db_session, user):
+    world = db_session.query(models.World).first()
+    stranger = _player_city(db_session, "stranger", world.id, 10)
+    ally = _player_city(db_session, "ally", world.id, 20)
+    alliance = models.Alliance(name="Guild", leader_id=user.id, world_id=world.id)
+    db_session.add(alliance)
+    db_session.flush()
+    db_session.add_all(
+        [
+            models.AllianceMember(alliance_id=alliance.id, user_id=user.id),
+            models.AllianceMember(alliance_id=alliance.id, user_id=ally.owner_id),
+        ]
+    )
+    ids = {
+        "half": _offer(db_session, stranger, "wood", 100, "clay", 50),
+        "double": _offer(db_session, stranger, "wood", 100, "clay", 200),
+        "even_a": _offer(db_session, stranger, "wood", 100, "clay", 100),
+        "even_b": _offer(db_session, stranger, "wood", 50, "clay", 50),
+        "hidden": _offer(db_session, stranger, "wood", 100, "clay", 10, alliance_only=True),
+        "allied": _offer(db_session, ally, "wood", 100, "clay", 20, alliance_only=True),
+        "iron": _offer(db_session, stranger, "iron", 100, "clay", 30),
+    }
+    db_session.commit()
+    return world, ids, stranger, ally
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_order_book_pages_by_ratio_then_id_with_visibility(db_session, user, book, monkeypatch, in_memory):
+    monkeypatch.setattr(market_book.settings, "market_book_enabled", in_memory)
+    world, ids, _, _ = book
+    filters = {"offer_type": "wood", "request_type": "clay", "max_ratio": 1.5}
+
+    first, cursor = market.get_order_book(db_session, world.id, user.id, limit=2, **filters)
+    second, end = market.get_order_book(db_session, world.id, user.id, limit=2, cursor=cursor, **filters)
+
+    assert _ids(first) == [ids["allied"], ids["half"]]
+    assert first[0].owner_name == "ally" and first[0].city_name == "ally town"
+    assert (_ids(second), end) == ([ids["even_a"], ids["even_b"]], None)
+
+    allied, _ = market.get_order_book(db_session, world.id, user.id, filter_alliance=True)
+    assert _ids(allied) == [ids["allied"]]
+    public, _ = market.get_order_book(db_session, world.id, None, min_ratio=0.3)
+    assert _ids(public) == [ids["iron"], ids["half"], ids["even_a"], ids["even_b"], ids["double"]]
+
+
+def test_in_memory_book_follows_create_cancel_and_accept(db_session, user, city, book, monkeypatch):
+    monkeypatch.setattr(market_book.settings, "market_book_enabled", True)
+    world, ids, stranger, _ = book
+    db_session.add(models.Building(city_id=city.id, name="market", level=5))
+    city.wood = 1000
+    city.last_production = utc_now()
+    db_session.commit()
+    market.get_order_book(db_session, world.id, user.id)
+    loads = market_book.get_stats()["loads"]
+
+    created = market.create_offer(
+        db_session,
+        stranger,
+        schemas.MarketOfferCreate(offer_type="clay", offer_amount=100, request_type="iron", request_amount=80),
+    )
+    offers, _ = market.get_order_book(db_session, world.id, user.id, offer_type="clay")
+    assert _ids(offers) == [created.id]
+    assert offers[0].owner_name == "stranger"
+
+    market.cancel_offer(db_session, stranger, created.id)
+    market.accept_offer(db_session, city, ids["half"])
+    offers, _ = market.get_order_book(db_session, world.id, user.id, request_type="clay")
+    assert ids["half"] not in _ids(offers) and len(offers) == 5
+    assert market_book.get_stats()["loads"] == loads
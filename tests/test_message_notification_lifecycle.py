@@ -92,6 +92,15 @@ def test_message_delivery_read_delete_and_notification_privacy(client, db_sessio
     assert outsider_notifications.status_code == 200
     assert notification.id not in [item["id"] for item in outsider_notifications.json()]
 
+    outsider_type_mark = client.patch(
+        "/notification/read", params={"type": notification.type}, headers=_headers(outsider)
+    )
+    assert outsider_type_mark.json() == {"updated": 0}
+    type_mark = client.patch(
+        "/notification/read", params={"type": notification.type}, headers=_headers(receiver)
+    )
+    assert type_mark.json() == {"updated": 1}
+
     marked = client.patch(
         f"/notification/read/{notification.id}",
         headers=_headers(receiver),
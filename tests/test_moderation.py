@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from app import models
+from app.routers.auth import create_access_token
+from app.services import moderation
+
+
+def _headers(user: models.User) -> dict[str, str]:
+    return {
+        "Authorization": "Bearer "
+        + create_access_token({"sub": user.username, "type": "access", "ver": user.auth_version})
+    }
+
+
+def test_filter_matches_folded_and_overlapping_terms_in_one_pass():
+    word_filter = moderation.WordFilter(["curse", "he", "she", "hers", "strasse", "fine"])
+
+    assert word_filter.censor("You CÚRSE!") == "You ***!"
+    assert word_filter.censor("ushers") == "u***"
+    assert word_filter.censor("Große Straße") == "Große ***"
+    assert word_filter.censor("ﬁne day") == "*** day"
+    assert word_filter.censor("cursecurse") == "******"
+    assert word_filter.censor("clean text") == "clean text"
+
+
+def test_terms_apply_to_their_world_and_language_and_reload(client, db_session, monkeypatch):
+    world = db_session.query(models.World).first()
+    admin = models.User(
+        username="chat_admin",
+        email="chat_admin@example.com",
+        hashed_password="placeholder",
+        is_verified=True,
+        is_admin=True,
+    )
+    db_session.add(admin)
+    db_session.commit()
+    # Check for changed terms on every message.
+    monkeypatch.setattr(moderation, "get_settings", lambda: SimpleNamespace(chat_filter_reload_seconds=0))
+
+    response = client.post(
+        "/admin/moderation/terms",
+        headers=_headers(admin),
+        json={"terms": ["troll", "Troll", "  "], "world_id": world.id, "language": "es"},
+    )
+    assert response.json() == {"added": 1}
+
+    assert moderation.censor("troll curse", world.id, "es") == "*** ***"
+    assert moderation.censor("troll curse", world.id, "en") == "troll ***"
+    assert moderation.censor("troll curse", None, "es") == "troll ***"
+
+    # Another replica adds a term: seen at the next check, and only then recompiled.
+    assert moderation.censor("ogro", world.id, "en") == "ogro"
+    compiles = moderation.get_stats()["compiles"]
+    assert moderation.censor("ogro", world.id, "en") == "ogro"
+    assert moderation.get_stats()["compiles"] == compiles
+    db_session.add(models.ChatFilterTerm(term="ogro"))
+    db_session.commit()
+    assert moderation.censor("ogro", world.id, "en") == "***"
+    assert moderation.get_stats()["compiles"] == compiles + 1
+
+    term_id = client.get("/admin/moderation/terms", headers=_headers(admin)).json()[0]["id"]
+    client.delete(f"/admin/moderation/terms/{term_id}", headers=_headers(admin))
+    assert moderation.censor("troll", world.id, "es") == "troll"
+
+
+def test_a_deleted_then_added_term_is_seen_by_other_replicas(db_session, monkeypatch):
+    monkeypatch.setattr(moderation, "get_settings", lambda: SimpleNamespace(chat_filter_reload_seconds=0))
+    term = models.ChatFilterTerm(term="ogro")
+    db_session.add(term)
+    db_session.commit()
+    assert moderation.censor("ogro troll") == "*** troll"
+
+    # Another replica swaps the term; SQLite hands the new row the same id.
+    db_session.delete(term)
+    db_session.commit()
+    replacement = models.ChatFilterTerm(term="troll")
+    db_session.add(replacement)
+    db_session.commit()
+    assert replacement.id == term.id
+
+    assert moderation.censor("ogro troll") == "ogro ***"
+
+
+def test_async_censor_keeps_the_previous_filter_while_reloading_off_the_loop(db_session, monkeypatch):
+    monkeypatch.setattr(moderation, "get_settings", lambda: SimpleNamespace(chat_filter_reload_seconds=0))
+    signature = moderation._signature
+    release = threading.Event()
+    checked_on = []
+
+    def slow_signature(*args):
+        checked_on.append(threading.current_thread())
+        release.wait(5)
+        return signature(*args)
+
+    async def run():
+        first = await moderation.censor_async("ogro curse")
+        monkeypatch.setattr(moderation, "_signature", slow_signature)
+        db_session.add(models.ChatFilterTerm(term="ogro"))
+        db_session.commit()
+        during = await moderation.censor_async("ogro curse")
+        again = await moderation.censor_async("ogro curse")
+        release.set()
+        for _ in range(100):
+            if not moderation._refreshing:
+                break
+            await asyncio.sleep(0.01)
+        return first, during, again, await moderation.censor_async("ogro curse")
+
+    first, during, again, after = asyncio.run(run())
+
+    assert (first, during, again) == ("ogro ***", "ogro ***", "ogro ***")
+    assert after == "*** ***"
+    assert checked_on and threading.main_thread() not in checked_on
@@ -188,3 +188,49 @@ def test_worker_uses_frozen_movement_army_and_loot_returns_once(
         .one()
     )
     assert troop.quantity == 2
+
+
+def test_worker_resolves_simultaneous_arrivals_in_bounded_batches(
+    db_session, city, user, monkeypatch
+):
+    monkeypatch.setattr(movement_service, "utc_now", lambda: FIXED_NOW)
+    monkeypatch.setattr(
+        movement_service,
+        "_run_resolution_effect",
+        lambda *args, **kwargs: None,
+    )
+
+    db_session.add(models.Troop(city_id=city.id, unit_type="archer", quantity=1))
+    returns = [
+        models.Movement(
+            origin_city_id=city.id,
+            target_city_id=city.id,
+            world_id=city.world_id,
+            movement_type="return",
+            troops={"basic_infantry": 2, "archer": 1},
+            resources={},
+            spy_count=0,
+            arrival_time=FIXED_NOW - timedelta(seconds=index + 1),
+            speed_used=1.0,
+            status="ongoing",
+        )
+        for index in range(5)
+    ]
+    db_session.add_all(returns)
+    db_session.commit()
+    # Claimed in arrival order: the last one created arrives first.
+    expected_ids = [item.id for item in sorted(returns, key=lambda item: item.arrival_time)]
+
+    resolved = movement_service.resolve_due_movements(db_session, batch_size=2)
+    assert [item.id for item in resolved] == expected_ids
+    assert movement_service.resolve_due_movements(db_session, batch_size=2) == []
+
+    db_session.expire_all()
+    quantities = {
+        troop.unit_type: troop.quantity
+        for troop in db_session.query(models.Troop).filter_by(city_id=city.id)
+    }
+    assert quantities == {"basic_infantry": 10, "archer": 6}
+    assert (
+        db_session.query(models.Movement).filter_by(status="completed").count() == 5
+    )
@@ -0,0 +1,204 @@
+import socketserver
+import threading
+from datetime import timedelta
+
+import pytest
+
+from app import models
+from app.services import emailer, notification as notification_service, notification_outbox
+from app.utils import utc_now
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        server = self.server
+        server.connections += 1
+        self._reply("220 fake ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == "QUIT":
+                self._reply("221 bye")
+                return
+            if command in ("EHLO", "HELO"):
+                self._reply("250 fake")
+            elif command == "MAIL":
+                recipients = []
+                self._reply("250 ok")
+            elif command == "RCPT":
+                recipient = line.split(":", 1)[1].strip(" <>")
+                if recipient in server.reject:
+                    self._reply("550 no such user")
+                else:
+                    recipients.append(recipient)
+                    self._reply("250 ok")
+            elif command == "DATA":
+                self._reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                server.messages.extend(recipients)
+                self._reply("250 queued")
+            else:
+                self._reply("250 ok")
+
+
+@pytest.fixture()
+def fake_smtp(monkeypatch):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    server.reject = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(emailer.settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(emailer.settings, "smtp_port", server.server_address[1])
+    monkeypatch.setattr(emailer.settings, "smtp_use_starttls", False)
+    monkeypatch.setattr(emailer.settings, "smtp_username", "")
+    monkeypatch.setattr(emailer.settings, "from_email", "juego@example.com")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def dispatcher(monkeypatch):
+    published = []
+    monkeypatch.setattr(
+        notification_outbox.socket_manager,
+        "publish_to_users",
+        lambda user_ids, event, data: published.append((list(user_ids), event, data)),
+    )
+    dispatcher = notification_outbox.OutboxDispatcher(
+        notification_outbox.SessionLocal,
+        batch_size=50,
+        max_attempts=2,
+        retry_seconds=30,
+        poll_seconds=1,
+    )
+    dispatcher.published = published
+    return dispatcher
+
+
+def _players(db_session, count: int) -> list[models.User]:
+    players = [
+        models.User(
+            username=f"player{index}",
+            email=f"player{index}@example.com",
+            hashed_password="x",
+            email_notifications=True,
+        )
+        for index in range(count)
+    ]
+    db_session.add_all(players)
+    db_session.commit()
+    return players
+
+
+def test_outbox_rows_share_the_domain_transaction(db_session, user, dispatcher):
+    message = models.Message(sender_id=user.id, receiver_id=user.id, subject="s", content="c")
+    db_session.add(message)
+    notification_service.create_notification(
+        db_session,
+        user,
+        title="Nuevo mensaje",
+        body="Hola",
+        notification_type="message_received",
+        commit=False,
+    )
+    db_session.rollback()
+
+    assert db_session.query(models.Notification).count() == 0
+    assert db_session.query(models.NotificationOutbox).count() == 0
+    assert dispatcher.drain() == 0
+    assert dispatcher.published == []
+
+
+def test_batched_dispatch_reuses_one_smtp_connection(db_session, fake_smtp, dispatcher):
+    players = _players(db_session, 120)
+    world = db_session.query(models.World).first()
+    db_session.add_all(models.PlayerWorld(user_id=player.id, world_id=world.id) for player in players)
+    db_session.commit()
+
+    notification_service.notify_world(
+        db_session,
+        world.id,
+        title="Evento global iniciado",
+        body="El evento 'Luna de sangre' ha comenzado en tu mundo.",
+        notification_type="event_started",
+    )
+    notification_service.create_notification(
+        db_session,
+        players[0],
+        title="¡Estás bajo ataque!",
+        body="Tropas en camino.",
+        notification_type="attack_incoming",
+    )
+    assert db_session.query(models.Notification).count() == 121
+    assert db_session.query(models.NotificationOutbox).count() == 122
+
+    assert dispatcher.drain() == 122
+    assert dispatcher.batches == 3
+    assert fake_smtp.connections == 1
+    assert sorted(fake_smtp.messages) == sorted([players[0].email] + [player.email for player in players])
+    assert dispatcher.published == [([players[0].id], "notification", dispatcher.published[0][2])]
+    assert db_session.query(models.NotificationOutbox).count() == 0
+
+
+def test_failed_email_is_retried_with_backoff_then_given_up(db_session, fake_smtp, dispatcher):
+    rejected, accepted = _players(db_session, 2)
+    fake_smtp.reject.add(rejected.email)
+    for player in (rejected, accepted):
+        notification_service.create_notification(
+            db_session,
+            player,
+            title="¡Estás bajo ataque!",
+            body="Tropas en camino.",
+            notification_type="attack_incoming",
+        )
+
+    now = utc_now()
+    dispatcher.drain(now)
+    assert fake_smtp.messages == [accepted.email]
+    row = db_session.query(models.NotificationOutbox).one()
+    assert row.user_id == rejected.id
+    assert row.attempts == 1
+    assert row.failed_at is None
+    assert "550" in row.last_error
+
+    # Not due before its backoff has passed.
+    assert dispatcher.drain(now + timedelta(seconds=10)) == 0
+    assert dispatcher.drain(now + timedelta(seconds=31)) == 1
+    db_session.expire_all()
+    row = db_session.query(models.NotificationOutbox).one()
+    assert row.attempts == 2
+    assert row.failed_at is not None
+    assert dispatcher.drain(now + timedelta(days=1)) == 0
+
+    stats = notification_outbox.get_outbox_stats(db_session)
+    assert stats["failed"]["email"] == 1
+    assert stats["pending"] == {"socket": 0, "email": 0}
+
+
+def test_rows_claimed_by_another_dispatcher_are_not_sent_twice(db_session, user, dispatcher):
+    notification_service.create_notification(
+        db_session,
+        user,
+        title="Construcción completada",
+        body="Cuartel nivel 2",
+        notification_type="building_complete",
+    )
+    now = utc_now()
+    db_session.query(models.NotificationOutbox).update(
+        {"available_at": now + timedelta(seconds=notification_outbox.CLAIM_SECONDS)}
+    )
+    db_session.commit()
+
+    assert dispatcher.drain(now) == 0
+    # The claim lease expires if its dispatcher died mid-batch.
+    assert dispatcher.drain(now + timedelta(seconds=notification_outbox.CLAIM_SECONDS)) == 1
+    assert dispatcher.published[0][0] == [user.id]
@@ -65,6 +65,37 @@ def test_one_minute_is_one_sixtieth_of_hourly_rate(db_session, city, monkeypatch
     assert gains["iron"] == pytest.approx(10.0 / 60.0)
 
 
+def test_accrual_pays_each_part_of_the_window_at_the_event_rate_in_force(db_session, city, monkeypatch):
+    _freeze_time(monkeypatch)
+    city.wood = city.clay = city.iron = 0.0
+    city.last_production = FIXED_NOW - timedelta(hours=10)
+    db_session.add(
+        models.WorldEvent(
+            world_id=city.world_id,
+            name="Cosecha",
+            description="",
+            start_time=FIXED_NOW - timedelta(hours=6),
+            end_time=FIXED_NOW - timedelta(hours=4),
+            modifiers={"production_speed": 3.0},
+        )
+    )
+    db_session.commit()
+
+    # Idle through the whole event: 8 hours at x1 and 2 hours at x3.
+    assert production.project_resources(db_session, city)["wood"] == pytest.approx(15.0 * 14)
+
+    # Settled before the event: the event's hours are still paid at x3 later.
+    production.settle_resources(db_session, city, FIXED_NOW - timedelta(hours=9))
+    assert city.wood == pytest.approx(15.0)
+    assert production.project_resources(db_session, city)["wood"] == pytest.approx(15.0 * 14)
+
+    # Spending during the event does not extend its rate to the idle hours before it.
+    during = FIXED_NOW - timedelta(hours=5)
+    production.settle_resources(db_session, city, during)
+    assert city.wood == pytest.approx(15.0 * (4 + 1 * 3))
+    assert production.project_resources(db_session, city)["wood"] == pytest.approx(15.0 * 14)
+
+
 def test_world_resource_modifier_scales_hourly_rates(db_session, city):
     city.world.resource_modifier = 2.0
     db_session.commit()
@@ -125,3 +156,37 @@ def test_city_status_exposes_server_storage_and_hourly_rates(client, db_session,
     assert payload["production_per_hour"] == pytest.approx(
         {"wood": 15.0, "clay": 12.0, "iron": 10.0}
     )
+
+
+def test_reads_project_resources_without_writing_the_city(
+    client, db_session, city, user, monkeypatch
+):
+    _freeze_time(monkeypatch)
+    city.wood = city.clay = city.iron = 0.0
+    city.loyalty = 50.0
+    city.last_production = FIXED_NOW - timedelta(hours=2)
+    db_session.commit()
+
+    response = client.get(
+        f"/city/{city.id}",
+        params={"world_id": city.world_id},
+        headers=_auth_headers(user),
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["wood"] == pytest.approx(30.0)
+    assert payload["clay"] == pytest.approx(24.0)
+    assert payload["iron"] == pytest.approx(20.0)
+    assert payload["loyalty"] == pytest.approx(54.0)
+
+    db_session.expire_all()
+    stored = db_session.get(models.City, city.id)
+    assert stored.wood == 0.0
+    assert stored.loyalty == 50.0
+    assert stored.last_production.replace(tzinfo=timezone.utc) == FIXED_NOW - timedelta(hours=2)
+
+    # Settling for a write yields exactly what the read showed.
+    gains = production.settle_resources(db_session, stored, FIXED_NOW)
+    assert gains == pytest.approx({"wood": 30.0, "clay": 24.0, "iron": 20.0})
+    assert stored.last_production == FIXED_NOW
@@ -0,0 +1,249 @@
+"""Query-plan regression tests for the worker, anti-cheat and report feed hot paths.
+
+The real service functions run against a world seeded at a realistic size
+(nothing is due, so they only read). Every SELECT they issue is captured and
+explained with the same parameters; a test fails when the plan reads one of
+its hot tables sequentially instead of through an index.
+"""
+
+import json
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.scheduler import load_due_times
+from app.services import anticheat, building, market, movement, queue, troops, unit_catalog
+from app.services import report
+from app.services.sharding import QueueShard
+from app.utils import utc_now
+
+CITIES = 2_000
+BARBARIANS = 200
+MOVEMENTS = 60_000
+QUEUE_ITEMS = 10_000
+LOGS = 50_000
+REPORTS = 50_000
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(3)
+    now = utc_now().replace(tzinfo=None)
+    with engine.begin() as connection:
+        connection.execute(
+            models.World.__table__.insert().values(name="Plans", speed_modifier=1.0, resource_modifier=1.0)
+        )
+        connection.execute(
+            models.User.__table__.insert(),
+            [
+                {
+                    "username": f"player{index}",
+                    "email": f"player{index}@example.com",
+                    "hashed_password": "placeholder",
+                    "auth_version": 0,
+                }
+                for index in range(CITIES)
+            ],
+        )
+        connection.execute(
+            models.City.__table__.insert(),
+            [
+                {
+                    "name": f"City {index}",
+                    "owner_id": index + 1 if index < CITIES else None,
+                    "world_id": 1,
+                    "x": index % 100,
+                    "y": index // 100,
+                }
+                for index in range(CITIES + BARBARIANS)
+            ],
+        )
+        movements = []
+        for index in range(MOVEMENTS):
+            ongoing = index % 10 == 0
+            created_at = now - timedelta(minutes=rng.randint(1, 60 * 24 * 30))
+            movements.append(
+                {
+                    "origin_city_id": rng.randint(1, CITIES),
+                    "target_city_id": rng.randint(1, CITIES + BARBARIANS),
+                    "world_id": 1,
+                    "movement_type": rng.choice(("attack", "spy", "reinforce", "return", "transport")),
+                    "troops": {},
+                    "resources": {},
+                    "arrival_time": now + timedelta(minutes=rng.randint(1, 600))
+                    if ongoing
+                    else created_at + timedelta(minutes=30),
+                    "created_at": created_at,
+                    "status": "ongoing" if ongoing else "completed",
+                }
+            )
+        connection.execute(models.Movement.__table__.insert(), movements)
+        for table, name_column in (
+            (models.BuildingQueue.__table__, "building_type"),
+            (models.TroopQueue.__table__, "troop_type"),
+        ):
+            rows = []
+            for index in range(QUEUE_ITEMS):
+                row = {
+                    "city_id": index % CITIES + 1,
+                    name_column: f"item{index // CITIES}",
+                    "finish_time": now + timedelta(seconds=rng.randint(60, 86_400)),
+                }
+                row["target_level" if table.name == "building_queue" else "amount"] = 1
+                rows.append(row)
+            connection.execute(table.insert(), rows)
+        connection.execute(
+            models.Log.__table__.insert(),
+            [
+                {
+                    "user_id": rng.randint(1, CITIES),
+                    "action": rng.choice(("spy_result", "login", "movement:attack:1->2", "trade")),
+                    "details": "success_chance=0.500;success=False",
+                    "timestamp": now - timedelta(minutes=rng.randint(1, 60 * 24 * 30)),
+                }
+                for _ in range(LOGS)
+            ],
+        )
+        connection.execute(
+            models.Report.__table__.insert(),
+            [
+                {
+                    "city_id": (index % CITIES) + 1,
+                    "owner_id": (index % CITIES) + 1,
+                    "world_id": 1,
+                    "report_type": "battle",
+                    "content": "{}",
+                    "created_at": now - timedelta(minutes=rng.randint(1, 60 * 24 * 30)),
+                }
+                for index in range(REPORTS)
+            ],
+        )
+        connection.execute(text("ANALYZE"))
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def captured_selects():
+    statements = []
+
+    def record(_conn, _cursor, statement, parameters, _context, _executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _walks_primary_key(table: str, index: str | None) -> bool:
+    return index is None or index in (f"{table}_pkey", f"ix_{table}_id")
+
+
+def sequential_scans(db, statement, parameters) -> set:
+    """Tables the plan of ``statement`` reads in full.
+
+    A sequential scan counts, and so does a walk of the whole primary key
+    (the planner's way of honouring ``ORDER BY id`` without an index on the
+    filter). An ordered walk of any other index is fine: it stops at LIMIT.
+    """
+
+    connection = db.connection()
+    if engine.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scanned, nodes = set(), [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan" or (
+                node["Node Type"] in ("Index Scan", "Index Only Scan")
+                and "Index Cond" not in node
+                and _walks_primary_key(node["Relation Name"], node["Index Name"])
+            ):
+                scanned.add(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+        return scanned
+    scanned = set()
+    for *_, detail in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+        # "SCAN t", "SCAN t USING [COVERING] INDEX i", "SEARCH t USING INDEX i (...)";
+        # min()/max() without a usable index shows up as a bare "SEARCH t".
+        words = detail.split()
+        if words[0] not in ("SCAN", "SEARCH"):
+            continue
+        index = words[words.index("INDEX") + 1] if "INDEX" in words else None
+        if "KEY" in words:
+            index = f"{words[1]}_pkey"
+        if (words[0] == "SCAN" and _walks_primary_key(words[1], index)) or (
+            words[0] == "SEARCH" and index is None
+        ):
+            scanned.add(words[1])
+    return scanned
+
+
+def _city(db, city_id=1):
+    return db.get(models.City, city_id)
+
+
+HOT_QUERIES = {
+    "building_queues": (lambda db: building.process_building_queues(db), {"building_queue"}),
+    "troop_queues": (lambda db: troops.process_troop_queues(db), {"troop_queue"}),
+    "due_movements": (lambda db: movement.resolve_due_movements(db), {"movements"}),
+    "oldest_due_time": (
+        lambda db: queue.oldest_due_time(db, utc_now()),
+        {"building_queue", "troop_queue", "movements"},
+    ),
+    "oldest_due_time_city_shard": (
+        lambda db: queue.oldest_due_time(db, utc_now(), shard=QueueShard(0, 4, "city")),
+        {"building_queue", "troop_queue", "movements"},
+    ),
+    "load_due_times": (lambda db: load_due_times(db, 100), {"building_queue", "troop_queue", "movements"}),
+    "merchants": (lambda db: market._get_available_merchants(db, _city(db)), {"movements"}),
+    "population_away": (lambda db: unit_catalog.get_population_used(db, _city(db)), {"movements"}),
+    "lucky_spy_reports": (
+        lambda db: anticheat.check_spy_result(db, db.get(models.User, 1), 0.05, True),
+        {"logs"},
+    ),
+    "user_cities": (lambda db: db.get(models.User, 2).cities, {"cities"}),
+    "report_feed": (
+        lambda db: report.list_reports(db, 3, 1, cursor=report.encode_cursor(utc_now(), 0), limit=20),
+        {"reports"},
+    ),
+    "unread_reports": (
+        lambda db: report.unread_reports(
+            db, models.PlayerWorld(user_id=3, world_id=1), report.encode_cursor(utc_now() - timedelta(days=7), 0)
+        ),
+        {"reports"},
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_indexes(seeded, name):
+    callback, hot_tables = HOT_QUERIES[name]
+    seeded.expire_all()
+    with captured_selects() as statements:
+        callback(seeded)
+    seeded.rollback()
+
+    explained = [
+        (statement, parameters)
+        for statement, parameters in statements
+        if any(f"FROM {table}" in statement or f"JOIN {table}" in statement for table in hot_tables)
+    ]
+    assert explained, f"{name} issued no query on {sorted(hot_tables)}"
+    for statement, parameters in explained:
+        scanned = sequential_scans(seeded, statement, parameters) & hot_tables
+        assert not scanned, f"{name} scans {sorted(scanned)} sequentially:\n{statement}"
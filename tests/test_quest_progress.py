@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import models
+from app.database import engine
+from app.services import achievement, production, progress_events, quest
+
+
+@contextmanager
+def _statements():
+    statements = []
+
+    def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _progress(db_session, user, quest_id):
+    db_session.expire_all()
+    return (
+        db_session.query(models.QuestProgress)
+        .join(models.Quest)
+        .filter(models.Quest.quest_id == quest_id, models.QuestProgress.user_id == user.id)
+        .one()
+    )
+
+
+def test_events_only_touch_the_progress_of_matching_definitions(db_session, user):
+    quest.handle_event(db_session, user, "troops_trained", {"unit_type": "basic_infantry", "amount": 6})
+
+    with _statements() as statements:
+        quest.handle_event(db_session, user, "troops_trained", {"unit_type": "basic_infantry", "amount": 6})
+        quest.handle_event(db_session, user, "market_opened")
+    assert not any("FROM quests" in statement or "FROM achievements" in statement for statement in statements)
+    assert sum("FROM quest_progress" in statement for statement in statements) == 1
+
+    progress = _progress(db_session, user, "tutorial_troops")
+    assert progress.status == "completed"
+    assert progress.progress_data == {"trained": 12}
+    assert db_session.query(models.QuestProgress).count() == 1
+
+
+def test_resource_collection_is_coalesced_into_one_batched_write(db_session, user, city):
+    db_session.add(
+        models.Achievement(
+            title="Recolector",
+            description="Recolecta 1500 recursos",
+            category="economy",
+            requirement_type="resources_collected",
+            requirement_value=1500,
+            reward_type="title",
+            reward_value="Recolector",
+        )
+    )
+    db_session.commit()
+    db_session.refresh(city)
+    progress_events.invalidate()
+
+    with _statements() as statements:
+        for _ in range(4):
+            production.record_resource_gains(db_session, city, {"wood": 150.0, "clay": 100.0, "iron": 50.5})
+    assert statements == []
+    buffer = progress_events.get_buffer()
+    assert buffer.pending() == {user.id: 1200}
+
+    assert buffer.flush() == 1
+    assert buffer.pending() == {}
+    gatherer = _progress(db_session, user, "gatherer")
+    assert (gatherer.status, gatherer.progress_data) == ("completed", {"collected": 1200})
+    (_, collected), = achievement.get_user_achievements(db_session, user)
+    assert (collected.current_progress, collected.status) == (1200, "pending")
+
+    production.record_resource_gains(db_session, city, {"wood": 400.0})
+    progress_events.flush_progress()
+    db_session.expire_all()
+    (_, collected), = achievement.get_user_achievements(db_session, user)
+    assert (collected.current_progress, collected.status) == (1500, "completed")
@@ -12,3 +12,88 @@ def test_ranking_sorts_by_points(db_session, city, second_city):
     entries = ranking.get_player_ranking(db_session, world_id)
     assert entries
     assert entries[0]["points"] >= entries[-1]["points"]
+
+
+def test_ranking_reads_materialized_scores_in_pages(db_session, user, city):
+    world_id = city.world_id
+    rival = models.User(username="rival", email="rival@example.com", hashed_password="x")
+    db_session.add(rival)
+    db_session.commit()
+    rival_city = models.City(name="Rival", owner_id=rival.id, world_id=world_id, x=9, y=9)
+    db_session.add(rival_city)
+    db_session.commit()
+    db_session.add_all(
+        [
+            models.Building(city_id=city.id, name="town_hall", level=2),
+            models.Building(city_id=rival_city.id, name="town_hall", level=4),
+        ]
+    )
+    db_session.commit()
+    ranking.rebuild_scores(db_session, world_id)
+    db_session.commit()
+
+    first_page = ranking.get_player_ranking(db_session, world_id, limit=1)
+    second_page = ranking.get_player_ranking(db_session, world_id, limit=1, offset=1)
+
+    assert [entry["user_id"] for entry in first_page] == [rival.id]
+    assert [entry["user_id"] for entry in second_page] == [user.id]
+    assert first_page[0]["points"] == 20
+    assert ranking.check_score_consistency(db_session, world_id) == []
+
+
+def test_queue_completion_and_battle_keep_scores_consistent(db_session, user, city, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from app.services import building, combat, movement, troops
+
+    world_id = city.world_id
+    city.wood = city.clay = city.iron = 5000
+    db_session.add_all(
+        [
+            models.Building(city_id=city.id, name="barracks", level=1),
+            models.Troop(city_id=city.id, unit_type="basic_infantry", quantity=10),
+        ]
+    )
+    db_session.commit()
+    ranking.rebuild_scores(db_session, world_id)
+    db_session.commit()
+
+    building.queue_upgrade(db_session, city, "barracks")
+    troops.queue_training(db_session, city, "basic_infantry", 2)
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.query(models.BuildingQueue).update({models.BuildingQueue.finish_time: past})
+    db_session.query(models.TroopQueue).update({models.TroopQueue.finish_time: past})
+    db_session.commit()
+    building.process_building_queues(db_session)
+    troops.process_troop_queues(db_session)
+    assert ranking.check_score_consistency(db_session, world_id) == []
+
+    barbarian = models.City(name="Barbarians", owner_id=None, world_id=world_id, x=2, y=0)
+    db_session.add(barbarian)
+    db_session.commit()
+    db_session.add(models.Troop(city_id=barbarian.id, unit_type="basic_infantry", quantity=3))
+    db_session.commit()
+    monkeypatch.setattr(combat, "_luck", lambda: 0.0)
+    monkeypatch.setattr(movement, "_run_resolution_effect", lambda *args, **kwargs: None)
+    monkeypatch.setattr(movement, "_run_dispatch_side_effects", lambda *args, **kwargs: None)
+
+    outgoing = movement.send_movement(
+        db_session,
+        city,
+        barbarian.id,
+        "attack",
+        troops={"basic_infantry": 6},
+    )
+    assert ranking.check_score_consistency(db_session, world_id) == []
+
+    outgoing.arrival_time = past
+    db_session.commit()
+    movement.resolve_due_movements(db_session)
+    db_session.query(models.Movement).filter_by(status="ongoing").update(
+        {models.Movement.arrival_time: past}
+    )
+    db_session.commit()
+    movement.resolve_due_movements(db_session)
+
+    db_session.expire_all()
+    assert ranking.check_score_consistency(db_session, world_id) == []
@@ -0,0 +1,76 @@
+from app.database import engine
+from app.services import rate_limit
+
+POLICY = rate_limit.RateLimit("test", 3, 10)
+
+
+class Clock:
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_sliding_window_counter_weights_the_previous_window():
+    clock = Clock()
+    limiter = rate_limit.Limiter(rate_limit.MemoryBackend(max_keys=100), clock=clock)
+
+    assert [limiter.allow(POLICY, "ip") for _ in range(4)] == [True, True, True, False]
+    denied = limiter.hit(POLICY, "ip")
+    assert not denied.allowed and 0 < denied.retry_after <= 10
+    assert limiter.allow(POLICY, "other-ip")
+
+    # Halfway into the next window half of the previous hits still count.
+    clock.now += 15
+    assert [limiter.allow(POLICY, "ip") for _ in range(2)] == [True, False]
+    clock.now += 20
+    assert [limiter.allow(POLICY, "ip") for _ in range(4)] == [True, True, True, False]
+    assert limiter.stats()["policies"]["test"] == {"allowed": 8, "denied": 4}
+
+
+def test_memory_backend_evicts_idle_and_least_recent_keys():
+    clock = Clock()
+    backend = rate_limit.MemoryBackend(max_keys=50)
+    limiter = rate_limit.Limiter(backend, clock=clock)
+
+    for index in range(200):
+        limiter.allow(POLICY, f"scraper-{index}")
+    assert backend.size() == 50
+
+    clock.now += 3 * POLICY.window_seconds
+    for _ in range(20):
+        limiter.allow(POLICY, "regular")
+        clock.now += 1
+    assert backend.size() == 1
+
+
+def test_database_backend_shares_limits_between_processes(db_session):
+    clock = Clock()
+    first = rate_limit.Limiter(rate_limit.DatabaseBackend(engine), clock=clock)
+    second = rate_limit.Limiter(rate_limit.DatabaseBackend(engine), clock=clock)
+
+    assert first.allow(POLICY, "ip")
+    assert second.allow(POLICY, "ip")
+    assert first.allow(POLICY, "ip")
+    assert not second.allow(POLICY, "ip")
+    assert not first.allow(POLICY, "ip")
+    assert second.allow(POLICY, "elsewhere")
+
+    clock.now += 2 * POLICY.window_seconds
+    assert first.allow(POLICY, "ip")
+    # Rows of windows that can no longer matter are pruned.
+    assert first.stats()["keys"] == 2
+    clock.now += 100
+    first.allow(POLICY, "late")
+    assert second.backend.size() == 1
+
+
+def test_auth_email_endpoint_answers_429_with_retry_after(client):
+    payload = {"email": "nobody@example.com"}
+    for _ in range(rate_limit.AUTH_EMAIL.limit):
+        assert client.post("/auth/forgot-password", json=payload).status_code == 200
+
+    response = client.post("/auth/forgot-password", json=payload)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
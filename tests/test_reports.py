@@ -2,7 +2,9 @@ from datetime import timedelta
 import json
 from sqlalchemy.orm import Session
 from app import models
-from app.services import movement
+from app.routers.auth import create_access_token
+from app.services import movement, world_membership
+from app.services import report as report_service
 from app.utils import utc_now
 
 def test_trade_report_generation(db_session: Session, city: models.City, second_city: models.City):
@@ -99,3 +101,113 @@ def test_reinforce_report_generation(db_session: Session, city: models.City, sec
     content = json.loads(str(report.content))
     assert content["troops"] == troops
     assert content["sender"]["name"] == city.name
+
+
+def _headers(user: models.User) -> dict[str, str]:
+    token = create_access_token({"sub": user.username, "type": "access", "ver": user.auth_version})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _deliver(db_session, city, created_at, loot=0):
+    report = report_service.build_report(
+        city,
+        world_id=city.world_id,
+        report_type="trade",
+        content=json.dumps(
+            {
+                "type": "trade",
+                "sender": {"id": city.id, "name": city.name},
+                "receiver": {"id": city.id, "name": "Market"},
+                "resources": {"wood": loot, "clay": 0, "iron": 0},
+            }
+        ),
+        attacker_city_id=city.id,
+        defender_city_id=city.id,
+    )
+    report.created_at = created_at
+    db_session.add(report)
+    db_session.commit()
+    return report.id
+
+
+def test_battle_reports_are_summarized_for_each_side(db_session: Session, city: models.City, second_city: models.City):
+    content = json.dumps(
+        {
+            "type": "battle",
+            "attacker": {"id": city.id, "name": city.name, "initial": {"axeman": 10}, "losses": {"axeman": 4}},
+            "defender": {"id": second_city.id, "name": second_city.name, "initial": {"spearman": 5}, "losses": {"spearman": 5}},
+            "loot": {"wood": 100, "clay": 50, "iron": 25},
+        }
+    )
+    attacker_report, defender_report = (
+        report_service.build_report(
+            recipient,
+            world_id=city.world_id,
+            report_type="battle",
+            content=content,
+            attacker_city_id=city.id,
+            defender_city_id=second_city.id,
+        )
+        for recipient in (city, second_city)
+    )
+
+    assert (attacker_report.outcome, defender_report.outcome) == ("victory", "defeat")
+    assert attacker_report.loot_total == defender_report.loot_total == 175
+    assert (attacker_report.attacker_name, attacker_report.defender_name) == (city.name, second_city.name)
+    assert attacker_report.owner_id == city.owner_id
+
+
+def test_report_feed_pages_newest_first_and_loads_content_on_demand(client, db_session: Session, user: models.User):
+    world = db_session.query(models.World).first()
+    membership = world_membership.join_world(db_session, user, world.id)
+    city = membership.starting_city
+    now = utc_now()
+    # Two reports share a timestamp: the id breaks the tie.
+    ids = [_deliver(db_session, city, now - timedelta(minutes=minutes), loot=minutes) for minutes in (5, 4, 3, 3, 1)]
+    headers = _headers(user)
+
+    seen, cursor = [], None
+    while True:
+        params = {"world_id": world.id, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/report/", params=params, headers=headers).json()
+        assert all("content" not in summary for summary in page["reports"])
+        seen.extend(summary["id"] for summary in page["reports"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [ids[4], ids[3], ids[2], ids[1], ids[0]]
+
+    detail = client.get(f"/report/{ids[0]}", headers=headers).json()
+    assert detail["loot_total"] == 5
+    assert json.loads(detail["content"])["resources"]["wood"] == 5
+
+    stranger = models.User(username="stranger", email="stranger@example.com", hashed_password="x", is_verified=True)
+    db_session.add(stranger)
+    db_session.commit()
+    assert client.get(f"/report/{ids[0]}", headers=_headers(stranger)).status_code == 404
+    assert client.get("/report/", params={"world_id": world.id}, headers=_headers(stranger)).json()["reports"] == []
+    assert client.get("/report/", params={"world_id": world.id, "cursor": "bad"}, headers=headers).status_code == 400
+
+
+def test_unread_cursor_only_moves_forward(client, db_session: Session, user: models.User):
+    world = db_session.query(models.World).first()
+    membership = world_membership.join_world(db_session, user, world.id)
+    city = membership.starting_city
+    now = utc_now()
+    for minutes in (3, 2):
+        _deliver(db_session, city, now - timedelta(minutes=minutes))
+    headers = _headers(user)
+    params = {"world_id": world.id}
+
+    status = client.get("/report/unread", params=params, headers=headers).json()
+    assert status["unread"] == 2 and status["read_cursor"] is None
+    older = report_service.encode_cursor(now - timedelta(minutes=10), 0)
+
+    read = client.post("/report/read", params={**params, "cursor": status["latest_cursor"]}, headers=headers).json()
+    assert read["unread"] == 0
+    assert client.post("/report/read", params={**params, "cursor": older}, headers=headers).json()["unread"] == 0
+
+    _deliver(db_session, city, now)
+    status = client.get("/report/unread", params=params, headers=headers).json()
+    assert status["unread"] == 1
+    assert client.get("/report/unread", params={**params, "since": older}, headers=headers).json()["unread"] == 3
@@ -0,0 +1,99 @@
+import os
+from datetime import timedelta
+
+from app import models
+from app.services import retention
+from app.utils import utc_now
+
+
+def _history(db_session, user, world_id, created_at):
+    db_session.add_all(
+        [
+            models.Log(user_id=user.id, action="login", details="ok", timestamp=created_at),
+            models.Report(world_id=world_id, report_type="battle", content="{}", created_at=created_at),
+            models.ChatMessage(user_id=user.id, world_id=world_id, channel="world", content="hola", timestamp=created_at),
+            models.Notification(user_id=user.id, title="t", body="b", type="info", created_at=created_at),
+        ]
+    )
+
+
+def _archived(directory, table):
+    rows = []
+    for path in sorted((directory / table).rglob("*.jsonl.gz")):
+        rows.extend(retention.read_archive(path))
+    return rows
+
+
+def _retention_settings(monkeypatch, tmp_path):
+    monkeypatch.setenv("ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setenv("RETENTION_BATCH_SIZE", "2")
+    monkeypatch.setenv("RETENTION_LOGS_DAYS", "90")
+    monkeypatch.setenv("RETENTION_REPORTS_DAYS", "90")
+    monkeypatch.setenv("RETENTION_CHAT_DAYS", "30")
+    monkeypatch.setenv("RETENTION_NOTIFICATIONS_DAYS", "0")
+
+
+def test_expired_rows_are_archived_in_batches_then_deleted(db_session, user, tmp_path, monkeypatch):
+    _retention_settings(monkeypatch, tmp_path)
+    world = db_session.query(models.World).first()
+    now = utc_now()
+    for age in (200, 120, 100, 60, 1):
+        _history(db_session, user, world.id, now - timedelta(days=age))
+    db_session.commit()
+
+    archived = retention.run(db_session, now=now)
+
+    assert archived == {"logs": 3, "reports": 3, "chat_messages": 4}
+    assert db_session.query(models.Log).count() == 2
+    assert db_session.query(models.ChatMessage).count() == 1
+    # Retention 0 keeps notifications forever.
+    assert db_session.query(models.Notification).count() == 5
+
+    logs = _archived(tmp_path, "logs")
+    assert [row["details"] for row in logs] == ["ok"] * 3
+    assert len({row["id"] for row in logs}) == 3
+    assert len(list((tmp_path / "logs").rglob("*.jsonl.gz"))) == 2
+    assert retention.run(db_session, now=now) == {"logs": 0, "reports": 0, "chat_messages": 0}
+
+
+def test_rerun_after_interrupted_delete_rewrites_the_same_archive(db_session, user, tmp_path, monkeypatch):
+    _retention_settings(monkeypatch, tmp_path)
+    world = db_session.query(models.World).first()
+    now = utc_now()
+    for age in (300, 200, 100):
+        _history(db_session, user, world.id, now - timedelta(days=age))
+    db_session.commit()
+
+    # A previous run wrote the first batch and died before deleting it.
+    spec = next(spec for spec in retention.RETAINED_TABLES if spec.name == "reports")
+    first_batch = [
+        {column.name: getattr(report, column.name) for column in spec.table.columns}
+        for report in db_session.query(models.Report).order_by(models.Report.created_at).limit(2)
+    ]
+    retention.write_archive(tmp_path, spec, first_batch)
+
+    retention.run(db_session, now=now)
+
+    reports = _archived(tmp_path, "reports")
+    assert sorted(row["id"] for row in reports) == sorted({row["id"] for row in reports})
+    assert len(reports) == 3
+    assert db_session.query(models.Report).count() == 0
+
+
+def test_partition_tables_are_not_models():
+    assert retention.is_partition("logs_p202610")
+    assert retention.is_partition("chat_messages_default")
+    assert not retention.is_partition("logs")
+    assert not retention.is_partition("player_scores_p202610")
+
+
+def test_archives_older_than_their_retention_are_purged(tmp_path):
+    spec = retention.RETAINED_TABLES[0]
+    now = utc_now()
+    old = retention.write_archive(tmp_path, spec, [{"id": 1, "timestamp": now - timedelta(days=400)}])
+    recent = retention.write_archive(tmp_path, spec, [{"id": 2, "timestamp": now}])
+    stale = (now - timedelta(days=400)).timestamp()
+    os.utime(old, (stale, stale))
+
+    assert retention.purge_archives(tmp_path, now - timedelta(days=365)) == 1
+    assert not old.exists() and recent.exists()
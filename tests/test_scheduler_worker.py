@@ -1,3 +1,5 @@
+import threading
+import time
 from contextlib import contextmanager
 from datetime import timedelta
 
@@ -74,3 +76,176 @@ def test_completed_troop_queue_is_idempotent_on_retry(db_session, city):
     assert len(first) == 1
     assert second == []
     assert trained.quantity == 4
+
+
+def test_queue_wakeup_loop_runs_only_when_an_item_is_due(db_session, city, monkeypatch):
+    """The worker sleeps until the earliest due time and records lateness."""
+
+    now = utc_now()
+    db_session.add_all(
+        [
+            models.TroopQueue(
+                city_id=city.id,
+                troop_type="basic_infantry",
+                amount=1,
+                finish_time=now - timedelta(seconds=3),
+            ),
+            models.TroopQueue(
+                city_id=city.id,
+                troop_type="archer",
+                amount=1,
+                finish_time=now + timedelta(hours=1),
+            ),
+        ]
+    )
+    db_session.commit()
+
+    runs = []
+
+    def run_job():
+        runs.append(utc_now())
+        return scheduler_module._run_database_job(
+            "queue_processing", scheduler_module.queue_service.process_all_queues
+        )
+
+    monkeypatch.setattr(
+        scheduler_module.queue_service.notification_service,
+        "create_notification",
+        lambda *args, **kwargs: None,
+    )
+    loop = scheduler_module.QueueWakeupLoop(
+        poll_seconds=5.0, resync_seconds=60.0, preload_limit=10, run_job=run_job
+    )
+    loop._refresh()
+    assert len(loop.due_times) == 2
+
+    assert loop.tick() is True
+    assert len(runs) == 1
+    # Only the future item is left, so the next tick does not touch the DB.
+    assert len(loop.due_times) == 1
+    assert loop.due_times.peek() > utc_now()
+    assert loop.tick() is False
+    assert len(runs) == 1
+
+    lateness = loop.lateness.snapshot()
+    assert lateness["count"] == 1
+    assert lateness["max_seconds"] >= 3.0
+
+
+def test_queue_wakeup_loop_backs_off_from_items_it_cannot_resolve(db_session, city, monkeypatch):
+    """Frozen worlds are not preloaded, and a run that resolves nothing polls."""
+
+    db_session.add(
+        models.BuildingQueue(
+            city_id=city.id,
+            building_type="barracks",
+            target_level=1,
+            finish_time=utc_now() - timedelta(seconds=1),
+        )
+    )
+    city.world.is_active = False
+    db_session.commit()
+
+    runs = []
+
+    def run_job():
+        runs.append(utc_now())
+        return scheduler_module._run_database_job(
+            "queue_processing", scheduler_module.queue_service.process_all_queues
+        )
+
+    loop = scheduler_module.QueueWakeupLoop(
+        poll_seconds=0.2, resync_seconds=60.0, preload_limit=10, run_job=run_job
+    )
+    loop._refresh()
+    assert len(loop.due_times) == 0
+    assert loop.tick() is False
+
+    # A job that keeps leaving the item due must not be rerun back to back.
+    city.world.is_active = True
+    db_session.commit()
+    loop = scheduler_module.QueueWakeupLoop(
+        poll_seconds=0.2, resync_seconds=60.0, preload_limit=10, run_job=lambda: runs.append(utc_now()) or True
+    )
+    loop.start()
+    time.sleep(1.0)
+    loop.stop()
+
+    assert loop._stalled
+    assert 1 <= len(runs) <= 12
+
+
+def test_sharded_workers_process_every_queue_exactly_once(db_session, user, monkeypatch):
+    """Several in-process workers split the shards and never double-apply."""
+
+    monkeypatch.setenv("QUEUE_SHARD_COUNT", "4")
+    monkeypatch.setattr(
+        scheduler_module.queue_service.notification_service,
+        "create_notification",
+        lambda *args, **kwargs: None,
+    )
+    scheduler_module.shard_metrics.reset()
+
+    worlds = [db_session.query(models.World).first()]
+    for index in range(3):
+        world = models.World(name=f"Shard {index}", speed_modifier=1.0, resource_modifier=1.0)
+        db_session.add(world)
+        worlds.append(world)
+    db_session.flush()
+
+    due = utc_now() - timedelta(seconds=2)
+    cities = []
+    for world in worlds:
+        city = models.City(name=f"Capital {world.id}", owner_id=user.id, world_id=world.id, x=0, y=0)
+        db_session.add(city)
+        db_session.flush()
+        cities.append(city)
+        db_session.add(
+            models.TroopQueue(city_id=city.id, troop_type="archer", amount=3, finish_time=due)
+        )
+        db_session.add(
+            models.Movement(
+                origin_city_id=city.id,
+                target_city_id=city.id,
+                world_id=world.id,
+                movement_type="return",
+                troops={"basic_infantry": 2},
+                resources={},
+                spy_count=0,
+                arrival_time=due,
+                speed_used=1.0,
+                status="ongoing",
+            )
+        )
+    db_session.commit()
+
+    barrier = threading.Barrier(3)
+    results = []
+
+    def worker():
+        barrier.wait(timeout=5)
+        results.append(scheduler_module.run_queue_processing_job())
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+        assert not thread.is_alive()
+
+    # Leftovers, if any, are picked up by a later run; nothing runs twice.
+    scheduler_module.run_queue_processing_job()
+
+    db_session.expire_all()
+    for city in cities:
+        quantities = {
+            troop.unit_type: troop.quantity
+            for troop in db_session.query(models.Troop).filter_by(city_id=city.id)
+        }
+        assert quantities == {"archer": 3, "basic_infantry": 2}
+    assert db_session.query(models.TroopQueue).count() == 0
+    assert db_session.query(models.Movement).filter_by(status="ongoing").count() == 0
+
+    metrics = scheduler_module.shard_metrics.snapshot()
+    assert sum(entry["items"] for entry in metrics.values()) == 2 * len(worlds)
+    assert set(metrics) == {f"queue_processing:{index}" for index in range(4)}
@@ -0,0 +1,190 @@
+from datetime import timedelta
+
+import pytest
+
+from app import models
+from app.services import barbarian_ai, movement, troops
+from app.services import queue as queue_service
+from app.services import season as season_service
+from app.utils import utc_now
+
+
+def _world_with_players(db_session, name: str, points: list[int]) -> tuple[models.World, list[models.User]]:
+    world = models.World(name=name, speed_modifier=1.0, resource_modifier=1.0)
+    db_session.add(world)
+    db_session.flush()
+    players = []
+    for index, score in enumerate(points):
+        player = models.User(
+            username=f"{name}-{index}",
+            email=f"{name}-{index}@example.com",
+            hashed_password="x",
+        )
+        db_session.add(player)
+        db_session.flush()
+        city = models.City(name=f"{name} {index}", owner_id=player.id, world_id=world.id, x=index, y=0)
+        db_session.add(city)
+        db_session.flush()
+        db_session.add_all(
+            [
+                models.Building(city_id=city.id, name="barracks", level=2),
+                models.Troop(city_id=city.id, unit_type="basic_infantry", quantity=5),
+                models.PlayerScore(user_id=player.id, world_id=world.id, points=score),
+            ]
+        )
+        players.append(player)
+    alliance = models.Alliance(name=f"{name} guard", leader_id=players[0].id, world_id=world.id)
+    db_session.add(alliance)
+    db_session.flush()
+    db_session.add(models.AllianceMember(alliance_id=alliance.id, user_id=players[0].id))
+    db_session.commit()
+    return world, players
+
+
+def _counts(db_session, world_id: int) -> dict:
+    cities = db_session.query(models.City.id).filter(models.City.world_id == world_id)
+    return {
+        "cities": cities.count(),
+        "buildings": db_session.query(models.Building).filter(models.Building.city_id.in_(cities)).count(),
+        "alliances": db_session.query(models.Alliance).filter(models.Alliance.world_id == world_id).count(),
+        "scores": db_session.query(models.PlayerScore).filter(models.PlayerScore.world_id == world_id).count(),
+    }
+
+
+def test_rollover_snapshots_ranking_in_chunks_and_only_resets_its_world(db_session):
+    world, players = _world_with_players(db_session, "north", [40, 90, 90, 10, 70])
+    other, _ = _world_with_players(db_session, "south", [5, 15])
+    season_service.start_new_season(db_session, str(world.id), "Primavera")
+    before_other = _counts(db_session, other.id)
+
+    progress = []
+    results = season_service.end_current_season(
+        db_session,
+        str(world.id),
+        chunk_size=2,
+        on_progress=lambda season: progress.append((season.rollover_stage, season.rollover_rows)),
+    )
+
+    ranked = [(result.rank, result.user_id, result.points) for result in results]
+    assert ranked == [
+        (1, players[1].id, 90),
+        (2, players[2].id, 90),
+        (3, players[4].id, 70),
+        (4, players[0].id, 40),
+        (5, players[3].id, 10),
+    ]
+    assert results[3].alliance_name == "north guard"
+    assert results[0].get_rewards() == ["legendary_banner", "golden_theme", "dragon_emblem"]
+    assert [stage for stage, _ in progress[:3]] == ["snapshot"] * 3
+    assert progress[-1][0] == "reset"
+
+    assert _counts(db_session, world.id) == {"cities": 0, "buildings": 0, "alliances": 0, "scores": 0}
+    assert _counts(db_session, other.id) == before_other
+    season = db_session.query(models.Season).one()
+    assert (season.is_active, season.rollover_stage) == (False, "done")
+    assert season.rollover_rows == progress[-1][1]
+
+
+def test_interrupted_rollover_resumes_without_duplicate_results(db_session):
+    world, players = _world_with_players(db_session, "north", [50, 40, 30, 20, 10])
+    season_service.start_new_season(db_session, str(world.id), "Verano")
+
+    def crash_after_first_chunk(season):
+        if season.rollover_rows >= 2:
+            raise RuntimeError("worker killed")
+
+    with pytest.raises(RuntimeError):
+        season_service.end_current_season(
+            db_session, str(world.id), chunk_size=2, on_progress=crash_after_first_chunk
+        )
+    db_session.rollback()
+    with pytest.raises(Exception) as blocked:
+        season_service.start_new_season(db_session, str(world.id), "Otoño")
+    assert blocked.value.status_code == 409
+
+    results = season_service.end_current_season(db_session, str(world.id), chunk_size=2)
+
+    assert [result.user_id for result in results] == [player.id for player in players]
+    assert [result.rank for result in results] == [1, 2, 3, 4, 5]
+    assert _counts(db_session, world.id)["cities"] == 0
+
+
+def test_rollover_freezes_the_world_and_clears_rows_written_while_it_runs(db_session, monkeypatch):
+    world, players = _world_with_players(db_session, "north", [50, 40, 30, 20, 10])
+    season_service.start_new_season(db_session, str(world.id), "Invierno")
+    cities = {
+        city.owner_id: city
+        for city in db_session.query(models.City).filter(models.City.world_id == world.id)
+    }
+    barbarians = models.City(name="Barbarians", owner_id=None, world_id=world.id, x=9, y=9, wood=500)
+    db_session.add(barbarians)
+    db_session.add(
+        models.TroopQueue(
+            city_id=cities[players[3].id].id,
+            troop_type="basic_infantry",
+            amount=100,
+            finish_time=utc_now() - timedelta(minutes=1),
+        )
+    )
+    db_session.commit()
+    barbarian_id = barbarians.id
+    written = []
+
+    def write_between_chunks(season):
+        if season.rollover_stage == "snapshot":
+            with pytest.raises(ValueError):
+                movement.send_movement(
+                    db_session,
+                    cities[players[4].id],
+                    cities[players[0].id].id,
+                    "attack",
+                    {"basic_infantry": 1},
+                )
+            with pytest.raises(ValueError):
+                troops.queue_training(db_session, cities[players[4].id], "basic_infantry", 1)
+            assert queue_service.process_all_queues(db_session)["troops"] == []
+            barbarian_ai.process_barbarian_growth(db_session)
+        elif season.rollover_step == 3 and not written:
+            # A request that passed its checks before the freeze commits late.
+            city = cities[players[1].id]
+            db_session.add_all(
+                [
+                    models.Troop(city_id=city.id, unit_type="archer", quantity=3),
+                    models.TroopQueue(
+                        city_id=city.id,
+                        troop_type="archer",
+                        amount=1,
+                        finish_time=utc_now() + timedelta(hours=1),
+                    ),
+                    models.Movement(
+                        origin_city_id=city.id,
+                        target_city_id=cities[players[2].id].id,
+                        world_id=world.id,
+                        movement_type="reinforce",
+                        arrival_time=utc_now() + timedelta(hours=1),
+                    ),
+                ]
+            )
+            written.append(city.id)
+
+    results = season_service.end_current_season(
+        db_session, str(world.id), chunk_size=2, on_progress=write_between_chunks
+    )
+
+    assert written
+    assert [(result.user_id, result.points) for result in results] == [
+        (player.id, points) for player, points in zip(players, [50, 40, 30, 20, 10])
+    ]
+    assert _counts(db_session, world.id)["cities"] == 0
+    assert db_session.query(models.Troop).count() == 0
+    assert db_session.query(models.TroopQueue).count() == 0
+    assert db_session.query(models.Movement).count() == 0
+    assert db_session.get(models.City, barbarian_id) is None
+    db_session.refresh(world)
+    assert not world.is_active
+
+    later = utc_now() + timedelta(days=1)
+    monkeypatch.setattr(season_service, "utc_now", lambda: later)
+    season_service.start_new_season(db_session, str(world.id), "Primavera")
+    db_session.refresh(world)
+    assert world.is_active
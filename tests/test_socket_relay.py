@@ -0,0 +1,82 @@
+import asyncio
+import json
+import threading
+
+from app.services import message_bus, socket_manager
+
+
+def test_bus_payloads_are_packed_under_the_notify_limit():
+    messages = [
+        message_bus.make_message("notification", {"body": "x" * 300}, [f"user_{index}"])
+        for index in range(50)
+    ]
+
+    payloads = message_bus.encode_batches(messages, limit=2000)
+
+    assert len(payloads) > 1
+    assert all(len(payload.encode("utf-8")) <= 2000 for payload in payloads)
+    decoded = [message for payload in payloads for message in json.loads(payload)]
+    assert [message["rooms"] for message in decoded] == [message["rooms"] for message in messages]
+
+
+def test_relay_groups_identical_events_into_one_emit(monkeypatch):
+    emitted = []
+
+    async def fake_emit(event, data, room=None):
+        emitted.append((event, data, room))
+
+    monkeypatch.setattr(socket_manager.sio, "emit", fake_emit)
+    relay = socket_manager.EventRelay()
+    world_event = {"title": "Evento global iniciado"}
+    messages = [
+        message_bus.make_message("notification", world_event, [f"user_{user_id}"])
+        for user_id in (3, 1, 2)
+    ]
+    messages.append(message_bus.make_message("notification", {"title": "Otro"}, ["user_1"]))
+
+    asyncio.run(relay.deliver(messages))
+
+    assert emitted == [
+        ("notification", world_event, ["user_1", "user_2", "user_3"]),
+        ("notification", {"title": "Otro"}, ["user_1"]),
+    ]
+    assert relay.metrics()["delivered"] == 4
+    assert relay.metrics()["emits"] == 2
+
+
+def test_events_published_from_a_worker_thread_reach_the_relay(monkeypatch):
+    emitted = []
+    delivered = threading.Event()
+
+    async def fake_emit(event, data, room=None):
+        emitted.append((event, data, room))
+        delivered.set()
+
+    publisher = message_bus.BatchingPublisher(
+        message_bus.InMemoryBus(), flush_seconds=0.01, max_batch=50
+    )
+    monkeypatch.setattr(message_bus, "_publisher", publisher)
+    monkeypatch.setattr(socket_manager.sio, "emit", fake_emit)
+    relay = socket_manager.EventRelay()
+
+    async def scenario():
+        await relay.start()
+        worker = threading.Thread(
+            target=socket_manager.publish_to_users,
+            args=([7, 8], "battle_resolved", {"movement_id": 1}),
+        )
+        worker.start()
+        worker.join()
+        for _ in range(200):
+            if delivered.is_set():
+                break
+            await asyncio.sleep(0.01)
+        await relay.stop()
+
+    asyncio.run(scenario())
+
+    assert emitted == [("battle_resolved", {"movement_id": 1}, ["user_7", "user_8"])]
+    metrics = relay.metrics()
+    assert metrics["published"] == 1
+    assert metrics["relay_queue_depth"] == 0
+    assert metrics["latency_max_seconds"] >= 0.0
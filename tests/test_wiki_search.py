@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import models
+from app.routers import wiki
+from app.routers.auth import create_access_token
+from app.services import wiki_search
+
+
+def _headers(user: models.User) -> dict[str, str]:
+    token = create_access_token({"sub": user.username, "type": "access", "ver": user.auth_version})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture()
+def admin(db_session, monkeypatch):
+    # Only the articles of each test are indexed.
+    monkeypatch.setattr(wiki, "_builtin_seeded", True)
+    admin = models.User(
+        username="wiki_admin",
+        email="wiki_admin@example.com",
+        hashed_password="placeholder",
+        is_verified=True,
+        is_admin=True,
+    )
+    db_session.add(admin)
+    db_session.commit()
+    db_session.refresh(admin)
+    return admin
+
+
+def _create(client, admin, title, category, content):
+    response = client.post(
+        "/wiki/create",
+        headers=_headers(admin),
+        json={"title": title, "category": category, "content_markdown": content},
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def _titles(client, q, **params):
+    response = client.get("/wiki/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return [result["title"] for result in response.json()["results"]]
+
+
+def test_search_folds_accents_ranks_titles_and_pages(client, admin):
+    _create(client, admin, "Estadísticas de tropas", "troops", "| Unidad | Ataque |\n| --- | ---: |\n| Lancero | 10 |")
+    _create(client, admin, "Muralla", "buildings", "La **muralla** mejora las estadísticas de defensa.")
+    _create(client, admin, "Caballaria", "troops", "A cavalaria é rápida e forte contra arqueiros.")
+    for number in range(3):
+        _create(client, admin, f"Nota {number}", "beginner", "Consejos de defensa para principiantes.")
+
+    assert _titles(client, "ESTADISTICAS") == ["Estadísticas de tropas", "Muralla"]
+    assert _titles(client, "estadísticas muralla") == ["Muralla"]
+    assert _titles(client, "cavalaria RÁPIDA") == ["Caballaria"]
+    assert _titles(client, "lanc") == ["Estadísticas de tropas"]
+    assert _titles(client, "lanc ") == []
+    assert _titles(client, "de la ") == []
+
+    first = client.get("/wiki/search", params={"q": "defensa", "limit": 2}).json()
+    assert (first["total"], first["next_offset"], len(first["results"])) == (4, 2, 2)
+    scores = [result["score"] for result in first["results"]]
+    assert scores == sorted(scores, reverse=True)
+    rest = client.get("/wiki/search", params={"q": "defensa", "limit": 2, "offset": 2}).json()
+    assert rest["next_offset"] is None
+    titles = {result["title"] for result in first["results"] + rest["results"]}
+    assert titles == {"Muralla", "Nota 0", "Nota 1", "Nota 2"}
+
+    muralla = next(result for result in first["results"] + rest["results"] if result["title"] == "Muralla")
+    assert muralla["snippet"] == "La muralla mejora las estadísticas de defensa."
+
+    browse = client.get("/wiki/search").json()
+    assert browse["total"] == 6
+    assert browse["results"][0]["title"] == "Nota 2"
+    assert browse["results"][0]["score"] is None
+
+
+def test_index_follows_local_and_remote_edits(client, admin, db_session, monkeypatch):
+    # Check for changed articles on every search.
+    monkeypatch.setattr(wiki_search, "get_settings", lambda: SimpleNamespace(wiki_index_reload_seconds=0))
+    builds = wiki_search.get_stats()["builds"]
+    article_id = _create(client, admin, "Mercado", "economy", "Intercambia madera por hierro.")
+    assert _titles(client, "madera") == ["Mercado"]
+    assert wiki_search.get_stats()["builds"] == builds + 1
+
+    response = client.patch(
+        f"/wiki/edit/{article_id}",
+        headers=_headers(admin),
+        json={"content_markdown": "Intercambia arcilla por hierro."},
+    )
+    assert response.status_code == 200
+    _create(client, admin, "Almacén", "buildings", "Guarda la arcilla sobrante.")
+    assert _titles(client, "madera") == []
+    assert sorted(_titles(client, "arcilla")) == ["Almacén", "Mercado"]
+    assert wiki_search.get_stats()["builds"] == builds + 1
+
+    # Another process edits the article; this one notices on its next check.
+    article = db_session.get(models.WikiArticle, article_id)
+    article.content_markdown = "Intercambia piedra por hierro."
+    article.updated_at = article.updated_at.replace(year=article.updated_at.year + 1)
+    wiki_search.prepare(article)
+    db_session.commit()
+
+    assert _titles(client, "piedra") == ["Mercado"]
+    assert _titles(client, "hierro") == ["Mercado"]
+    assert wiki_search.get_stats()["builds"] == builds + 2
@@ -0,0 +1,21 @@
+from app.services import world_gen
+
+
+def test_terrain_grid_matches_reference_function_inside_and_outside_map():
+    grid = world_gen.TerrainGrid.build(40)
+
+    for x in range(-3, 44):
+        for y in range(-3, 44):
+            assert grid.tile_type(x, y) == world_gen._compute_tile_type(x, y)
+            assert world_gen.get_tile_type(x, y) == world_gen._compute_tile_type(x, y)
+
+
+def test_terrain_rectangle_slices_match_single_tile_lookups():
+    grid = world_gen.get_terrain_grid(30)
+
+    rectangle = grid.rectangle(-5, 34, 25, 36)
+
+    assert len(rectangle) == 40 * 12
+    for (x, y), tile_type in rectangle.items():
+        assert tile_type == world_gen._compute_tile_type(x, y)
+    assert grid.column(31, -2, 2) == [world_gen._compute_tile_type(31, y) for y in range(-2, 3)]